@@ -1,1023 +1,1554 @@
-# admin_logic.py
-import tkinter as tk
-from tkinter import messagebox, ttk, filedialog
-import pandas as pd
-from datetime import datetime
-import os
-from firebase_setup import db
-import firebase_admin
-
-# --- Logging Setup ---
-import logging
-
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
-
-# --- End Logging Setup ---
-
-class AdminLogic:
-    def __init__(self, root, app_instance):
-        logging.info("Initializing AdminLogic class.")
-        self.root = root
-        self.app = app_instance
-        self.users_tree = None
-        self.batches_tree = None
-        self.batch_filter_var = None  # Variable to hold the selected batch filter (All, Pending, Approved)
-
-        style = ttk.Style()
-        style.theme_use('clam')  # Better default look
-
-        # Button styles
-        style.configure("Green.TButton", background="#2ecc71", foreground="white", font=("Segoe UI", 10, "bold"))
-        style.map("Green.TButton", background=[("active", "#27ae60")])
-
-        style.configure("Yellow.TButton", background="#f1c40f", foreground="black", font=("Segoe UI", 10, "bold"))
-        style.map("Yellow.TButton", background=[("active", "#f39c12")])
-
-        style.configure("Orange.TButton", background="#e67e22", foreground="white", font=("Segoe UI", 10, "bold"))
-        style.map("Orange.TButton", background=[("active", "#d35400")])
-
-        style.configure("View.TButton", background="#3498db", foreground="white", font=("Segoe UI", 10, "bold"))
-        style.map("View.TButton", background=[("active", "#2980b9")])
-        logging.info("AdminLogic initialized.")
-
-    def admin_dashboard(self):
-        """Displays the admin dashboard with user and batch management."""
-        logging.info("Entering admin_dashboard method.")
-        self.app.clear_root()
-        self.root.geometry("1200x700")
-
-        # Top frame for Logout button and Welcome message
-        top_frame = ttk.Frame(self.root)
-        top_frame.pack(fill="x", padx=10, pady=10)
-
-        ttk.Button(top_frame, text="Logout", command=self.app.logout).pack(side="right")
-
-        # Main content frame to hold sidebar and central content
-        main_content_frame = ttk.Frame(self.root)
-        main_content_frame.pack(expand=True, fill="both", padx=10, pady=10)
-
-        # Sidebar Frame
-        sidebar_frame = ttk.Frame(main_content_frame, width=200, relief="raised", borderwidth=1)
-        sidebar_frame.pack(side="left", fill="y", padx=(0, 20))
-        sidebar_frame.pack_propagate(False)  # Prevent sidebar from resizing based on content
-
-        ttk.Label(sidebar_frame, text="Navigation", font=("Helvetica", 12, "bold")).pack(pady=10)
-
-        # Sidebar buttons
-        ttk.Button(sidebar_frame, text="User Management", command=self.show_user_management).pack(fill="x", pady=5,
-                                                                                                  padx=10)
-        ttk.Button(sidebar_frame, text="Batch Management", command=self.show_batch_management).pack(fill="x", pady=5,
-                                                                                                    padx=10)
-        ttk.Button(sidebar_frame, text="Export Approved Data", command=self.export_user_batches).pack(fill="x", pady=5,
-                                                                                                      padx=10)
-
-        # Central content area
-        self.central_content_frame = ttk.Frame(main_content_frame)
-        self.central_content_frame.pack(side="right", expand=True, fill="both")
-
-        # Initially show user management
-        self.show_user_management()
-        logging.info("Admin dashboard loaded.")
-
-    def clear_central_content(self):
-        """Clears all widgets from the central content frame."""
-        logging.info("Clearing central content frame.")
-        for widget in self.central_content_frame.winfo_children():
-            widget.destroy()
-        logging.info("Central content frame cleared.")
-
-    def show_user_management(self):
-        """Displays the user management section in the central content frame."""
-        logging.info("Displaying user management section.")
-        self.clear_central_content()
-        # Users Section
-        ttk.Label(self.central_content_frame, text="User Management", font=("Helvetica", 14, "bold")).pack(pady=(20, 5))
-        self.users_tree = ttk.Treeview(self.central_content_frame,
-                                       columns=("EmployeeID", "Username", "Email", "Role", "Status"),
-                                       show='headings')
-        self.users_tree.heading("EmployeeID", text="Employee ID")
-        self.users_tree.heading("Username", text="Username")
-        self.users_tree.heading("Email", text="Email")
-        self.users_tree.heading("Role", text="Role")
-        self.users_tree.heading("Status", text="Status")  # New: Status heading
-
-        self.users_tree.column("EmployeeID", width=120, anchor="center")
-        self.users_tree.column("Username", width=120, anchor="center")
-        self.users_tree.column("Email", width=200, anchor="center")
-        self.users_tree.column("Role", width=80, anchor="center")
-        self.users_tree.column("Status", width=80, anchor="center")
-
-        self.users_tree.pack(expand=True, fill="both", padx=10, pady=10)
-
-        btn_user_frame = ttk.Frame(self.central_content_frame)
-        btn_user_frame.pack(pady=5)
-
-        ttk.Button(btn_user_frame, text="Add User", command=self.admin_add_user, style="Green.TButton").pack(
-            side="left", padx=5)
-        ttk.Button(btn_user_frame, text="Edit User", command=self.admin_edit_user, style="View.TButton").pack(
-            side="left", padx=5)
-        ttk.Button(btn_user_frame, text="Delete User", command=self.admin_delete_user, style="Yellow.TButton").pack(
-            side="left", padx=5)
-        ttk.Button(btn_user_frame, text="Approve User", command=self.admin_approve_user, style="Green.TButton").pack(
-            side="left", padx=5)
-
-        self.load_users()
-        logging.info("User management section displayed.")
-
-    def show_batch_management(self):
-        """Displays the batch management section in the central content frame, with a filter for status."""
-        logging.info("Displaying batch management section.")
-        self.clear_central_content()
-        ttk.Label(self.central_content_frame, text="Batch Management", font=("Helvetica", 14, "bold")).pack(
-            pady=(20, 5))
-
-        # Filter controls
-        filter_frame = ttk.Frame(self.central_content_frame)
-        filter_frame.pack(pady=5)
-
-        ttk.Label(filter_frame, text="Filter by Status:").pack(side="left", padx=5)
-        self.batch_filter_var = tk.StringVar(value="pending approval")  # Default to pending approval
-        filter_combobox = ttk.Combobox(filter_frame, textvariable=self.batch_filter_var,
-                                       values=["pending approval", "approved", "all"],
-                                       state="readonly")
-        filter_combobox.pack(side="left", padx=5)
-        filter_combobox.bind("<<ComboboxSelected>>", lambda event: self.load_batches(self.batch_filter_var.get()))
-
-        self.batches_tree = ttk.Treeview(self.central_content_frame,
-                                         columns=(
-                                             "BatchID", "Product Name", "Description", "Submission Date", "User",
-                                             "Status",
-                                             "Sample Count"),
-                                         show='headings')
-        # Updated heading for the date column to 'Submission Date'
-        self.batches_tree.heading("Submission Date", text="Submission Date")  # Changed heading text
-        # Ensure all other columns are also correctly configured
-        for col_name in ["BatchID", "Product Name", "Description", "User", "Status", "Sample Count"]:
-            self.batches_tree.heading(col_name, text=col_name)
-            self.batches_tree.column(col_name, width=100, anchor="center")
-        # Adjust column width for Submission Date if necessary
-        self.batches_tree.column("Submission Date", width=120, anchor="center")
-
-        self.batches_tree.pack(expand=True, fill="both", padx=10, pady=10)
-
-        btn_batch_frame = ttk.Frame(self.central_content_frame)
-        btn_batch_frame.pack(pady=5)
-
-        ttk.Button(btn_batch_frame, text="Approve Selected Batch", command=self.admin_approve_selected_batch,
-                   style="Green.TButton").pack(side="left", padx=5)
-        ttk.Button(btn_batch_frame, text="Reject Selected Batch", command=self.admin_reject_selected_batch,
-                   style="Orange.TButton").pack(side="left", padx=5)
-        ttk.Button(btn_batch_frame, text="View Samples", command=self.admin_view_samples_for_batch,
-                   style="View.TButton").pack(side="left", padx=5)
-        ttk.Button(btn_batch_frame, text="Delete Batch", command=self.delete_batch, style="Yellow.TButton").pack(
-            side="left", padx=5)
-        # add edit batch
-        ttk.Button(btn_batch_frame, text="Edit Batch", command=self.edit_batch_info, style="Yellow.TButton").pack(
-            side="left", padx=5)
-
-        # Removed the "View Approved Batches" button here as well
-        self.load_batches(self.batch_filter_var.get())  # Load batches based on initial filter value
-        logging.info("Batch management section displayed.")
-
-    def load_users(self):
-        """Loads user data from Firestore and populates the users treeview."""
-        logging.info("Attempting to load users.")
-        if self.users_tree is None:
-            logging.warning("users_tree is None. Admin dashboard not initialized. Skipping user load.")
-            return
-
-        self.users_tree.delete(*self.users_tree.get_children())
-        try:
-            users = db.collection("users").stream()
-            for user in users:
-                data = user.to_dict()
-                self.users_tree.insert("", "end", iid=user.id,
-                                       values=(data.get("employee_id"), data.get("username", ""),
-                                               data.get("email"), data.get("role"),
-                                               data.get("status", "active" if data.get("role") == "admin" else "pending")))
-            logging.info("Users loaded successfully.")
-        except Exception as e:
-            logging.error(f"Failed to load users: {e}", exc_info=True)
-            messagebox.showerror("Error", f"Failed to load users: {e}")
-
-    def admin_add_user(self):
-        """Opens a form to add a new user by delegating to AuthManager."""
-        logging.info("Opening add user form.")
-        self.app.auth_manager.user_form_window()
-        logging.info("Add user form opened.")
-
-    def admin_edit_user(self):
-        """Opens a form to edit an existing user by delegating to AuthManager."""
-        logging.info("Attempting to open edit user form.")
-        selected = self.users_tree.selection()
-        if not selected:
-            messagebox.showinfo("Info", "Please select a user to edit.")
-            logging.warning("Edit user aborted: No user selected.")
-            return
-        user_id = selected[0]
-        try:
-            user_doc = db.collection("users").document(user_id).get()
-            if user_doc.exists:
-                user_data = user_doc.to_dict()
-                self.app.auth_manager.user_form_window(user_id=user_id, user_data=user_data)
-                logging.info(f"Edit user form opened for user ID: {user_id}.")
-            else:
-                messagebox.showerror("Error", "User not found.")
-                logging.error(f"User with ID {user_id} not found for editing.")
-        except Exception as e:
-            logging.error(f"Failed to retrieve user data for editing: {e}", exc_info=True)
-            messagebox.showerror("Error", f"Failed to retrieve user data: {e}")
-
-    def admin_delete_user(self):
-        """Deletes a selected user from Firestore."""
-        logging.info("Attempting to delete user.")
-        selected = self.users_tree.selection()
-        if not selected:
-            messagebox.showinfo("Info", "Please select a user to delete.")
-            logging.warning("Delete user aborted: No user selected.")
-            return
-        user_id = selected[0]
-        confirm = messagebox.askyesno("Confirm Delete",
-                                      f"Are you sure you want to delete user with Employee ID '{user_id}'?")
-        if confirm:
-            try:
-                db.collection("users").document(user_id).delete()
-                messagebox.showinfo("Success", "User deleted successfully.")
-                logging.info(f"User with ID {user_id} deleted successfully.")
-                self.load_users()
-            except Exception as e:
-                logging.error(f"Failed to delete user {user_id}: {e}", exc_info=True)
-                messagebox.showerror("Error", f"Failed to delete user: {e}")
-        else:
-            logging.info("Delete user cancelled by user.")
-
-    def admin_approve_user(self):
-        """Approves a selected user by changing their status to 'active'."""
-        logging.info("Attempting to approve user.")
-        selected = self.users_tree.selection()
-        if not selected:
-            messagebox.showinfo("Info", "Please select a user to approve.")
-            logging.warning("Approve user aborted: No user selected.")
-            return
-        user_id = selected[0]
-        try:
-            user_doc = db.collection("users").document(user_id).get()
-
-            if not user_doc.exists:
-                messagebox.showerror("Error", "User not found.")
-                logging.error(f"User with ID {user_id} not found for approval.")
-                return
-
-            user_data = user_doc.to_dict()
-            if user_data.get("status") == "active":
-                messagebox.showinfo("Info", "User is already active.")
-                logging.info(f"User {user_id} is already active, no action needed.")
-                return
-
-            confirm = messagebox.askyesno("Confirm Approval",
-                                          f"Are you sure you want to approve user '{user_data.get('username')}'?")
-            if confirm:
-                db.collection("users").document(user_id).update({"status": "active"})
-                messagebox.showinfo("Success", f"User '{user_data.get('username')}' approved successfully.")
-                logging.info(f"User {user_id} approved successfully and status set to 'active'.")
-                self.load_users()  # Refresh the user list
-            else:
-                logging.info("Approve user cancelled by user.")
-        except Exception as e:
-            logging.error(f"Failed to approve user {user_id}: {e}", exc_info=True)
-            messagebox.showerror("Error", f"Failed to approve user: {e}")
-
-    def load_batches(self, status_filter="pending approval"):
-        """Loads batch data from Firestore and populates the batches treeview.
-           Can filter by status: "pending approval", "approved", or "all"."""
-        logging.info(f"Attempting to load batches with filter: {status_filter}.")
-        if self.batches_tree is None:
-            logging.warning("batches_tree is None. Admin dashboard not initialized. Skipping batch load.")
-            return
-
-        self.batches_tree.delete(*self.batches_tree.get_children())
-
-        batches_query = db.collection("batches")
-        if status_filter and status_filter != "all":
-            batches_query = batches_query.where("status", "==", status_filter)
-
-        try:
-            batches = batches_query.stream()
-
-            for batch in batches:
-                data = batch.to_dict()
-                submission_date_str = data.get("submission_date", "")
-
-                if isinstance(submission_date_str, datetime):
-                    submission_date_str = submission_date_str.strftime("%Y-%m-%d")
-                elif isinstance(submission_date_str, firebase_admin.firestore.Timestamp):
-                    submission_date_str = submission_date_str.to_datetime().strftime("%Y-%m-%d")
-                else:
-                    submission_date_str = str(submission_date_str) if submission_date_str is not None else ''
-
-                row_id = self.batches_tree.insert("", "end", iid=batch.id,
-                                                  values=(data.get("batch_id", ""),
-                                                          data.get("product_name", ""),
-                                                          data.get("description", ""),
-                                                          submission_date_str,
-                                                          data.get("user_email", ""),
-                                                          data.get("status", "pending approval"),
-                                                          data.get("number_of_samples", 0)))
-
-                # Apply row tag based on status
-                status = data.get("status", "pending approval")
-                if status == "approved":
-                    self.batches_tree.item(row_id, tags=("approved",))
-                elif status == "pending approval":
-                    self.batches_tree.item(row_id, tags=("pending",))
-                elif status == "rejected":
-                    self.batches_tree.item(row_id, tags=("rejected",))
-
-                # Define tag styles
-                self.batches_tree.tag_configure("approved", background="#d4edda")  # light green
-                self.batches_tree.tag_configure("pending", background="#fff3cd")  # light yellow
-                self.batches_tree.tag_configure("rejected", background="#f8d7da")  # light red/orange
-
-            logging.info(f"Batches loaded successfully with filter: {status_filter}.")
-        except Exception as e:
-            logging.error(f"Failed to load batches with filter {status_filter}: {e}", exc_info=True)
-            messagebox.showerror("Error", f"Failed to load batches: {e}")
-
-    def admin_approve_selected_batch(self):
-        """Approves the selected batch and all its associated samples."""
-        logging.info("Attempting to approve selected batch.")
-        selected = self.batches_tree.selection()
-        if not selected:
-            messagebox.showinfo("Info", "Please select a batch to approve.")
-            logging.warning("Approve batch aborted: No batch selected.")
-            return
-
-        batch_doc_id = selected[0]
-        try:
-            batch_doc = db.collection("batches").document(batch_doc_id).get()
-
-            if not batch_doc.exists:
-                messagebox.showerror("Error", "Selected batch not found.")
-                logging.error(f"Batch with document ID {batch_doc_id} not found for approval.")
-                return
-
-            batch_data = batch_doc.to_dict()
-            if batch_data.get("status") == "approved":
-                messagebox.showinfo("Info", "Batch is already approved.")
-                logging.info(f"Batch {batch_doc_id} is already approved.")
-                return
-
-            confirm = messagebox.askyesno("Confirm Batch Approval",
-                                          f"Are you sure you want to approve batch '{batch_data.get('product_name')}' (ID: {batch_data.get('batch_id')}) and all its samples?")
-            if confirm:
-                batch_write = db.batch()
-                # Update batch status to approved
-                batch_write.update(db.collection("batches").document(batch_doc_id), {"status": "approved"})
-                logging.info(f"Prepared to set batch {batch_doc_id} status to 'approved'.")
-
-                # Also approve all samples associated with this batch
-                associated_samples = db.collection("samples").where("batch_id", "==", batch_data.get('batch_id')).stream() # Use batch_id field
-                samples_updated_count = 0
-                for sample in associated_samples:
-                    batch_write.update(sample.reference, {"status": "approved"})
-                    samples_updated_count += 1
-                logging.info(f"Prepared to approve {samples_updated_count} samples for batch {batch_doc_id}.")
-
-                batch_write.commit()
-                messagebox.showinfo("Success",
-                                    f"Batch '{batch_data.get('product_name')}' and all its samples approved successfully.")
-                logging.info(f"Batch {batch_doc_id} and {samples_updated_count} samples approved successfully.")
-                self.load_batches(self.batch_filter_var.get())  # Refresh the batches tree with current filter
-            else:
-                logging.info("Approve batch cancelled by user.")
-        except Exception as e:
-            logging.error(f"Failed to approve batch {batch_doc_id} and samples: {e}", exc_info=True)
-            messagebox.showerror("Error", f"Failed to approve batch and samples: {e}")
-
-    def admin_reject_selected_batch(self):
-        """Rejects the selected batch and all its associated samples."""
-        logging.info("Attempting to reject selected batch.")
-        selected = self.batches_tree.selection()
-        if not selected:
-            messagebox.showinfo("Info", "Please select a batch to reject.")
-            logging.warning("Reject batch aborted: No batch selected.")
-            return
-
-        batch_doc_id = selected[0]
-        try:
-            batch_doc = db.collection("batches").document(batch_doc_id).get()
-
-            if not batch_doc.exists:
-                messagebox.showerror("Error", "Selected batch not found.")
-                logging.error(f"Batch with document ID {batch_doc_id} not found for rejection.")
-                return
-
-            batch_data = batch_doc.to_dict()
-            if batch_data.get("status") == "rejected":
-                messagebox.showinfo("Info", "Batch is already rejected.")
-                logging.info(f"Batch {batch_doc_id} is already rejected.")
-                return
-
-            confirm = messagebox.askyesno("Confirm Batch Rejection",
-                                          f"Are you sure you want to reject batch '{batch_data.get('product_name')}' (ID: {batch_data.get('batch_id')}) and all its samples?")
-            if confirm:
-                batch_write = db.batch()
-                # Update batch status to rejected
-                batch_write.update(db.collection("batches").document(batch_doc_id), {"status": "rejected"})
-                logging.info(f"Prepared to set batch {batch_doc_id} status to 'rejected'.")
-
-                # Also reject all samples associated with this batch
-                associated_samples = db.collection("samples").where("batch_id", "==", batch_data.get('batch_id')).stream() # Use batch_id field
-                samples_updated_count = 0
-                for sample in associated_samples:
-                    batch_write.update(sample.reference, {"status": "rejected"})
-                    samples_updated_count += 1
-                logging.info(f"Prepared to reject {samples_updated_count} samples for batch {batch_doc_id}.")
-
-                batch_write.commit()
-                messagebox.showinfo("Success",
-                                    f"Batch '{batch_data.get('product_name')}' and all its samples rejected successfully.")
-                logging.info(f"Batch {batch_doc_id} and {samples_updated_count} samples rejected successfully.")
-                self.load_batches(self.batch_filter_var.get())  # Refresh the batches tree with current filter
-            else:
-                logging.info("Reject batch cancelled by user.")
-        except Exception as e:
-            logging.error(f"Failed to reject batch {batch_doc_id} and samples: {e}", exc_info=True)
-            messagebox.showerror("Error", f"Failed to reject batch and samples: {e}")
-
-    def admin_view_samples_for_batch(self):
-        """Opens a new window to display samples associated with the selected batch with pagination."""
-        logging.info("Attempting to view samples for selected batch.")
-        selected = self.batches_tree.selection()
-        if not selected:
-            messagebox.showinfo("Info", "Please select a batch to view its samples.")
-            logging.warning("View samples aborted: No batch selected.")
-            return
-
-        batch_doc_id = selected[0]
-        try:
-            batch_doc = db.collection("batches").document(batch_doc_id).get()
-
-            if not batch_doc.exists:
-                messagebox.showerror("Error", "Selected batch not found.")
-                logging.error(f"Batch with document ID {batch_doc_id} not found for viewing samples.")
-                return
-
-            batch_data = batch_doc.to_dict()
-            batch_id_from_doc = batch_data.get("batch_id")  # Get the 'batch_id' field from the batch document
-            product_name = batch_data.get("product_name")
-            # user_employee_id = batch_data.get("user_employee_id", "")  # Get user_employee_id from batch - not used here, so commented out
-
-            if not batch_id_from_doc:
-                messagebox.showerror("Error", "Batch ID not found for the selected batch.")
-                logging.error(f"Batch ID field missing for batch document ID {batch_doc_id}.")
-                return
-
-            samples_window = tk.Toplevel(self.root)
-            samples_window.title(f"Samples for Batch: {product_name} ({batch_id_from_doc})")  # Use the actual batch_id
-            samples_window.geometry("800x550")
-            samples_window.current_page = 1  # Initialize current page for this window
-            samples_window.items_per_page = 20  # Samples per page
-            logging.info(f"Opened samples window for batch {batch_id_from_doc}.")
-
-            ttk.Label(samples_window, text=f"Samples for Batch: {product_name} (ID: {batch_id_from_doc})",
-                      font=("Helvetica", 14, "bold")).pack(pady=10)
-
-            samples_tree = ttk.Treeview(samples_window,
-                                        columns=(
-                                            "SampleID", "Owner", "Maturation Date", "Status", "Creation Date"),
-                                        show='headings')
-
-            samples_tree.heading("SampleID", text="Sample ID")
-            samples_tree.heading("Owner", text="Owner")
-            samples_tree.heading("Maturation Date", text="Maturation Date")
-            samples_tree.heading("Status", text="Status")
-            samples_tree.heading("Creation Date", text="Creation Date")
-
-            samples_tree.column("SampleID", width=100, anchor="center")
-            samples_tree.column("Owner", width=100, anchor="center")
-            samples_tree.column("Maturation Date", width=120, anchor="center")
-            samples_tree.column("Status", width=100, anchor="center")
-            samples_tree.column("Creation Date", width=120, anchor="center")
-
-            samples_tree.pack(expand=True, fill="both", padx=10, pady=10)
-
-            # Pagination controls frame
-            pagination_frame = ttk.Frame(samples_window)
-            pagination_frame.pack(pady=5)
-
-            prev_button = ttk.Button(pagination_frame, text="Previous Page")
-            prev_button.pack(side="left", padx=5)
-
-            page_label = ttk.Label(pagination_frame, text="Page X of Y")
-            page_label.pack(side="left", padx=10)
-
-            next_button = ttk.Button(pagination_frame, text="Next Page")
-            next_button.pack(side="left", padx=5)
-
-            # Frame for buttons below the samples tree
-            btn_sample_frame = ttk.Frame(samples_window)
-            btn_sample_frame.pack(pady=5)
-
-            # New "Approve Sample" button
-            ttk.Button(btn_sample_frame, text="Approve Sample",
-                       command=lambda: self.admin_approve_sample(samples_tree, batch_doc_id)).pack(side="left", padx=5)
-            ttk.Button(btn_sample_frame, text="Reject Sample",  # New button
-                       command=lambda: self.admin_reject_sample(samples_tree, batch_doc_id)).pack(side="left", padx=5)
-
-            def go_to_page(page_num):
-                samples_window.current_page = page_num
-                self._load_samples_into_tree(batch_id_from_doc, samples_tree, page_label,
-                                             samples_window.current_page, samples_window.items_per_page)
-                # Enable/disable buttons based on current page
-                prev_button.config(state="normal" if samples_window.current_page > 1 else "disabled")
-                next_button.config(
-                    state="normal" if samples_window.current_page < samples_window.total_pages else "disabled")
-
-            prev_button.config(command=lambda: go_to_page(samples_window.current_page - 1))
-            next_button.config(command=lambda: go_to_page(samples_window.current_page + 1))
-
-            # Initial load of samples for the first page
-            go_to_page(1)  # Load first page
-            logging.info(f"Samples window for batch {batch_id_from_doc} initialized with pagination.")
-
-        except Exception as e:
-            logging.error(f"Error opening samples view for batch {batch_doc_id}: {e}", exc_info=True)
-            messagebox.showerror("Error", f"Failed to view samples for batch: {e}")
-
-    def admin_approve_sample(self, samples_tree_ref, batch_doc_id):
-        """Approves a selected sample and checks/updates the parent batch status."""
-        logging.info(f"Attempting to approve sample for batch document ID: {batch_doc_id}.")
-        selected_sample_iid = samples_tree_ref.selection()
-        if not selected_sample_iid:
-            messagebox.showinfo("Info", "Please select a sample to approve.")
-            logging.warning("Approve sample aborted: No sample selected.")
-            return
-
-        sample_tree_data = samples_tree_ref.item(selected_sample_iid[0], 'values')
-        sample_id_from_tree = sample_tree_data[0]  # Assuming Sample ID is the first column
-
-        try:
-            # Find the Firestore document ID for the selected sample using its sample_id and batch_id
-            sample_query = db.collection("samples").where("sample_id", "==", sample_id_from_tree).where("batch_id", "==",
-                                                                                                        self._get_batch_id_from_doc_id(batch_doc_id)).limit( # Use the actual batch_id string from the batch document
-                1).get()
-
-            if not sample_query:
-                messagebox.showerror("Error", "Selected sample not found in database.")
-                logging.error(f"Sample with display ID {sample_id_from_tree} not found in database for batch document ID {batch_doc_id}.")
-                return
-
-            sample_doc_ref = sample_query[0].reference
-            sample_doc = sample_query[0].to_dict()
-
-            if sample_doc.get("status") == "approved":
-                messagebox.showinfo("Info", "Sample is already approved.")
-                logging.info(f"Sample {sample_id_from_tree} is already approved.")
-                return
-
-            confirm = messagebox.askyesno("Confirm Approve Sample",
-                                          f"Approve sample '{sample_doc.get('sample_id')}'?")
-            if confirm:
-                # Update sample status
-                sample_doc_ref.update({"status": "approved"})
-                messagebox.showinfo("Success", f"Sample '{sample_doc.get('sample_id')}' approved successfully.")
-                logging.info(f"Sample {sample_id_from_tree} approved successfully.")
-
-                self.load_batches(self.batch_filter_var.get()) # Reload main batches tree
-
-                # Now, check if all samples in the batch are approved
-                all_samples_approved = True
-                # Use the actual batch_id field for querying samples
-                associated_samples_in_batch = db.collection("samples").where("batch_id", "==", self._get_batch_id_from_doc_id(batch_doc_id)).stream()
-
-                # Check for samples in the generator before iterating
-                samples_exist = False
-                temp_samples_list = []
-                for s in associated_samples_in_batch:
-                    samples_exist = True
-                    temp_samples_list.append(s)  # Store to iterate again if needed
-
-                if samples_exist:
-                    logging.debug(f"Checking {len(temp_samples_list)} samples for batch {self._get_batch_id_from_doc_id(batch_doc_id)}.")
-                    for s in temp_samples_list:
-                        s_data = s.to_dict()
-                        if s_data.get("status") != "approved":
-                            all_samples_approved = False
-                            logging.debug(f"Sample {s_data.get('sample_id')} is not approved. Batch cannot be fully approved.")
-                            break  # Found a pending or rejected sample, no need to check further
-                else:  # If no samples exist, it cannot be 'all approved'
-                    all_samples_approved = False
-                    logging.info(f"No samples found for batch {self._get_batch_id_from_doc_id(batch_doc_id)}. Batch status will not be set to 'approved'.")
-
-                batch_ref = db.collection("batches").document(batch_doc_id)
-                current_batch_status = batch_ref.get().to_dict().get("status")
-
-                if all_samples_approved and samples_exist:  # Only set batch to approved if there are samples and all are approved
-                    if current_batch_status != "approved":
-                        batch_ref.update({"status": "approved"})
-                        messagebox.showinfo("Batch Status Update",
-                                            f"Batch '{self._get_batch_id_from_doc_id(batch_doc_id)}' status updated to 'approved' as all samples are approved.")
-                        logging.info(f"Batch {self._get_batch_id_from_doc_id(batch_doc_id)} status updated to 'approved'.")
-                        self.load_batches(self.batch_filter_var.get())  # Refresh the main batches tree
-                elif not all_samples_approved and current_batch_status == "approved": # If it was approved, but now a sample is not, revert
-                    batch_ref.update({"status": "pending approval"})
-                    messagebox.showinfo("Batch Status Update",
-                                        f"Batch '{self._get_batch_id_from_doc_id(batch_doc_id)}' status updated to 'pending approval' as some samples are not yet approved.")
-                    logging.info(f"Batch {self._get_batch_id_from_doc_id(batch_doc_id)} status reverted to 'pending approval'.")
-                    self.load_batches(self.batch_filter_var.get())  # Refresh the main batches tree
-                else:
-                    logging.info(f"Batch {self._get_batch_id_from_doc_id(batch_doc_id)} status remains '{current_batch_status}' as not all samples are approved or no samples exist.")
-
-            else:
-                logging.info("Approve sample cancelled by user.")
-        except Exception as e:
-            logging.error(f"Failed to approve sample or update batch status for sample {sample_id_from_tree}: {e}", exc_info=True)
-            messagebox.showerror("Error", f"Failed to approve sample or update batch status: {e}")
-
-    def admin_reject_sample(self, samples_tree_ref, batch_doc_id):
-        """Rejects a selected sample and updates the parent batch status if necessary."""
-        logging.info(f"Attempting to reject sample for batch document ID: {batch_doc_id}.")
-        selected_sample_iid = samples_tree_ref.selection()
-        if not selected_sample_iid:
-            messagebox.showinfo("Info", "Please select a sample to reject.")
-            logging.warning("Reject sample aborted: No sample selected.")
-            return
-
-        sample_tree_data = samples_tree_ref.item(selected_sample_iid[0], 'values')
-        sample_id_from_tree = sample_tree_data[0]
-
-        try:
-            sample_query = db.collection("samples").where("sample_id", "==", sample_id_from_tree).where("batch_id", "==",
-                                                                                                        self._get_batch_id_from_doc_id(batch_doc_id)).limit( # Use the actual batch_id string
-                1).get()
-
-            if not sample_query:
-                messagebox.showerror("Error", "Selected sample not found in database.")
-                logging.error(f"Sample {sample_id_from_tree} not found in database for rejection.")
-                return
-
-            sample_doc_ref = sample_query[0].reference
-            sample_doc = sample_query[0].to_dict()
-
-            if sample_doc.get("status") == "rejected":
-                messagebox.showinfo("Info", "Sample is already rejected.")
-                logging.info(f"Sample {sample_id_from_tree} is already rejected.")
-                return
-
-            confirm = messagebox.askyesno("Confirm Reject Sample",
-                                          f"Reject sample '{sample_doc.get('sample_id')}'?")
-            if confirm:
-                sample_doc_ref.update({"status": "rejected"})
-                messagebox.showinfo("Success", f"Sample '{sample_doc.get('sample_id')}' rejected successfully.")
-                logging.info(f"Sample {sample_id_from_tree} rejected successfully.")
-                self.load_batches(self.batch_filter_var.get())  # Reload the main batches tree
-
-                # If a sample is rejected, the batch status should definitely revert to "pending approval"
-                batch_ref = db.collection("batches").document(batch_doc_id)
-                current_batch_status = batch_ref.get().to_dict().get("status")
-                if current_batch_status != "pending approval":
-                    batch_ref.update({"status": "pending approval"})
-                    messagebox.showinfo("Batch Status Update",
-                                        f"Batch '{self._get_batch_id_from_doc_id(batch_doc_id)}' status updated to 'pending approval' as a sample was rejected.")
-                    logging.info(f"Batch {self._get_batch_id_from_doc_id(batch_doc_id)} status updated to 'pending approval' due to sample rejection.")
-                    self.load_batches(self.batch_filter_var.get())
-            else:
-                logging.info("Reject sample cancelled by user.")
-        except Exception as e:
-            logging.error(f"Failed to reject sample or update batch status for sample {sample_id_from_tree}: {e}", exc_info=True)
-            messagebox.showerror("Error", f"Failed to reject sample or update batch status: {e}")
-
-    def _load_samples_into_tree(self, batch_id, samples_tree, page_label_ref, page_number, items_per_page):
-        """Helper method to load samples into the provided treeview with pagination."""
-        logging.info(f"Loading samples into tree for batch_id: {batch_id}, page: {page_number}.")
-        samples_tree.delete(*samples_tree.get_children())
-
-        try:
-            # First, get the total count of samples for this batch
-            all_samples_query = db.collection("samples").where("batch_id", "==", batch_id).stream()
-            all_samples = list(all_samples_query)  # Convert stream to list to count
-            total_samples = len(all_samples)
-            total_pages = (total_samples + items_per_page - 1) // items_per_page
-            if total_pages == 0:
-                total_pages = 1  # At least one page even if no samples
-
-            # Update the page label in the UI
-            page_label_ref.master.master.total_pages = total_pages  # Store total_pages on the samples_window
-            page_label_ref.config(text=f"Page {page_number} of {total_pages}")
-            logging.debug(f"Total samples for batch {batch_id}: {total_samples}, Total pages: {total_pages}.")
-
-            # Calculate offset for Firestore query - Firestore's .offset() is for documents, not arbitrary lists
-            # To implement true pagination, you'd generally use start_at or start_after with an order_by.
-            # For simplicity here, if using .offset() for illustration, keep in mind its limitations with large datasets.
-            # A more robust solution would involve fetching the 'items_per_page' starting after the last document of the previous page.
-            # For this example, assuming simpler offset might be intended if data size is small.
-            # However, for correct Firestore pagination:
-            # You would need a query that orders by a field (e.g., creation_date or sample_id)
-            # and then use start_after() based on the last document of the previous page.
-            # This implementation will retrieve all samples and then slice them, which is inefficient for large datasets.
-            # Let's adjust to perform slicing on the fetched list as it was likely intended by 'offset'.
-
-            start_index = (page_number - 1) * items_per_page
-            end_index = start_index + items_per_page
-            paginated_samples = all_samples[start_index:end_index]
-            logging.debug(f"Slicing samples from index {start_index} to {end_index}. Fetched {len(paginated_samples)} for current page.")
-
-
-            samples_found_on_page = 0
-            for sample in paginated_samples:
-                samples_found_on_page += 1
-                sample_data = sample.to_dict()
-                logging.debug(f"  Found sample: {sample_data.get('sample_id')}, batch_id: {sample_data.get('batch_id')}")
-
-                maturation_date_str = ""
-                if isinstance(sample_data.get('maturation_date'), datetime):
-                    maturation_date_str = sample_data['maturation_date'].strftime("%Y-%m-%d")
-                elif isinstance(sample_data.get('maturation_date'), firebase_admin.firestore.Timestamp):
-                    maturation_date_str = sample_data['maturation_date'].to_datetime().strftime("%Y-%m-%d")
-                else:
-                    maturation_date_str = str(sample_data.get('maturation_date', ''))
-
-                creation_date_str = ""
-                if isinstance(sample_data.get('creation_date'), datetime):
-                    creation_date_str = sample_data['creation_date'].strftime("%Y-%m-%d %H:%M:%S")
-                elif isinstance(sample_data.get('creation_date'), firebase_admin.firestore.Timestamp):
-                    creation_date_str = sample_data['creation_date'].to_datetime().strftime("%Y-%m-%d %H:%M:%S")
-                else:
-                    creation_date_str = str(sample_data.get('creation_date', ''))
-
-                samples_tree.insert("", "end", iid=sample.id,  # Store document ID for easy reference
-                                    values=(sample_data.get("sample_id", ""),
-                                            sample_data.get("owner", ""),
-                                            maturation_date_str,
-                                            sample_data.get("status", ""),
-                                            creation_date_str))
-            
-            if samples_found_on_page == 0 and total_samples > 0 and page_number > 1:
-                logging.info("No samples on current page, navigating to previous valid page recursively.")
-                page_label_ref.master.master.current_page = max(1, page_number - 1)
-                self._load_samples_into_tree(batch_id, samples_tree, page_label_ref,
-                                             page_label_ref.master.master.current_page, items_per_page)
-            elif samples_found_on_page == 0 and total_samples == 0:
-                logging.info(f"No samples found at all for batch_id: {batch_id}.")
-            else:
-                logging.info(f"Loaded {samples_found_on_page} samples for page {page_number} of batch {batch_id}.")
-
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to load samples for batch: {e}")
-            logging.error(f"Error loading samples into tree for batch {batch_id}: {e}", exc_info=True)
-
-    def _get_batch_id_from_doc_id(self, doc_id):
-        """Helper to get the 'batch_id' field (the human-readable ID) from a Firestore batch document ID."""
-        try:
-            batch_doc = db.collection("batches").document(doc_id).get()
-            if batch_doc.exists:
-                return batch_doc.to_dict().get("batch_id")
-            return None
-        except Exception as e:
-            logging.error(f"Failed to retrieve batch_id for document ID {doc_id}: {e}", exc_info=True)
-            return None
-
-    def delete_batch(self):
-        """Deletes a selected batch and all its associated samples from Firestore."""
-        logging.info("Starting delete_batch process.")
-        selected = self.batches_tree.selection()
-        if not selected:
-            messagebox.showinfo("Info", "Please select a batch to delete.")
-            logging.warning("Delete batch aborted: No batch selected.")
-            return
-
-        firestore_batch_doc_id = selected[0]
-        # Get the displayed batch ID for the confirmation message
-        item_values = self.batches_tree.item(firestore_batch_doc_id)['values']
-        batch_id_display = item_values[0] if item_values else firestore_batch_doc_id
-
-        logging.info(f"Attempting to delete batch: DocID='{firestore_batch_doc_id}', DisplayID='{batch_id_display}'")
-
-        confirm = messagebox.askyesno("Confirm Delete Batch",
-                                      f"Are you sure you want to delete Batch '{batch_id_display}'?\n\n"
-                                      "This will PERMANENTLY DELETE ALL SAMPLES associated with this batch as well. This action cannot be undone.")
-        if not confirm:
-            logging.info("Delete batch aborted: User cancelled.")
-            return
-
-        try:
-            batch_write = db.batch()
-
-            # 1. Delete all samples associated with this batch
-            # Use 'batch_id' field in samples collection, which stores the human-readable batch_id_display
-            samples_to_delete = db.collection("samples").where("batch_id", "==", batch_id_display).stream()
-            deleted_samples_count = 0
-            for sample_doc in samples_to_delete:
-                batch_write.delete(sample_doc.reference)
-                deleted_samples_count += 1
-            logging.info(f"Prepared to delete {deleted_samples_count} samples for batch '{batch_id_display}'.")
-
-            # 2. Delete the batch document itself
-            batch_doc_ref = db.collection("batches").document(firestore_batch_doc_id)
-            batch_write.delete(batch_doc_ref)
-            logging.info(f"Prepared to delete batch document: {firestore_batch_doc_id}.")
-
-            # Commit the batch operation
-            batch_write.commit()
-            logging.info("Firestore batch committed successfully (batch and samples deleted).")
-
-            messagebox.showinfo("Success",
-                                f"Batch '{batch_id_display}' and its {deleted_samples_count} associated samples deleted successfully.")
-            logging.info(f"Batch '{batch_id_display}' and its samples deleted.")
-
-            # Refresh the Treeview to reflect the deletion
-            self.load_batches(self.batch_filter_var.get())
-            logging.info("Batch data reloaded and tree refreshed after deletion.")
-
-        except Exception as e:
-            logging.error(f"Failed to delete batch '{batch_id_display}': {e}", exc_info=True)
-            messagebox.showerror("Error", f"Failed to delete batch and its samples:\n{e}")
-
-    #Add edit_batch
-    def edit_batch_info(self):
-        """Opens a form to edit the product name and description of a selected batch."""
-        logging.info("Attempting to open edit batch form.")
-        selected = self.batches_tree.selection()
-        if not selected:
-            messagebox.showinfo("Info", "Please select a batch to edit.")
-            logging.warning("Edit batch aborted: No batch selected.")
-            return
-
-        batch_doc_id = selected[0]
-        try:
-            batch_doc = db.collection("batches").document(batch_doc_id).get()
-
-            if not batch_doc.exists:
-                messagebox.showerror("Error", "Selected batch not found.")
-                logging.error(f"Batch with document ID {batch_doc_id} not found for editing.")
-                return
-
-            batch_data = batch_doc.to_dict()
-            logging.info(f"Opened edit form for batch: {batch_data.get('batch_id')}.")
-
-            edit_window = tk.Toplevel(self.root)
-            edit_window.title(f"Edit Batch: {batch_data.get('batch_id')}")
-            edit_window.geometry("400x250")
-            edit_window.transient(self.root)  # Make it appear on top of the main window
-            edit_window.grab_set()  # Make it modal
-
-            # Product Name
-            ttk.Label(edit_window, text="Product Name:").pack(pady=5)
-            product_name_entry = ttk.Entry(edit_window, width=40)
-            product_name_entry.pack(pady=5)
-            product_name_entry.insert(0, batch_data.get("product_name", ""))
-
-            # Description
-            ttk.Label(edit_window, text="Description:").pack(pady=5)
-            description_text = tk.Text(edit_window, width=30, height=5)
-            description_text.pack(pady=5)
-            description_text.insert("1.0", batch_data.get("description", ""))
-
-            def save_changes():
-                logging.info(f"Attempting to save changes for batch {batch_data.get('batch_id')}.")
-                new_product_name = product_name_entry.get().strip()
-                new_description = description_text.get("1.0", tk.END).strip()
-
-                if not new_product_name:
-                    messagebox.showwarning("Input Error", "Product Name cannot be empty.")
-                    logging.warning("Product Name is empty during batch edit save.")
-                    return
-
-                try:
-                    db.collection("batches").document(batch_doc_id).update({
-                        "product_name": new_product_name,
-                        "description": new_description
-                    })
-                    messagebox.showinfo("Success", "Batch information updated successfully.")
-                    logging.info(f"Batch {batch_doc_id} information updated successfully.")
-                    edit_window.destroy()
-                    self.load_batches(self.batch_filter_var.get())  # Refresh batches tree
-                except Exception as e:
-                    logging.error(f"Failed to update batch information for {batch_doc_id}: {e}", exc_info=True)
-                    messagebox.showerror("Error", f"Failed to update batch information: {e}")
-
-            ttk.Button(edit_window, text="Save Changes", command=save_changes, style="Green.TButton").pack(pady=10)
-            edit_window.protocol("WM_DELETE_WINDOW", edit_window.destroy) # Ensure window closes properly
-            logging.info(f"Edit batch form for {batch_doc_id} displayed.")
-
-        except Exception as e:
-            logging.error(f"Failed to open edit batch form for {batch_doc_id}: {e}", exc_info=True)
-            messagebox.showerror("Error", f"Failed to open edit batch form: {e}")
-
-
-    def export_user_batches(self):
-        """Exports approved batches and their associated samples to an Excel file."""
-        logging.info("Initiating export of approved batches and samples to Excel.")
-        # Add confirmation dialog here
-        confirm = messagebox.askyesno("Confirm Export",
-                                      "Are you sure you want to export all approved batch data to Excel?")
-        if not confirm:
-            logging.info("Export cancelled by user.")
-            return  # User cancelled the export
-
-        logging.info("Attempting to export approved batches and samples to Excel.")
-        approved_batches_data = []
-        batches_ref = db.collection("batches")
-        samples_ref = db.collection("samples")
-
-        try:
-            approved_batches = batches_ref.where("status", "==", "approved").get()
-
-            if not approved_batches:
-                messagebox.showwarning("Warning", "No approved batches to export.")
-                logging.warning("No approved batches found to export.")
-                return
-
-            for batch in approved_batches:
-                batch_data = batch.to_dict()
-                actual_batch_id_field = batch_data.get("batch_id")
-                logging.debug(f"Processing batch {actual_batch_id_field} for export.")
-
-                # Query samples using the 'batch_id' field from the batch document
-                associated_samples = samples_ref.where("batch_id", "==", actual_batch_id_field).get()
-
-                # Ensure batch data is always included, even if no samples
-                if not associated_samples:
-                    logging.info(f"Batch {actual_batch_id_field} has no samples. Exporting batch data only.")
-                    combined_data = {
-                        "batch_id": batch_data.get("batch_id", ""),
-                        "product_name": batch_data.get("product_name", ""),
-                        "batch_description": batch_data.get("description", ""),
-                        "batch_status": batch_data.get("status", ""),
-                        "user_employee_id": batch_data.get("user_employee_id", ""), # Added employee ID to export
-                        "user_email": batch_data.get("user_email", ""),
-                        "sample_id": "",
-                        "sample_owner": "",
-                        "sample_maturation_date": "",
-                        "sample_status": "",
-                        "sample_creation_date": "" # Added sample creation date
-                    }
-                    approved_batches_data.append(combined_data)
-
-                for sample in associated_samples:
-                    sample_data = sample.to_dict()
-                    mat_date_str = ""
-                    sample_mat_date_obj = sample_data.get('maturation_date')
-                    if isinstance(sample_mat_date_obj, datetime):
-                        mat_date_str = sample_mat_date_obj.strftime("%Y-%m-%d")
-                    elif isinstance(sample_mat_date_obj, firebase_admin.firestore.Timestamp):
-                        mat_date_str = sample_mat_date_obj.to_datetime().strftime("%Y-%m-%d")
-                    else:
-                        mat_date_str = str(sample_mat_date_obj) if sample_mat_date_obj is not None else ''
-
-                    creation_date_str = ""
-                    sample_creation_date_obj = sample_data.get('creation_date')
-                    if isinstance(sample_creation_date_obj, datetime):
-                        creation_date_str = sample_creation_date_obj.strftime("%Y-%m-%d %H:%M:%S")
-                    elif isinstance(sample_creation_date_obj, firebase_admin.firestore.Timestamp):
-                        creation_date_str = sample_creation_date_obj.to_datetime().strftime("%Y-%m-%d %H:%M:%S")
-                    else:
-                        creation_date_str = str(sample_creation_date_obj) if sample_creation_date_obj is not None else ''
-
-
-                    combined_data = {
-                        "batch_id": batch_data.get("batch_id", ""),
-                        "product_name": batch_data.get("product_name", ""),
-                        "batch_description": batch_data.get("description", ""),
-                        "batch_status": batch_data.get("status", ""),
-                        "user_employee_id": batch_data.get("user_employee_id", ""), # Added employee ID to export
-                        "user_email": batch_data.get("user_email", ""),
-                        "sample_id": sample_data.get("sample_id", ""),
-                        "sample_owner": sample_data.get("owner", ""),
-                        "sample_maturation_date": mat_date_str,
-                        "sample_status": sample_data.get("status", ""),
-                        "sample_creation_date": creation_date_str # Added sample creation date
-                    }
-                    approved_batches_data.append(combined_data)
-
-            if not approved_batches_data:
-                messagebox.showwarning("Warning", "No approved batches with data to export.")
-                logging.warning("No data collected for approved batches, nothing to export.")
-                return
-
-            df_approved_with_samples = pd.DataFrame(approved_batches_data)
-
-            filetypes = (("Excel files", "*.xlsx"),)
-            filename = filedialog.asksaveasfilename(defaultextension=".xlsx",
-                                                    filetypes=filetypes,
-                                                    initialfile="Approved_Batches_and_Samples.xlsx")
-            if filename:
-                try:
-                    for col in df_approved_with_samples.columns:
-                        if pd.api.types.is_datetime64_any_dtype(df_approved_with_samples[col]):
-                            if df_approved_with_samples[col].dt.tz is not None:
-                                df_approved_with_samples[col] = df_approved_with_samples[col].dt.tz_localize(None)
-
-                    df_approved_with_samples.to_excel(filename, index=False)
-                    messagebox.showinfo("Success",
-                                        f"Approved batches and their samples exported to {os.path.basename(filename)}")
-                    logging.info(f"Successfully exported approved batches and samples to {filename}.")
-                except Exception as e:
-                    logging.error(f"Failed to export Excel file for approved batches: {e}", exc_info=True)
-                    messagebox.showerror("Error", f"Failed to export Excel file:\n{e}")
-            else:
-                logging.info("Export to Excel cancelled by user.")
-        except Exception as e:
-            logging.error(f"Error fetching data for Excel export: {e}", exc_info=True)
-            messagebox.showerror("Error", f"Error during data collection for export:\n{e}")
+# admin_logic.py
+import tkinter as tk
+from tkinter import messagebox, ttk, filedialog
+import pandas as pd
+from datetime import datetime
+import os
+from firebase_setup import db
+from delta_sync import add_tombstone
+from firestore_metrics import ui_action
+from sharded_counter import ShardedCounter, counter_totals, delete_counter_shards
+from page_index import PageBoundaryIndex, when_index_ready
+from count_cache import aggregate_count_value
+from event_bus import SAMPLE_CHANGED, SAMPLE_DELETED, BATCH_ADDED, BATCH_CHANGED, BATCH_DELETED, BATCH_SAMPLE_COUNT_CHANGED
+from bulk_ops import start_bulk_operation, show_bulk_summary
+from concurrent_edits import EditBase, save_edit
+from firestore_retry import run_transaction
+from constants import LIST_VIEW_FIELDS, MAINTENANCE_COLLECTION, MAX_WRITES_PER_BATCH, USER_SEARCH_PREFIX_FIELDS
+from helpers import user_search_prefixes, user_status
+import firebase_admin
+
+# --- Logging Setup ---
+import logging
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# --- End Logging Setup ---
+
+BATCH_STATUS_TAGS = {"approved": ("approved",), "pending approval": ("pending",), "rejected": ("rejected",)}
+# batches_tree columns patched in place when a batch field changes
+BATCH_TREE_COLUMNS = {"product_name": "Product Name", "description": "Description", "status": "Status"}
+USER_FIELDS_BACKFILL = "user_fields_v1"  # Marker document of the user status and search prefix backfill
+
+
+def backfill_user_fields(db):
+    """Once per database: writes the status shown for users saved without one (so the status filter finds them)
+    and the search prefix fields of users saved before they existed. Later runs cost one marker read."""
+    marker_ref = db.collection(MAINTENANCE_COLLECTION).document(USER_FIELDS_BACKFILL)
+    if marker_ref.get().exists:
+        return 0
+    batch_write, pending, updated = db.batch(), 0, 0
+    for user_doc in db.collection("users").stream():
+        data = user_doc.to_dict()
+        changes = {field: value for field, value in user_search_prefixes(data).items() if data.get(field) != value}
+        if not data.get("status"):
+            changes["status"] = user_status(data)
+        if not changes:
+            continue
+        changes["updated_at"] = firebase_admin.firestore.SERVER_TIMESTAMP
+        batch_write.update(user_doc.reference, changes)
+        pending += 1
+        updated += 1
+        if pending == MAX_WRITES_PER_BATCH:
+            batch_write.commit()
+            batch_write, pending = db.batch(), 0
+    batch_write.set(marker_ref, {"ran_at": firebase_admin.firestore.SERVER_TIMESTAMP, "users_updated": updated})
+    batch_write.commit()
+    logging.info(f"Backfilled status and search fields of {updated} users.")
+    return updated
+
+
+class AdminLogic:
+    def __init__(self, root, app_instance):
+        logging.info("Initializing AdminLogic class.")
+        self.root = root
+        self.app = app_instance
+        self.users_tree = None
+        self.batches_tree = None
+        self.batch_filter_var = None  # Variable to hold the selected batch filter (All, Pending, Approved)
+        # User Management paging: pages are read with keyset cursors, start_after the last user of the page before
+        self.users_per_page = 50
+        self.user_page_index = 0
+        self.user_page_cursors = []  # user_page_cursors[i] is the last user snapshot of page i + 1
+        self.user_search_var = None
+        self.user_search_field_var = None
+        self.user_status_filter_var = None
+        self.user_role_filter_var = None
+
+        style = ttk.Style()
+        style.theme_use('clam')  # Better default look
+
+        # Button styles
+        style.configure("Green.TButton", background="#2ecc71", foreground="white", font=("Segoe UI", 10, "bold"))
+        style.map("Green.TButton", background=[("active", "#27ae60")])
+
+        style.configure("Yellow.TButton", background="#f1c40f", foreground="black", font=("Segoe UI", 10, "bold"))
+        style.map("Yellow.TButton", background=[("active", "#f39c12")])
+
+        style.configure("Orange.TButton", background="#e67e22", foreground="white", font=("Segoe UI", 10, "bold"))
+        style.map("Orange.TButton", background=[("active", "#d35400")])
+
+        style.configure("View.TButton", background="#3498db", foreground="white", font=("Segoe UI", 10, "bold"))
+        style.map("View.TButton", background=[("active", "#2980b9")])
+        logging.info("AdminLogic initialized.")
+
+    @ui_action()
+    def admin_dashboard(self):
+        """Displays the admin dashboard with user and batch management.
+        The dashboard is built once per login; showing it again keeps the panels and their data."""
+        logging.info("Entering admin_dashboard method.")
+        if not self.app.show_screen("admin", self._build_admin_dashboard):
+            logging.info("Showing cached admin dashboard.")
+        self.app.counter_folder.start()
+        self.root.geometry("1200x700")
+
+    def _build_admin_dashboard(self, screen):
+        """Creates the admin dashboard widgets in screen and shows user management."""
+        # Top frame for Logout button and Welcome message
+        top_frame = ttk.Frame(screen)
+        top_frame.pack(fill="x", padx=10, pady=10)
+
+        ttk.Button(top_frame, text="Logout", command=self.app.logout).pack(side="right")
+
+        # Main content frame to hold sidebar and central content
+        main_content_frame = ttk.Frame(screen)
+        main_content_frame.pack(expand=True, fill="both", padx=10, pady=10)
+
+        # Sidebar Frame
+        sidebar_frame = ttk.Frame(main_content_frame, width=200, relief="raised", borderwidth=1)
+        sidebar_frame.pack(side="left", fill="y", padx=(0, 20))
+        sidebar_frame.pack_propagate(False)  # Prevent sidebar from resizing based on content
+
+        ttk.Label(sidebar_frame, text="Navigation", font=("Helvetica", 12, "bold")).pack(pady=10)
+
+        # Sidebar buttons
+        ttk.Button(sidebar_frame, text="User Management", command=self.show_user_management).pack(fill="x", pady=5,
+                                                                                                  padx=10)
+        ttk.Button(sidebar_frame, text="Batch Management", command=self.show_batch_management).pack(fill="x", pady=5,
+                                                                                                    padx=10)
+        ttk.Button(sidebar_frame, text="Export Approved Data", command=self.export_user_batches).pack(fill="x", pady=5,
+                                                                                                      padx=10)
+        ttk.Button(sidebar_frame, text="Firestore Usage", command=self.app.show_metrics_panel).pack(fill="x", pady=5,
+                                                                                                   padx=10)
+        ttk.Button(sidebar_frame, text="Refresh", command=self.refresh_central_content).pack(fill="x", pady=5, padx=10)
+
+        # Central content area
+        self.central_content_frame = ttk.Frame(main_content_frame)
+        self.central_content_frame.pack(side="right", expand=True, fill="both")
+        self.central_panels = {}
+        self.current_panel = None
+
+        # Initially show user management
+        self.show_user_management()
+        logging.info("Admin dashboard loaded.")
+
+    def clear_central_content(self):
+        """Clears all widgets from the central content frame, so its panels are rebuilt and reloaded when next shown."""
+        logging.info("Clearing central content frame.")
+        for widget in self.central_content_frame.winfo_children():
+            widget.destroy()
+        self.central_panels = {}
+        logging.info("Central content frame cleared.")
+
+    def show_central_panel(self, name, build):
+        """Shows the cached panel name in the central content frame, calling build(panel) only if it isn't cached.
+        The other panels are hidden with their rows and filters kept, so switching between them reads nothing."""
+        panel = self.central_panels.get(name)
+        for other in self.central_panels.values():
+            if other is not panel:
+                other.pack_forget()
+        built = panel is None
+        if built:
+            panel = ttk.Frame(self.central_content_frame)
+            self.central_panels[name] = panel
+            build(panel)
+        panel.pack(expand=True, fill="both")
+        self.current_panel = name
+        return built
+
+    @ui_action()
+    def refresh_central_content(self):
+        """Drops the cached panels and rebuilds (and reloads) the one on screen."""
+        shown_panel = self.current_panel
+        self.clear_central_content()
+        if shown_panel == "batches":
+            self.show_batch_management()
+        else:
+            self.show_user_management()
+
+    @ui_action()
+    def show_user_management(self):
+        """Displays the user management section in the central content frame."""
+        logging.info("Displaying user management section.")
+        try:
+            backfill_user_fields(db)
+        except Exception as e:
+            logging.warning(f"Backfilling user fields failed, will retry next time: {e}")
+        self.show_central_panel("users", self._build_user_management)
+
+    def _build_user_management(self, panel):
+        """Creates the user management widgets in panel and loads the users."""
+        # Users Section
+        ttk.Label(panel, text="User Management", font=("Helvetica", 14, "bold")).pack(pady=(20, 5))
+
+        # Search and filter controls, applied by the users query itself
+        user_filter_frame = ttk.Frame(panel)
+        user_filter_frame.pack(pady=5)
+
+        ttk.Label(user_filter_frame, text="Search:").pack(side="left", padx=5)
+        self.user_search_var = tk.StringVar()
+        user_search_entry = ttk.Entry(user_filter_frame, textvariable=self.user_search_var, width=20)
+        user_search_entry.pack(side="left", padx=5)
+        user_search_entry.bind("<Return>", lambda event: self.load_users())
+        self.user_search_field_var = tk.StringVar(value="username")
+        ttk.Combobox(user_filter_frame, textvariable=self.user_search_field_var, values=["username", "email"],
+                     state="readonly", width=10).pack(side="left", padx=5)
+
+        ttk.Label(user_filter_frame, text="Status:").pack(side="left", padx=5)
+        self.user_status_filter_var = tk.StringVar(value="all")
+        status_filter_combobox = ttk.Combobox(user_filter_frame, textvariable=self.user_status_filter_var,
+                                              values=["all", "pending", "active", "rejected"], state="readonly",
+                                              width=10)
+        status_filter_combobox.pack(side="left", padx=5)
+        status_filter_combobox.bind("<<ComboboxSelected>>", lambda event: self.load_users())
+
+        ttk.Label(user_filter_frame, text="Role:").pack(side="left", padx=5)
+        self.user_role_filter_var = tk.StringVar(value="all")
+        role_filter_combobox = ttk.Combobox(user_filter_frame, textvariable=self.user_role_filter_var,
+                                            values=["all", "admin", "user", "tester"], state="readonly", width=10)
+        role_filter_combobox.pack(side="left", padx=5)
+        role_filter_combobox.bind("<<ComboboxSelected>>", lambda event: self.load_users())
+
+        ttk.Button(user_filter_frame, text="Search", command=self.load_users).pack(side="left", padx=5)
+
+        # Several users can be selected (Ctrl/Shift-click) for the bulk actions below
+        self.users_tree = ttk.Treeview(panel,
+                                       columns=("EmployeeID", "Username", "Email", "Role", "Status"),
+                                       show='headings', selectmode="extended")
+        self.users_tree.heading("EmployeeID", text="Employee ID")
+        self.users_tree.heading("Username", text="Username")
+        self.users_tree.heading("Email", text="Email")
+        self.users_tree.heading("Role", text="Role")
+        self.users_tree.heading("Status", text="Status")  # New: Status heading
+
+        self.users_tree.column("EmployeeID", width=120, anchor="center")
+        self.users_tree.column("Username", width=120, anchor="center")
+        self.users_tree.column("Email", width=200, anchor="center")
+        self.users_tree.column("Role", width=80, anchor="center")
+        self.users_tree.column("Status", width=80, anchor="center")
+
+        self.users_tree.pack(expand=True, fill="both", padx=10, pady=10)
+
+        btn_user_frame = ttk.Frame(panel)
+        btn_user_frame.pack(pady=5)
+
+        ttk.Button(btn_user_frame, text="Add User", command=self.admin_add_user, style="Green.TButton").pack(
+            side="left", padx=5)
+        ttk.Button(btn_user_frame, text="Edit User", command=self.admin_edit_user, style="View.TButton").pack(
+            side="left", padx=5)
+        ttk.Button(btn_user_frame, text="Delete User", command=self.admin_delete_user, style="Yellow.TButton").pack(
+            side="left", padx=5)
+        ttk.Button(btn_user_frame, text="Approve User", command=self.admin_approve_user, style="Green.TButton").pack(
+            side="left", padx=5)
+        ttk.Button(btn_user_frame, text="Reject User", command=self.admin_reject_users, style="Orange.TButton").pack(
+            side="left", padx=5)
+        ttk.Button(btn_user_frame, text="Change Role", command=self.admin_change_user_roles, style="View.TButton").pack(
+            side="left", padx=5)
+
+        user_pagination_frame = ttk.Frame(panel)
+        user_pagination_frame.pack(pady=5)
+        self.prev_user_page_btn = ttk.Button(user_pagination_frame, text="Previous Page", state="disabled",
+                                             command=lambda: self.load_users(reset=False, direction="prev"))
+        self.prev_user_page_btn.pack(side="left", padx=5)
+        self.user_page_label = ttk.Label(user_pagination_frame, text="Page 1")
+        self.user_page_label.pack(side="left", padx=10)
+        self.next_user_page_btn = ttk.Button(user_pagination_frame, text="Next Page", state="disabled",
+                                             command=lambda: self.load_users(reset=False, direction="next"))
+        self.next_user_page_btn.pack(side="left", padx=5)
+
+        self.load_users()
+        logging.info("User management section displayed.")
+
+    @ui_action()
+    def show_batch_management(self):
+        """Displays the batch management section in the central content frame, with a filter for status."""
+        logging.info("Displaying batch management section.")
+        self.show_central_panel("batches", self._build_batch_management)
+
+    def _build_batch_management(self, panel):
+        """Creates the batch management widgets in panel and loads the batches."""
+        ttk.Label(panel, text="Batch Management", font=("Helvetica", 14, "bold")).pack(
+            pady=(20, 5))
+
+        # Filter controls
+        filter_frame = ttk.Frame(panel)
+        filter_frame.pack(pady=5)
+
+        ttk.Label(filter_frame, text="Filter by Status:").pack(side="left", padx=5)
+        self.batch_filter_var = tk.StringVar(value="pending approval")  # Default to pending approval
+        filter_combobox = ttk.Combobox(filter_frame, textvariable=self.batch_filter_var,
+                                       values=["pending approval", "approved", "all"],
+                                       state="readonly")
+        filter_combobox.pack(side="left", padx=5)
+        filter_combobox.bind("<<ComboboxSelected>>", lambda event: self.load_batches(self.batch_filter_var.get()))
+
+        self.batches_tree = ttk.Treeview(panel,
+                                         columns=(
+                                             "BatchID", "Product Name", "Description", "Submission Date", "User",
+                                             "Status",
+                                             "Sample Count"),
+                                         show='headings')
+        # Updated heading for the date column to 'Submission Date'
+        self.batches_tree.heading("Submission Date", text="Submission Date")  # Changed heading text
+        # Ensure all other columns are also correctly configured
+        for col_name in ["BatchID", "Product Name", "Description", "User", "Status", "Sample Count"]:
+            self.batches_tree.heading(col_name, text=col_name)
+            self.batches_tree.column(col_name, width=100, anchor="center")
+        # Adjust column width for Submission Date if necessary
+        self.batches_tree.column("Submission Date", width=120, anchor="center")
+
+        self.batches_tree.pack(expand=True, fill="both", padx=10, pady=10)
+        # Committed changes (new batches, sample approvals, deletes) patch the batch rows instead of reloading the list
+        self.app.events.subscribe(BATCH_ADDED, self.batches_tree, self._on_batch_added)
+        self.app.events.subscribe(BATCH_CHANGED, self.batches_tree, self._on_batch_changed)
+        self.app.events.subscribe(BATCH_DELETED, self.batches_tree,
+                                  lambda batch_doc_id: self.batches_tree.exists(batch_doc_id) and self.batches_tree.delete(batch_doc_id))
+        self.app.events.subscribe(BATCH_SAMPLE_COUNT_CHANGED, self.batches_tree, self._on_batch_sample_count_changed)
+
+        btn_batch_frame = ttk.Frame(panel)
+        btn_batch_frame.pack(pady=5)
+
+        ttk.Button(btn_batch_frame, text="Approve Selected Batch", command=self.admin_approve_selected_batch,
+                   style="Green.TButton").pack(side="left", padx=5)
+        ttk.Button(btn_batch_frame, text="Reject Selected Batch", command=self.admin_reject_selected_batch,
+                   style="Orange.TButton").pack(side="left", padx=5)
+        ttk.Button(btn_batch_frame, text="View Samples", command=self.admin_view_samples_for_batch,
+                   style="View.TButton").pack(side="left", padx=5)
+        ttk.Button(btn_batch_frame, text="Delete Batch", command=self.delete_batch, style="Yellow.TButton").pack(
+            side="left", padx=5)
+        # add edit batch
+        ttk.Button(btn_batch_frame, text="Edit Batch", command=self.edit_batch_info, style="Yellow.TButton").pack(
+            side="left", padx=5)
+
+        # Removed the "View Approved Batches" button here as well
+        self.load_batches(self.batch_filter_var.get())  # Load batches based on initial filter value
+        logging.info("Batch management section displayed.")
+
+    @ui_action("load_users({direction})")
+    def load_users(self, reset=True, direction=None):
+        """Loads one page of users into the users treeview, ordered by employee ID.
+        The status and role filters are equality filters and the search is a prefix range on username or email,
+        all applied by Firestore. reset starts again from the first page; otherwise direction is "next" or "prev"."""
+        logging.info(f"Attempting to load users (reset={reset}, direction={direction}).")
+        if self.users_tree is None:
+            logging.warning("users_tree is None. Admin dashboard not initialized. Skipping user load.")
+            return
+
+        if reset:
+            self.user_page_index = 0
+            self.user_page_cursors = []
+        elif direction == "next":
+            self.user_page_index += 1
+        elif direction == "prev":
+            self.user_page_index = max(0, self.user_page_index - 1)
+
+        self.users_tree.delete(*self.users_tree.get_children())
+        try:
+            page_query = self._users_query()
+            if self.user_page_index > 0:
+                page_query = page_query.start_after(self.user_page_cursors[self.user_page_index - 1])
+            # One extra user tells whether there is a next page without counting the collection
+            users = page_query.limit(self.users_per_page + 1).get()
+            has_next_page = len(users) > self.users_per_page
+            users = users[:self.users_per_page]
+            if users:
+                del self.user_page_cursors[self.user_page_index:]
+                self.user_page_cursors.append(users[-1])
+
+            for user in users:
+                self.users_tree.insert("", "end", iid=user.id, values=self._user_row_values(user.to_dict()))
+
+            self.user_page_label.config(text=f"Page {self.user_page_index + 1}")
+            self.prev_user_page_btn.config(state="normal" if self.user_page_index > 0 else "disabled")
+            self.next_user_page_btn.config(state="normal" if has_next_page else "disabled")
+            logging.info(f"Loaded {len(users)} users on page {self.user_page_index + 1}.")
+        except Exception as e:
+            logging.error(f"Failed to load users: {e}", exc_info=True)
+            messagebox.showerror("Error", f"Failed to load users: {e}")
+
+    def _users_query(self):
+        """Builds the users query for the current search and filters, projected to the columns shown."""
+        query = db.collection("users")
+        status_filter = self.user_status_filter_var.get() if self.user_status_filter_var else "all"
+        role_filter = self.user_role_filter_var.get() if self.user_role_filter_var else "all"
+        if status_filter != "all":
+            query = query.where("status", "==", status_filter)
+        if role_filter != "all":
+            query = query.where("role", "==", role_filter)
+
+        search_text = self.user_search_var.get().strip() if self.user_search_var else ""
+        if search_text:
+            # Users store every leading substring of the searchable fields, so the prefix match is an
+            # array-contains filter rather than a range, and the page stays ordered by employee ID
+            query = query.where(USER_SEARCH_PREFIX_FIELDS[self.user_search_field_var.get()], "array_contains", search_text)
+        return query.order_by("employee_id").select(LIST_VIEW_FIELDS["user_rows"])
+
+    def _user_row_values(self, data):
+        return (data.get("employee_id"), data.get("username", ""), data.get("email"), data.get("role"), user_status(data))
+
+    def _user_matches_filters(self, data):
+        """Tells whether a user belongs in the users treeview under the current search and filters."""
+        for value, var in ((user_status(data), self.user_status_filter_var), (data.get("role"), self.user_role_filter_var)):
+            if var is not None and var.get() != "all" and value != var.get():
+                return False
+        search_text = self.user_search_var.get().strip() if self.user_search_var else ""
+        return not search_text or str(data.get(self.user_search_field_var.get(), "")).startswith(search_text)
+
+    def refresh_user_row(self, user_id, data):
+        """Shows a saved user's new values in the users treeview without reloading the page.
+        A user that no longer matches the search and filters is removed; a new user that matches is appended."""
+        if self.users_tree is None or not self.users_tree.winfo_exists():
+            return
+        if not self._user_matches_filters(data):
+            if self.users_tree.exists(user_id):
+                self.users_tree.delete(user_id)
+        elif self.users_tree.exists(user_id):
+            self.users_tree.item(user_id, values=self._user_row_values(data))
+        else:
+            self.users_tree.insert("", "end", iid=user_id, values=self._user_row_values(data))
+
+    def admin_add_user(self):
+        """Opens a form to add a new user by delegating to AuthManager."""
+        logging.info("Opening add user form.")
+        self.app.auth_manager.user_form_window()
+        logging.info("Add user form opened.")
+
+    @ui_action()
+    def admin_edit_user(self):
+        """Opens a form to edit an existing user by delegating to AuthManager."""
+        logging.info("Attempting to open edit user form.")
+        selected = self.users_tree.selection()
+        if not selected:
+            messagebox.showinfo("Info", "Please select a user to edit.")
+            logging.warning("Edit user aborted: No user selected.")
+            return
+        user_id = selected[0]
+        try:
+            user_doc = db.collection("users").document(user_id).get()
+            if user_doc.exists:
+                user_data = user_doc.to_dict()
+                self.app.auth_manager.user_form_window(user_id=user_id, user_data=user_data)
+                logging.info(f"Edit user form opened for user ID: {user_id}.")
+            else:
+                messagebox.showerror("Error", "User not found.")
+                logging.error(f"User with ID {user_id} not found for editing.")
+        except Exception as e:
+            logging.error(f"Failed to retrieve user data for editing: {e}", exc_info=True)
+            messagebox.showerror("Error", f"Failed to retrieve user data: {e}")
+
+    @ui_action()
+    def admin_delete_user(self):
+        """Deletes a selected user from Firestore."""
+        logging.info("Attempting to delete user.")
+        selected = self.users_tree.selection()
+        if not selected:
+            messagebox.showinfo("Info", "Please select a user to delete.")
+            logging.warning("Delete user aborted: No user selected.")
+            return
+        if len(selected) > 1:
+            self.admin_delete_users(selected)
+            return
+        user_id = selected[0]
+        confirm = messagebox.askyesno("Confirm Delete",
+                                      f"Are you sure you want to delete user with Employee ID '{user_id}'?")
+        if confirm:
+            try:
+                batch_write = db.batch()
+                batch_write.delete(db.collection("users").document(user_id))
+                add_tombstone(db, batch_write, "users", user_id, self.app.current_user.get('employee_id'))
+                batch_write.commit()
+                if self.users_tree.exists(user_id):
+                    self.users_tree.delete(user_id)
+                messagebox.showinfo("Success", "User deleted successfully.")
+                logging.info(f"User with ID {user_id} deleted successfully.")
+            except Exception as e:
+                logging.error(f"Failed to delete user {user_id}: {e}", exc_info=True)
+                messagebox.showerror("Error", f"Failed to delete user: {e}")
+        else:
+            logging.info("Delete user cancelled by user.")
+
+    @ui_action()
+    def admin_approve_user(self):
+        """Approves a selected user by changing their status to 'active'."""
+        logging.info("Attempting to approve user.")
+        selected = self.users_tree.selection()
+        if not selected:
+            messagebox.showinfo("Info", "Please select a user to approve.")
+            logging.warning("Approve user aborted: No user selected.")
+            return
+        if len(selected) > 1:
+            self.admin_set_users_status(selected, "active")
+            return
+        user_id = selected[0]
+        try:
+            # The row holds every field the approval needs, so the user document isn't read again
+            employee_id, username, email, role, status = self.users_tree.item(user_id, 'values')
+            user_data = {"employee_id": employee_id, "username": username, "email": email, "role": role,
+                         "status": status}
+            if user_data.get("status") == "active":
+                messagebox.showinfo("Info", "User is already active.")
+                logging.info(f"User {user_id} is already active, no action needed.")
+                return
+
+            confirm = messagebox.askyesno("Confirm Approval",
+                                          f"Are you sure you want to approve user '{user_data.get('username')}'?")
+            if confirm:
+                db.collection("users").document(user_id).update(
+                    {"status": "active", "updated_at": firebase_admin.firestore.SERVER_TIMESTAMP})
+                self.refresh_user_row(user_id, dict(user_data, status="active"))
+                messagebox.showinfo("Success", f"User '{user_data.get('username')}' approved successfully.")
+                logging.info(f"User {user_id} approved successfully and status set to 'active'.")
+            else:
+                logging.info("Approve user cancelled by user.")
+        except Exception as e:
+            logging.error(f"Failed to approve user {user_id}: {e}", exc_info=True)
+            messagebox.showerror("Error", f"Failed to approve user: {e}")
+
+    def _selected_user_rows(self, user_ids):
+        """Returns the selected users as dicts read from their rows (no document reads), labelled for the
+        bulk result summary. The signed-in admin's own account is left out of bulk changes."""
+        own_id = (self.app.current_user or {}).get("employee_id")
+        users, skipped = [], []
+        for user_id in user_ids:
+            employee_id, username, email, role, status = self.users_tree.item(user_id, 'values')
+            user = {"id": user_id, "label": f"{username} ({employee_id})", "employee_id": employee_id,
+                    "username": username, "email": email, "role": role, "status": status}
+            if user_id == own_id:
+                skipped.append((user, "your own account"))
+            else:
+                users.append(user)
+        return users, skipped
+
+    def _run_user_bulk_action(self, title, users, skipped, add_writes, on_success, done_text):
+        """Commits add_writes for every user in chunked batched writes behind one progress bar, then patches
+        the rows of the users that succeeded with on_success(user) and shows the per-user summary."""
+        def on_done(progress):
+            for user in progress.succeeded:
+                on_success(user)
+            show_bulk_summary(self.root, title, progress, done_text)
+
+        start_bulk_operation(self.root, db, title, users, add_writes, on_done, skipped=skipped,
+                             action=f"bulk_users({title})")
+
+    def _users_confirmation_text(self, users, skipped, question):
+        names = ", ".join(user["username"] for user in users[:5]) + (", ..." if len(users) > 5 else "")
+        skipped_text = f"\n\n{len(skipped)} selected user(s) will be skipped." if skipped else ""
+        return f"{question} {len(users)} user(s)?\n\n{names}{skipped_text}"
+
+    def admin_set_users_status(self, user_ids, status):
+        """Sets the status of several users ('active' approves, 'rejected' rejects) after one confirmation."""
+        users, skipped = self._selected_user_rows(user_ids)
+        skipped += [(user, f"already {status}") for user in users if user["status"] == status]
+        users = [user for user in users if user["status"] != status]
+        verb = "Approve" if status == "active" else "Reject"
+        if not users:
+            messagebox.showinfo("Info", f"None of the selected users can be set to '{status}'.")
+            return
+        if not messagebox.askyesno(f"Confirm {verb}", self._users_confirmation_text(users, skipped, verb)):
+            logging.info(f"Bulk {verb.lower()} of {len(users)} users cancelled.")
+            return
+
+        def add_writes(batch_write, user):
+            batch_write.update(db.collection("users").document(user["id"]),
+                               {"status": status, "updated_at": firebase_admin.firestore.SERVER_TIMESTAMP})
+
+        self._run_user_bulk_action(f"{verb} Users", users, skipped, add_writes,
+                                   lambda user: self.refresh_user_row(user["id"], dict(user, status=status)),
+                                   "Approved" if status == "active" else "Rejected")
+
+    @ui_action()
+    def admin_reject_users(self):
+        """Rejects the selected users: their status becomes 'rejected' and they can no longer log in."""
+        selected = self.users_tree.selection()
+        if not selected:
+            messagebox.showinfo("Info", "Please select the users to reject.")
+            logging.warning("Reject users aborted: No user selected.")
+            return
+        self.admin_set_users_status(selected, "rejected")
+
+    @ui_action()
+    def admin_change_user_roles(self):
+        """Gives the selected users the role chosen in a dialog."""
+        selected = self.users_tree.selection()
+        if not selected:
+            messagebox.showinfo("Info", "Please select the users whose role should change.")
+            logging.warning("Change role aborted: No user selected.")
+            return
+        role = self._ask_role(len(selected))
+        if not role:
+            logging.info("Change role cancelled by user.")
+            return
+        users, skipped = self._selected_user_rows(selected)
+        skipped += [(user, f"already {role}") for user in users if user["role"] == role]
+        users = [user for user in users if user["role"] != role]
+        if not users:
+            messagebox.showinfo("Info", f"All selected users already have the role '{role}'.")
+            return
+        if not messagebox.askyesno("Confirm Role Change",
+                                   self._users_confirmation_text(users, skipped, f"Make '{role}'")):
+            logging.info(f"Role change of {len(users)} users cancelled.")
+            return
+
+        def add_writes(batch_write, user):
+            batch_write.update(db.collection("users").document(user["id"]),
+                               {"role": role, "updated_at": firebase_admin.firestore.SERVER_TIMESTAMP})
+
+        self._run_user_bulk_action("Change Role", users, skipped, add_writes,
+                                   lambda user: self.refresh_user_row(user["id"], dict(user, role=role)),
+                                   f"Role set to {role}")
+
+    def _ask_role(self, user_count):
+        """Asks for the role to give user_count users; returns it, or None if cancelled."""
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Change Role")
+        dialog.transient(self.root)
+        dialog.grab_set()
+        ttk.Label(dialog, text=f"New role for {user_count} selected user(s):").pack(padx=20, pady=(15, 5))
+        role_var = tk.StringVar(value="user")
+        ttk.Combobox(dialog, textvariable=role_var, values=["user", "tester", "admin"], state="readonly",
+                     width=15).pack(padx=20, pady=5)
+        chosen = {}
+
+        def choose():
+            chosen["role"] = role_var.get()
+            dialog.destroy()
+
+        btn_frame = ttk.Frame(dialog)
+        btn_frame.pack(pady=10)
+        ttk.Button(btn_frame, text="OK", command=choose, style="Green.TButton").pack(side="left", padx=5)
+        ttk.Button(btn_frame, text="Cancel", command=dialog.destroy).pack(side="left", padx=5)
+        dialog.wait_window()
+        return chosen.get("role")
+
+    def admin_delete_users(self, user_ids):
+        """Deletes several users after one confirmation."""
+        users, skipped = self._selected_user_rows(user_ids)
+        if not users:
+            messagebox.showinfo("Info", "None of the selected users can be deleted.")
+            return
+        if not messagebox.askyesno("Confirm Delete", self._users_confirmation_text(users, skipped, "Delete")):
+            logging.info(f"Bulk delete of {len(users)} users cancelled.")
+            return
+
+        def add_writes(batch_write, user):
+            batch_write.delete(db.collection("users").document(user["id"]))
+            add_tombstone(db, batch_write, "users", user["id"], self.app.current_user.get('employee_id'))
+
+        def remove_row(user):
+            if self.users_tree.winfo_exists() and self.users_tree.exists(user["id"]):
+                self.users_tree.delete(user["id"])
+
+        self._run_user_bulk_action("Delete Users", users, skipped, add_writes, remove_row, "Deleted")
+
+    @ui_action("load_batches({status_filter})")
+    def load_batches(self, status_filter="pending approval"):
+        """Loads batch data from Firestore and populates the batches treeview.
+           Can filter by status: "pending approval", "approved", or "all"."""
+        logging.info(f"Attempting to load batches with filter: {status_filter}.")
+        if self.batches_tree is None:
+            logging.warning("batches_tree is None. Admin dashboard not initialized. Skipping batch load.")
+            return
+
+        self.batches_tree.delete(*self.batches_tree.get_children())
+
+        batches_query = db.collection("batches")
+        if status_filter and status_filter != "all":
+            batches_query = batches_query.where("status", "==", status_filter)
+
+        try:
+            batches = {batch.id: batch.to_dict() for batch in batches_query.select(LIST_VIEW_FIELDS["batch_rows"]).get()}
+            # number_of_samples is sharded; fold each batch's shards into the value shown
+            sample_counts = counter_totals(db, "batches", batches, "number_of_samples")
+
+            for batch_doc_id, data in batches.items():
+                self._insert_batch_row(batch_doc_id, data, sample_counts[batch_doc_id])
+
+            logging.info(f"Batches loaded successfully with filter: {status_filter}.")
+        except Exception as e:
+            logging.error(f"Failed to load batches with filter {status_filter}: {e}", exc_info=True)
+            messagebox.showerror("Error", f"Failed to load batches: {e}")
+
+    def _insert_batch_row(self, batch_doc_id, data, sample_count):
+        """Adds a batch to the batches treeview, tagged by its status."""
+        submission_date_str = data.get("submission_date", "")
+
+        if isinstance(submission_date_str, datetime):
+            submission_date_str = submission_date_str.strftime("%Y-%m-%d")
+        elif isinstance(submission_date_str, firebase_admin.firestore.Timestamp):
+            submission_date_str = submission_date_str.to_datetime().strftime("%Y-%m-%d")
+        else:
+            submission_date_str = str(submission_date_str) if submission_date_str is not None else ''
+
+        row_id = self.batches_tree.insert("", "end", iid=batch_doc_id,
+                                          values=(data.get("batch_id", ""),
+                                                  data.get("product_name", ""),
+                                                  data.get("description", ""),
+                                                  submission_date_str,
+                                                  data.get("user_email", ""),
+                                                  data.get("status", "pending approval"),
+                                                  sample_count))
+
+        # Apply row tag based on status
+        status = data.get("status", "pending approval")
+        self.batches_tree.item(row_id, tags=BATCH_STATUS_TAGS.get(status, ()))
+
+        # Define tag styles
+        self.batches_tree.tag_configure("approved", background="#d4edda")  # light green
+        self.batches_tree.tag_configure("pending", background="#fff3cd")  # light yellow
+        self.batches_tree.tag_configure("rejected", background="#f8d7da")  # light red/orange
+
+    @ui_action()
+    def admin_approve_selected_batch(self):
+        """Approves the selected batch and all its associated samples."""
+        logging.info("Attempting to approve selected batch.")
+        selected = self.batches_tree.selection()
+        if not selected:
+            messagebox.showinfo("Info", "Please select a batch to approve.")
+            logging.warning("Approve batch aborted: No batch selected.")
+            return
+
+        batch_doc_id = selected[0]
+        try:
+            batch_doc = db.collection("batches").document(batch_doc_id).get()
+
+            if not batch_doc.exists:
+                messagebox.showerror("Error", "Selected batch not found.")
+                logging.error(f"Batch with document ID {batch_doc_id} not found for approval.")
+                return
+
+            batch_data = batch_doc.to_dict()
+            if batch_data.get("status") == "approved":
+                messagebox.showinfo("Info", "Batch is already approved.")
+                logging.info(f"Batch {batch_doc_id} is already approved.")
+                return
+
+            confirm = messagebox.askyesno("Confirm Batch Approval",
+                                          f"Are you sure you want to approve batch '{batch_data.get('product_name')}' (ID: {batch_data.get('batch_id')}) and all its samples?")
+            if confirm:
+                self._set_batch_and_samples_status(batch_doc_id, batch_data, "approved")
+            else:
+                logging.info("Approve batch cancelled by user.")
+        except Exception as e:
+            logging.error(f"Failed to approve batch {batch_doc_id} and samples: {e}", exc_info=True)
+            messagebox.showerror("Error", f"Failed to approve batch and samples: {e}")
+
+    def _set_batch_and_samples_status(self, batch_doc_id, batch_data, status):
+        """Sets every sample of a batch, then the batch itself, to status. The sample updates are committed in
+        batched writes behind a progress bar; the batch is only updated once all of them succeeded. The changes
+        are published to the views on screen instead of reloading the batch list."""
+        verb = "Approve" if status == "approved" else "Reject"
+        # Use batch_id field, which samples store as the human-readable batch ID
+        samples = [{"id": sample_doc.id, "label": sample_doc.to_dict().get("sample_id") or sample_doc.id}
+                   for sample_doc in db.collection("samples").where("batch_id", "==", batch_data.get('batch_id'))
+                   .select(["sample_id"]).stream()]
+        logging.info(f"Prepared to set {len(samples)} samples of batch {batch_doc_id} to '{status}'.")
+        changes = self._sample_status_update(status)
+
+        def add_writes(batch_write, sample):
+            batch_write.update(db.collection("samples").document(sample["id"]), changes)
+
+        def on_done(progress):
+            for sample in progress.succeeded:
+                self.app.events.publish(SAMPLE_CHANGED, doc_id=sample["id"], changes=changes)
+            if progress.failed:
+                show_bulk_summary(self.root, f"{verb} Batch", progress, status.capitalize())
+                messagebox.showerror("Error", f"Batch '{batch_data.get('batch_id')}' was left unchanged because "
+                                              f"{len(progress.failed)} of its samples could not be {status}. Try again.")
+                return
+            try:
+                db.collection("batches").document(batch_doc_id).update(
+                    {"status": status, "updated_at": firebase_admin.firestore.SERVER_TIMESTAMP})
+            except Exception as e:
+                logging.error(f"Failed to set batch {batch_doc_id} to '{status}': {e}", exc_info=True)
+                messagebox.showerror("Error", f"The samples were {status}, but the batch status could not be updated: {e}")
+                return
+            self.app.events.publish(BATCH_CHANGED, batch_doc_id=batch_doc_id, changes={"status": status})
+            messagebox.showinfo("Success",
+                                f"Batch '{batch_data.get('product_name')}' and all its samples {status} successfully.")
+            logging.info(f"Batch {batch_doc_id} and {len(progress.succeeded)} samples {status} successfully.")
+
+        start_bulk_operation(self.root, db, f"{verb} Batch", samples, add_writes, on_done,
+                             action=f"batch_samples({status})")
+
+    def _sample_status_update(self, status):
+        """Returns the field updates for a sample status change, stamped so delta syncs pick it up."""
+        return {
+            "status": status,
+            "last_updated_by_user_id": self.app.current_user.get('employee_id'),
+            "last_updated_timestamp": firebase_admin.firestore.SERVER_TIMESTAMP
+        }
+
+    @ui_action()
+    def admin_reject_selected_batch(self):
+        """Rejects the selected batch and all its associated samples."""
+        logging.info("Attempting to reject selected batch.")
+        selected = self.batches_tree.selection()
+        if not selected:
+            messagebox.showinfo("Info", "Please select a batch to reject.")
+            logging.warning("Reject batch aborted: No batch selected.")
+            return
+
+        batch_doc_id = selected[0]
+        try:
+            batch_doc = db.collection("batches").document(batch_doc_id).get()
+
+            if not batch_doc.exists:
+                messagebox.showerror("Error", "Selected batch not found.")
+                logging.error(f"Batch with document ID {batch_doc_id} not found for rejection.")
+                return
+
+            batch_data = batch_doc.to_dict()
+            if batch_data.get("status") == "rejected":
+                messagebox.showinfo("Info", "Batch is already rejected.")
+                logging.info(f"Batch {batch_doc_id} is already rejected.")
+                return
+
+            confirm = messagebox.askyesno("Confirm Batch Rejection",
+                                          f"Are you sure you want to reject batch '{batch_data.get('product_name')}' (ID: {batch_data.get('batch_id')}) and all its samples?")
+            if confirm:
+                self._set_batch_and_samples_status(batch_doc_id, batch_data, "rejected")
+            else:
+                logging.info("Reject batch cancelled by user.")
+        except Exception as e:
+            logging.error(f"Failed to reject batch {batch_doc_id} and samples: {e}", exc_info=True)
+            messagebox.showerror("Error", f"Failed to reject batch and samples: {e}")
+
+    @ui_action()
+    def admin_view_samples_for_batch(self):
+        """Opens a new window to display samples associated with the selected batch with pagination."""
+        logging.info("Attempting to view samples for selected batch.")
+        selected = self.batches_tree.selection()
+        if not selected:
+            messagebox.showinfo("Info", "Please select a batch to view its samples.")
+            logging.warning("View samples aborted: No batch selected.")
+            return
+
+        batch_doc_id = selected[0]
+        try:
+            batch_doc = db.collection("batches").document(batch_doc_id).get()
+
+            if not batch_doc.exists:
+                messagebox.showerror("Error", "Selected batch not found.")
+                logging.error(f"Batch with document ID {batch_doc_id} not found for viewing samples.")
+                return
+
+            batch_data = batch_doc.to_dict()
+            batch_id_from_doc = batch_data.get("batch_id")  # Get the 'batch_id' field from the batch document
+            product_name = batch_data.get("product_name")
+            # user_employee_id = batch_data.get("user_employee_id", "")  # Get user_employee_id from batch - not used here, so commented out
+
+            if not batch_id_from_doc:
+                messagebox.showerror("Error", "Batch ID not found for the selected batch.")
+                logging.error(f"Batch ID field missing for batch document ID {batch_doc_id}.")
+                return
+
+            samples_window = tk.Toplevel(self.root)
+            samples_window.title(f"Samples for Batch: {product_name} ({batch_id_from_doc})")  # Use the actual batch_id
+            samples_window.geometry("800x550")
+            samples_window.current_page = 1  # Initialize current page for this window
+            samples_window.items_per_page = 20  # Samples per page
+            logging.info(f"Opened samples window for batch {batch_id_from_doc}.")
+
+            ttk.Label(samples_window, text=f"Samples for Batch: {product_name} (ID: {batch_id_from_doc})",
+                      font=("Helvetica", 14, "bold")).pack(pady=10)
+
+            # Several samples can be selected (Ctrl/Shift-click) and approved or rejected together
+            samples_tree = ttk.Treeview(samples_window,
+                                        columns=(
+                                            "SampleID", "Owner", "Maturation Date", "Status", "Creation Date"),
+                                        show='headings', selectmode="extended")
+
+            samples_tree.heading("SampleID", text="Sample ID")
+            samples_tree.heading("Owner", text="Owner")
+            samples_tree.heading("Maturation Date", text="Maturation Date")
+            samples_tree.heading("Status", text="Status")
+            samples_tree.heading("Creation Date", text="Creation Date")
+
+            samples_tree.column("SampleID", width=100, anchor="center")
+            samples_tree.column("Owner", width=100, anchor="center")
+            samples_tree.column("Maturation Date", width=120, anchor="center")
+            samples_tree.column("Status", width=100, anchor="center")
+            samples_tree.column("Creation Date", width=120, anchor="center")
+
+            samples_tree.pack(expand=True, fill="both", padx=10, pady=10)
+            self.app.events.subscribe(SAMPLE_CHANGED, samples_tree,
+                                      lambda doc_id, changes: self._on_admin_sample_changed(samples_tree, doc_id, changes))
+            self.app.events.subscribe(SAMPLE_DELETED, samples_tree,
+                                      lambda doc_id: samples_tree.exists(doc_id) and samples_tree.delete(doc_id))
+
+            # Pagination controls frame
+            pagination_frame = ttk.Frame(samples_window)
+            pagination_frame.pack(pady=5)
+
+            prev_button = ttk.Button(pagination_frame, text="Previous Page")
+            prev_button.pack(side="left", padx=5)
+
+            page_label = ttk.Label(pagination_frame, text="Page X of Y")
+            page_label.pack(side="left", padx=10)
+
+            next_button = ttk.Button(pagination_frame, text="Next Page")
+            next_button.pack(side="left", padx=5)
+
+            goto_page_entry = ttk.Entry(pagination_frame, width=5)
+            goto_page_entry.pack(side="left", padx=(15, 2))
+            goto_button = ttk.Button(pagination_frame, text="Go to Page")
+            goto_button.pack(side="left", padx=2)
+
+            # Start cursors of every page, from a key-only scan of the batch's samples built in the background
+            page_index = PageBoundaryIndex(db.collection("samples").where("batch_id", "==", batch_id_from_doc),
+                                           samples_window.items_per_page)
+            page_index.build_async("build_batch_samples_page_index")
+
+            # Frame for buttons below the samples tree
+            btn_sample_frame = ttk.Frame(samples_window)
+            btn_sample_frame.pack(pady=5)
+
+            # New "Approve Sample" button
+            ttk.Button(btn_sample_frame, text="Approve Sample",
+                       command=lambda: self.admin_approve_sample(samples_tree, batch_doc_id)).pack(side="left", padx=5)
+            ttk.Button(btn_sample_frame, text="Reject Sample",  # New button
+                       command=lambda: self.admin_reject_sample(samples_tree, batch_doc_id)).pack(side="left", padx=5)
+
+            def update_buttons():
+                # Enable/disable buttons based on current page
+                prev_button.config(state="normal" if samples_window.current_page > 1 else "disabled")
+                next_button.config(
+                    state="normal" if samples_window.current_page < samples_window.total_pages else "disabled")
+
+            def on_index_error(error):
+                if samples_window.winfo_exists():
+                    messagebox.showerror("Error", f"Failed to index the batch's sample pages: {error}", parent=samples_window)
+
+            @ui_action("admin_view_samples_page({page_num})")
+            def go_to_page(page_num):
+                if not samples_window.winfo_exists():
+                    return
+                if page_num > 1 and not page_index.ready:
+                    # Pages after the first start from a cursor in the page index
+                    page_label.config(text="Indexing pages...")
+                    when_index_ready(self.root, page_index, lambda: go_to_page(page_num), on_index_error)
+                    return
+                if page_index.ready and not 1 <= page_num <= page_index.page_count:
+                    messagebox.showerror("Error", f"Please enter a page number between 1 and {page_index.page_count}.",
+                                         parent=samples_window)
+                    return
+                samples_window.current_page = page_num
+                self._load_samples_into_tree(batch_id_from_doc, samples_tree, page_label,
+                                             samples_window.current_page, samples_window.items_per_page, page_index)
+                update_buttons()
+
+            def go_to_entered_page():
+                try:
+                    go_to_page(int(goto_page_entry.get().strip()))
+                except ValueError:
+                    messagebox.showerror("Error", "Please enter a page number.", parent=samples_window)
+
+            prev_button.config(command=lambda: go_to_page(samples_window.current_page - 1))
+            next_button.config(command=lambda: go_to_page(samples_window.current_page + 1))
+            goto_button.config(command=go_to_entered_page)
+            goto_page_entry.bind("<Return>", lambda event: go_to_entered_page())
+
+            # Initial load of samples for the first page
+            go_to_page(1)  # Load first page
+
+            def show_page_total():
+                if samples_window.winfo_exists():
+                    samples_window.total_pages = page_index.page_count
+                    page_label.config(text=f"Page {samples_window.current_page} of {page_index.page_count}")
+                    update_buttons()
+            when_index_ready(self.root, page_index, show_page_total, on_index_error)
+            logging.info(f"Samples window for batch {batch_id_from_doc} initialized with pagination.")
+
+        except Exception as e:
+            logging.error(f"Error opening samples view for batch {batch_doc_id}: {e}", exc_info=True)
+            messagebox.showerror("Error", f"Failed to view samples for batch: {e}")
+
+    @ui_action()
+    def admin_approve_sample(self, samples_tree_ref, batch_doc_id):
+        """Approves a selected sample and checks/updates the parent batch status."""
+        logging.info(f"Attempting to approve sample for batch document ID: {batch_doc_id}.")
+        selected_sample_iid = samples_tree_ref.selection()
+        if not selected_sample_iid:
+            messagebox.showinfo("Info", "Please select a sample to approve.")
+            logging.warning("Approve sample aborted: No sample selected.")
+            return
+        if len(selected_sample_iid) > 1:
+            self.admin_set_samples_status(samples_tree_ref, batch_doc_id, selected_sample_iid, "approved")
+            return
+
+        sample_doc_id = selected_sample_iid[0]  # Rows are keyed by the sample's Firestore document ID
+        sample_tree_data = samples_tree_ref.item(sample_doc_id, 'values')
+        sample_id_from_tree = sample_tree_data[0]  # Assuming Sample ID is the first column
+
+        if sample_tree_data[3] == "approved":
+            messagebox.showinfo("Info", "Sample is already approved.")
+            logging.info(f"Sample {sample_id_from_tree} is already approved.")
+            return
+
+        confirm = messagebox.askyesno("Confirm Approve Sample", f"Approve sample '{sample_id_from_tree}'?")
+        if not confirm:
+            logging.info("Approve sample cancelled by user.")
+            return
+
+        if not self._set_sample_status(samples_tree_ref, sample_doc_id, "approved"):
+            return
+        messagebox.showinfo("Success", f"Sample '{sample_id_from_tree}' approved successfully.")
+        logging.info(f"Sample {sample_id_from_tree} approved successfully.")
+
+        try:
+            self._roll_up_batch_status(batch_doc_id)
+        except Exception as e:
+            logging.error(f"Failed to update batch status after approving sample {sample_id_from_tree}: {e}", exc_info=True)
+            messagebox.showerror("Error", f"Failed to update batch status: {e}")
+
+    @ui_action()
+    def admin_reject_sample(self, samples_tree_ref, batch_doc_id):
+        """Rejects a selected sample and updates the parent batch status if necessary."""
+        logging.info(f"Attempting to reject sample for batch document ID: {batch_doc_id}.")
+        selected_sample_iid = samples_tree_ref.selection()
+        if not selected_sample_iid:
+            messagebox.showinfo("Info", "Please select a sample to reject.")
+            logging.warning("Reject sample aborted: No sample selected.")
+            return
+        if len(selected_sample_iid) > 1:
+            self.admin_set_samples_status(samples_tree_ref, batch_doc_id, selected_sample_iid, "rejected")
+            return
+
+        sample_doc_id = selected_sample_iid[0]
+        sample_tree_data = samples_tree_ref.item(sample_doc_id, 'values')
+        sample_id_from_tree = sample_tree_data[0]
+
+        if sample_tree_data[3] == "rejected":
+            messagebox.showinfo("Info", "Sample is already rejected.")
+            logging.info(f"Sample {sample_id_from_tree} is already rejected.")
+            return
+
+        confirm = messagebox.askyesno("Confirm Reject Sample", f"Reject sample '{sample_id_from_tree}'?")
+        if not confirm:
+            logging.info("Reject sample cancelled by user.")
+            return
+
+        if not self._set_sample_status(samples_tree_ref, sample_doc_id, "rejected"):
+            return
+        messagebox.showinfo("Success", f"Sample '{sample_id_from_tree}' rejected successfully.")
+        logging.info(f"Sample {sample_id_from_tree} rejected successfully.")
+
+        try:
+            self._reopen_batch_after_rejection(batch_doc_id)
+        except Exception as e:
+            logging.error(f"Failed to update batch status after rejecting sample {sample_id_from_tree}: {e}", exc_info=True)
+            messagebox.showerror("Error", f"Failed to update batch status: {e}")
+
+    def admin_set_samples_status(self, samples_tree_ref, batch_doc_id, sample_doc_ids, status):
+        """Approves or rejects several samples of a batch after one confirmation. The status updates are
+        committed as batched writes, and the batch status is rolled up once at the end."""
+        verb = "Approve" if status == "approved" else "Reject"
+        samples, skipped = [], []
+        for sample_doc_id in sample_doc_ids:
+            values = samples_tree_ref.item(sample_doc_id, 'values')
+            sample = {"id": sample_doc_id, "label": values[0]}
+            if values[3] == status:
+                skipped.append((sample, f"already {status}"))
+            else:
+                samples.append(sample)
+        if not samples:
+            messagebox.showinfo("Info", f"All selected samples are already {status}.")
+            return
+        skipped_text = f"\n{len(skipped)} already {status} sample(s) will be skipped." if skipped else ""
+        if not messagebox.askyesno(f"Confirm {verb} Samples", f"{verb} {len(samples)} selected sample(s)?{skipped_text}"):
+            logging.info(f"Bulk {verb.lower()} of {len(samples)} samples cancelled.")
+            return
+
+        changes = self._sample_status_update(status)
+
+        def add_writes(batch_write, sample):
+            batch_write.update(db.collection("samples").document(sample["id"]), changes)
+
+        def on_done(progress):
+            for sample in progress.succeeded:
+                self.app.events.publish(SAMPLE_CHANGED, doc_id=sample["id"], changes=changes)
+            show_bulk_summary(self.root, f"{verb} Samples", progress, status.capitalize())
+            if not progress.succeeded:
+                return
+            try:
+                if status == "approved":
+                    self._roll_up_batch_status(batch_doc_id)
+                else:
+                    self._reopen_batch_after_rejection(batch_doc_id)
+            except Exception as e:
+                logging.error(f"Failed to update batch status after bulk {verb.lower()}: {e}", exc_info=True)
+                messagebox.showerror("Error", f"Failed to update batch status: {e}")
+
+        start_bulk_operation(self.root, db, f"{verb} Samples", samples, add_writes, on_done, skipped=skipped,
+                             action=f"bulk_samples({status})")
+
+    def _reopen_batch_after_rejection(self, batch_doc_id):
+        """A batch with a rejected sample goes back to 'pending approval'."""
+        batch_ref = db.collection("batches").document(batch_doc_id)
+
+        def reopen(transaction):
+            batch_data = batch_ref.get(transaction=transaction).to_dict() or {}
+            if batch_data.get("status") == "pending approval":
+                return batch_data.get("batch_id"), None
+            transaction.update(batch_ref, {"status": "pending approval",
+                                           "updated_at": firebase_admin.firestore.SERVER_TIMESTAMP})
+            return batch_data.get("batch_id"), "pending approval"
+
+        batch_id, new_status = run_transaction(db, reopen, "batch_status_roll_up")
+        if new_status:
+            self.app.events.publish(BATCH_CHANGED, batch_doc_id=batch_doc_id, changes={"status": new_status})
+            messagebox.showinfo("Batch Status Update",
+                                f"Batch '{batch_id}' status updated to 'pending approval' as a sample was rejected.")
+            logging.info(f"Batch {batch_id} status updated to 'pending approval' due to sample rejection.")
+
+    def _set_sample_status(self, samples_tree_ref, sample_doc_id, status):
+        """Writes a sample's new status, showing it in samples_tree_ref first and reverting the row if the write
+        fails. Other views on screen are told through the event bus instead of being reloaded."""
+        changes = self._sample_status_update(status)
+        previous_status = samples_tree_ref.set(sample_doc_id, "Status")
+        samples_tree_ref.set(sample_doc_id, "Status", status)
+        try:
+            db.collection("samples").document(sample_doc_id).update(changes)
+        except Exception as e:
+            if samples_tree_ref.exists(sample_doc_id):
+                samples_tree_ref.set(sample_doc_id, "Status", previous_status)
+            logging.error(f"Failed to set sample {sample_doc_id} to '{status}': {e}", exc_info=True)
+            messagebox.showerror("Error", f"Failed to update sample status: {e}")
+            return False
+        self.app.events.publish(SAMPLE_CHANGED, doc_id=sample_doc_id, changes=changes)
+        return True
+
+    def _roll_up_batch_status(self, batch_doc_id):
+        """Sets a batch to 'approved' once all of its samples are approved, or back to 'pending approval' when an
+        approved batch has samples that aren't. Samples are counted with aggregations rather than read.
+
+        The batch read, both counts and the status write run in one transaction, so two reviewers finishing a
+        batch's last samples at the same time can't leave it with a status computed from stale counts; a
+        contended attempt is retried (see firestore_retry.py)."""
+        batch_ref = db.collection("batches").document(batch_doc_id)
+
+        def roll_up(transaction):
+            batch_data = batch_ref.get(transaction=transaction).to_dict() or {}
+            batch_id = batch_data.get("batch_id")
+            current_batch_status = batch_data.get("status")
+
+            batch_samples = db.collection("samples").where("batch_id", "==", batch_id)
+            total_samples = aggregate_count_value(batch_samples.count().get(transaction=transaction))
+            approved_samples = aggregate_count_value(
+                batch_samples.where("status", "==", "approved").count().get(transaction=transaction))
+            all_samples_approved = total_samples > 0 and approved_samples == total_samples
+            logging.debug(f"Batch {batch_id}: {approved_samples} of {total_samples} samples approved.")
+
+            new_status = None
+            if all_samples_approved and current_batch_status != "approved":
+                new_status = "approved"
+            elif not all_samples_approved and current_batch_status == "approved":
+                new_status = "pending approval"
+            if new_status:
+                transaction.update(batch_ref, {"status": new_status,
+                                               "updated_at": firebase_admin.firestore.SERVER_TIMESTAMP})
+            return batch_id, current_batch_status, new_status
+
+        batch_id, current_batch_status, new_status = run_transaction(db, roll_up, "batch_status_roll_up")
+        if new_status:
+            self.app.events.publish(BATCH_CHANGED, batch_doc_id=batch_doc_id, changes={"status": new_status})
+        if new_status == "approved":
+            messagebox.showinfo("Batch Status Update",
+                                f"Batch '{batch_id}' status updated to 'approved' as all samples are approved.")
+            logging.info(f"Batch {batch_id} status updated to 'approved'.")
+        elif new_status == "pending approval":
+            messagebox.showinfo("Batch Status Update",
+                                f"Batch '{batch_id}' status updated to 'pending approval' as some samples are not yet approved.")
+            logging.info(f"Batch {batch_id} status reverted to 'pending approval'.")
+        else:
+            logging.info(f"Batch {batch_id} status remains '{current_batch_status}'.")
+
+    def _on_batch_added(self, batch_doc_id, data):
+        """Adds a batch created elsewhere in the app if it matches the status filter shown."""
+        status_filter = self.batch_filter_var.get()
+        if self.batches_tree.exists(batch_doc_id) or (status_filter and status_filter != "all"
+                                                      and data.get("status", "pending approval") != status_filter):
+            return
+        self._insert_batch_row(batch_doc_id, data, data.get("number_of_samples", 0) or 0)
+
+    def _on_batch_changed(self, batch_doc_id, changes):
+        """Patches a batch row after a committed change; a row whose new status is outside the filter is dropped."""
+        if not self.batches_tree.exists(batch_doc_id):
+            return
+        status = changes.get("status")
+        if status is not None:
+            status_filter = self.batch_filter_var.get()
+            if status_filter and status_filter != "all" and status != status_filter:
+                self.batches_tree.delete(batch_doc_id)
+                return
+            self.batches_tree.item(batch_doc_id, tags=BATCH_STATUS_TAGS.get(status, ()))
+        for field, column in BATCH_TREE_COLUMNS.items():
+            if field in changes:
+                self.batches_tree.set(batch_doc_id, column, changes[field])
+
+    def _on_batch_sample_count_changed(self, batch_doc_id, delta):
+        if self.batches_tree.exists(batch_doc_id):
+            count = int(self.batches_tree.set(batch_doc_id, "Sample Count") or 0) + delta
+            self.batches_tree.set(batch_doc_id, "Sample Count", count)
+
+    def _on_admin_sample_changed(self, samples_tree, doc_id, changes):
+        if not samples_tree.exists(doc_id):
+            return
+        for field, column in (("owner", "Owner"), ("status", "Status")):
+            if field in changes:
+                samples_tree.set(doc_id, column, changes[field])
+        if isinstance(changes.get("maturation_date"), datetime):
+            samples_tree.set(doc_id, "Maturation Date", changes["maturation_date"].strftime("%Y-%m-%d"))
+
+    def _load_samples_into_tree(self, batch_id, samples_tree, page_label_ref, page_number, items_per_page, page_index):
+        """Helper method to load one page of a batch's samples (ordered by creation date) into the treeview.
+        Pages after the first start after their cursor in page_index, so each page is a single query."""
+        logging.info(f"Loading samples into tree for batch_id: {batch_id}, page: {page_number}.")
+        samples_tree.delete(*samples_tree.get_children())
+
+        try:
+            query = db.collection("samples").where("batch_id", "==", batch_id).order_by("creation_date").order_by("__name__")
+            if page_number > 1:
+                query = query.start_after(page_index.cursor_for_page(page_number - 1))
+            paginated_samples = query.select(LIST_VIEW_FIELDS["sample_rows"]).limit(items_per_page).get()
+
+            if page_index.ready:
+                total_samples = page_index.total_count
+                total_pages = page_index.page_count
+                page_label_ref.config(text=f"Page {page_number} of {total_pages}")
+            else:
+                # Still indexing: the total is not known yet, so allow Next only after a full page
+                total_samples = len(paginated_samples)
+                total_pages = page_number + 1 if len(paginated_samples) == items_per_page else page_number
+                page_label_ref.config(text=f"Page {page_number} of ...")
+            page_label_ref.master.master.total_pages = total_pages  # Store total_pages on the samples_window
+            logging.debug(f"Fetched {len(paginated_samples)} samples for page {page_number} of batch {batch_id}, total pages: {total_pages}.")
+
+            samples_found_on_page = 0
+            for sample in paginated_samples:
+                samples_found_on_page += 1
+                sample_data = sample.to_dict()
+                logging.debug(f"  Found sample: {sample_data.get('sample_id')}, batch_id: {sample_data.get('batch_id')}")
+
+                maturation_date_str = ""
+                if isinstance(sample_data.get('maturation_date'), datetime):
+                    maturation_date_str = sample_data['maturation_date'].strftime("%Y-%m-%d")
+                elif isinstance(sample_data.get('maturation_date'), firebase_admin.firestore.Timestamp):
+                    maturation_date_str = sample_data['maturation_date'].to_datetime().strftime("%Y-%m-%d")
+                else:
+                    maturation_date_str = str(sample_data.get('maturation_date', ''))
+
+                creation_date_str = ""
+                if isinstance(sample_data.get('creation_date'), datetime):
+                    creation_date_str = sample_data['creation_date'].strftime("%Y-%m-%d %H:%M:%S")
+                elif isinstance(sample_data.get('creation_date'), firebase_admin.firestore.Timestamp):
+                    creation_date_str = sample_data['creation_date'].to_datetime().strftime("%Y-%m-%d %H:%M:%S")
+                else:
+                    creation_date_str = str(sample_data.get('creation_date', ''))
+
+                samples_tree.insert("", "end", iid=sample.id,  # Store document ID for easy reference
+                                    values=(sample_data.get("sample_id", ""),
+                                            sample_data.get("owner", ""),
+                                            maturation_date_str,
+                                            sample_data.get("status", ""),
+                                            creation_date_str))
+            
+            if samples_found_on_page == 0 and total_samples > 0 and page_number > 1:
+                logging.info("No samples on current page, navigating to previous valid page recursively.")
+                page_label_ref.master.master.current_page = max(1, page_number - 1)
+                self._load_samples_into_tree(batch_id, samples_tree, page_label_ref,
+                                             page_label_ref.master.master.current_page, items_per_page, page_index)
+            elif samples_found_on_page == 0 and total_samples == 0:
+                logging.info(f"No samples found at all for batch_id: {batch_id}.")
+            else:
+                logging.info(f"Loaded {samples_found_on_page} samples for page {page_number} of batch {batch_id}.")
+
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to load samples for batch: {e}")
+            logging.error(f"Error loading samples into tree for batch {batch_id}: {e}", exc_info=True)
+
+    @ui_action()
+    def delete_batch(self):
+        """Deletes a selected batch and all its associated samples from Firestore."""
+        logging.info("Starting delete_batch process.")
+        selected = self.batches_tree.selection()
+        if not selected:
+            messagebox.showinfo("Info", "Please select a batch to delete.")
+            logging.warning("Delete batch aborted: No batch selected.")
+            return
+
+        firestore_batch_doc_id = selected[0]
+        # Get the displayed batch ID for the confirmation message
+        item_values = self.batches_tree.item(firestore_batch_doc_id)['values']
+        batch_id_display = item_values[0] if item_values else firestore_batch_doc_id
+
+        logging.info(f"Attempting to delete batch: DocID='{firestore_batch_doc_id}', DisplayID='{batch_id_display}'")
+
+        confirm = messagebox.askyesno("Confirm Delete Batch",
+                                      f"Are you sure you want to delete Batch '{batch_id_display}'?\n\n"
+                                      "This will PERMANENTLY DELETE ALL SAMPLES associated with this batch as well. This action cannot be undone.")
+        if not confirm:
+            logging.info("Delete batch aborted: User cancelled.")
+            return
+
+        employee_id = self.app.current_user.get('employee_id')
+        try:
+            # 1. Find all samples associated with this batch
+            # Use 'batch_id' field in samples collection, which stores the human-readable batch_id_display
+            samples = [{"id": sample_doc.id, "label": sample_doc.to_dict().get("sample_id") or sample_doc.id}
+                       for sample_doc in db.collection("samples").where("batch_id", "==", batch_id_display)
+                       .select(["sample_id"]).stream()]
+            logging.info(f"Prepared to delete {len(samples)} samples for batch '{batch_id_display}'.")
+        except Exception as e:
+            logging.error(f"Failed to delete batch '{batch_id_display}': {e}", exc_info=True)
+            messagebox.showerror("Error", f"Failed to delete batch and its samples:\n{e}")
+            return
+
+        def add_writes(batch_write, sample):
+            batch_write.delete(db.collection("samples").document(sample["id"]))
+            add_tombstone(db, batch_write, "samples", sample["id"], employee_id)
+
+        def adjust_sample_count(batch_write, chunk):
+            # Keeps the batch's count right if a later commit fails and the batch document stays
+            ShardedCounter(db, "batches", firestore_batch_doc_id, "number_of_samples").increment(batch_write, -len(chunk))
+
+        def on_done(progress):
+            # The views on screen drop the deleted rows; nothing is reloaded
+            for sample in progress.succeeded:
+                self.app.events.publish(SAMPLE_DELETED, doc_id=sample["id"])
+            if progress.failed:
+                self.app.events.publish(BATCH_SAMPLE_COUNT_CHANGED, batch_doc_id=firestore_batch_doc_id,
+                                        delta=-len(progress.succeeded))
+                show_bulk_summary(self.root, "Delete Batch", progress, "Deleted")
+                messagebox.showerror("Error", f"Batch '{batch_id_display}' was kept because {len(progress.failed)} of "
+                                              "its samples could not be deleted. Delete it again to retry.")
+                return
+            try:
+                # 2. Delete the batch document itself, once none of its samples are left
+                batch_write = db.batch()
+                batch_write.delete(db.collection("batches").document(firestore_batch_doc_id))
+                add_tombstone(db, batch_write, "batches", firestore_batch_doc_id, employee_id)
+                delete_counter_shards(db, batch_write, "batches", firestore_batch_doc_id)
+                batch_write.commit()
+            except Exception as e:
+                logging.error(f"Failed to delete batch document '{batch_id_display}': {e}", exc_info=True)
+                messagebox.showerror("Error", f"The samples of batch '{batch_id_display}' were deleted, "
+                                              f"but the batch itself could not be:\n{e}")
+                return
+            logging.info(f"Batch '{batch_id_display}' and its {len(progress.succeeded)} samples deleted.")
+            self.app.events.publish(BATCH_DELETED, batch_doc_id=firestore_batch_doc_id)
+            messagebox.showinfo("Success",
+                                f"Batch '{batch_id_display}' and its {len(progress.succeeded)} associated samples deleted successfully.")
+
+        # Samples are deleted in commits of at most MAX_WRITES_PER_BATCH writes: a delete and a tombstone per
+        # sample, plus one counter shard write per commit
+        start_bulk_operation(self.root, db, "Delete Batch", samples, add_writes, on_done, writes_per_item=3,
+                             action="delete_batch_samples", before_commit=adjust_sample_count)
+
+    #Add edit_batch
+    @ui_action()
+    def edit_batch_info(self):
+        """Opens a form to edit the product name and description of a selected batch."""
+        logging.info("Attempting to open edit batch form.")
+        selected = self.batches_tree.selection()
+        if not selected:
+            messagebox.showinfo("Info", "Please select a batch to edit.")
+            logging.warning("Edit batch aborted: No batch selected.")
+            return
+
+        batch_doc_id = selected[0]
+        try:
+            batch_doc = db.collection("batches").document(batch_doc_id).get()
+
+            if not batch_doc.exists:
+                messagebox.showerror("Error", "Selected batch not found.")
+                logging.error(f"Batch with document ID {batch_doc_id} not found for editing.")
+                return
+
+            batch_data = batch_doc.to_dict()
+            # The version the form edits; a conflict on save moves it to the version read then
+            edit_base = EditBase(batch_data, batch_doc.update_time)
+            logging.info(f"Opened edit form for batch: {batch_data.get('batch_id')}.")
+
+            edit_window = tk.Toplevel(self.root)
+            edit_window.title(f"Edit Batch: {batch_data.get('batch_id')}")
+            edit_window.geometry("400x250")
+            edit_window.transient(self.root)  # Make it appear on top of the main window
+            edit_window.grab_set()  # Make it modal
+
+            # Product Name
+            ttk.Label(edit_window, text="Product Name:").pack(pady=5)
+            product_name_entry = ttk.Entry(edit_window, width=40)
+            product_name_entry.pack(pady=5)
+            product_name_entry.insert(0, batch_data.get("product_name", ""))
+
+            # Description
+            ttk.Label(edit_window, text="Description:").pack(pady=5)
+            description_text = tk.Text(edit_window, width=30, height=5)
+            description_text.pack(pady=5)
+            description_text.insert("1.0", batch_data.get("description", ""))
+
+            @ui_action("edit_batch_info.save")
+            def save_changes():
+                logging.info(f"Attempting to save changes for batch {batch_data.get('batch_id')}.")
+                new_product_name = product_name_entry.get().strip()
+                new_description = description_text.get("1.0", tk.END).strip()
+
+                if not new_product_name:
+                    messagebox.showwarning("Input Error", "Product Name cannot be empty.")
+                    logging.warning("Product Name is empty during batch edit save.")
+                    return
+
+                try:
+                    # Conditional on the batch being unchanged since the form opened; a conflict is merged
+                    saved = save_edit(db, db.collection("batches").document(batch_doc_id), edit_base,
+                                      {"product_name": new_product_name, "description": new_description,
+                                       "updated_at": firebase_admin.firestore.SERVER_TIMESTAMP},
+                                      f"Batch '{batch_data.get('batch_id')}'", parent=edit_window)
+                    if saved is None:
+                        logging.info(f"Edit of batch {batch_doc_id} returned to the form after a conflict.")
+                        return
+                    self.app.events.publish(BATCH_CHANGED, batch_doc_id=batch_doc_id,
+                                            changes={field: saved.get(field) for field in ("product_name", "description")})
+                    messagebox.showinfo("Success", "Batch information updated successfully.")
+                    logging.info(f"Batch {batch_doc_id} information updated successfully.")
+                    edit_window.destroy()
+                except Exception as e:
+                    logging.error(f"Failed to update batch information for {batch_doc_id}: {e}", exc_info=True)
+                    messagebox.showerror("Error", f"Failed to update batch information: {e}")
+
+            ttk.Button(edit_window, text="Save Changes", command=save_changes, style="Green.TButton").pack(pady=10)
+            edit_window.protocol("WM_DELETE_WINDOW", edit_window.destroy) # Ensure window closes properly
+            logging.info(f"Edit batch form for {batch_doc_id} displayed.")
+
+        except Exception as e:
+            logging.error(f"Failed to open edit batch form for {batch_doc_id}: {e}", exc_info=True)
+            messagebox.showerror("Error", f"Failed to open edit batch form: {e}")
+
+
+    @ui_action()
+    def export_user_batches(self):
+        """Exports approved batches and their associated samples to an Excel file."""
+        logging.info("Initiating export of approved batches and samples to Excel.")
+        # Add confirmation dialog here
+        confirm = messagebox.askyesno("Confirm Export",
+                                      "Are you sure you want to export all approved batch data to Excel?")
+        if not confirm:
+            logging.info("Export cancelled by user.")
+            return  # User cancelled the export
+
+        logging.info("Attempting to export approved batches and samples to Excel.")
+        approved_batches_data = []
+        batches_ref = db.collection("batches")
+        samples_ref = db.collection("samples")
+
+        try:
+            approved_batches = batches_ref.where("status", "==", "approved").get()
+
+            if not approved_batches:
+                messagebox.showwarning("Warning", "No approved batches to export.")
+                logging.warning("No approved batches found to export.")
+                return
+
+            for batch in approved_batches:
+                batch_data = batch.to_dict()
+                actual_batch_id_field = batch_data.get("batch_id")
+                logging.debug(f"Processing batch {actual_batch_id_field} for export.")
+
+                # Query samples using the 'batch_id' field from the batch document
+                associated_samples = samples_ref.where("batch_id", "==", actual_batch_id_field).get()
+
+                # Ensure batch data is always included, even if no samples
+                if not associated_samples:
+                    logging.info(f"Batch {actual_batch_id_field} has no samples. Exporting batch data only.")
+                    combined_data = {
+                        "batch_id": batch_data.get("batch_id", ""),
+                        "product_name": batch_data.get("product_name", ""),
+                        "batch_description": batch_data.get("description", ""),
+                        "batch_status": batch_data.get("status", ""),
+                        "user_employee_id": batch_data.get("user_employee_id", ""), # Added employee ID to export
+                        "user_email": batch_data.get("user_email", ""),
+                        "sample_id": "",
+                        "sample_owner": "",
+                        "sample_maturation_date": "",
+                        "sample_status": "",
+                        "sample_creation_date": "" # Added sample creation date
+                    }
+                    approved_batches_data.append(combined_data)
+
+                for sample in associated_samples:
+                    sample_data = sample.to_dict()
+                    mat_date_str = ""
+                    sample_mat_date_obj = sample_data.get('maturation_date')
+                    if isinstance(sample_mat_date_obj, datetime):
+                        mat_date_str = sample_mat_date_obj.strftime("%Y-%m-%d")
+                    elif isinstance(sample_mat_date_obj, firebase_admin.firestore.Timestamp):
+                        mat_date_str = sample_mat_date_obj.to_datetime().strftime("%Y-%m-%d")
+                    else:
+                        mat_date_str = str(sample_mat_date_obj) if sample_mat_date_obj is not None else ''
+
+                    creation_date_str = ""
+                    sample_creation_date_obj = sample_data.get('creation_date')
+                    if isinstance(sample_creation_date_obj, datetime):
+                        creation_date_str = sample_creation_date_obj.strftime("%Y-%m-%d %H:%M:%S")
+                    elif isinstance(sample_creation_date_obj, firebase_admin.firestore.Timestamp):
+                        creation_date_str = sample_creation_date_obj.to_datetime().strftime("%Y-%m-%d %H:%M:%S")
+                    else:
+                        creation_date_str = str(sample_creation_date_obj) if sample_creation_date_obj is not None else ''
+
+
+                    combined_data = {
+                        "batch_id": batch_data.get("batch_id", ""),
+                        "product_name": batch_data.get("product_name", ""),
+                        "batch_description": batch_data.get("description", ""),
+                        "batch_status": batch_data.get("status", ""),
+                        "user_employee_id": batch_data.get("user_employee_id", ""), # Added employee ID to export
+                        "user_email": batch_data.get("user_email", ""),
+                        "sample_id": sample_data.get("sample_id", ""),
+                        "sample_owner": sample_data.get("owner", ""),
+                        "sample_maturation_date": mat_date_str,
+                        "sample_status": sample_data.get("status", ""),
+                        "sample_creation_date": creation_date_str # Added sample creation date
+                    }
+                    approved_batches_data.append(combined_data)
+
+            if not approved_batches_data:
+                messagebox.showwarning("Warning", "No approved batches with data to export.")
+                logging.warning("No data collected for approved batches, nothing to export.")
+                return
+
+            df_approved_with_samples = pd.DataFrame(approved_batches_data)
+
+            filetypes = (("Excel files", "*.xlsx"),)
+            filename = filedialog.asksaveasfilename(defaultextension=".xlsx",
+                                                    filetypes=filetypes,
+                                                    initialfile="Approved_Batches_and_Samples.xlsx")
+            if filename:
+                try:
+                    for col in df_approved_with_samples.columns:
+                        if pd.api.types.is_datetime64_any_dtype(df_approved_with_samples[col]):
+                            if df_approved_with_samples[col].dt.tz is not None:
+                                df_approved_with_samples[col] = df_approved_with_samples[col].dt.tz_localize(None)
+
+                    df_approved_with_samples.to_excel(filename, index=False)
+                    messagebox.showinfo("Success",
+                                        f"Approved batches and their samples exported to {os.path.basename(filename)}")
+                    logging.info(f"Successfully exported approved batches and samples to {filename}.")
+                except Exception as e:
+                    logging.error(f"Failed to export Excel file for approved batches: {e}", exc_info=True)
+                    messagebox.showerror("Error", f"Failed to export Excel file:\n{e}")
+            else:
+                logging.info("Export to Excel cancelled by user.")
+        except Exception as e:
+            logging.error(f"Error fetching data for Excel export: {e}", exc_info=True)
+            messagebox.showerror("Error", f"Error during data collection for export:\n{e}")
@@ -0,0 +1,383 @@
+# benchmark.py
+"""Headless benchmark of the major Firestore-backed operations.
+
+Seeds the in-memory Firestore fake (firestore_fake.py) with 1k/10k/100k samples, drives the real
+logic modules through each operation and records wall time, Firestore reads/writes and peak Python
+memory. Results are saved as JSON so runs of different versions can be compared:
+
+    python benchmark.py                                   # 1k, 10k and 100k samples
+    python benchmark.py --sizes 1000 --repeat 1
+    python benchmark.py --baseline benchmark_results/<earlier run>.json
+
+Tk still needs a display; on a machine without one, run it under xvfb-run.
+"""
+import os
+
+# Must be set before firebase_setup is imported (via main_app)
+os.environ["SHELFLIFE_FIRESTORE_BACKEND"] = "fake"
+os.environ["SHELFLIFE_OFFLINE_MIRROR"] = "0"
+
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tkinter as tk
+import tracemalloc
+from datetime import datetime, timedelta
+from tkinter import filedialog, messagebox
+
+import pandas as pd
+
+from constants import SAMPLE_STATUS_OPTIONS
+from firebase_setup import remote_db
+from firestore_metrics import metrics, track_action
+from import_pipeline import normalize_import_chunk
+from main_app import ShelfLifeApp
+
+# --- Logging Setup ---
+import logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+# --- End Logging Setup ---
+
+DEFAULT_SIZES = (1000, 10000, 100000)
+DEFAULT_RESULTS_DIR = "benchmark_results"
+SAMPLES_PER_BATCH = 100
+BATCH_STATUSES = ("pending approval", "approved", "rejected")
+REGRESSION_METRICS = ("median_s", "reads", "writes", "peak_memory_mb")
+
+BENCH_USERS = {
+    "E9001": {"username": "bench_admin", "email": "bench.admin@example.com", "role": "admin"},
+    "E9002": {"username": "bench_user", "email": "bench.user@example.com", "role": "user"},
+    "E9003": {"username": "bench_tester", "email": "bench.tester@example.com", "role": "tester"},
+}
+
+
+# --- Seeding ---
+
+def seed(store, sample_count, now=None):
+    """Fills the fake store with users, batches and sample_count samples spread over them."""
+    now = now or datetime.now()
+    store.clear()
+    store.load("users", {
+        employee_id: dict(user, employee_id=employee_id, password="benchmark", status="active")
+        for employee_id, user in BENCH_USERS.items()
+    })
+
+    owners = list(BENCH_USERS)
+    batches = {}
+    samples = {}
+    batch_count = max(1, sample_count // SAMPLES_PER_BATCH)
+    for b in range(batch_count):
+        batch_id = f"batch_bench_{b:06d}"
+        owner_id = owners[b % len(owners)]
+        batches[batch_id] = {
+            "batch_id": batch_id,
+            "product_name": f"Product {b % 50}",
+            "description": f"Benchmark batch {b}",
+            "submission_date": now - timedelta(days=b % 365),
+            "user_employee_id": owner_id,
+            "user_username": BENCH_USERS[owner_id]["username"],
+            "user_email": BENCH_USERS[owner_id]["email"],
+            "status": BATCH_STATUSES[b % len(BATCH_STATUSES)],
+            "number_of_samples": 0,
+        }
+    for i in range(sample_count):
+        batch_id = f"batch_bench_{(i // SAMPLES_PER_BATCH) % batch_count:06d}"
+        batches[batch_id]["number_of_samples"] += 1
+        submitter = batches[batch_id]["user_employee_id"]
+        created = now - timedelta(minutes=sample_count - i)
+        samples[f"bench_sample_{i:07d}"] = {
+            "sample_id": f"S{i:07d}",
+            "owner": BENCH_USERS[submitter]["username"],
+            "maturation_date": now + timedelta(days=(i % 365) - 180),
+            "status": SAMPLE_STATUS_OPTIONS[i % len(SAMPLE_STATUS_OPTIONS)],
+            "batch_id": batch_id,
+            "creation_date": created,
+            "submitted_by_employee_id": submitter,
+            "last_updated_by_user_id": submitter,
+            "last_updated_timestamp": created,
+        }
+    store.load("batches", batches)
+    store.load("samples", samples)
+    logging.info(f"Seeded {len(BENCH_USERS)} users, {len(batches)} batches and {len(samples)} samples.")
+
+
+def login_as(app, employee_id):
+    user = remote_db.collection("users").document(employee_id).get().to_dict()
+    app.current_user = dict(user, id=employee_id, employee_id=employee_id)
+    app.invalidate_screens()  # As on a real login, the previous user's dashboards are not reused
+
+
+# --- Headless dialogs ---
+
+class DialogRecorder:
+    """Answers message boxes and file dialogs so operations run unattended; errors are kept for the report."""
+
+    def __init__(self, output_dir):
+        self.output_dir = output_dir
+        self.errors = []
+        self._originals = {}
+
+    def install(self):
+        def show_error(title=None, message=None, **options):
+            self.errors.append(f"{title}: {message}")
+        patches = {
+            (messagebox, "showinfo"): lambda *args, **kwargs: "ok",
+            (messagebox, "showwarning"): lambda *args, **kwargs: "ok",
+            (messagebox, "showerror"): show_error,
+            (messagebox, "askyesno"): lambda *args, **kwargs: True,
+            (filedialog, "asksaveasfilename"): lambda *args, **kwargs: os.path.join(
+                self.output_dir, kwargs.get("initialfile") or "benchmark_export.xlsx"),
+        }
+        for (module, name), replacement in patches.items():
+            self._originals[(module, name)] = getattr(module, name)
+            setattr(module, name, replacement)
+
+    def uninstall(self):
+        for (module, name), original in self._originals.items():
+            setattr(module, name, original)
+        self._originals = {}
+
+
+# --- Operations ---
+
+class BenchmarkRunner:
+    """Runs every benchmarked operation against one seeded data size."""
+
+    def __init__(self, root, store, sample_count, repeat, import_rows, dialogs):
+        self.root = root
+        self.store = store
+        self.sample_count = sample_count
+        self.repeat = repeat
+        self.import_rows = import_rows
+        self.dialogs = dialogs
+        self.app = None
+        self._import_counter = 0
+        self.results = {}
+
+    def _import_chunks(self):
+        """Builds a normalized Excel-import chunk with sample IDs that are not in the store yet."""
+        self._import_counter += 1
+        now = datetime.now()
+        prefix = f"IMP{self._import_counter:04d}"
+        df = pd.DataFrame([{
+            "sample_id": f"{prefix}-{i:05d}",
+            "owner": "bench_user",
+            "maturation_date": now + timedelta(days=30 + i % 60),
+            "status": "pending approval",
+            "batch_id": "",
+            "creation_date": now,
+            "submitted_by_employee_id": "E9002",
+        } for i in range(self.import_rows)])
+        return [normalize_import_chunk(df, "bench_user", "E9002")[0]]
+
+    def _wait_for_import(self):
+        """Pumps Tk events until the background import has finished and its result has been handled."""
+        while self.app.user_logic.import_progress is not None:
+            self.root.update()
+            time.sleep(0.005)
+
+    def _wait_for_next_second(self):
+        # New batch IDs have one-second resolution; start each run in a fresh second so repeated runs don't collide.
+        time.sleep(1 - datetime.now().microsecond / 1_000_000)
+
+    def _new_batch_import(self):
+        form = tk.Toplevel(self.root)
+        form.withdraw()
+        self.app.user_logic._add_excel_to_new_batch_db(self._import_chunks(), "Benchmark Product", "benchmark import", form)
+        self._wait_for_import()
+
+    def _existing_batch_import(self):
+        form = tk.Toplevel(self.root)
+        form.withdraw()
+        self.app.user_logic._add_excel_to_existing_batch_db(self._import_chunks(), "batch_bench_000000", form)
+        self._wait_for_import()
+
+    def _tester_filter(self, start, end):
+        tester = self.app.tester_logic
+        tester.tester_mat_date_start_entry.set_date(start)
+        tester.tester_mat_date_end_entry.set_date(end)
+        tester.filter_samples_by_maturation_date()
+
+    def measure(self, name, operation, prepare=None):
+        """Times operation over self.repeat runs, then runs it once more under tracemalloc for peak memory.
+        prepare, if given, runs untimed before every run."""
+        timings = []
+        counts = {}
+        for _ in range(self.repeat):
+            if prepare:
+                prepare()
+            metrics.reset()
+            self.dialogs.errors = []
+            started = time.perf_counter()
+            with track_action(f"benchmark:{name}"):
+                operation()
+                self.root.update_idletasks()
+            timings.append(time.perf_counter() - started)
+            counts = metrics.snapshot()["totals"]
+
+        if prepare:
+            prepare()
+        tracemalloc.start()
+        try:
+            with track_action(f"benchmark:{name}"):
+                operation()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+        result = {
+            "median_s": round(statistics.median(timings), 4),
+            "min_s": round(min(timings), 4),
+            "runs": len(timings),
+            "reads": counts.get("reads", 0),
+            "writes": counts.get("writes", 0),
+            "deletes": counts.get("deletes", 0),
+            "bytes_read": counts.get("bytes_read", 0),
+            "peak_memory_mb": round(peak / (1024 * 1024), 2),
+            "errors": list(self.dialogs.errors),
+        }
+        self.results[name] = result
+        status = f" ERRORS: {result['errors']}" if result["errors"] else ""
+        print(f"  {name:<40} {result['median_s']:>9.3f}s {result['reads']:>9} reads "
+              f"{result['writes']:>6} writes {result['peak_memory_mb']:>9.1f} MB{status}")
+        return result
+
+    def run(self):
+        seed(self.store, self.sample_count)
+        self.app = ShelfLifeApp(self.root)
+        today = datetime.now().date()
+
+        # User dashboard (the admin dashboard is not open, as for a real user)
+        login_as(self.app, "E9002")
+        self.app.user_dashboard()
+        user = self.app.user_logic
+        self.measure("load_samples_paginated(all_samples)", lambda: user.load_samples_paginated("all_samples", reset=True))
+        self.measure("navigate_samples_page(next)", lambda: user.navigate_samples_page("next"),
+                     prepare=lambda: user.load_samples_paginated("all_samples", reset=True))
+        self.measure("load_samples_paginated(my_samples)", lambda: user.load_samples_paginated("my_samples", reset=True))
+        self.measure("refresh_tree", user.refresh_tree)
+        self.measure("load_all_user_samples_from_db_with_filters(approved)",
+                     lambda: user.load_all_user_samples_from_db_with_filters({"status": "approved"}))
+        self.measure("load_all_batches_to_tree", user.load_all_batches_to_tree)
+        self.measure("excel_import(new_batch)", self._new_batch_import, prepare=self._wait_for_next_second)
+        self.measure("excel_import(existing_batch)", self._existing_batch_import)
+
+        # Admin dashboard
+        login_as(self.app, "E9001")
+        self.app.admin_dashboard()
+        admin = self.app.admin_logic
+        self.measure("admin_dashboard", admin.admin_dashboard)
+        admin.show_batch_management()
+        for status_filter in ("all", "pending approval", "approved", "rejected"):
+            self.measure(f"load_batches({status_filter})", lambda s=status_filter: admin.load_batches(s))
+        self.measure("export_user_batches", admin.export_user_batches)
+
+        # Tester dashboard
+        login_as(self.app, "E9003")
+        self.app.test_dashboard()
+        self.measure("filter_samples_by_maturation_date(30 days)",
+                     lambda: self._tester_filter(today, today + timedelta(days=30)))
+        self.measure("filter_samples_by_maturation_date(365 days)",
+                     lambda: self._tester_filter(today - timedelta(days=180), today + timedelta(days=185)))
+
+        self.app.clear_root()
+        self.app.root.unbind_all("<Control-Shift-D>")
+        return self.results
+
+
+# --- Results ---
+
+def _git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def save_results(results, results_dir):
+    os.makedirs(results_dir, exist_ok=True)
+    file_name = f"benchmark_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{results['revision']}.json"
+    path = os.path.join(results_dir, file_name)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    return path
+
+
+def compare(current, baseline, threshold):
+    """Returns a list of regression descriptions where current is worse than baseline by more than threshold."""
+    regressions = []
+    for size, operations in current["sizes"].items():
+        for name, result in operations.items():
+            before = baseline.get("sizes", {}).get(size, {}).get(name)
+            if not before:
+                continue
+            for key in REGRESSION_METRICS:
+                old, new = before.get(key, 0), result.get(key, 0)
+                # Ignore noise on tiny timings and memory figures
+                floor = 0.01 if key == "median_s" else 1 if key == "peak_memory_mb" else 0
+                if new > old * (1 + threshold) and new - old > floor:
+                    regressions.append(f"{size} samples, {name}: {key} {old} -> {new}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark Firestore-backed operations against an in-memory fake.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES), help="Sample counts to seed")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per operation (median is reported)")
+    parser.add_argument("--import-rows", type=int, default=200, help="Rows per benchmarked Excel import")
+    parser.add_argument("--results-dir", default=DEFAULT_RESULTS_DIR, help="Where result JSON files are written")
+    parser.add_argument("--baseline", help="Earlier result file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Relative slowdown reported as a regression")
+    parser.add_argument("--log-level", default="WARNING", help="Application log level during the run")
+    args = parser.parse_args(argv)
+
+    logging.getLogger().setLevel(args.log_level.upper())
+    store = remote_db.store
+    root = tk.Tk()
+    root.withdraw()
+
+    results = {
+        "revision": _git_revision(),
+        "created_at": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": args.repeat,
+        "import_rows": args.import_rows,
+        "sizes": {},
+    }
+    with tempfile.TemporaryDirectory() as export_dir:
+        dialogs = DialogRecorder(export_dir)
+        dialogs.install()
+        try:
+            for size in args.sizes:
+                print(f"{size} samples:")
+                runner = BenchmarkRunner(root, store, size, args.repeat, args.import_rows, dialogs)
+                results["sizes"][str(size)] = runner.run()
+        finally:
+            dialogs.uninstall()
+            root.destroy()
+
+    path = save_results(results, args.results_dir)
+    print(f"Results saved to {path}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s) against {args.baseline} (revision {baseline.get('revision')}):")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print(f"No regressions against {args.baseline} (revision {baseline.get('revision')}).")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,155 @@
+# bulk_ops.py
+import threading
+import tkinter as tk
+from tkinter import ttk, messagebox
+
+from google.api_core.exceptions import FailedPrecondition
+
+from constants import BULK_PROGRESS_POLL_MS, MAX_WRITES_PER_BATCH
+from firestore_metrics import track_action
+
+# --- Logging Setup ---
+import logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+# --- End Logging Setup ---
+
+
+class BulkProgress:
+    """Thread-safe per-item results of a running bulk operation, read by the progress window.
+    Items are dicts with at least "id" and "label"; failed and skipped entries are (item, reason)."""
+
+    def __init__(self, total):
+        self._lock = threading.Lock()
+        self.total = total
+        self.succeeded = []
+        self.failed = []
+        self.skipped = []
+        self.finished = False
+
+    @property
+    def done(self):
+        return len(self.succeeded) + len(self.failed) + len(self.skipped)
+
+    def add(self, succeeded=(), failed=(), skipped=()):
+        with self._lock:
+            self.succeeded.extend(succeeded)
+            self.failed.extend(failed)
+            self.skipped.extend(skipped)
+
+    def finish(self):
+        with self._lock:
+            self.finished = True
+
+    def summary(self):
+        skipped = f", {len(self.skipped)} skipped" if self.skipped else ""
+        return f"{self.done} of {self.total} processed: {len(self.succeeded)} done, {len(self.failed)} failed{skipped}"
+
+
+def run_bulk_writes(db, items, add_writes, progress, writes_per_item=1, before_commit=None, find_changed=None):
+    """Writes items in WriteBatch commits of at most MAX_WRITES_PER_BATCH writes; add_writes(batch_write, item)
+    adds one item's writes (at most writes_per_item). before_commit(batch_write, chunk), if given, adds writes
+    that cover a whole commit, such as one counter adjustment per parent document; count them in writes_per_item.
+    A commit that fails marks its items failed and the remaining chunks still run, so the result is reported per item.
+
+    Writes may carry last_update_time preconditions; one stale item fails its whole commit. find_changed(chunk),
+    if given, then returns the (item, reason) pairs that changed since they were read: those are skipped and the
+    rest of the chunk is committed again."""
+    items_per_commit = max(1, MAX_WRITES_PER_BATCH // writes_per_item)
+    for start in range(0, len(items), items_per_commit):
+        chunk = items[start:start + items_per_commit]
+        while chunk:
+            batch_write = db.batch()
+            try:
+                for item in chunk:
+                    add_writes(batch_write, item)
+                if before_commit is not None:
+                    before_commit(batch_write, chunk)
+                batch_write.commit()
+                progress.add(succeeded=chunk)
+                break
+            except FailedPrecondition as e:
+                changed = find_changed(chunk) if find_changed is not None else []
+                if not changed:
+                    logging.error(f"Bulk write of {len(chunk)} items failed: {e}", exc_info=True)
+                    progress.add(failed=[(item, str(e)) for item in chunk])
+                    break
+                logging.info(f"{len(changed)} of {len(chunk)} items changed since they were read; skipping them.")
+                progress.add(skipped=changed)
+                changed_items = [item for item, _ in changed]
+                chunk = [item for item in chunk if item not in changed_items]
+            except Exception as e:
+                logging.error(f"Bulk write of {len(chunk)} items failed: {e}", exc_info=True)
+                progress.add(failed=[(item, str(e)) for item in chunk])
+                break
+    progress.finish()
+
+
+def start_bulk_operation(root, db, title, items, add_writes, on_done, writes_per_item=1, skipped=(), action="bulk_write",
+                         before_commit=None, find_changed=None):
+    """Runs run_bulk_writes on a background thread behind a progress window.
+    skipped are (item, reason) pairs left out up front; on_done(progress) is called on the Tk thread at the end."""
+    progress = BulkProgress(len(items) + len(skipped))
+    progress.add(skipped=skipped)
+
+    progress_window = tk.Toplevel(root)
+    progress_window.title(title)
+    progress_window.geometry("460x120")
+    progress_window.transient(root)
+    progress_window.protocol("WM_DELETE_WINDOW", lambda: None)  # Stays open until the operation ends
+    progress_bar = ttk.Progressbar(progress_window, length=400, mode="determinate", maximum=max(progress.total, 1))
+    progress_bar.pack(pady=(20, 5))
+    progress_label = ttk.Label(progress_window, text="Starting...")
+    progress_label.pack(pady=5)
+
+    def run():
+        with track_action(action):
+            run_bulk_writes(db, items, add_writes, progress, writes_per_item, before_commit, find_changed)
+
+    def poll():
+        progress_bar["value"] = progress.done
+        progress_label.config(text=progress.summary())
+        if not progress.finished:
+            root.after(BULK_PROGRESS_POLL_MS, poll)
+            return
+        progress_window.destroy()
+        logging.info(f"{title}: {progress.summary()}")
+        on_done(progress)
+
+    threading.Thread(target=run, name=action, daemon=True).start()
+    poll()
+    return progress
+
+
+def show_bulk_summary(root, title, progress, done_text="Done"):
+    """Reports the result of a bulk operation per item: a message if everything succeeded, otherwise a
+    window listing every item with its outcome."""
+    if not progress.failed and not progress.skipped:
+        messagebox.showinfo(title, f"{progress.summary()}.")
+        return
+
+    summary_window = tk.Toplevel(root)
+    summary_window.title(title)
+    summary_window.geometry("640x360")
+    summary_window.transient(root)
+    ttk.Label(summary_window, text=progress.summary(), font=("Helvetica", 10, "bold")).pack(pady=(10, 5))
+
+    tree_frame = ttk.Frame(summary_window)
+    tree_frame.pack(expand=True, fill="both", padx=10, pady=5)
+    results_tree = ttk.Treeview(tree_frame, columns=("Item", "Result"), show="headings")
+    results_tree.heading("Item", text="Item")
+    results_tree.heading("Result", text="Result")
+    results_tree.column("Item", width=200)
+    results_tree.column("Result", width=400)
+    scrollbar = ttk.Scrollbar(tree_frame, orient="vertical", command=results_tree.yview)
+    results_tree.configure(yscrollcommand=scrollbar.set)
+    results_tree.pack(side="left", expand=True, fill="both")
+    scrollbar.pack(side="right", fill="y")
+
+    for item, reason in progress.failed:
+        results_tree.insert("", "end", values=(item["label"], f"Failed: {reason}"))
+    for item, reason in progress.skipped:
+        results_tree.insert("", "end", values=(item["label"], f"Skipped: {reason}"))
+    for item in progress.succeeded:
+        results_tree.insert("", "end", values=(item["label"], done_text))
+
+    ttk.Button(summary_window, text="Close", command=summary_window.destroy).pack(pady=10)
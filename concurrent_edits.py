@@ -0,0 +1,85 @@
+# concurrent_edits.py
+from tkinter import messagebox
+
+from google.api_core.exceptions import FailedPrecondition
+
+from delta_sync import as_naive
+
+# --- Logging Setup ---
+import logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+# --- End Logging Setup ---
+
+# Stamped on every edit; they never count as conflicting
+EDIT_STAMP_FIELDS = {"last_updated_by_user_id", "last_updated_timestamp", "updated_at"}
+
+
+def _same(a, b):
+    return as_naive(a) == as_naive(b)
+
+
+def _show(value):
+    if hasattr(value, "strftime"):
+        return value.strftime("%Y-%m-%d")
+    return "(empty)" if value in (None, "") else str(value)
+
+
+class EditBase:
+    """The version of a document an edit form is based on: its data and the snapshot's update_time.
+    save_edit moves it to the latest version it reads, so the next save from the same form starts from there."""
+
+    def __init__(self, data, update_time):
+        self.data = data or {}
+        self.update_time = update_time
+
+
+def save_edit(db, doc_ref, base, changes, label, parent=None):
+    """Writes an edit made in a form opened from a snapshot (base, an EditBase).
+
+    The update carries base.update_time as a precondition, so it only succeeds if nobody saved the document in
+    between; the uncontended save is a single write. On a conflict the document is read again. Fields the
+    other person changed that this edit didn't touch are kept, and if both changed the same field a merge
+    prompt asks whose values win. Returns the document's data as saved (the latest version read with the
+    changes written on top), or None if the user went back to the form; base then holds the version just
+    read, so saving again only conflicts with changes made after it."""
+    original, update_time = base.data, base.update_time
+    edited = {field for field, value in changes.items()
+              if field not in EDIT_STAMP_FIELDS and not _same(value, original.get(field))}
+    changes = {field: value for field, value in changes.items() if field in edited or field in EDIT_STAMP_FIELDS}
+    while True:
+        if not edited:
+            return original  # Nothing of this edit is left to write
+        try:
+            option = db.write_option(last_update_time=update_time) if update_time is not None else None
+            if option is None:
+                doc_ref.update(changes)
+            else:
+                doc_ref.update(changes, option=option)
+            return dict(original, **changes)
+        except FailedPrecondition:
+            logging.info(f"{label} changed since the edit form was opened; re-reading it to merge.")
+
+        snapshot = doc_ref.get()
+        if not snapshot.exists:
+            raise ValueError(f"{label} was deleted while it was being edited.")
+        current = snapshot.to_dict()
+        base.data, base.update_time = current, snapshot.update_time
+        conflicts = sorted(field for field in edited
+                           if not _same(current.get(field), original.get(field))
+                           and not _same(current.get(field), changes[field]))
+        if conflicts:
+            details = "\n".join(f"{field}: yours '{_show(changes[field])}', theirs '{_show(current.get(field))}'"
+                                for field in conflicts)
+            choice = messagebox.askyesnocancel(
+                "Edit Conflict",
+                f"{label} was changed by someone else while you were editing it:\n\n{details}\n\n"
+                "Yes: keep your values.\nNo: keep their values (your other changes are still saved).\n"
+                "Cancel: go back to the form.", parent=parent)
+            if choice is None:
+                return None
+            if choice is False:
+                edited -= set(conflicts)
+                changes = {field: value for field, value in changes.items() if field not in conflicts}
+        # Retry against the version just read; fields this edit doesn't write keep the other person's values
+        original, update_time = current, snapshot.update_time
+        edited = {field for field in edited if not _same(changes[field], current.get(field))}
@@ -1,15 +1,111 @@
-# constants.py
-import re
-
-EMAIL_REGEX = re.compile(r"^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$")
-MIN_PASSWORD_LENGTH = 6
-EMPLOYEE_ID_REGEX = re.compile(r"^E\d+$") 
-
-NOTIFICATION_DAYS_BEFORE = 60 # 2 months approx.
-
-# Default columns for displaying samples in Treeview
-# Note: 'DocID' is for internal Firestore document ID, 'DisplaySampleID' is the user-facing ID
-COLUMNS = ["SampleID", "Owner", "MaturationDate", "Status", "BatchID", "ProductName", "Description", "TestDate", "UserEmployeeID", "UserUsername", "UserEmail", "SubmissionDate", "NumberOfSamples"]
-
-# Status options for samples
-SAMPLE_STATUS_OPTIONS = ["pending approval", "approved", "rejected", "pending test", "tested"]
+# constants.py
+import os
+import re
+
+EMAIL_REGEX = re.compile(r"^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$")
+MIN_PASSWORD_LENGTH = 6
+EMPLOYEE_ID_REGEX = re.compile(r"^E\d+$") 
+
+NOTIFICATION_DAYS_BEFORE = 60 # 2 months approx.
+
+# Default columns for displaying samples in Treeview
+# Note: 'DocID' is for internal Firestore document ID, 'DisplaySampleID' is the user-facing ID
+COLUMNS = ["SampleID", "Owner", "MaturationDate", "Status", "BatchID", "ProductName", "Description", "TestDate", "UserEmployeeID", "UserUsername", "UserEmail", "SubmissionDate", "NumberOfSamples"]
+
+# Status options for samples
+SAMPLE_STATUS_OPTIONS = ["pending approval", "approved", "rejected", "pending test", "tested"]
+
+
+# Firestore backend: "firestore" (default) or "fake" for the in-memory store in firestore_fake.py,
+# used by benchmark.py to run the app headlessly without a live project.
+FIRESTORE_BACKEND = os.environ.get("SHELFLIFE_FIRESTORE_BACKEND", "firestore")
+
+# Firestore request limits
+MAX_WRITES_PER_BATCH = 500  # Firestore rejects commits with more writes than this
+IN_QUERY_LIMIT = 30  # Firestore's maximum number of values in an "in" filter
+
+# Offline-first local mirror (see local_mirror.py)
+# Set SHELFLIFE_OFFLINE_MIRROR=1 to serve reads from the local SQLite mirror and queue writes in the outbox.
+OFFLINE_MIRROR_ENABLED = os.environ.get("SHELFLIFE_OFFLINE_MIRROR", "0") == "1"
+LOCAL_MIRROR_PATH = os.environ.get("SHELFLIFE_MIRROR_PATH", "local_mirror.db")
+MIRRORED_COLLECTIONS = ("batches", "samples", "users", "tombstones", "import_jobs", "counter_shards")
+SYNC_INTERVAL_SECONDS = 15  # How often the background sync thread pushes the outbox and pulls changes
+
+# Delta sync (see delta_sync.py)
+# Deleted documents leave a tombstone so incremental refreshes can drop them from cached views.
+TOMBSTONES_COLLECTION = "tombstones"
+# Collections that can be pulled incrementally, keyed to the timestamp field every write sets to SERVER_TIMESTAMP.
+# Deleting a document from one of them leaves a tombstone. Counter shards are left out: folded shards are deleted,
+# so the collection stays small enough to pull in full, which drops deleted shards without any tombstones.
+DELTA_SYNC_FIELDS = {"samples": "last_updated_timestamp", "tombstones": "deleted_timestamp", "batches": "updated_at",
+                     "users": "updated_at", "import_jobs": "updated_at"}
+
+# Streaming Excel/CSV import (see import_pipeline.py)
+IMPORT_CHUNK_ROWS = 5000  # Rows read, validated and converted at a time
+IMPORT_JOBS_COLLECTION = "import_jobs"  # One document per DB import, with its committed row ranges
+IMPORT_LEASE_SECONDS = 120  # A running import job not checkpointed for this long is treated as interrupted
+
+# Sharded counters (see sharded_counter.py)
+COUNTER_SHARDS = 10  # Shards per counter; concurrent increments into one batch scale with this
+COUNTER_SHARDS_COLLECTION = "counter_shards"
+COUNTER_FOLD_INTERVAL_SECONDS = 600  # How often shard values are folded into their parent documents
+COUNTER_FOLD_QUIET_SECONDS = 120  # Shards incremented more recently than this are left for a later fold
+
+# Sample page cache (see page_cache.py)
+PAGE_CACHE_PAGES_PER_VIEW = 10  # Most recently viewed pages kept per paginated view
+PAGE_CACHE_VIEWS = 6  # Most recently used paginated views kept
+PREFETCH_WAIT_SECONDS = 5  # How long Next waits for a prefetch of the page that is still in flight
+
+# Pagination totals (see count_cache.py)
+COUNT_CACHE_MAX_AGE_SECONDS = 120  # Counts older than this are recounted in the background on next use
+COUNT_POLL_MS = 200  # How often the page label checks for a count still being counted
+PAGE_INDEX_POLL_MS = 200  # How often a page jump checks whether the page index has been built
+
+# Bulk actions (see bulk_ops.py)
+BULK_PROGRESS_POLL_MS = 100  # How often a bulk action's progress bar is updated
+
+# Firestore retries (see firestore_retry.py)
+TRANSACTION_MAX_ATTEMPTS = 5  # Attempts of a contended transaction before giving up
+RETRY_BASE_DELAY_SECONDS = 0.05  # Backoff before the first retry; doubles per attempt, with full jitter
+RETRY_MAX_DELAY_SECONDS = 2.0  # Cap on a single backoff
+CALL_MAX_ATTEMPTS = 5  # Attempts of a Firestore call failing with a transient error before giving up
+# Client-side token bucket all Firestore calls pass through; a batch commit takes one token per write
+MAX_OPS_PER_SECOND = 2000  # Rate while Firestore isn't pushing back
+MIN_OPS_PER_SECOND = 20  # RESOURCE_EXHAUSTED halves the rate, down to this
+OPS_BURST = 500  # Tokens that can be spent at once (one full write batch)
+OPS_RECOVERY_PER_SECOND = 50  # How fast a lowered rate climbs back, per second
+
+# Read coalescing (see single_flight.py)
+SINGLE_FLIGHT_REUSE_SECONDS = 0.5  # A finished read also answers identical reads this soon after, until a write
+
+# User search (see helpers.py): each searchable field's leading substrings, so a prefix search is an
+# array-contains filter and the users page can still be ordered by employee ID
+USER_SEARCH_PREFIX_FIELDS = {"username": "username_prefixes", "email": "email_prefixes"}
+MAINTENANCE_COLLECTION = "maintenance"  # Markers of one-off data backfills that have run
+
+# Due-soon view (see due_soon.py)
+DUE_SOON_COLLECTION = "views"  # Materialized views; the due-soon view is "due_soon" plus a "due_soon_d<YYYYMMDD>" per day
+DUE_SOON_DAYS = 7  # Maturation days covered, starting today
+DUE_SOON_URGENT_DAYS = 3  # Days after today that are still highlighted as urgent
+DUE_SOON_REFRESH_SECONDS = 300  # How often the scheduled job brings the view up to date
+DUE_SOON_WRITE_DELAY_SECONDS = 2  # Sample writes within this long are applied to the view in one refresh
+
+# Tester scan mode (see scan_queue.py)
+SCAN_POLL_MS = 200  # How often the scan window shows lookups finished in the background
+SCAN_RETRY_SECONDS = 5  # Wait after a failed lookup before the next one; doubled per failure in a row
+SCAN_RETRY_MAX_SECONDS = 60
+
+# List query field projections
+# Each list view requests only the fields it renders (query.select); windows that show or edit a whole
+# document (sample details, edit sample, export) fetch the full document when they open.
+LIST_VIEW_FIELDS = {
+    "sample_rows": ["sample_id", "owner", "maturation_date", "status", "batch_id", "creation_date"],
+    "batch_rows": ["batch_id", "product_name", "description", "submission_date", "user_email", "status",
+                   "number_of_samples"],
+    "batch_ids": ["batch_id"],
+    "tester_sample_rows": ["sample_id", "owner", "maturation_date", "status", "batch_id", "submitted_by_employee_id"],
+    "user_rows": ["employee_id", "username", "email", "role", "status"],
+    "user_emails": ["employee_id", "email", "role"],
+    "usernames": ["username"],
+    "scan_lookup": ["sample_id", "status", "batch_id"],
+}
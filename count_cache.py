@@ -0,0 +1,103 @@
+# count_cache.py
+import threading
+import time
+
+from constants import COUNT_CACHE_MAX_AGE_SECONDS
+from firestore_metrics import track_action
+
+# --- Logging Setup ---
+import logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+# --- End Logging Setup ---
+
+
+def aggregate_count_value(aggregate_query_snapshot):
+    """Reads the value of a count aggregation result (0 if the result can't be read)."""
+    if not aggregate_query_snapshot:
+        return 0
+    try:
+        potential_result_object = aggregate_query_snapshot[0]
+        if isinstance(potential_result_object, list) and len(potential_result_object) > 0:
+            potential_result_object = potential_result_object[0]
+        if hasattr(potential_result_object, 'value'):
+            return potential_result_object.value
+        elif isinstance(potential_result_object, dict) and 'count' in potential_result_object:
+            return potential_result_object.get('count', 0)
+        logging.error(f"Unexpected structure for aggregate result object: {type(potential_result_object)}")
+    except IndexError:
+        logging.warning("AggregateQuerySnapshot was empty or index 0 out of bounds.")
+    except Exception as unexpected_e:
+        logging.error(f"Unexpected error when getting total count: {unexpected_e}", exc_info=True)
+    return 0
+
+
+class CountCache:
+    """Count aggregation results keyed by query shape (collection and equality filters).
+
+    get() never blocks: it returns the last known count (or None) and, when there is none or it is
+    stale, starts counting on a background thread. invalidate() marks a collection's counts stale after
+    a local write; the old value is still returned until the new count arrives."""
+
+    def __init__(self, db, max_age=COUNT_CACHE_MAX_AGE_SECONDS):
+        self.db = db
+        self.max_age = max_age
+        self._counts = {}  # key -> {"value", "counted_at", "stale"}
+        self._pending = set()
+        self._generation = 0  # Bumped on invalidate so counts started before it are marked stale
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(collection, filters):
+        return collection, tuple((field, op, repr(value)) for field, op, value in filters)
+
+    def peek(self, collection, filters=()):
+        """Returns the last known count or None, without starting a refresh."""
+        with self._lock:
+            entry = self._counts.get(self._key(collection, filters))
+            return entry["value"] if entry else None
+
+    def is_pending(self, collection, filters=()):
+        with self._lock:
+            return self._key(collection, filters) in self._pending
+
+    def get(self, collection, filters=()):
+        """Returns the last known count or None, refreshing it in the background if missing or stale."""
+        key = self._key(collection, filters)
+        with self._lock:
+            entry = self._counts.get(key)
+            if entry is None or entry["stale"] or time.monotonic() - entry["counted_at"] > self.max_age:
+                self._start_refresh(key, collection, list(filters))
+            return entry["value"] if entry else None
+
+    def _start_refresh(self, key, collection, filters):
+        if key in self._pending:
+            return
+        self._pending.add(key)
+        generation = self._generation
+
+        def run():
+            try:
+                with track_action(f"count({collection})"):
+                    query = self.db.collection(collection)
+                    for field, op, value in filters:
+                        query = query.where(field, op, value)
+                    value = aggregate_count_value(query.count().get())
+                with self._lock:
+                    self._counts[key] = {"value": value, "counted_at": time.monotonic(),
+                                         "stale": generation != self._generation}
+                logging.debug(f"Counted {value} documents for {key}.")
+            except Exception as e:
+                logging.warning(f"Counting {key} failed: {e}")
+            finally:
+                with self._lock:
+                    self._pending.discard(key)
+
+        threading.Thread(target=run, name=f"count-{collection}", daemon=True).start()
+
+    def invalidate(self, collection=None):
+        """Marks the counts of a collection (or all counts) stale; they are recounted on their next get()."""
+        with self._lock:
+            self._generation += 1
+            for key, entry in self._counts.items():
+                if collection is None or key[0] == collection:
+                    entry["stale"] = True
@@ -0,0 +1,121 @@
+# delta_sync.py
+from datetime import datetime
+
+from firebase_admin import firestore
+
+from constants import TOMBSTONES_COLLECTION
+
+# --- Logging Setup ---
+import logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+# --- End Logging Setup ---
+
+EPOCH = datetime(1970, 1, 1)  # Mark for a collection with no stamped documents yet
+
+
+def tombstone_id(collection, doc_id):
+    """Returns the tombstone document ID for a deleted document."""
+    return f"{collection}__{doc_id}"
+
+
+def add_tombstone(db, batch_write, collection, doc_id, deleted_by_user_id=None):
+    """Adds a tombstone for a deleted document to a write batch, so delta syncs can see the deletion."""
+    tombstone_ref = db.collection(TOMBSTONES_COLLECTION).document(tombstone_id(collection, doc_id))
+    batch_write.set(tombstone_ref, {
+        "collection": collection,
+        "doc_id": doc_id,
+        "deleted_timestamp": firestore.SERVER_TIMESTAMP,
+        "deleted_by_user_id": deleted_by_user_id,
+    })
+
+
+def as_naive(value):
+    """Drops the UTC tzinfo Firestore attaches to timestamps; marks are kept as naive UTC values, which Firestore
+    also reads as UTC when they are used in a query."""
+    if isinstance(value, datetime) and value.tzinfo is not None:
+        return value.replace(tzinfo=None)
+    return value
+
+
+class DeltaSync:
+    """Remembers a high-water mark per (collection, query) view and fetches only what changed since then.
+
+    A view is primed with server_marks() taken just before its full load. Later refreshes query documents whose
+    last_updated_timestamp is past the mark, plus tombstones of documents deleted since then, so refreshing an
+    unchanged view reads no documents. Writers stamp both fields with SERVER_TIMESTAMP, and marks only ever come
+    from timestamps read back from Firestore, so a workstation whose clock is off can't push a mark past a write."""
+
+    def __init__(self, db):
+        self.db = db
+        self._marks = {}  # view key -> {"changes": datetime, "tombstones": datetime}
+
+    def server_marks(self, collection):
+        """Returns marks ({"changes", "tombstones"}) at the newest change and deletion timestamps stored so far.
+        Every write committed later is stamped after them, so marks taken before a full load are a safe starting
+        point for its delta refreshes. Costs two document reads; safe to call off the Tk thread."""
+        return {"changes": self._newest(collection, "last_updated_timestamp"),
+                "tombstones": self._newest(TOMBSTONES_COLLECTION, "deleted_timestamp")}
+
+    def _newest(self, collection, field):
+        docs = self.db.collection(collection).order_by(field, direction=firestore.Query.DESCENDING) \
+            .limit(1).select([field]).get()
+        value = as_naive(docs[0].to_dict().get(field)) if docs else None
+        return value if isinstance(value, datetime) else EPOCH
+
+    def prime(self, key, marks):
+        """Records that the view identified by key was fully loaded after server_marks() returned marks."""
+        self._marks[key] = dict(marks)
+        logging.debug(f"Delta sync mark primed for {key} at {marks}.")
+
+    def has_mark(self, key):
+        return key in self._marks
+
+    def marks(self, key):
+        """Returns a copy of a view's marks ({"changes", "tombstones"}), e.g. to store them with the view."""
+        return dict(self._marks[key])
+
+    def restore(self, key, marks):
+        """Sets a view's marks to ones saved earlier with marks()."""
+        self._marks[key] = {"changes": as_naive(marks["changes"]), "tombstones": as_naive(marks["tombstones"])}
+
+    def forget(self, key=None):
+        """Drops the mark for one view, or for all views when key is None (e.g. on logout)."""
+        if key is None:
+            self._marks.clear()
+        else:
+            self._marks.pop(key, None)
+
+    def fetch_changes(self, key, collection, equality_filters=(), field_paths=None):
+        """Returns (changed_snapshots, deleted_doc_ids) for a primed view and advances its mark.
+        equality_filters are (field, "==", value) clauses of the view that Firestore can apply server-side;
+        range conditions must be re-checked by the caller. field_paths projects the changed documents to the
+        fields the view renders (the change timestamp is always included)."""
+        mark = self._marks[key]
+
+        changes_query = self.db.collection(collection)
+        for field_path, op, value in equality_filters:
+            changes_query = changes_query.where(field_path, op, value)
+        changes_query = changes_query.where("last_updated_timestamp", ">", mark["changes"])
+        if field_paths is not None:
+            changes_query = changes_query.select(list(field_paths) + ["last_updated_timestamp"])
+        changed = list(changes_query.stream())
+
+        tombstones_query = self.db.collection(TOMBSTONES_COLLECTION) \
+            .where("collection", "==", collection) \
+            .where("deleted_timestamp", ">", mark["tombstones"])
+        tombstones = [doc.to_dict() for doc in tombstones_query.stream()]
+
+        # Advance the marks to the newest timestamps actually seen, so the next refresh skips these documents.
+        for doc in changed:
+            updated_at = as_naive(doc.to_dict().get("last_updated_timestamp"))
+            if isinstance(updated_at, datetime) and updated_at > mark["changes"]:
+                mark["changes"] = updated_at
+        for tombstone in tombstones:
+            deleted_at = as_naive(tombstone.get("deleted_timestamp"))
+            if isinstance(deleted_at, datetime) and deleted_at > mark["tombstones"]:
+                mark["tombstones"] = deleted_at
+
+        changed_ids = {doc.id for doc in changed}
+        deleted_ids = {t.get("doc_id") for t in tombstones if t.get("doc_id") not in changed_ids}
+        logging.info(f"Delta sync for {key}: {len(changed)} changed, {len(deleted_ids)} deleted.")
+        return changed, deleted_ids
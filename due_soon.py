@@ -0,0 +1,278 @@
+# due_soon.py
+"""Materialized due-soon view: the samples maturing today and in the next few days, one document per day.
+
+The tester dashboard opens on this view with one batched read of its documents instead of a maturation date
+range query, a read of every user for the email columns and per-row urgency calculations. A meta document holds
+the window and the delta sync marks, and each maturation day is a bucket document carrying its urgency class
+("today", "urgent" or "this_week"), so no document grows with more than one day's samples:
+
+    views/due_soon = {
+        "window_start": <today 00:00>, "days": 7, "built_at": <server time>, "refreshed_at": <server time>,
+        "synced_changes": <delta sync mark>, "synced_tombstones": <delta sync mark>,
+        "user_emails": {employee_id: email}, "test_team_emails": "a@lab, b@lab",
+    }
+    views/due_soon_d20250611 = {"day": <2025-06-11 00:00>, "urgency": "today",
+                                "samples": {doc_id: {sample_id, owner, ...}}}
+
+It is rebuilt with a range query once the day changes, and kept up to date in between by a delta sync of the
+samples changed or deleted since its marks (see delta_sync.py). The marks are server timestamps: a rebuild starts
+from server_marks() taken before its range query, and a refresh advances them to the newest change it saw.
+Refreshes run after sample writes in the app and on a schedule. A refresh commits the meta document and only the
+day buckets it changed in one batch. Two refreshes racing can at worst leave the older marks behind with a
+bucket already holding newer changes, and the next refresh picks the same changes up and applies them again.
+
+    python due_soon.py        # rebuild the view, e.g. from a nightly scheduled task
+"""
+import threading
+import time
+from datetime import datetime, timedelta
+
+from firebase_admin import firestore
+
+from constants import (DUE_SOON_COLLECTION, DUE_SOON_DAYS, DUE_SOON_REFRESH_SECONDS, DUE_SOON_URGENT_DAYS,
+                       DUE_SOON_WRITE_DELAY_SECONDS, IN_QUERY_LIMIT, LIST_VIEW_FIELDS)
+from delta_sync import DeltaSync, as_naive
+from firestore_metrics import track_action
+
+# --- Logging Setup ---
+import logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+# --- End Logging Setup ---
+
+DUE_SOON_DOCUMENT = "due_soon"
+_VIEW_KEY = ("views", DUE_SOON_DOCUMENT)
+
+
+def day_key(day):
+    """Bucket key of a maturation day; a plain field name, so it never needs quoting in field paths."""
+    return day.strftime("d%Y%m%d")
+
+
+def urgency_class(days_left):
+    if days_left == 0:
+        return "today"
+    if 0 < days_left <= DUE_SOON_URGENT_DAYS:
+        return "urgent"
+    return "this_week"
+
+
+def _today():
+    return datetime.combine(datetime.today().date(), datetime.min.time())
+
+
+class DueSoonView:
+    """Reads and maintains the due-soon view document."""
+
+    def __init__(self, db, days=DUE_SOON_DAYS):
+        self.db = db
+        self.days = days
+        self._lock = threading.Lock()
+        self._refresh_scheduled = False
+        self._thread = None
+        self._stop_event = threading.Event()
+
+    def _ref(self, key=None):
+        """The meta document, or the bucket document of day key."""
+        name = DUE_SOON_DOCUMENT if key is None else f"{DUE_SOON_DOCUMENT}_{key}"
+        return self.db.collection(DUE_SOON_COLLECTION).document(name)
+
+    def _day_keys(self, window_start, days):
+        return [day_key(as_naive(window_start) + timedelta(days=offset)) for offset in range(days)]
+
+    def _read(self):
+        """Reads the meta document and today's bucket documents in one call. Returns the view with its buckets
+        ({day key: bucket}) under "buckets", or None if it is missing or from an earlier day, together with the
+        meta document as read (None if missing) so a rebuild can drop the buckets of its old window."""
+        today = _today()
+        keys = self._day_keys(today, self.days)
+        snapshots = {snapshot.id: snapshot for snapshot in self.db.get_all([self._ref()] + [self._ref(key) for key in keys])}
+        meta = snapshots.get(DUE_SOON_DOCUMENT)
+        previous = meta.to_dict() if meta is not None and meta.exists else None
+        if previous is None or as_naive(previous.get("window_start")) != today or previous.get("days") != self.days:
+            return None, previous
+        view = dict(previous)
+        view["buckets"] = {}
+        for key in keys:
+            snapshot = snapshots.get(f"{DUE_SOON_DOCUMENT}_{key}")
+            if snapshot is not None and snapshot.exists:
+                view["buckets"][key] = snapshot.to_dict()
+        return view, previous
+
+    def load(self):
+        """Returns the view for today: one batched read of its documents, plus a rebuild if it is missing or from
+        an earlier day."""
+        view, previous = self._read()
+        if view is None:
+            return self.rebuild(previous)
+        return view
+
+    def rebuild(self, previous=None):
+        """Rebuilds the view from a maturation date range query and returns it. previous is the meta document
+        of the view being replaced, if any; its day buckets outside the new window are deleted."""
+        today = _today()
+        # Taken before the range query: every write it might miss is stamped after these, so refreshes catch it
+        marks = DeltaSync(self.db).server_marks("samples")
+        samples = self.db.collection("samples") \
+            .where("maturation_date", ">=", today) \
+            .where("maturation_date", "<", today + timedelta(days=self.days)) \
+            .select(LIST_VIEW_FIELDS["tester_sample_rows"]).get()
+        entries = {sample.id: self._entry(sample.to_dict()) for sample in samples}
+
+        user_emails, test_team_emails = {}, []
+        for user_doc in self.db.collection("users").select(LIST_VIEW_FIELDS["user_emails"]).get():
+            user_data = user_doc.to_dict()
+            if user_data.get("employee_id"):
+                user_emails[user_data["employee_id"]] = user_data.get("email", "N/A")
+            if user_data.get("role") == "tester" and user_data.get("email"):
+                test_team_emails.append(user_data["email"])
+        submitters = {entry.get("submitted_by_employee_id") for entry in entries.values()}
+        view = {
+            "window_start": today,
+            "days": self.days,
+            "built_at": firestore.SERVER_TIMESTAMP,
+            "synced_changes": marks["changes"],
+            "synced_tombstones": marks["tombstones"],
+            "user_emails": {employee_id: email for employee_id, email in user_emails.items() if employee_id in submitters},
+            "test_team_emails": ", ".join(test_team_emails) if test_team_emails else "N/A",
+        }
+        keys = self._day_keys(today, self.days)
+        stale_keys = []
+        if previous and isinstance(as_naive(previous.get("window_start")), datetime):
+            stale_keys = [key for key in self._day_keys(previous["window_start"], previous.get("days") or 0)
+                          if key not in keys]
+        # Every day of the window is written, empty days too, so no bucket is left from an earlier build
+        self._store(view, entries, keys, stale_keys)
+        logging.info(f"Due-soon view rebuilt with {len(entries)} samples.")
+        return view
+
+    def refresh(self):
+        """Applies the samples changed or deleted since the view's marks and returns the view. Writes the
+        meta document and the day buckets that changed, if any (or rebuilds the view if it is from an earlier day)."""
+        view, previous = self._read()
+        if view is None:
+            return self.rebuild(previous)
+
+        sync = DeltaSync(self.db)
+        sync.restore(_VIEW_KEY, {"changes": view["synced_changes"], "tombstones": view["synced_tombstones"]})
+        changed, deleted_ids = sync.fetch_changes(_VIEW_KEY, "samples", field_paths=LIST_VIEW_FIELDS["tester_sample_rows"])
+        marks = sync.marks(_VIEW_KEY)
+        if not changed and not deleted_ids:
+            return view
+
+        entries = self.entries(view)
+        for doc_id in deleted_ids:
+            entries.pop(doc_id, None)
+        window_end = as_naive(view["window_start"]) + timedelta(days=self.days)
+        for sample in changed:
+            entries.pop(sample.id, None)
+            data = sample.to_dict()
+            maturation_date = as_naive(data.get("maturation_date"))
+            if isinstance(maturation_date, datetime) and as_naive(view["window_start"]) <= maturation_date < window_end:
+                entries[sample.id] = self._entry(data)
+
+        user_emails = dict(view.get("user_emails") or {})
+        unknown = sorted({entry.get("submitted_by_employee_id") for entry in entries.values()} - set(user_emails) - {None})
+        for start in range(0, len(unknown), IN_QUERY_LIMIT):
+            chunk = unknown[start:start + IN_QUERY_LIMIT]
+            for user_doc in self.db.collection("users").where("employee_id", "in", chunk) \
+                    .select(LIST_VIEW_FIELDS["user_emails"]).get():
+                user_data = user_doc.to_dict()
+                user_emails[user_data["employee_id"]] = user_data.get("email", "N/A")
+
+        view.update(synced_changes=marks["changes"], synced_tombstones=marks["tombstones"], user_emails=user_emails)
+        old_buckets = view.pop("buckets")
+        new_buckets = self._buckets(view, entries)
+        changed_keys = [key for key in self._day_keys(view["window_start"], self.days)
+                        if (new_buckets.get(key) or {}).get("samples", {}) != (old_buckets.get(key) or {}).get("samples", {})]
+        self._store(view, entries, changed_keys)
+        logging.info(f"Due-soon view refreshed: {len(changed)} changed, {len(deleted_ids)} deleted samples, "
+                     f"{len(changed_keys)} day(s) rewritten.")
+        return view
+
+    def _entry(self, data):
+        entry = {field: data.get(field) for field in LIST_VIEW_FIELDS["tester_sample_rows"]}
+        entry["maturation_date"] = as_naive(entry["maturation_date"])
+        return entry
+
+    def _buckets(self, view, entries):
+        """Groups entries ({doc_id: sample fields}) into {day key: bucket} by maturation day."""
+        window_start = as_naive(view["window_start"])
+        buckets = {}
+        for doc_id, entry in entries.items():
+            day = datetime.combine(as_naive(entry["maturation_date"]).date(), datetime.min.time())
+            bucket = buckets.setdefault(day_key(day), {"day": day, "urgency": urgency_class((day - window_start).days),
+                                                       "samples": {}})
+            bucket["samples"][doc_id] = entry
+        return buckets
+
+    def _store(self, view, entries, keys, stale_keys=()):
+        """Writes the meta document with the day buckets in keys (empty days included) in one batch, deleting
+        the buckets in stale_keys. Leaves the buckets, as written, under view["buckets"]."""
+        window_start = as_naive(view["window_start"])
+        buckets = self._buckets(view, entries)
+        for key in keys:
+            if key not in buckets:
+                day = datetime.strptime(key, "d%Y%m%d")
+                buckets[key] = {"day": day, "urgency": urgency_class((day - window_start).days), "samples": {}}
+        view["refreshed_at"] = firestore.SERVER_TIMESTAMP
+        batch_write = self.db.batch()
+        batch_write.set(self._ref(), view)
+        for key in keys:
+            batch_write.set(self._ref(key), buckets[key])
+        for key in stale_keys:
+            batch_write.delete(self._ref(key))
+        batch_write.commit()
+        view["buckets"] = buckets
+
+    @staticmethod
+    def entries(view):
+        """Returns {doc_id: sample fields} of every sample in the view."""
+        return {doc_id: entry for bucket in (view.get("buckets") or {}).values()
+                for doc_id, entry in bucket["samples"].items()}
+
+    def refresh_soon(self, delay=DUE_SOON_WRITE_DELAY_SECONDS):
+        """Refreshes the view in the background after delay; sample writes meanwhile share the one refresh."""
+        with self._lock:
+            if self._refresh_scheduled:
+                return
+            self._refresh_scheduled = True
+
+        def run():
+            time.sleep(delay)
+            with self._lock:
+                self._refresh_scheduled = False
+            self._refresh_logged("refresh_due_soon")
+
+        threading.Thread(target=run, name="DueSoonRefresh", daemon=True).start()
+
+    def _refresh_logged(self, action):
+        try:
+            with track_action(action):
+                self.refresh()
+        except Exception as e:
+            logging.warning(f"Refreshing the due-soon view failed, will retry on the next refresh: {e}")
+
+    def start(self, interval=DUE_SOON_REFRESH_SECONDS):
+        """Starts the scheduled refresh thread (once; later calls do nothing while it runs)."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+
+        def run():
+            while not self._stop_event.wait(interval):
+                self._refresh_logged("scheduled_due_soon_refresh")
+
+        self._thread = threading.Thread(target=run, name="DueSoonSchedule", daemon=True)
+        self._thread.start()
+        logging.info("Due-soon view refresh scheduled.")
+
+    def stop(self):
+        self._stop_event.set()
+
+
+if __name__ == "__main__":
+    from firebase_setup import db
+    with track_action("rebuild_due_soon"):
+        due_soon = DueSoonView(db)
+        built = due_soon.rebuild(due_soon._read()[1])
+    print(f"Due-soon view rebuilt: {len(DueSoonView.entries(built))} samples in the next {built['days']} days.")
@@ -0,0 +1,52 @@
+# event_bus.py
+import tkinter as tk
+
+# --- Logging Setup ---
+import logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+# --- End Logging Setup ---
+
+# Events published after a write has been committed. Payloads are keyword arguments:
+SAMPLE_CHANGED = "sample_changed"  # doc_id, changes ({field: new value})
+SAMPLE_DELETED = "sample_deleted"  # doc_id
+BATCH_ADDED = "batch_added"  # batch_doc_id, data (the new batch's fields)
+BATCH_CHANGED = "batch_changed"  # batch_doc_id, changes ({field: new value})
+BATCH_DELETED = "batch_deleted"  # batch_doc_id
+BATCH_SAMPLE_COUNT_CHANGED = "batch_sample_count_changed"  # batch_doc_id, delta
+
+
+def widget_exists(widget):
+    try:
+        return bool(widget.winfo_exists())
+    except tk.TclError:
+        return False  # The application window itself is gone
+
+
+class EventBus:
+    """Tells the views on screen about committed changes so they can patch their rows in place.
+
+    A view subscribes with the widget that shows the data (usually its Treeview). Events are only delivered
+    while that widget exists; subscriptions of destroyed widgets are dropped on the next publish, so views
+    that are not mounted cost nothing and never trigger reloads."""
+
+    def __init__(self):
+        self._subscribers = {}  # event -> list of (widget, callback)
+
+    def subscribe(self, event, widget, callback):
+        """Calls callback(**payload) for every published event while widget exists."""
+        subscribers = self._subscribers.setdefault(event, [])
+        if (widget, callback) not in subscribers:
+            subscribers.append((widget, callback))
+
+    def publish(self, event, **payload):
+        """Delivers event to the mounted subscribers; returns how many were notified."""
+        subscribers = self._subscribers.get(event, [])
+        mounted = [(widget, callback) for widget, callback in subscribers if widget_exists(widget)]
+        self._subscribers[event] = mounted
+        for widget, callback in mounted:
+            try:
+                callback(**payload)
+            except Exception as e:
+                logging.error(f"Handling {event} in {widget} failed: {e}", exc_info=True)
+        logging.debug(f"Published {event} to {len(mounted)} view(s).")
+        return len(mounted)
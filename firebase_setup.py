@@ -1,17 +1,48 @@
-# firebase_setup.py
-import firebase_admin
-from firebase_admin import credentials, firestore
-from tkinter import messagebox
-
-# Path to your Firebase service account key file
-# Replace "firebase_config.json" with the actual path if it's not in the same directory
-try:
-    cred = credentials.Certificate("firebase_config.json")
-    firebase_admin.initialize_app(cred)
-    db = firestore.client()
-except Exception as e:
-    messagebox.showerror("Firebase Error", f"Failed to initialize Firebase: {e}\nPlease ensure 'firebase_config.json' is correctly placed and accessible.")
-    # In a real application, you might want to log this error and exit more gracefully,
-    # or handle it within the main application flow.
-    # For now, we exit if Firebase setup is critical.
-    exit()
+# firebase_setup.py
+import os
+import firebase_admin
+from firebase_admin import credentials, firestore
+from tkinter import messagebox
+from constants import FIRESTORE_BACKEND, OFFLINE_MIRROR_ENABLED, LOCAL_MIRROR_PATH
+from firestore_metrics import instrument_client
+
+
+def _create_firestore_client():
+    """Creates the Firestore client. If FIRESTORE_EMULATOR_HOST is set, connects to the local emulator
+    with anonymous credentials instead of the service account. The "fake" backend uses an in-memory store."""
+    if FIRESTORE_BACKEND == "fake":
+        from firestore_fake import FakeFirestoreClient
+        return FakeFirestoreClient()
+
+    if os.environ.get("FIRESTORE_EMULATOR_HOST"):
+        from google.auth.credentials import AnonymousCredentials
+        from google.cloud import firestore as cloud_firestore
+        project_id = os.environ.get("GCLOUD_PROJECT", "seprojectapr25")
+        return cloud_firestore.Client(project=project_id, credentials=AnonymousCredentials())
+
+    # Path to your Firebase service account key file
+    # Replace "firebase_config.json" with the actual path if it's not in the same directory
+    cred = credentials.Certificate("firebase_config.json")
+    firebase_admin.initialize_app(cred)
+    return firestore.client()
+
+
+try:
+    # Every Firestore call is accounted to the UI action that caused it (see firestore_metrics.py)
+    remote_db = instrument_client(_create_firestore_client())
+    db = remote_db
+    mirror = None
+    if OFFLINE_MIRROR_ENABLED:
+        # Serve reads from the local SQLite mirror and queue writes in its outbox (see local_mirror.py)
+        from local_mirror import LocalMirror, MirrorClient
+        mirror = LocalMirror(remote_db, LOCAL_MIRROR_PATH)
+        if not mirror.is_hydrated():
+            mirror.sync_once()  # First run: populate the mirror before the first screen is shown
+        mirror.start()
+        db = MirrorClient(mirror)
+except Exception as e:
+    messagebox.showerror("Firebase Error", f"Failed to initialize Firebase: {e}\nPlease ensure 'firebase_config.json' is correctly placed and accessible.")
+    # In a real application, you might want to log this error and exit more gracefully,
+    # or handle it within the main application flow.
+    # For now, we exit if Firebase setup is critical.
+    exit()
@@ -0,0 +1,133 @@
+# firestore_fake.py
+import copy
+import threading
+
+from google.api_core.exceptions import AlreadyExists, InvalidArgument, NotFound
+
+from constants import MAX_WRITES_PER_BATCH
+from firestore_query import apply_field_writes, run_query
+from local_mirror import (MirrorCollectionReference, MirrorSnapshot, MirrorTransaction, MirrorWriteBatch, WriteOption,
+                          check_preconditions, next_update_time)
+
+# --- Logging Setup ---
+import logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+# --- End Logging Setup ---
+
+
+class FakeFirestore:
+    """In-memory, Firestore-compatible document store for benchmarks and headless runs.
+
+    It speaks the same store interface as LocalMirror (get_document, query, count, apply_writes),
+    so the Firestore facade in local_mirror.py can sit on top of it unchanged. Queries are
+    evaluated with Firestore's ordering and cursor semantics (see firestore_query.py)."""
+
+    remote_db = None  # Nothing behind the fake; MirrorWriteBatch never needs to forward writes
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._docs = {}
+        self._update_times = {}  # (collection, doc_id) -> time of the document's last write
+        self._last_update_time = None
+
+    def collection_names(self):
+        with self._lock:
+            return sorted(name for name, docs in self._docs.items() if docs)
+
+    def load(self, collection, documents):
+        """Bulk-loads {doc_id: data} into a collection without going through write batches (used for seeding)."""
+        with self._lock:
+            target = self._docs.setdefault(collection, {})
+            for doc_id, data in documents.items():
+                target[doc_id] = apply_field_writes({}, data)
+                self._touch(collection, doc_id)
+
+    def clear(self):
+        with self._lock:
+            self._docs.clear()
+            self._update_times.clear()
+
+    def _touch(self, collection, doc_id):
+        self._last_update_time = next_update_time(self._last_update_time)
+        self._update_times[(collection, doc_id)] = self._last_update_time
+
+    def get_update_time(self, collection, doc_id):
+        with self._lock:
+            return self._update_times.get((collection, doc_id))
+
+    def get_document(self, collection, doc_id):
+        with self._lock:
+            data = self._docs.get(collection, {}).get(doc_id)
+            return copy.deepcopy(data) if data is not None else None
+
+    def query(self, collection, filters=(), orders=(), start_after=None, offset=0, limit=None):
+        with self._lock:
+            results = run_query(self._docs.get(collection, {}).items(), filters, orders, start_after, offset, limit)
+            return [(doc_id, copy.deepcopy(data)) for doc_id, data in results]
+
+    def count(self, collection, filters=()):
+        with self._lock:
+            return len(run_query(self._docs.get(collection, {}).items(), filters))
+
+    def apply_writes(self, writes, preconditions=None):
+        """Applies a list of (op, collection, doc_id, data, merge) writes atomically, like a committed WriteBatch.
+        preconditions ({(collection, doc_id): last_update_time}) fail the whole batch if a document changed since.
+        Returns the commit time, which is every written document's update time and the value of its
+        SERVER_TIMESTAMP fields, as in Firestore."""
+        if len(writes) > MAX_WRITES_PER_BATCH:
+            raise InvalidArgument(f"maximum {MAX_WRITES_PER_BATCH} writes allowed per request")
+        with self._lock:
+            check_preconditions(self._update_times, preconditions)
+            commit_time = next_update_time(self._last_update_time)
+            staged = {}
+            for op, collection, doc_id, data, merge in writes:
+                key = (collection, doc_id)
+                current = staged[key] if key in staged else self._docs.get(collection, {}).get(doc_id)
+                if op == "update" and current is None:
+                    raise NotFound(f"No document to update: {collection}/{doc_id}")
+                if op == "create" and current is not None:
+                    raise AlreadyExists(f"Document already exists: {collection}/{doc_id}")
+                if op == "delete":
+                    staged[key] = None
+                elif op == "update" or merge:
+                    staged[key] = apply_field_writes(current, data, commit_time)
+                else:
+                    staged[key] = apply_field_writes({}, data, commit_time)
+
+            for (collection, doc_id), new_data in staged.items():
+                if new_data is None:
+                    self._docs.get(collection, {}).pop(doc_id, None)
+                    self._update_times.pop((collection, doc_id), None)
+                else:
+                    self._docs.setdefault(collection, {})[doc_id] = new_data
+                    self._update_times[(collection, doc_id)] = commit_time
+            self._last_update_time = commit_time
+            return commit_time
+
+
+class FakeFirestoreClient:
+    """Drop-in replacement for the Firestore client backed by a FakeFirestore store."""
+
+    def __init__(self, store=None):
+        self.store = store if store is not None else FakeFirestore()
+
+    def collection(self, collection_path):
+        return MirrorCollectionReference(self.store, collection_path)
+
+    def batch(self):
+        return MirrorWriteBatch(self.store)
+
+    def transaction(self, **kwargs):
+        return MirrorTransaction(self.store)
+
+    def write_option(self, last_update_time=None):
+        return WriteOption(last_update_time)
+
+    def get_all(self, references, field_paths=None, transaction=None):
+        for reference in references:
+            yield MirrorSnapshot(reference, self.store.get_document(reference.collection_name, reference.id),
+                                 self.store.get_update_time(reference.collection_name, reference.id))
+
+    def collections(self):
+        return [MirrorCollectionReference(self.store, name) for name in self.store.collection_names()]
+
@@ -0,0 +1,689 @@
+# firestore_metrics.py
+import bisect
+import functools
+import inspect
+import json
+import math
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+from google.cloud.firestore_v1 import transforms
+
+from single_flight import SingleFlight
+
+# --- Logging Setup ---
+import logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+# --- End Logging Setup ---
+
+UNATTRIBUTED_ACTION = "(unattributed)"
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is open-ended.
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000)
+_RECENT_LATENCIES = 1000  # Latencies kept per action for percentiles
+
+_action_state = threading.local()
+
+
+# --- Document size estimates (Firestore storage size rules) ---
+
+def _value_size(value):
+    if value is None or isinstance(value, bool):
+        return 1
+    if isinstance(value, (int, float, datetime)):
+        return 8
+    if isinstance(value, str):
+        return len(value.encode("utf-8")) + 1
+    if isinstance(value, bytes):
+        return len(value)
+    if isinstance(value, (list, tuple)):
+        return sum(_value_size(v) for v in value)
+    if isinstance(value, dict):
+        return sum(len(str(k).encode("utf-8")) + 1 + _value_size(v) for k, v in value.items())
+    return 8  # Sentinels (Increment, SERVER_TIMESTAMP), GeoPoints, references
+
+
+def estimate_document_size(path, data):
+    """Approximates the billed size of a document: its name plus fields plus 32 bytes of overhead."""
+    name_size = sum(len(segment.encode("utf-8")) + 1 for segment in path.split("/")) + 16
+    return name_size + _value_size(data or {}) + 32
+
+
+# --- Statistics ---
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram with a window of recent samples for percentiles."""
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.total_ms = 0.0
+        self.recent = deque(maxlen=_RECENT_LATENCIES)
+
+    def add(self, latency_ms):
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS_MS, latency_ms)] += 1
+        self.total_ms += latency_ms
+        self.recent.append(latency_ms)
+
+    def percentile(self, pct):
+        if not self.recent:
+            return 0.0
+        ordered = sorted(self.recent)
+        return ordered[min(len(ordered) - 1, int(math.ceil(pct / 100.0 * len(ordered))) - 1)]
+
+    def to_dict(self):
+        labels = [f"<={bound}ms" for bound in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]}ms"]
+        return {
+            "buckets": dict(zip(labels, self.counts)),
+            "total_ms": round(self.total_ms, 2),
+            "p50_ms": round(self.percentile(50), 2),
+            "p95_ms": round(self.percentile(95), 2),
+            "p99_ms": round(self.percentile(99), 2),
+        }
+
+
+class ActionStats:
+    """Firestore usage attributed to one UI action."""
+
+    def __init__(self, name):
+        self.name = name
+        self.calls = 0
+        self.reads = 0
+        self.writes = 0
+        self.deletes = 0
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.operations = {}  # "collection.op" -> count
+        self.transactions = 0
+        self.transaction_attempts = 0
+        self.transaction_conflicts = 0  # Attempts that lost to a concurrent transaction and were retried
+        self.transactions_failed = 0
+        self.retries = {}  # error kind -> calls retried after it
+        self.retries_exhausted = 0  # Calls that still failed after the last retry
+        self.throttled_ms = 0.0  # Time calls waited for the client-side rate limit
+        self.saved_calls = 0  # Reads answered by an identical read already in flight (see single_flight.py)
+        self.action_latency = LatencyHistogram()  # Wall-clock of the whole action
+        self.firestore_latency = LatencyHistogram()  # Wall-clock of each Firestore call
+
+    def to_dict(self):
+        return {
+            "action": self.name,
+            "calls": self.calls,
+            "reads": self.reads,
+            "writes": self.writes,
+            "deletes": self.deletes,
+            "bytes_read": self.bytes_read,
+            "bytes_written": self.bytes_written,
+            "operations": dict(sorted(self.operations.items())),
+            "transactions": self.transactions,
+            "transaction_attempts": self.transaction_attempts,
+            "transaction_conflicts": self.transaction_conflicts,
+            "transactions_failed": self.transactions_failed,
+            "contention_rate": round(self.transaction_conflicts / self.transaction_attempts, 3)
+            if self.transaction_attempts else 0.0,
+            "retries": dict(sorted(self.retries.items())),
+            "retries_exhausted": self.retries_exhausted,
+            "throttled_ms": round(self.throttled_ms, 1),
+            "saved_calls": self.saved_calls,
+            "action_latency": self.action_latency.to_dict(),
+            "firestore_latency": self.firestore_latency.to_dict(),
+        }
+
+
+class FirestoreMetrics:
+    """Thread-safe accumulator of Firestore reads, writes, deletes, bytes and latency per UI action."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._actions = {}
+        self.started_at = datetime.now()
+
+    def _stats(self, action):
+        stats = self._actions.get(action)
+        if stats is None:
+            stats = self._actions[action] = ActionStats(action)
+        return stats
+
+    def record(self, operation, collection, latency_ms, reads=0, writes=0, deletes=0, bytes_read=0, bytes_written=0):
+        """Records one Firestore call against the UI action running on the current thread."""
+        with self._lock:
+            stats = self._stats(current_action() or UNATTRIBUTED_ACTION)
+            stats.reads += reads
+            stats.writes += writes
+            stats.deletes += deletes
+            stats.bytes_read += bytes_read
+            stats.bytes_written += bytes_written
+            key = f"{collection}.{operation}"
+            stats.operations[key] = stats.operations.get(key, 0) + 1
+            stats.firestore_latency.add(latency_ms)
+
+    def record_transaction(self, name, attempts, conflicts, succeeded):
+        """Records a transaction that took attempts attempts, conflicts of which aborted on contention."""
+        with self._lock:
+            stats = self._stats(current_action() or UNATTRIBUTED_ACTION)
+            stats.transactions += 1
+            stats.transaction_attempts += attempts
+            stats.transaction_conflicts += conflicts
+            if not succeeded:
+                stats.transactions_failed += 1
+            key = f"{name}.transaction"
+            stats.operations[key] = stats.operations.get(key, 0) + 1
+
+    def record_retry(self, kind, gave_up=False):
+        """Records a Firestore call that failed with the transient error kind and was retried (or given up on)."""
+        with self._lock:
+            stats = self._stats(current_action() or UNATTRIBUTED_ACTION)
+            if gave_up:
+                stats.retries_exhausted += 1
+            else:
+                stats.retries[kind] = stats.retries.get(kind, 0) + 1
+
+    def record_saved_call(self, operation, collection):
+        """Records a read that shared the result of an identical one instead of calling Firestore."""
+        with self._lock:
+            stats = self._stats(current_action() or UNATTRIBUTED_ACTION)
+            stats.saved_calls += 1
+            key = f"{collection}.{operation}_saved"
+            stats.operations[key] = stats.operations.get(key, 0) + 1
+
+    def record_throttled(self, wait_ms):
+        with self._lock:
+            self._stats(current_action() or UNATTRIBUTED_ACTION).throttled_ms += wait_ms
+
+    def action_finished(self, action, latency_ms):
+        with self._lock:
+            stats = self._stats(action)
+            stats.calls += 1
+            stats.action_latency.add(latency_ms)
+
+    def snapshot(self):
+        """Returns all statistics as a JSON-serializable dict, most expensive actions (by reads) first."""
+        with self._lock:
+            actions = sorted((stats.to_dict() for stats in self._actions.values()),
+                             key=lambda a: (a["reads"] + a["writes"] + a["deletes"]), reverse=True)
+        return {
+            "started_at": self.started_at.isoformat(),
+            "exported_at": datetime.now().isoformat(),
+            "totals": {
+                "reads": sum(a["reads"] for a in actions),
+                "writes": sum(a["writes"] for a in actions),
+                "deletes": sum(a["deletes"] for a in actions),
+                "bytes_read": sum(a["bytes_read"] for a in actions),
+                "bytes_written": sum(a["bytes_written"] for a in actions),
+                "retries": sum(sum(a["retries"].values()) for a in actions),
+                "saved_calls": sum(a["saved_calls"] for a in actions),
+            },
+            "actions": actions,
+        }
+
+    def export_json(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(), f, indent=2)
+        logging.info(f"Firestore metrics exported to {path}.")
+
+    def reset(self):
+        with self._lock:
+            self._actions = {}
+            self.started_at = datetime.now()
+
+
+metrics = FirestoreMetrics()
+
+
+# --- UI action attribution ---
+
+def current_action():
+    """Returns the outermost UI action running on this thread, or None."""
+    stack = getattr(_action_state, "stack", None)
+    return stack[0] if stack else None
+
+
+class track_action:
+    """Context manager attributing Firestore calls on this thread to a named action.
+    Nested actions are folded into the outermost one, i.e. the button the user pressed."""
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        if not hasattr(_action_state, "stack"):
+            _action_state.stack = []
+        _action_state.stack.append(self.name)
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _action_state.stack.pop()
+        if not _action_state.stack:
+            metrics.action_finished(self.name, (time.perf_counter() - self._started) * 1000)
+        return False
+
+
+def ui_action(name=None):
+    """Decorator marking a logic-module method as a UI action for Firestore accounting.
+    name may reference the call's arguments, e.g. "load_batches({status_filter})"."""
+    def decorator(func):
+        signature = inspect.signature(func)
+        action_template = name or func.__name__.lstrip("_")
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            try:
+                bound = signature.bind(*args, **kwargs)
+                bound.apply_defaults()
+                action = action_template.format(**bound.arguments)
+            except (TypeError, KeyError, IndexError, ValueError):
+                action = action_template
+            with track_action(action):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# --- Instrumented Firestore proxies ---
+
+def _unwrap(value):
+    if isinstance(value, _Instrumented):
+        return value._inner
+    if isinstance(value, list):
+        return [_unwrap(v) for v in value]
+    return value
+
+
+def _call(operation, fn, idempotent=True, tokens=1):
+    """Sends one Firestore request through the retry layer and rate limit."""
+    from firestore_retry import call_with_retry  # firestore_retry records into metrics, so it imports this module
+    return call_with_retry(operation, fn, idempotent=idempotent, tokens=tokens)
+
+
+def _is_idempotent(data):
+    """False if writing data twice would not be the same as writing it once (a field increment)."""
+    if isinstance(data, transforms.Increment):
+        return False
+    if isinstance(data, dict):
+        return all(_is_idempotent(value) for value in data.values())
+    return True
+
+
+class _Unkeyable(Exception):
+    """A query argument with no stable shape (the read is then never coalesced)."""
+
+
+def _shape(value):
+    """Returns a hashable, normalized form of a query argument for single-flight keys."""
+    value = _unwrap(value)
+    if value is None or isinstance(value, (str, int, float, bool, datetime)):
+        return value
+    if isinstance(value, (list, tuple)):
+        return tuple(_shape(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((str(k), _shape(v)) for k, v in value.items()))
+    if hasattr(value, "field_path") and hasattr(value, "op_string"):  # FieldFilter
+        return "filter", value.field_path, value.op_string, _shape(value.value)
+    if isinstance(getattr(value, "filters", None), (list, tuple)):  # And / Or of filters, in any order
+        return type(value).__name__, tuple(sorted((_shape(f) for f in value.filters), key=repr))
+    if hasattr(value, "reference") and hasattr(value, "to_dict"):  # Snapshot used as a cursor
+        return "snapshot", value.reference.path, _shape(getattr(value, "update_time", None))
+    raise _Unkeyable(type(value).__name__)
+
+
+def _flight_key(*parts):
+    """Single-flight key for a read, or None if one of its arguments can't be keyed."""
+    try:
+        return _shape(parts)
+    except _Unkeyable:
+        return None
+
+
+def _coalesced(flights, key, operation, collection, read):
+    """Runs read() unless an identical read (same key) is in flight on this client, then shares its result."""
+    if flights is None:
+        return read()
+    result, saved = flights.do(key, read)
+    if saved:
+        metrics.record_saved_call(operation, collection)
+    return result
+
+
+def _collection_id(path):
+    """Returns the collection ID from a document path such as "samples/abc"."""
+    return path.rsplit("/", 2)[-2] if "/" in path else path
+
+
+def _snapshot_size(snapshot):
+    if not getattr(snapshot, "exists", True):
+        return 0
+    return estimate_document_size(snapshot.reference.path, snapshot.to_dict())
+
+
+class _Instrumented:
+    """Base proxy: forwards attribute access to the wrapped Firestore object. flights is the SingleFlight
+    of the InstrumentedClient the object came from."""
+
+    def __init__(self, inner, flights=None):
+        self._inner = inner
+        self._flights = flights
+
+    def __getattr__(self, name):
+        return getattr(self._inner, name)
+
+
+class InstrumentedDocumentReference(_Instrumented):
+    """Document reference proxy. Calls go through the retry layer (see firestore_retry.py); reads in a
+    transaction are left to the transaction's own retries."""
+
+    def _timed(self, operation, call, idempotent=True, **counts):
+        started = time.perf_counter()
+        try:
+            result = _call(f"{operation} {self._inner.path}", call, idempotent)
+        finally:
+            if self._flights is not None:
+                self._flights.wrote()
+        metrics.record(operation, _collection_id(self._inner.path), (time.perf_counter() - started) * 1000, **counts)
+        return result
+
+    def get(self, *args, **kwargs):
+        started = time.perf_counter()
+        kwargs = {k: _unwrap(v) for k, v in kwargs.items()}
+        if kwargs.get("transaction") is not None:
+            snapshot = self._inner.get(*args, **kwargs)
+        else:
+            def read():
+                snapshot = _call(f"get {self._inner.path}", lambda: self._inner.get(*args, **kwargs))
+                metrics.record("get", _collection_id(self._inner.path), (time.perf_counter() - started) * 1000,
+                               reads=1, bytes_read=_snapshot_size(snapshot))
+                return snapshot
+            return InstrumentedSnapshot(_coalesced(self._flights, _flight_key("get", self._inner.path, args, kwargs),
+                                                   "get", _collection_id(self._inner.path), read), self._flights)
+        metrics.record("get", _collection_id(self._inner.path), (time.perf_counter() - started) * 1000,
+                       reads=1, bytes_read=_snapshot_size(snapshot))
+        return InstrumentedSnapshot(snapshot, self._flights)
+
+    def set(self, document_data, *args, **kwargs):
+        size = estimate_document_size(self._inner.path, document_data)
+        return self._timed("set", lambda: self._inner.set(document_data, *args, **kwargs), _is_idempotent(document_data),
+                           writes=1, bytes_written=size)
+
+    def create(self, document_data, *args, **kwargs):
+        size = estimate_document_size(self._inner.path, document_data)
+        return self._timed("create", lambda: self._inner.create(document_data, *args, **kwargs), False,
+                           writes=1, bytes_written=size)
+
+    def update(self, field_updates, *args, **kwargs):
+        size = estimate_document_size(self._inner.path, field_updates)
+        idempotent = _is_idempotent(field_updates) and not args and kwargs.get("option") is None
+        return self._timed("update", lambda: self._inner.update(field_updates, *args, **kwargs), idempotent,
+                           writes=1, bytes_written=size)
+
+    def delete(self, *args, **kwargs):
+        return self._timed("delete", lambda: self._inner.delete(*args, **kwargs), deletes=1)
+
+    def collection(self, collection_id):
+        return InstrumentedQuery(self._inner.collection(collection_id), collection_id, self._flights,
+                                 path=f"{self._inner.path}/{collection_id}")
+
+
+class InstrumentedSnapshot(_Instrumented):
+    """Snapshot proxy whose .reference is instrumented too (e.g. sample.reference.update(...))."""
+
+    @property
+    def reference(self):
+        return InstrumentedDocumentReference(self._inner.reference, self._flights)
+
+
+class InstrumentedQuery(_Instrumented):
+    """Proxy for CollectionReference/Query: builder calls return instrumented queries,
+    stream()/get() record one read per returned document (minimum one, as billed).
+
+    The builder calls are also kept as the query's shape, so identical get()/count() reads running at the same
+    time are coalesced (see single_flight.py). stream() is lazy and is always sent."""
+
+    def __init__(self, inner, collection, flights=None, path=None, steps=()):
+        super().__init__(inner, flights)
+        self._collection = collection
+        self._path = path or collection
+        self._steps = steps  # (method, normalized arguments) per builder call; None if one can't be keyed
+
+    def __getattr__(self, name):
+        attr = getattr(self._inner, name)
+        if not callable(attr):
+            return attr
+
+        def builder(*args, **kwargs):
+            result = attr(*[_unwrap(a) for a in args], **{k: _unwrap(v) for k, v in kwargs.items()})
+            if hasattr(result, "stream") and hasattr(result, "where"):
+                steps = self._steps
+                if steps is not None:
+                    step = _flight_key(name, _where_filter(args, kwargs) if name == "where" else (args, kwargs))
+                    steps = steps + (step,) if step is not None else None
+                return InstrumentedQuery(result, self._collection, self._flights, self._path, steps)
+            return result
+        return builder
+
+    def _query_key(self):
+        """The query's normalized shape: filters in any order, sort orders in order, the last of other calls."""
+        if self._steps is None:
+            return None
+        filters, orders, others = [], [], {}
+        for name, arguments in self._steps:
+            if name == "where":
+                filters.append(arguments)
+            elif name == "order_by":
+                orders.append(arguments)
+            else:
+                others[name] = arguments
+        return self._path, tuple(sorted(filters, key=repr)), tuple(orders), tuple(sorted(others.items()))
+
+    def document(self, document_id=None):
+        return InstrumentedDocumentReference(self._inner.document(document_id), self._flights)
+
+    def add(self, document_data, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            result = _call(f"add to {self._collection}", lambda: self._inner.add(document_data, *args, **kwargs), False)
+        finally:
+            if self._flights is not None:
+                self._flights.wrote()
+        metrics.record("add", self._collection, (time.perf_counter() - started) * 1000,
+                       writes=1, bytes_written=estimate_document_size(f"{self._collection}/{'x' * 20}", document_data))
+        return result
+
+    def stream(self, *args, **kwargs):
+        """Yields instrumented snapshots. Opening the stream (up to its first document) is retried on transient
+        errors; an error after documents have been yielded is raised, as retrying would repeat them."""
+        reads, size, elapsed = 0, 0, 0.0
+        args = [_unwrap(a) for a in args]
+        kwargs = {k: _unwrap(v) for k, v in kwargs.items()}
+
+        def open_stream():
+            iterator = iter(self._inner.stream(*args, **kwargs))
+            return iterator, next(iterator, None)
+
+        try:
+            started = time.perf_counter()
+            if kwargs.get("transaction") is not None:
+                iterator, snapshot = open_stream()
+            else:
+                iterator, snapshot = _call(f"query on {self._collection}", open_stream)
+            while True:
+                elapsed += time.perf_counter() - started
+                if snapshot is None:
+                    break
+                reads += 1
+                size += _snapshot_size(snapshot)
+                yield InstrumentedSnapshot(snapshot, self._flights)
+                started = time.perf_counter()
+                snapshot = next(iterator, None)
+        finally:
+            metrics.record("query", self._collection, elapsed * 1000, reads=max(reads, 1), bytes_read=size)
+
+    def get(self, *args, **kwargs):
+        if _unwrap(kwargs.get("transaction")) is not None:
+            return list(self.stream(*args, **kwargs))
+        query_key = self._query_key()
+        key = _flight_key("query", query_key, args, kwargs) if query_key is not None else None
+        return list(_coalesced(self._flights, key, "query", self._collection, lambda: list(self.stream(*args, **kwargs))))
+
+    def count(self, *args, **kwargs):
+        query_key = self._query_key()
+        key = _flight_key("count", query_key, args, kwargs) if query_key is not None else None
+        return InstrumentedAggregationQuery(self._inner.count(*args, **kwargs), self._collection, self._flights, key)
+
+
+def _where_filter(args, kwargs):
+    """where("a", "==", 1) and where(filter=FieldFilter("a", "==", 1)) as the same shape."""
+    if "filter" in kwargs:
+        return kwargs["filter"]
+    names = ("field_path", "op_string", "value")
+    return ("filter",) + tuple(kwargs.get(name, args[i] if i < len(args) else None) for i, name in enumerate(names))
+
+
+class InstrumentedAggregationQuery(_Instrumented):
+    """Count aggregations are billed one read per 1000 index entries counted (minimum one)."""
+
+    def __init__(self, inner, collection, flights=None, key=None):
+        super().__init__(inner, flights)
+        self._collection = collection
+        self._key = key  # Single-flight key of the count (None: never coalesced)
+
+    def get(self, *args, **kwargs):
+        kwargs = {k: _unwrap(v) for k, v in kwargs.items()}
+        in_transaction = kwargs.get("transaction") is not None
+
+        def read():
+            started = time.perf_counter()
+            if in_transaction:
+                result = self._inner.get(*args, **kwargs)
+            else:
+                result = _call(f"count on {self._collection}", lambda: self._inner.get(*args, **kwargs))
+            counted = 0
+            for row in result or []:
+                for aggregation in (row if isinstance(row, list) else [row]):
+                    counted += getattr(aggregation, "value", 0) or 0
+            metrics.record("count", self._collection, (time.perf_counter() - started) * 1000,
+                           reads=max(1, int(math.ceil(counted / 1000.0))))
+            return result
+
+        if in_transaction or self._key is None:
+            return read()
+        return _coalesced(self._flights, _flight_key(self._key, args, kwargs), "count", self._collection, read)
+
+
+class InstrumentedWriteBatch(_Instrumented):
+    """Counts staged writes and deletes and records them when the batch commits."""
+
+    def __init__(self, inner, flights=None):
+        super().__init__(inner, flights)
+        self._writes = {}  # collection -> [writes, deletes, bytes]
+        self._idempotent = True  # No creates, increments or preconditions staged, so a commit can be resent
+
+    def _stage(self, reference, deleting=False, data=None, idempotent=True):
+        reference = _unwrap(reference)
+        self._idempotent = self._idempotent and idempotent and _is_idempotent(data)
+        counts = self._writes.setdefault(_collection_id(reference.path), [0, 0, 0])
+        if deleting:
+            counts[1] += 1
+        else:
+            counts[0] += 1
+            counts[2] += estimate_document_size(reference.path, data)
+        return reference
+
+    def set(self, reference, document_data, *args, **kwargs):
+        self._inner.set(self._stage(reference, data=document_data), document_data, *args, **kwargs)
+        return self
+
+    def create(self, reference, document_data, *args, **kwargs):
+        self._inner.create(self._stage(reference, data=document_data, idempotent=False), document_data, *args, **kwargs)
+        return self
+
+    def update(self, reference, field_updates, *args, **kwargs):
+        idempotent = not args and kwargs.get("option") is None
+        self._inner.update(self._stage(reference, data=field_updates, idempotent=idempotent), field_updates, *args, **kwargs)
+        return self
+
+    def delete(self, reference, *args, **kwargs):
+        self._inner.delete(self._stage(reference, deleting=True), *args, **kwargs)
+        return self
+
+    def commit(self, *args, **kwargs):
+        started = time.perf_counter()
+        tokens = sum(writes + deletes for writes, deletes, _ in self._writes.values())
+        try:
+            result = _call("batch commit", lambda: self._inner.commit(*args, **kwargs), self._idempotent, max(tokens, 1))
+        finally:
+            if self._flights is not None:
+                self._flights.wrote()
+        self._record_commit("batch_commit", (time.perf_counter() - started) * 1000)
+        return result
+
+    def _record_commit(self, operation, elapsed_ms):
+        for collection, (writes, deletes, size) in self._writes.items():
+            metrics.record(operation, collection, elapsed_ms / max(len(self._writes), 1),
+                           writes=writes, deletes=deletes, bytes_written=size)
+        self._writes = {}
+        self._idempotent = True
+
+
+class InstrumentedTransaction(InstrumentedWriteBatch):
+    """Counts a transaction's staged writes like a batch; they are recorded when an attempt commits.
+    Reads go through the instrumented references and queries with transaction=this proxy."""
+
+    def run_attempt(self, fn):
+        """Runs fn(self) and commits once (see firestore_retry.run_transaction)."""
+        self._writes = {}
+        started = time.perf_counter()
+        try:
+            if hasattr(self._inner, "run_attempt"):
+                result = self._inner.run_attempt(lambda transaction: fn(self))
+            else:
+                from firebase_admin import firestore
+                result = firestore.transactional(lambda transaction: fn(self))(self._inner)
+        finally:
+            if self._writes and self._flights is not None:
+                self._flights.wrote()
+        self._record_commit("transaction_commit", (time.perf_counter() - started) * 1000)
+        return result
+
+
+class InstrumentedClient(_Instrumented):
+    """Wraps a Firestore client so every collection()/batch() call is accounted to the current UI action.
+    Identical reads in flight at the same time on this client share one call (see single_flight.py)."""
+
+    def __init__(self, inner):
+        super().__init__(inner, SingleFlight())
+
+    def collection(self, collection_path):
+        return InstrumentedQuery(self._inner.collection(collection_path), collection_path, self._flights)
+
+    def batch(self):
+        return InstrumentedWriteBatch(self._inner.batch(), self._flights)
+
+    def transaction(self, **kwargs):
+        return InstrumentedTransaction(self._inner.transaction(**kwargs), self._flights)
+
+    def get_all(self, references, *args, **kwargs):
+        references = [_unwrap(r) for r in references]
+        collection = _collection_id(references[0].path) if references else "?"
+        kwargs = {k: _unwrap(v) for k, v in kwargs.items()}
+
+        def read(transaction=None):
+            started = time.perf_counter()
+            if transaction is not None:
+                snapshots = list(self._inner.get_all(references, *args, **kwargs))
+            else:
+                snapshots = _call("get_all", lambda: list(self._inner.get_all(references, *args, **kwargs)))
+            metrics.record("get_all", collection, (time.perf_counter() - started) * 1000,
+                           reads=len(snapshots), bytes_read=sum(_snapshot_size(s) for s in snapshots))
+            return snapshots
+
+        if kwargs.get("transaction") is not None:
+            snapshots = read(kwargs["transaction"])
+        else:
+            key = _flight_key("get_all", [r.path for r in references], args, kwargs)
+            snapshots = _coalesced(self._flights, key, "get_all", collection, read)
+        return [InstrumentedSnapshot(s, self._flights) for s in snapshots]
+
+
+def instrument_client(client):
+    """Returns client wrapped for Firestore accounting."""
+    return InstrumentedClient(client)
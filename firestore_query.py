@@ -0,0 +1,233 @@
+# firestore_query.py
+import copy
+import functools
+import heapq
+from datetime import datetime, timezone
+
+from google.cloud.firestore_v1 import transforms
+
+# Firestore orders values of different types by type first, then by value.
+_TYPE_RANK_NULL, _TYPE_RANK_BOOL, _TYPE_RANK_NUMBER, _TYPE_RANK_TIMESTAMP = 0, 1, 2, 3
+_TYPE_RANK_STRING, _TYPE_RANK_BYTES, _TYPE_RANK_ARRAY, _TYPE_RANK_MAP = 4, 5, 8, 9
+
+
+# --- Value helpers ---
+
+def to_utc(value):
+    """Normalizes datetimes the way Firestore stores them: naive values are treated as UTC."""
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            return value.replace(tzinfo=timezone.utc)
+        return value.astimezone(timezone.utc)
+    return value
+
+
+def normalize(value):
+    """Converts a value into the canonical form used for query evaluation (UTC datetimes, plain Python scalars)."""
+    if isinstance(value, dict):
+        return {k: normalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [normalize(v) for v in value]
+    if isinstance(value, datetime):
+        return to_utc(value)
+    if hasattr(value, 'to_pydatetime'):  # pandas Timestamp
+        return to_utc(value.to_pydatetime())
+    if hasattr(value, 'item') and not isinstance(value, (str, bytes)):  # numpy scalar
+        return value.item()
+    return value
+
+
+def apply_field_writes(existing, changes, server_time=None):
+    """Applies set/update field values (with Increment, ArrayUnion/ArrayRemove, SERVER_TIMESTAMP and DELETE_FIELD)
+    to a document dict. SERVER_TIMESTAMP becomes server_time, or the current time if it is None."""
+    result = copy.deepcopy(existing) if existing else {}
+    for field_path, value in changes.items():
+        parts = field_path.split(".")
+        target = result
+        for part in parts[:-1]:
+            target = target.setdefault(part, {})
+        leaf = parts[-1]
+        if isinstance(value, transforms.Increment):
+            current = target.get(leaf)
+            target[leaf] = (current if isinstance(current, (int, float)) and not isinstance(current, bool) else 0) + value.value
+        elif value is transforms.SERVER_TIMESTAMP:
+            target[leaf] = server_time if server_time is not None else datetime.now(timezone.utc)
+        elif value is transforms.DELETE_FIELD:
+            target.pop(leaf, None)
+        elif isinstance(value, transforms.ArrayUnion):
+            current = list(target.get(leaf)) if isinstance(target.get(leaf), list) else []
+            target[leaf] = current + [v for v in normalize(list(value.values)) if v not in current]
+        elif isinstance(value, transforms.ArrayRemove):
+            removed = normalize(list(value.values))
+            current = target.get(leaf) if isinstance(target.get(leaf), list) else []
+            target[leaf] = [v for v in current if v not in removed]
+        else:
+            target[leaf] = normalize(value)
+    return result
+
+
+# --- Query evaluation ---
+
+def get_field(data, field_path):
+    """Returns (found, value) for a dotted field path inside a document dict."""
+    current = data
+    for part in field_path.split("."):
+        if not isinstance(current, dict) or part not in current:
+            return False, None
+        current = current[part]
+    return True, current
+
+
+def _type_rank(value):
+    if value is None:
+        return _TYPE_RANK_NULL
+    if isinstance(value, bool):
+        return _TYPE_RANK_BOOL
+    if isinstance(value, (int, float)):
+        return _TYPE_RANK_NUMBER
+    if isinstance(value, datetime):
+        return _TYPE_RANK_TIMESTAMP
+    if isinstance(value, str):
+        return _TYPE_RANK_STRING
+    if isinstance(value, bytes):
+        return _TYPE_RANK_BYTES
+    if isinstance(value, list):
+        return _TYPE_RANK_ARRAY
+    return _TYPE_RANK_MAP
+
+
+def compare_values(a, b):
+    """Three-way comparison following Firestore's cross-type ordering. Values must already be normalized."""
+    rank_a, rank_b = _type_rank(a), _type_rank(b)
+    if rank_a != rank_b:
+        return -1 if rank_a < rank_b else 1
+    if rank_a in (_TYPE_RANK_ARRAY, _TYPE_RANK_MAP):
+        a, b = repr(a), repr(b)
+    if a == b:
+        return 0
+    return -1 if a < b else 1
+
+
+def matches(data, field_path, op, value):
+    """Evaluates a single where() clause against a normalized document dict."""
+    found, field_value = get_field(data, field_path)
+    if not found:
+        return False
+    if op == "==":
+        return _type_rank(field_value) == _type_rank(value) and compare_values(field_value, value) == 0
+    if op == "!=":
+        return field_value is not None and not (_type_rank(field_value) == _type_rank(value) and compare_values(field_value, value) == 0)
+    if op in ("<", "<=", ">", ">="):
+        if _type_rank(field_value) != _type_rank(value):
+            return False
+        cmp = compare_values(field_value, value)
+        return {"<": cmp < 0, "<=": cmp <= 0, ">": cmp > 0, ">=": cmp >= 0}[op]
+    if op == "in":
+        return any(matches(data, field_path, "==", candidate) for candidate in value)
+    if op == "not-in":
+        return field_value is not None and not any(matches(data, field_path, "==", candidate) for candidate in value)
+    if op in ("array-contains", "array_contains"):  # The Python SDK spells the array operators with underscores
+        return isinstance(field_value, list) and any(compare_values(item, value) == 0 for item in field_value)
+    if op in ("array-contains-any", "array_contains_any"):
+        return isinstance(field_value, list) and any(compare_values(item, candidate) == 0 for item in field_value for candidate in value)
+    raise ValueError(f"Unsupported query operator: {op}")
+
+
+def _compile_filter(field_path, op, value):
+    """Returns a predicate for one where() clause; equality and "in" on scalar values become hash lookups."""
+    if op in ("==", "in"):
+        candidates = [value] if op == "==" else list(value)
+        try:
+            keys = {(_type_rank(candidate), candidate) for candidate in candidates}
+        except TypeError:  # Unhashable values (arrays, maps) fall back to the general comparison
+            keys = None
+        if keys is not None:
+            parts = field_path.split(".")
+
+            def predicate(data):
+                current = data
+                for part in parts:
+                    if not isinstance(current, dict) or part not in current:
+                        return False
+                    current = current[part]
+                try:
+                    return (_type_rank(current), current) in keys
+                except TypeError:
+                    return False
+            return predicate
+    return lambda data: matches(data, field_path, op, value)
+
+
+def matches_all(data, filters):
+    """Returns True if a document dict satisfies every (field_path, op, value) filter."""
+    data = normalize(data)
+    return all(matches(data, field_path, op, normalize(value)) for field_path, op, value in filters)
+
+
+def _effective_orders(filters, orders):
+    """Adds Firestore's implicit orderings: the first inequality field, then the document ID."""
+    effective = list(orders)
+    if not effective:
+        for field_path, op, _ in filters:
+            if op in ("<", "<=", ">", ">=", "!=", "not-in"):
+                effective.append((field_path, "ASCENDING"))
+                break
+    if not any(field_path == "__name__" for field_path, _ in effective):
+        last_direction = effective[-1][1] if effective else "ASCENDING"
+        effective.append(("__name__", last_direction))
+    return effective
+
+
+def _order_values(doc_id, data, orders):
+    return [doc_id if field_path == "__name__" else get_field(data, field_path)[1] for field_path, _ in orders]
+
+
+def _compare_keys(values_a, values_b, orders):
+    for a, b, (_, direction) in zip(values_a, values_b, orders):
+        cmp = compare_values(a, b)
+        if cmp:
+            return -cmp if direction == "DESCENDING" else cmp
+    return 0
+
+
+def _cursor_values(cursor, orders):
+    """Turns a start_after() argument (snapshot, dict or list of values) into ordered cursor values."""
+    if hasattr(cursor, "to_dict") and hasattr(cursor, "id"):
+        return normalize(_order_values(cursor.id, cursor.to_dict() or {}, orders))
+    if isinstance(cursor, dict):
+        return normalize([cursor.get(field_path) for field_path, _ in orders])
+    return normalize(list(cursor))
+
+
+def run_query(documents, filters=(), orders=(), start_after=None, offset=0, limit=None):
+    """Evaluates a Firestore-style query over an iterable of (doc_id, data) pairs.
+    Returns the matching (doc_id, data) pairs in query order."""
+    filters = [(field_path, op, normalize(value)) for field_path, op, value in filters]
+    orders = _effective_orders(filters, orders)
+    ordered_fields = [field_path for field_path, _ in orders if field_path != "__name__"]
+    predicates = [_compile_filter(field_path, op, value) for field_path, op, value in filters]
+    results = []
+    for doc_id, data in documents:
+        if not all(predicate(data) for predicate in predicates):
+            continue
+        # Documents missing an order_by field are excluded, as in Firestore
+        if not all(get_field(data, f)[0] for f in ordered_fields):
+            continue
+        results.append((doc_id, data, _order_values(doc_id, data, orders)))
+
+    if start_after is not None:
+        cursor = _cursor_values(start_after, orders)
+        results = [r for r in results if _compare_keys(r[2][:len(cursor)], cursor, orders[:len(cursor)]) > 0]
+
+    sort_key = functools.cmp_to_key(lambda a, b: _compare_keys(a[2], b[2], orders))
+    if limit is not None:
+        # Only the first offset + limit results are needed (e.g. one page of a paginated view)
+        results = heapq.nsmallest(offset + limit, results, key=sort_key)
+    else:
+        results.sort(key=sort_key)
+
+    if offset:
+        results = results[offset:]
+    if limit is not None:
+        results = results[:limit]
+    return [(doc_id, data) for doc_id, data, _ in results]
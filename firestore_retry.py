@@ -0,0 +1,160 @@
+# firestore_retry.py
+import random
+import threading
+import time
+
+from firebase_admin import firestore
+from google.api_core.exceptions import Aborted, DeadlineExceeded, ResourceExhausted, ServiceUnavailable
+
+from constants import (TRANSACTION_MAX_ATTEMPTS, RETRY_BASE_DELAY_SECONDS, RETRY_MAX_DELAY_SECONDS, CALL_MAX_ATTEMPTS,
+                       MAX_OPS_PER_SECOND, MIN_OPS_PER_SECOND, OPS_BURST, OPS_RECOVERY_PER_SECOND)
+from firestore_metrics import metrics
+
+# --- Logging Setup ---
+import logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+# --- End Logging Setup ---
+
+
+def backoff_delay(attempt, base=RETRY_BASE_DELAY_SECONDS, cap=RETRY_MAX_DELAY_SECONDS):
+    """Seconds to wait before retry number attempt (1-based): exponential with full jitter, so clients
+    that collided once don't retry in lockstep."""
+    return random.uniform(0, min(cap, base * 2 ** (attempt - 1)))
+
+
+# Transient errors worth retrying, by the name they are counted under in the metrics
+TRANSIENT_ERRORS = (
+    (DeadlineExceeded, "deadline_exceeded"),
+    (ResourceExhausted, "resource_exhausted"),
+    (Aborted, "aborted"),
+    (ServiceUnavailable, "unavailable"),
+)
+# Firestore rejected the request without applying it, so even a non-idempotent call can be sent again.
+# After a deadline or an unavailable backend the first request may still have been applied.
+NOT_APPLIED_ERRORS = {"resource_exhausted", "aborted"}
+
+
+class TokenBucket:
+    """Client-side rate limit on Firestore calls that adapts to quota pressure.
+
+    Calls take tokens, refilled at rate per second up to burst. Each RESOURCE_EXHAUSTED halves the rate (down to
+    min_rate) and it then climbs back by recovery per second, so a bulk job that hits the quota slows down
+    smoothly instead of failing, while normal use never waits."""
+
+    def __init__(self, max_rate=MAX_OPS_PER_SECOND, min_rate=MIN_OPS_PER_SECOND, burst=OPS_BURST,
+                 recovery=OPS_RECOVERY_PER_SECOND):
+        self.max_rate = max_rate
+        self.min_rate = min_rate
+        self.burst = burst
+        self.recovery = recovery
+        self.rate = max_rate
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self._updated
+        self._updated = now
+        self.rate = min(self.max_rate, self.rate + self.recovery * elapsed)
+        self._tokens = min(self.burst, self._tokens + self.rate * elapsed)
+
+    def acquire(self, tokens=1):
+        """Takes tokens, sleeping until they are available. Returns the seconds waited."""
+        tokens = min(tokens, self.burst)
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
+
+    def slow_down(self):
+        with self._lock:
+            self._refill()
+            self.rate = max(self.min_rate, self.rate / 2)
+            self._tokens = min(self._tokens, 0.0)
+            logging.warning(f"Firestore quota pressure; client rate lowered to {self.rate:.0f} ops/s.")
+
+
+throttle = TokenBucket()
+
+
+def classify_error(error):
+    """Returns the metrics name of a transient Firestore error, or None for errors a retry won't fix."""
+    for error_type, name in TRANSIENT_ERRORS:
+        if isinstance(error, error_type):
+            return name
+    return None
+
+
+def call_with_retry(operation, fn, idempotent=True, tokens=1):
+    """Calls fn() (one Firestore request) through the token bucket, retrying transient errors with jittered
+    exponential backoff up to CALL_MAX_ATTEMPTS times.
+
+    Non-idempotent calls (creates, increments, writes with preconditions) are only retried when Firestore
+    rejected the request outright. Retries, give-ups and time spent throttled are recorded for the current
+    UI action; the error of the last attempt is raised to the caller."""
+    for attempt in range(1, CALL_MAX_ATTEMPTS + 1):
+        waited = throttle.acquire(tokens)
+        if waited:
+            metrics.record_throttled(waited * 1000)
+        try:
+            return fn()
+        except Exception as e:
+            kind = classify_error(e)
+            if kind is None or not (idempotent or kind in NOT_APPLIED_ERRORS):
+                raise
+            if kind == "resource_exhausted":
+                throttle.slow_down()
+            if attempt == CALL_MAX_ATTEMPTS:
+                metrics.record_retry(kind, gave_up=True)
+                logging.error(f"Firestore {operation} still failing with {kind} after {attempt} attempts.")
+                raise
+            metrics.record_retry(kind)
+            delay = backoff_delay(attempt)
+            logging.info(f"Firestore {operation} failed with {kind} (attempt {attempt}); retrying in {delay * 1000:.0f} ms.")
+            time.sleep(delay)
+
+
+def is_contention(error):
+    """True for a transaction that lost to a concurrent one (ABORTED). The SDK wraps the ABORTED of its
+    last attempt in a ValueError."""
+    return isinstance(error, Aborted) or isinstance(getattr(error, "__cause__", None), Aborted)
+
+
+def run_attempt(transaction, fn):
+    """Runs fn(transaction) and commits, once."""
+    if hasattr(transaction, "run_attempt"):
+        return transaction.run_attempt(fn)  # Instrumented, mirror and fake transactions
+    return firestore.transactional(fn)(transaction)
+
+
+def run_transaction(db, fn, name, max_attempts=TRANSACTION_MAX_ATTEMPTS):
+    """Runs fn(transaction) in a transaction and returns its result.
+
+    Each attempt is a single-attempt Firestore transaction; on contention it is retried here after a jittered
+    exponential backoff, up to max_attempts times. fn can therefore run more than once: it should only read
+    through the transaction and stage writes, and messages or events belong after run_transaction returns.
+    Attempts and conflicts are recorded for the current UI action (see firestore_metrics.py)."""
+    for attempt in range(1, max_attempts + 1):
+        try:
+            result = run_attempt(db.transaction(max_attempts=1), fn)
+        except Exception as e:
+            if not is_contention(e):
+                metrics.record_transaction(name, attempt, attempt - 1, succeeded=False)
+                raise
+            if attempt == max_attempts:
+                metrics.record_transaction(name, attempt, attempt, succeeded=False)
+                logging.error(f"Transaction {name} still contended after {attempt} attempts.")
+                raise
+            delay = backoff_delay(attempt)
+            logging.info(f"Transaction {name} contended (attempt {attempt}); retrying in {delay * 1000:.0f} ms.")
+            time.sleep(delay)
+            continue
+        metrics.record_transaction(name, attempt, attempt - 1, succeeded=True)
+        return result
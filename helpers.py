@@ -1,14 +1,26 @@
-# helpers.py
-from constants import EMAIL_REGEX, MIN_PASSWORD_LENGTH, EMPLOYEE_ID_REGEX
-
-def validate_email(email):
-    """Validates if the provided string is a valid email format."""
-    return EMAIL_REGEX.match(email) is not None
-
-def validate_password(password):
-    """Validates if the password meets the minimum length requirement."""
-    return len(password) >= MIN_PASSWORD_LENGTH
-
-def validate_employee_id(emp_id):
-    """Validates if the employee ID matches the required pattern (e.g., E12345)."""
-    return EMPLOYEE_ID_REGEX.match(emp_id) is not None
+# helpers.py
+from constants import EMAIL_REGEX, MIN_PASSWORD_LENGTH, EMPLOYEE_ID_REGEX, USER_SEARCH_PREFIX_FIELDS
+
+def validate_email(email):
+    """Validates if the provided string is a valid email format."""
+    return EMAIL_REGEX.match(email) is not None
+
+def validate_password(password):
+    """Validates if the password meets the minimum length requirement."""
+    return len(password) >= MIN_PASSWORD_LENGTH
+
+def validate_employee_id(emp_id):
+    """Validates if the employee ID matches the required pattern (e.g., E12345)."""
+    return EMPLOYEE_ID_REGEX.match(emp_id) is not None
+
+def user_status(user_data):
+    """Returns a user's status; a user saved without one is pending (an admin active), as at signup."""
+    return user_data.get("status") or ("active" if user_data.get("role") == "admin" else "pending")
+
+def user_search_prefixes(user_data):
+    """Returns {prefix field: every leading substring of the field} for the searchable user fields."""
+    prefixes = {}
+    for field, prefix_field in USER_SEARCH_PREFIX_FIELDS.items():
+        value = str(user_data.get(field) or "")
+        prefixes[prefix_field] = [value[:length] for length in range(1, len(value) + 1)]
+    return prefixes
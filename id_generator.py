@@ -0,0 +1,48 @@
+# id_generator.py
+import os
+import threading
+import time
+
+CROCKFORD_ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+RANDOM_BITS = 80
+
+_lock = threading.Lock()
+_last_ms = -1
+_last_random = 0
+
+
+def _encode(value, length):
+    chars = []
+    for _ in range(length):
+        chars.append(CROCKFORD_ALPHABET[value & 31])
+        value >>= 5
+    return "".join(reversed(chars))
+
+
+def new_ulid():
+    """Returns a ULID: a 48-bit millisecond timestamp and 80 random bits as 26 Crockford base32 characters.
+
+    ULIDs sort lexicographically in creation order, so documents keyed by them page chronologically.
+    IDs made in the same millisecond by this process stay ordered (the random part is incremented), and
+    IDs from different clients collide with negligible probability, so no existence read is needed first;
+    write new documents with create() so a collision fails instead of overwriting."""
+    global _last_ms, _last_random
+    with _lock:
+        now_ms = time.time_ns() // 1_000_000
+        if now_ms <= _last_ms:
+            # Same millisecond (or the clock stepped back): keep ordering by bumping the last ID
+            now_ms, random_part = _last_ms, _last_random + 1
+            if random_part >> RANDOM_BITS:
+                now_ms, random_part = now_ms + 1, 0
+        else:
+            random_part = int.from_bytes(os.urandom(RANDOM_BITS // 8), "big")
+        _last_ms, _last_random = now_ms, random_part
+    return _encode(now_ms, 10) + _encode(random_part, 16)
+
+
+def new_batch_id(employee_id):
+    return f"batch_{employee_id}_{new_ulid()}"
+
+
+def new_import_job_id(employee_id):
+    return f"import_{employee_id}_{new_ulid()}"
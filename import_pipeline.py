@@ -0,0 +1,435 @@
+# import_pipeline.py
+import hashlib
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+from firebase_admin import firestore
+
+from constants import (IMPORT_CHUNK_ROWS, IMPORT_JOBS_COLLECTION, IMPORT_LEASE_SECONDS, IN_QUERY_LIMIT, MAX_WRITES_PER_BATCH,
+                       SAMPLE_STATUS_OPTIONS)
+from delta_sync import as_naive
+from firestore_retry import run_transaction
+from id_generator import new_import_job_id, new_ulid
+from sharded_counter import ShardedCounter
+
+# --- Logging Setup ---
+import logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+# --- End Logging Setup ---
+
+# File rows per commit; each commit also carries the batch's number_of_samples shard increment and the job checkpoint
+ROWS_PER_COMMIT = MAX_WRITES_PER_BATCH - 2
+
+# Map potential variations of column names to standardized ones
+IMPORT_COLUMN_ALIASES = {
+    'sampleid': 'sample_id',
+    'owner': 'owner',
+    'maturationdate': 'maturation_date',
+    'status': 'status',
+    'batchid': 'batch_id',
+    'creationdate': 'creation_date',
+    'submitted_by_employee_id': 'submitted_by_employee_id',
+    'ubmitted_by_employee_ic': 'submitted_by_employee_id',
+    'd_by_emp': 'submitted_by_employee_id',
+    'batch id': 'batch_id',
+    'sample id': 'sample_id',
+    'maturation date': 'maturation_date',
+    'creation date': 'creation_date',
+    'submitted by emp id': 'submitted_by_employee_id',
+}
+DATE_COLUMNS = ('maturation_date', 'creation_date')
+
+
+class ImportValidationError(Exception):
+    """Raised when an import file cannot be imported at all (e.g. it has no sample ID column)."""
+
+
+class ImportJobBusy(Exception):
+    """Raised when an import job is held by another run of it (e.g. still running on another workstation)."""
+
+
+# --- Reading ---
+
+def read_import_chunks(path, chunk_rows=IMPORT_CHUNK_ROWS):
+    """Yields the rows of a CSV or Excel file as DataFrames of at most chunk_rows rows, without loading the
+    whole file. Always yields at least one (possibly empty) DataFrame so the header can be checked."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".csv":
+        yielded = False
+        for chunk in pd.read_csv(path, chunksize=chunk_rows):
+            yielded = True
+            yield chunk
+        if not yielded:
+            yield pd.read_csv(path, nrows=0)
+    elif extension in (".xlsx", ".xlsm"):
+        yield from _read_xlsx_chunks(path, chunk_rows)
+    else:
+        # Legacy .xls has no streaming reader; read it whole and pass it on in chunks
+        df = pd.read_excel(path)
+        for start in range(0, max(len(df), 1), chunk_rows):
+            yield df.iloc[start:start + chunk_rows]
+
+
+def _read_xlsx_chunks(path, chunk_rows):
+    from openpyxl import load_workbook
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, ())
+        columns = [str(name) if name is not None else f"unnamed_{i}" for i, name in enumerate(header)]
+        buffer = []
+        yielded = False
+        for row in rows:
+            if all(value is None for value in row):
+                continue  # Blank spreadsheet rows
+            buffer.append(row[:len(columns)])
+            if len(buffer) == chunk_rows:
+                yield pd.DataFrame(buffer, columns=columns)
+                yielded = True
+                buffer = []
+        if buffer or not yielded:
+            yield pd.DataFrame(buffer, columns=columns)
+    finally:
+        workbook.close()
+
+
+def file_fingerprint(path):
+    """Returns a SHA-256 of the file's contents, used to make sure a resumed import reads the same file."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for buffer in iter(lambda: f.read(1 << 20), b""):
+            digest.update(buffer)
+    return digest.hexdigest()
+
+
+def estimate_total_rows(path):
+    """Returns the number of data rows in the file, or None if it cannot be told cheaply."""
+    extension = os.path.splitext(path)[1].lower()
+    try:
+        if extension == ".csv":
+            with open(path, "rb") as f:
+                return max(sum(buffer.count(b"\n") for buffer in iter(lambda: f.read(1 << 20), b"")) - 1, 0)
+        if extension in (".xlsx", ".xlsm"):
+            from openpyxl import load_workbook
+            workbook = load_workbook(path, read_only=True)
+            try:
+                max_row = workbook.active.max_row
+            finally:
+                workbook.close()
+            return max_row - 1 if max_row else None
+    except Exception as e:
+        logging.warning(f"Could not count rows in {path}: {e}")
+    return None
+
+
+# --- Validation and conversion ---
+
+def _to_python_datetimes(series):
+    """Converts a column to datetime.datetime objects (None where missing or unparseable) in one vectorized pass."""
+    converted = pd.to_datetime(series, errors='coerce')
+    if getattr(converted.dt, 'tz', None) is not None:
+        converted = converted.dt.tz_convert('UTC').dt.tz_localize(None)
+    return pd.Series(converted.to_numpy(dtype='datetime64[us]').astype(object), index=series.index, dtype=object)
+
+
+def normalize_import_chunk(df, default_owner, default_employee_id):
+    """Standardizes column names, fills missing columns and converts date columns for one chunk.
+    Returns (df, notes); notes are warnings about defaulted columns to show the user once."""
+    df.columns = [str(col).strip().lower() for col in df.columns]
+    df = df.rename(columns=IMPORT_COLUMN_ALIASES)
+
+    if 'sample_id' not in df.columns:
+        raise ImportValidationError("Excel file must contain a 'SampleID' column (or 'sample_id').")
+    notes = []
+    if 'owner' not in df.columns:
+        notes.append("Excel file should ideally contain an 'Owner' column. Defaulting to current user.")
+        df['owner'] = default_owner
+    if 'maturation_date' not in df.columns:
+        notes.append("Excel file should ideally contain a 'MaturationDate' column. Defaulting to None.")
+        df['maturation_date'] = None
+    if 'status' not in df.columns:
+        df['status'] = SAMPLE_STATUS_OPTIONS[0]
+    if 'creation_date' not in df.columns:
+        df['creation_date'] = datetime.now()
+    if 'submitted_by_employee_id' not in df.columns:
+        df['submitted_by_employee_id'] = default_employee_id
+
+    for col in DATE_COLUMNS:
+        df[col] = _to_python_datetimes(df[col])
+    return df, notes
+
+
+def chunk_records(df):
+    """Returns the rows of a normalized chunk as dicts of plain Python values, with None for missing cells."""
+    return df.astype(object).where(df.notna(), None).to_dict('records')
+
+
+# --- Writing ---
+
+class ImportProgress:
+    """Thread-safe counters for a running import, read by the progress window."""
+
+    def __init__(self, total_rows=None):
+        self._lock = threading.Lock()
+        self.total_rows = total_rows
+        self.rows_read = 0
+        self.rows_written = 0
+        self.rows_skipped = 0
+        self.rows_resumed = 0  # Rows committed by an earlier, interrupted run of the same job
+        self.started_at = time.monotonic()
+        self.finished = False
+        self.error = None
+
+    def add(self, read=0, written=0, skipped=0, resumed=0):
+        with self._lock:
+            self.rows_read += read
+            self.rows_written += written
+            self.rows_skipped += skipped
+            self.rows_resumed += resumed
+
+    def finish(self, error=None):
+        with self._lock:
+            self.error = error
+            self.finished = True
+
+    def rows_per_second(self):
+        elapsed = time.monotonic() - self.started_at
+        return self.rows_read / elapsed if elapsed > 0 else 0.0
+
+    def summary(self):
+        resumed = f", {self.rows_resumed:,} already imported" if self.rows_resumed else ""
+        return (f"{self.rows_read:,} rows read, {self.rows_written:,} saved, {self.rows_skipped:,} skipped{resumed} "
+                f"({self.rows_per_second():,.0f} rows/s)")
+
+
+def create_import_job(db, batch_id, employee_id, file_name=None, fingerprint=None, total_rows=None, new_batch_data=None):
+    """Creates the job document tracking an import (and the new batch, in the same commit). Returns the job dict.
+    Both are written with create(), so an ID collision fails the commit instead of overwriting a document."""
+    job_id = new_import_job_id(employee_id)
+    job = {
+        "job_id": job_id,
+        "batch_id": batch_id,
+        "employee_id": employee_id,
+        "file_name": file_name,
+        "file_fingerprint": fingerprint,
+        "total_rows": total_rows,
+        "rows_per_commit": ROWS_PER_COMMIT,
+        "committed_ranges": [],
+        "rows_written": 0,
+        "rows_skipped": 0,
+        "status": "running",
+        "lease_id": new_ulid(),  # The run allowed to commit ranges; resuming the job takes a new lease
+        "error": None,
+        "created_at": datetime.now(),
+        "updated_at": firestore.SERVER_TIMESTAMP,
+    }
+    batch_write = db.batch()
+    batch_write.create(db.collection(IMPORT_JOBS_COLLECTION).document(job_id), job)
+    if new_batch_data is not None:
+        batch_write.create(db.collection("batches").document(batch_id), new_batch_data)
+    batch_write.commit()
+    logging.info(f"Created import job '{job_id}' for batch '{batch_id}'.")
+    return job
+
+
+def _lease_active(job):
+    """True while a running job is still being checkpointed. updated_at is stamped by the server on every commit;
+    the lease is long enough that the gap to this machine's clock does not matter."""
+    updated_at = as_naive(job.get("updated_at"))
+    if job.get("status") != "running" or not isinstance(updated_at, datetime):
+        return False
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    return now - updated_at < timedelta(seconds=IMPORT_LEASE_SECONDS)
+
+
+def load_resumable_import_jobs(db, employee_id):
+    """Returns the user's import jobs that did not complete and are not still running somewhere, newest first."""
+    jobs = [doc.to_dict() for doc in db.collection(IMPORT_JOBS_COLLECTION).where("employee_id", "==", employee_id).stream()]
+    jobs = [job for job in jobs if job.get("status") != "completed" and not _lease_active(job)]
+    return sorted(jobs, key=lambda job: str(job.get("job_id")), reverse=True)
+
+
+def claim_import_job(db, job_id):
+    """Takes a new lease on an interrupted import job so this run may resume it, and returns the job as read in
+    the same transaction (with its latest committed ranges). Any earlier run of the job loses its lease and
+    stops at its next commit. Raises ImportJobBusy if the job completed or is still running elsewhere."""
+    job_ref = db.collection(IMPORT_JOBS_COLLECTION).document(job_id)
+    lease_id = new_ulid()
+
+    def claim(transaction):
+        snapshot = job_ref.get(transaction=transaction)
+        if not snapshot.exists:
+            raise ValueError(f"Import job '{job_id}' no longer exists.")
+        job = snapshot.to_dict()
+        if job.get("status") == "completed":
+            raise ImportJobBusy(f"Import job '{job_id}' has already completed.")
+        if _lease_active(job):
+            raise ImportJobBusy(f"Import job '{job_id}' is still running on another workstation.")
+        transaction.update(job_ref, {"status": "running", "lease_id": lease_id, "error": None,
+                                     "updated_at": firestore.SERVER_TIMESTAMP})
+        return dict(job, status="running", lease_id=lease_id, error=None)
+
+    return run_transaction(db, claim, "claim_import_job")
+
+
+def mark_import_job(db, job_id, status, error=None, lease_id=None):
+    """Records the final status of an import job. With lease_id, it is recorded only if that run still holds the
+    job, so a run that lost its lease cannot mark over the run that took it. Failures are logged, not raised."""
+    job_ref = db.collection(IMPORT_JOBS_COLLECTION).document(job_id)
+    changes = {"status": status, "error": str(error)[:500] if error else None, "updated_at": firestore.SERVER_TIMESTAMP}
+
+    def mark(transaction):
+        job = job_ref.get(transaction=transaction).to_dict() or {}
+        if job.get("lease_id") != lease_id:
+            logging.info(f"Import job '{job_id}' is held by another run; not marking it {status}.")
+            return
+        transaction.update(job_ref, changes)
+
+    try:
+        if lease_id is None:
+            job_ref.update(changes)
+        else:
+            run_transaction(db, mark, "mark_import_job")
+    except Exception as e:
+        logging.error(f"Could not mark import job '{job_id}' as {status}: {e}", exc_info=True)
+
+
+class SampleImporter:
+    """Writes normalized import chunks into one batch as a resumable, idempotent job.
+
+    The file is committed in fixed ranges of rows_per_commit rows. Each commit holds the range's samples
+    (with document IDs derived from the job and row number), the matching number_of_samples shard increment and a
+    checkpoint of the range on the job document, so a range is either fully imported or not at all.
+    Resuming the job reads the same file again and skips every range already checkpointed.
+    Each commit is a transaction that reads the job document first: a range another run has committed in the
+    meantime is skipped, and if the job's lease was taken by another run the import stops with ImportJobBusy.
+    Rows without a sample ID, repeated within the file or already in Firestore are skipped."""
+
+    def __init__(self, db, job, employee_id, progress=None):
+        self.db = db
+        self.job_id = job["job_id"]
+        self.lease_id = job.get("lease_id")
+        self.batch_id = job["batch_id"]
+        self.employee_id = employee_id
+        self.rows_per_commit = job.get("rows_per_commit") or ROWS_PER_COMMIT
+        self.committed_ranges = set(job.get("committed_ranges") or [])
+        self.progress = progress or ImportProgress()
+        self.job_ref = db.collection(IMPORT_JOBS_COLLECTION).document(self.job_id)
+        self.sample_counter = ShardedCounter(db, "batches", self.batch_id, "number_of_samples")
+        self._seen_sample_ids = set()
+
+    def import_chunks(self, chunks):
+        """Imports every chunk, committing whenever a full range of rows is ready, and marks the job completed."""
+        pending = []
+        range_start = 0
+        for df in chunks:
+            for record in chunk_records(df):
+                pending.append(record)
+                if len(pending) == self.rows_per_commit:
+                    self._import_range(range_start, pending)
+                    range_start += len(pending)
+                    pending = []
+        if pending:
+            self._import_range(range_start, pending)
+        run_transaction(self.db, self._complete, "complete_import_job")
+        logging.info(f"Import job '{self.job_id}' into batch '{self.batch_id}' finished: {self.progress.summary()}")
+        return self.progress
+
+    def _import_range(self, start, records):
+        range_key = f"{start}-{start + len(records)}"
+        if range_key in self.committed_ranges:
+            self.progress.add(read=len(records), resumed=len(records))
+            return
+        self.progress.add(read=len(records))
+
+        fresh = []
+        for row_number, record in enumerate(records, start):
+            sample_id = record.get('sample_id')
+            if sample_id is None or str(sample_id).strip() == "" or sample_id in self._seen_sample_ids:
+                continue
+            self._seen_sample_ids.add(sample_id)
+            fresh.append((row_number, record))
+
+        existing = self._existing_sample_ids([record['sample_id'] for _, record in fresh])
+        if existing:
+            logging.warning(f"Skipping {len(existing)} duplicate sample IDs already in the database.")
+        to_write = [(row_number, record) for row_number, record in fresh if record['sample_id'] not in existing]
+        self._commit(range_key, to_write, skipped=len(records) - len(to_write))
+
+    def _existing_sample_ids(self, sample_ids):
+        """Returns which of sample_ids already exist, with one "in" query per IN_QUERY_LIMIT IDs."""
+        found = set()
+        for start in range(0, len(sample_ids), IN_QUERY_LIMIT):
+            query = self.db.collection("samples").where("sample_id", "in", sample_ids[start:start + IN_QUERY_LIMIT])
+            for doc in query.stream():
+                found.add(doc.to_dict().get('sample_id'))
+        return found
+
+    def _read_job(self, transaction):
+        """Reads the job document in transaction and checks this run still holds its lease."""
+        job = self.job_ref.get(transaction=transaction).to_dict() or {}
+        if job.get("lease_id") != self.lease_id:
+            raise ImportJobBusy(f"Import job '{self.job_id}' was resumed by another run; stopping this one.")
+        return job
+
+    def _complete(self, transaction):
+        self._read_job(transaction)
+        transaction.update(self.job_ref, {"status": "completed", "error": None, "updated_at": firestore.SERVER_TIMESTAMP})
+
+    def _commit(self, range_key, rows, skipped):
+        def commit(transaction):
+            if range_key in (self._read_job(transaction).get("committed_ranges") or []):
+                return False  # Committed by another run since this one started
+            self._stage_range(transaction, range_key, rows, skipped)
+            return True
+
+        try:
+            applied = run_transaction(self.db, commit, "import_range")
+        except ImportJobBusy:
+            raise
+        except Exception:
+            # The commit may have been applied even though the call failed (e.g. a timeout);
+            # the checkpoint tells, so the increment is never applied twice.
+            if not self._range_committed(range_key):
+                raise
+            logging.warning(f"Commit of rows {range_key} for job '{self.job_id}' reported an error but was applied.")
+            applied = True
+        self.committed_ranges.add(range_key)
+        if applied:
+            self.progress.add(written=len(rows), skipped=skipped)
+        else:
+            self.progress.add(resumed=len(rows) + skipped)
+
+    def _stage_range(self, batch_write, range_key, rows, skipped):
+        for row_number, record in rows:
+            # Deterministic IDs: writing the same row again overwrites the same document
+            sample_ref = self.db.collection("samples").document(f"{self.job_id}_{row_number:07d}")
+            batch_write.set(sample_ref, {
+                "sample_id": record['sample_id'],
+                "owner": record['owner'],
+                "maturation_date": record['maturation_date'],
+                "status": record['status'],
+                "batch_id": self.batch_id,
+                "creation_date": record['creation_date'],
+                "submitted_by_employee_id": record['submitted_by_employee_id'],
+                "last_updated_by_user_id": self.employee_id,
+                "last_updated_timestamp": firestore.SERVER_TIMESTAMP
+            })
+        if rows:
+            self.sample_counter.increment(batch_write, len(rows))
+        batch_write.update(self.job_ref, {
+            "committed_ranges": firestore.ArrayUnion([range_key]),
+            "rows_written": firestore.Increment(len(rows)),
+            "rows_skipped": firestore.Increment(skipped),
+            "updated_at": firestore.SERVER_TIMESTAMP,
+        })
+
+    def _range_committed(self, range_key):
+        try:
+            job = self.job_ref.get().to_dict() or {}
+        except Exception:
+            return False
+        return range_key in (job.get("committed_ranges") or [])
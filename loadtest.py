@@ -0,0 +1,421 @@
+# loadtest.py
+"""Load test simulating many lab clients working against the Firestore emulator at the same time.
+
+Each simulated client is a thread with its own Firestore client (like a separate lab PC) that keeps
+picking an operation from a weighted mix and replaying the Firestore calls the logic modules make for it:
+
+    import          UserLogic._add_excel_to_existing_batch_db into one of a few shared ("hot") batches
+    approve_sample  AdminLogic.admin_approve_sample, including the parent batch status check
+    approve_batch   AdminLogic.admin_approve_selected_batch
+    browse          UserLogic.load_samples_paginated('all_samples') over the first few pages
+    export          AdminLogic.export_user_batches (data collection only, no Excel file)
+
+The logic methods themselves read Tk widgets and show dialogs, so they can only run on the Tk thread;
+the replayed call sequences keep their reads, writes and contention (number_of_samples shard increments,
+batch status updates) without the UI. Reports throughput, latency percentiles, contention retries and
+error rates per operation, and checks the hot batch counters against their actual sample counts.
+
+    firebase emulators:start --only firestore
+    FIRESTORE_EMULATOR_HOST=localhost:8080 python loadtest.py --clients 24 --duration 60
+    python loadtest.py --backend fake --clients 8 --duration 10        # smoke run, no emulator
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+import urllib.request
+from datetime import datetime, timedelta
+
+import pandas as pd
+from google.api_core.exceptions import Aborted, Conflict, DeadlineExceeded, ResourceExhausted, ServiceUnavailable
+from google.cloud.firestore_v1 import transforms
+
+from constants import MAX_WRITES_PER_BATCH, SAMPLE_STATUS_OPTIONS
+from firestore_metrics import instrument_client, metrics, track_action
+from sharded_counter import ShardedCounter
+
+# --- Logging Setup ---
+import logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+# --- End Logging Setup ---
+
+DEFAULT_MIX = "import=2,approve_sample=3,approve_batch=1,browse=8,export=1"
+SAMPLES_PER_PAGE = 100  # UserLogic.samples_per_page
+SAMPLES_PER_BATCH = 100
+# Errors Firestore returns when writes to the same documents collide or the backend is overloaded
+CONTENTION_ERRORS = (Aborted, Conflict, DeadlineExceeded, ResourceExhausted, ServiceUnavailable)
+
+
+# --- Clients and seeding ---
+
+def make_client_factory(backend, project_id):
+    """Returns a function creating one Firestore client per simulated lab client."""
+    if backend == "fake":
+        from firestore_fake import FakeFirestore, FakeFirestoreClient
+        store = FakeFirestore()
+        return lambda: instrument_client(FakeFirestoreClient(store))
+
+    if not os.environ.get("FIRESTORE_EMULATOR_HOST"):
+        sys.exit("FIRESTORE_EMULATOR_HOST is not set. The load test only runs against the emulator "
+                 "(or --backend fake), never the live project.")
+    from google.auth.credentials import AnonymousCredentials
+    from google.cloud import firestore as cloud_firestore
+    return lambda: instrument_client(cloud_firestore.Client(project=project_id, credentials=AnonymousCredentials()))
+
+
+def reset_emulator(project_id):
+    """Deletes every document in the emulator's default database."""
+    host = os.environ["FIRESTORE_EMULATOR_HOST"]
+    url = f"http://{host}/emulator/v1/projects/{project_id}/databases/(default)/documents"
+    urllib.request.urlopen(urllib.request.Request(url, method="DELETE"), timeout=30).close()
+    logging.info(f"Cleared emulator data for project {project_id}.")
+
+
+def _commit_in_chunks(client, writes):
+    """Writes (collection, doc_id, data) tuples with batched sets of at most MAX_WRITES_PER_BATCH."""
+    for start in range(0, len(writes), MAX_WRITES_PER_BATCH):
+        batch_write = client.batch()
+        for collection, doc_id, data in writes[start:start + MAX_WRITES_PER_BATCH]:
+            batch_write.set(client.collection(collection).document(doc_id), data)
+        batch_write.commit()
+
+
+def seed(client, run_id, sample_count, hot_batches, users):
+    """Creates users, batches (the first hot_batches of them shared by all importers) and samples.
+    Returns the seeded batch IDs grouped as {"hot": [...], "pending": [...]}."""
+    now = datetime.now()
+    writes = [("users", employee_id, {"employee_id": employee_id, "username": f"lt_{employee_id}",
+                                      "email": f"{employee_id.lower()}@example.com", "role": role,
+                                      "password": "loadtest", "status": "active"})
+              for employee_id, role in users.items()]
+    batch_count = max(hot_batches + 1, sample_count // SAMPLES_PER_BATCH)
+    batch_ids = [f"batch_{run_id}_{b:05d}" for b in range(batch_count)]
+    counts = dict.fromkeys(batch_ids, 0)
+    submitters = [employee_id for employee_id, role in users.items() if role == "user"]
+    for i in range(sample_count):
+        batch_id = batch_ids[i % batch_count]
+        counts[batch_id] += 1
+        writes.append(("samples", f"{run_id}_seed_{i:07d}", {
+            "sample_id": f"{run_id}-S{i:07d}",
+            "owner": "loadtest",
+            "maturation_date": now + timedelta(days=(i % 365) - 180),
+            "status": "pending approval" if i % 3 else SAMPLE_STATUS_OPTIONS[i % len(SAMPLE_STATUS_OPTIONS)],
+            "batch_id": batch_id,
+            "creation_date": now - timedelta(seconds=sample_count - i),
+            "submitted_by_employee_id": submitters[i % len(submitters)],
+            "last_updated_by_user_id": submitters[i % len(submitters)],
+            "last_updated_timestamp": now,
+        }))
+    for b, batch_id in enumerate(batch_ids):
+        writes.append(("batches", batch_id, {
+            "batch_id": batch_id,
+            "product_name": f"Load test product {b % 20}",
+            "description": "load test",
+            "submission_date": now,
+            "user_employee_id": submitters[b % len(submitters)],
+            "user_username": f"lt_{submitters[b % len(submitters)]}",
+            "user_email": f"{submitters[b % len(submitters)].lower()}@example.com",
+            "status": "approved" if b % 4 == 3 else "pending approval",
+            "number_of_samples": counts[batch_id],
+        }))
+    _commit_in_chunks(client, writes)
+    logging.info(f"Seeded {len(users)} users, {batch_count} batches and {sample_count} samples (run {run_id}).")
+    return {"hot": batch_ids[:hot_batches], "pending": [b for i, b in enumerate(batch_ids) if i % 4 != 3]}
+
+
+# --- Simulated operations ---
+
+class LabClient:
+    """One simulated lab PC: its own Firestore client and user, replaying logic-module call sequences."""
+
+    def __init__(self, index, client, run_id, batches, employee_id, admin_id, import_rows):
+        self.index = index
+        self.db = client
+        self.run_id = run_id
+        self.batches = batches
+        self.employee_id = employee_id
+        self.admin_id = admin_id
+        self.import_rows = import_rows
+        self.rng = random.Random(index)
+        self._imports = 0
+
+    def _sample_status_update(self, status):
+        return {"status": status, "last_updated_by_user_id": self.admin_id, "last_updated_timestamp": transforms.SERVER_TIMESTAMP}
+
+    def import_rows_into_hot_batch(self):
+        """UserLogic._add_excel_to_existing_batch_db: duplicate check per row, then one batch with the increment."""
+        self._imports += 1
+        batch_id = self.rng.choice(self.batches["hot"])
+        batch_doc_ref = self.db.collection("batches").document(batch_id)
+        if not batch_doc_ref.get().exists:
+            raise RuntimeError(f"Batch ID '{batch_id}' does not exist.")
+        batch_write = self.db.batch()
+        samples_added_count = 0
+        for i in range(self.import_rows):
+            sample_id = f"{self.run_id}-C{self.index:03d}-{self._imports:05d}-{i:04d}"
+            if list(self.db.collection("samples").where("sample_id", "==", sample_id).limit(1).get()):
+                continue
+            now = datetime.now()
+            batch_write.set(self.db.collection("samples").document(), {
+                "sample_id": sample_id,
+                "owner": "loadtest",
+                "maturation_date": now + timedelta(days=90),
+                "status": "pending approval",
+                "batch_id": batch_id,
+                "creation_date": now,
+                "submitted_by_employee_id": self.employee_id,
+                "last_updated_by_user_id": self.employee_id,
+                "last_updated_timestamp": now,
+            })
+            samples_added_count += 1
+        ShardedCounter(self.db, "batches", batch_id, "number_of_samples").increment(batch_write, samples_added_count)
+        batch_write.commit()
+
+    def approve_sample(self):
+        """AdminLogic.admin_approve_sample: approve one sample, then re-check and update the parent batch status."""
+        batch_id = self.rng.choice(self.batches["hot"])
+        candidates = self.db.collection("samples").where("batch_id", "==", batch_id) \
+            .where("status", "==", "pending approval").limit(20).get()
+        if not candidates:
+            return
+        sample = self.rng.choice(candidates)
+        sample.reference.update(self._sample_status_update("approved"))
+
+        batch_samples = list(self.db.collection("samples").where("batch_id", "==", batch_id).stream())
+        all_samples_approved = bool(batch_samples) and all(s.to_dict().get("status") == "approved" for s in batch_samples)
+        batch_ref = self.db.collection("batches").document(batch_id)
+        current_batch_status = batch_ref.get().to_dict().get("status")
+        if all_samples_approved and current_batch_status != "approved":
+            batch_ref.update({"status": "approved"})
+        elif not all_samples_approved and current_batch_status == "approved":
+            batch_ref.update({"status": "pending approval"})
+
+    def approve_batch(self):
+        """AdminLogic.admin_approve_selected_batch: one batch with the batch status and every sample's status."""
+        batch_id = self.rng.choice(self.batches["pending"])
+        batch_doc = self.db.collection("batches").document(batch_id).get()
+        if not batch_doc.exists:
+            raise RuntimeError("Selected batch not found.")
+        batch_write = self.db.batch()
+        batch_write.update(self.db.collection("batches").document(batch_id), {"status": "approved"})
+        writes = 1
+        for sample in self.db.collection("samples").where("batch_id", "==", batch_id).stream():
+            if writes == MAX_WRITES_PER_BATCH:
+                break  # The app commits everything at once; stay under the batch limit here
+            batch_write.update(sample.reference, self._sample_status_update("approved"))
+            writes += 1
+        batch_write.commit()
+
+    def browse(self, pages=3):
+        """UserLogic.load_samples_paginated('all_samples') followed by Next Page clicks."""
+        cursor = None
+        for _ in range(pages):
+            query = self.db.collection("samples").order_by("creation_date").order_by("__name__").limit(SAMPLES_PER_PAGE)
+            if cursor is not None:
+                query = query.start_after(cursor)
+            docs = list(query.stream())
+            self.db.collection("samples").count().get()
+            if len(docs) < SAMPLES_PER_PAGE:
+                break
+            cursor = docs[-1]
+
+    def export(self):
+        """AdminLogic.export_user_batches: approved batches, then the samples of each one."""
+        rows = []
+        for batch in self.db.collection("batches").where("status", "==", "approved").get():
+            batch_data = batch.to_dict()
+            for sample in self.db.collection("samples").where("batch_id", "==", batch_data.get("batch_id")).get():
+                sample_data = sample.to_dict()
+                rows.append({"batch_id": batch_data.get("batch_id"), "sample_id": sample_data.get("sample_id"),
+                             "sample_status": sample_data.get("status")})
+        pd.DataFrame(rows)
+
+    OPERATIONS = {
+        "import": import_rows_into_hot_batch,
+        "approve_sample": approve_sample,
+        "approve_batch": approve_batch,
+        "browse": browse,
+        "export": export,
+    }
+
+
+# --- Runner ---
+
+class OperationStats:
+    def __init__(self):
+        self.latencies_ms = []
+        self.retries = 0
+        self.errors = 0
+        self.error_messages = {}
+
+    def to_dict(self, duration_s):
+        latencies = sorted(self.latencies_ms)
+        count = len(latencies) + self.errors
+
+        def pct(p):
+            if not latencies:
+                return 0.0
+            return round(latencies[min(len(latencies) - 1, int(round(p / 100 * (len(latencies) - 1))))], 1)
+
+        return {
+            "completed": len(latencies),
+            "errors": self.errors,
+            "error_rate": round(self.errors / count, 4) if count else 0.0,
+            "throughput_per_s": round(len(latencies) / duration_s, 2) if duration_s else 0.0,
+            "p50_ms": pct(50),
+            "p95_ms": pct(95),
+            "p99_ms": pct(99),
+            "max_ms": round(latencies[-1], 1) if latencies else 0.0,
+            "mean_ms": round(statistics.fmean(latencies), 1) if latencies else 0.0,
+            "contention_retries": self.retries,
+            "error_messages": dict(sorted(self.error_messages.items(), key=lambda item: -item[1])[:5]),
+        }
+
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in LabClient.OPERATIONS:
+            raise argparse.ArgumentTypeError(f"Unknown operation '{name}' (choose from {', '.join(LabClient.OPERATIONS)})")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def run_client(lab_client, mix, deadline, think_ms, max_retries, stats, lock):
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    while time.monotonic() < deadline:
+        name = lab_client.rng.choices(names, weights)[0]
+        operation = LabClient.OPERATIONS[name]
+        retries = 0
+        started = time.perf_counter()
+        error = None
+        with track_action(f"loadtest:{name}"):
+            while True:
+                try:
+                    operation(lab_client)
+                    break
+                except CONTENTION_ERRORS as e:
+                    if retries >= max_retries:
+                        error = e
+                        break
+                    retries += 1
+                    # Exponential backoff with jitter, like the client libraries' own retry policy
+                    time.sleep(min(2.0, 0.05 * 2 ** retries) * lab_client.rng.uniform(0.5, 1.5))
+                except Exception as e:
+                    error = e
+                    break
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        with lock:
+            op_stats = stats[name]
+            op_stats.retries += retries
+            if error is None:
+                op_stats.latencies_ms.append(elapsed_ms)
+            else:
+                op_stats.errors += 1
+                message = f"{type(error).__name__}: {str(error)[:120]}"
+                op_stats.error_messages[message] = op_stats.error_messages.get(message, 0) + 1
+        if think_ms:
+            time.sleep(lab_client.rng.uniform(0, think_ms) / 1000)
+
+
+def check_counters(client, batch_ids):
+    """Compares number_of_samples on each batch with the samples actually stored for it (lost or doubled increments)."""
+    report = {}
+    for batch_id in batch_ids:
+        counter = ShardedCounter(client, "batches", batch_id, "number_of_samples").total()
+        actual = client.collection("samples").where("batch_id", "==", batch_id).count().get()[0][0].value
+        report[batch_id] = {"number_of_samples": counter, "actual_samples": actual, "drift": counter - actual}
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate many concurrent lab clients against the Firestore emulator.")
+    parser.add_argument("--clients", type=int, default=16, help="Number of simulated lab clients (threads)")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds to run")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX),
+                        help=f"Weighted operation mix (default: {DEFAULT_MIX})")
+    parser.add_argument("--import-rows", type=int, default=50, help="Rows per simulated Excel import")
+    parser.add_argument("--seed-samples", type=int, default=2000, help="Samples created before the run")
+    parser.add_argument("--hot-batches", type=int, default=2, help="Batches shared by all importers")
+    parser.add_argument("--think-ms", type=float, default=200, help="Maximum random pause between operations")
+    parser.add_argument("--max-retries", type=int, default=5, help="Retries on contention errors before counting an error")
+    parser.add_argument("--backend", choices=("emulator", "fake"), default="emulator")
+    parser.add_argument("--project", default=os.environ.get("GCLOUD_PROJECT", "seprojectapr25"))
+    parser.add_argument("--reset", action="store_true", help="Clear the emulator before seeding")
+    parser.add_argument("--output", help="Write the report as JSON to this file")
+    parser.add_argument("--log-level", default="WARNING", help="Log level during the run")
+    args = parser.parse_args(argv)
+
+    logging.getLogger().setLevel(args.log_level.upper())
+    client_factory = make_client_factory(args.backend, args.project)
+    if args.reset and args.backend == "emulator":
+        reset_emulator(args.project)
+
+    run_id = datetime.now().strftime("lt%Y%m%d%H%M%S")
+    admin_id, user_ids = "E8000", [f"E8{i:03d}" for i in range(1, 6)]
+    users = dict({admin_id: "admin"}, **{employee_id: "user" for employee_id in user_ids})
+    setup_client = client_factory()
+    batches = seed(setup_client, run_id, args.seed_samples, args.hot_batches, users)
+    metrics.reset()
+
+    stats = {name: OperationStats() for name in args.mix}
+    lock = threading.Lock()
+    lab_clients = [LabClient(i, client_factory(), run_id, batches, user_ids[i % len(user_ids)], admin_id, args.import_rows)
+                   for i in range(args.clients)]
+    print(f"Running {args.clients} clients for {args.duration:.0f}s against the {args.backend} (mix: {args.mix})...")
+    started = time.monotonic()
+    deadline = started + args.duration
+    threads = [threading.Thread(target=run_client, name=f"lab-client-{c.index}",
+                                args=(c, args.mix, deadline, args.think_ms, args.max_retries, stats, lock), daemon=True)
+               for c in lab_clients]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+
+    firestore_usage = {a["action"].split(":", 1)[1]: a for a in metrics.snapshot()["actions"] if a["action"].startswith("loadtest:")}
+    report = {
+        "backend": args.backend,
+        "run_id": run_id,
+        "clients": args.clients,
+        "duration_s": round(elapsed, 1),
+        "mix": args.mix,
+        "operations": {},
+        "hot_batch_counters": check_counters(setup_client, batches["hot"]),
+    }
+    print(f"\n{'operation':<16}{'done':>7}{'ops/s':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+          f"{'retries':>9}{'errors':>8}{'err %':>7}{'reads/op':>10}{'writes/op':>10}")
+    for name, op_stats in stats.items():
+        result = op_stats.to_dict(elapsed)
+        usage = firestore_usage.get(name, {})
+        calls = max(1, usage.get("calls", 0))
+        result["reads_per_op"] = round(usage.get("reads", 0) / calls, 1)
+        result["writes_per_op"] = round(usage.get("writes", 0) / calls, 1)
+        report["operations"][name] = result
+        print(f"{name:<16}{result['completed']:>7}{result['throughput_per_s']:>8}{result['p50_ms']:>9}{result['p95_ms']:>9}"
+              f"{result['p99_ms']:>9}{result['contention_retries']:>9}{result['errors']:>8}{result['error_rate'] * 100:>7.1f}"
+              f"{result['reads_per_op']:>10}{result['writes_per_op']:>10}")
+        for message, count in result["error_messages"].items():
+            print(f"    {count} x {message}")
+    print("\nHot batch counters:")
+    for batch_id, counter in report["hot_batch_counters"].items():
+        print(f"  {batch_id}: number_of_samples={counter['number_of_samples']} actual={counter['actual_samples']} "
+              f"drift={counter['drift']}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
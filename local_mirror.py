@@ -0,0 +1,761 @@
+# local_mirror.py
+import copy
+import json
+import secrets
+import sqlite3
+import string
+import threading
+from datetime import datetime, timedelta, timezone
+
+from google.api_core.exceptions import Aborted, AlreadyExists, FailedPrecondition, NotFound
+from google.cloud.firestore_v1 import transforms
+from google.cloud.firestore_v1.aggregation import AggregationResult
+
+from constants import DELTA_SYNC_FIELDS, MIRRORED_COLLECTIONS, SYNC_INTERVAL_SECONDS, TOMBSTONES_COLLECTION
+from firestore_metrics import track_action
+from firestore_query import apply_field_writes as _apply_field_writes, compare_values as _compare_values, get_field as _get_field, normalize as _normalize, run_query, to_utc as _to_utc
+
+# --- Logging Setup ---
+import logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+# --- End Logging Setup ---
+
+_AUTO_ID_CHARS = string.ascii_letters + string.digits
+# Updates touching only these fields are status flips, which stay last-writer-wins.
+_STATUS_CHANGE_FIELDS = {"status", "last_updated_timestamp", "last_updated_by_user_id"}
+
+# --- Update times ---
+
+class WriteOption:
+    """What write_option() returns on the mirror and fake clients: a last_update_time write precondition."""
+
+    def __init__(self, last_update_time=None):
+        self.last_update_time = last_update_time
+
+
+class WriteResult:
+    """What document writes return on the mirror and fake clients. update_time is the commit time on the fake
+    (which SERVER_TIMESTAMP fields are set to, as in Firestore) and None for writes queued in the mirror."""
+
+    def __init__(self, update_time=None):
+        self.update_time = update_time
+
+
+def next_update_time(last_update_time):
+    """Returns a document update time for a write now, always after last_update_time."""
+    now = datetime.now(timezone.utc)
+    if last_update_time is None or now > last_update_time:
+        return now
+    return last_update_time + timedelta(microseconds=1)
+
+
+def check_preconditions(update_times, preconditions):
+    """Raises FailedPrecondition, like Firestore, if a document was written after the update time an edit
+    was based on. preconditions maps (collection, doc_id) to that last_update_time."""
+    for (collection, doc_id), last_update_time in (preconditions or {}).items():
+        if update_times.get((collection, doc_id)) != last_update_time:
+            raise FailedPrecondition(f"{collection}/{doc_id} was updated after {last_update_time}.")
+
+
+def _preconditions(reference, option):
+    if option is None or getattr(option, "last_update_time", None) is None:
+        return {}
+    return {(reference.collection_name, reference.id): option.last_update_time}
+
+
+# --- Value helpers ---
+
+def _encode(value):
+    """Encodes a mirror value (including write sentinels) into a JSON-safe structure."""
+    if isinstance(value, dict):
+        return {k: _encode(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_encode(v) for v in value]
+    if isinstance(value, datetime):
+        return {"__datetime__": _to_utc(value).isoformat()}
+    if isinstance(value, transforms.Increment):
+        return {"__increment__": value.value}
+    if isinstance(value, transforms.ArrayUnion):
+        return {"__array_union__": _encode(list(value.values))}
+    if isinstance(value, transforms.ArrayRemove):
+        return {"__array_remove__": _encode(list(value.values))}
+    if value is transforms.SERVER_TIMESTAMP:
+        return {"__server_timestamp__": True}
+    if value is transforms.DELETE_FIELD:
+        return {"__delete_field__": True}
+    return value
+
+
+def _decode(value):
+    """Reverses _encode, restoring datetimes and Firestore write sentinels."""
+    if isinstance(value, dict):
+        if "__datetime__" in value:
+            return datetime.fromisoformat(value["__datetime__"])
+        if "__increment__" in value:
+            return transforms.Increment(value["__increment__"])
+        if "__array_union__" in value:
+            return transforms.ArrayUnion(_decode(value["__array_union__"]))
+        if "__array_remove__" in value:
+            return transforms.ArrayRemove(_decode(value["__array_remove__"]))
+        if "__server_timestamp__" in value:
+            return transforms.SERVER_TIMESTAMP
+        if "__delete_field__" in value:
+            return transforms.DELETE_FIELD
+        return {k: _decode(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_decode(v) for v in value]
+    return value
+
+
+# --- Local mirror store ---
+
+class LocalMirror:
+    """Keeps a durable SQLite copy of the mirrored collections plus an outbox of pending writes.
+    Reads are served from memory; a background thread pushes the outbox and pulls remote changes."""
+
+    def __init__(self, remote_db, path, collections=MIRRORED_COLLECTIONS, sync_interval=SYNC_INTERVAL_SECONDS):
+        self.remote_db = remote_db
+        self.path = path
+        self.collections = tuple(collections)
+        self.sync_interval = sync_interval
+        self._lock = threading.RLock()
+        self._docs = {name: {} for name in self.collections}
+        # Update times of the local copies, for write preconditions; a pulled remote change gets a new one too
+        self._update_times = {}
+        self._last_update_time = None
+        self._stop_event = threading.Event()
+        self._wake_event = threading.Event()
+        self._thread = None
+        self.last_sync_error = None
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS documents (
+                collection TEXT NOT NULL,
+                doc_id TEXT NOT NULL,
+                data TEXT NOT NULL,
+                PRIMARY KEY (collection, doc_id)
+            );
+            CREATE TABLE IF NOT EXISTS outbox (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                collection TEXT NOT NULL,
+                doc_id TEXT NOT NULL,
+                op TEXT NOT NULL,
+                payload TEXT,
+                merge INTEGER NOT NULL DEFAULT 0,
+                base TEXT,
+                created_at TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                status TEXT NOT NULL DEFAULT 'pending',
+                last_error TEXT
+            );
+            CREATE TABLE IF NOT EXISTS sync_state (
+                collection TEXT PRIMARY KEY,
+                last_pull_at TEXT,
+                high_water_mark TEXT
+            );
+        """)
+        sync_state_columns = {row[1] for row in self._conn.execute("PRAGMA table_info(sync_state)")}
+        if "high_water_mark" not in sync_state_columns:  # Mirror files created before delta sync
+            self._conn.execute("ALTER TABLE sync_state ADD COLUMN high_water_mark TEXT")
+        self._conn.commit()
+        self._load()
+        logging.info(f"LocalMirror opened at {path} for collections {self.collections}.")
+
+    def _load(self):
+        """Loads all mirrored documents from SQLite into memory."""
+        with self._lock:
+            rows = self._conn.execute("SELECT collection, doc_id, data FROM documents").fetchall()
+            for collection, doc_id, data in rows:
+                if collection in self._docs:
+                    self._docs[collection][doc_id] = _decode(json.loads(data))
+                    self._touch(collection, doc_id)
+        logging.info(f"Loaded {len(rows)} mirrored documents from {self.path}.")
+
+    def is_hydrated(self):
+        """True once every mirrored collection has been pulled from Firestore at least once."""
+        with self._lock:
+            pulled = {row[0] for row in self._conn.execute("SELECT collection FROM sync_state WHERE last_pull_at IS NOT NULL")}
+        return all(name in pulled for name in self.collections)
+
+    # --- Local reads ---
+
+    def get_document(self, collection, doc_id):
+        """Returns a copy of a mirrored document, or None if it does not exist locally."""
+        with self._lock:
+            data = self._docs[collection].get(doc_id)
+            return copy.deepcopy(data) if data is not None else None
+
+    def query(self, collection, filters=(), orders=(), start_after=None, offset=0, limit=None):
+        """Runs a query against the in-memory copy of a collection."""
+        with self._lock:
+            results = run_query(self._docs[collection].items(), filters, orders, start_after, offset, limit)
+            return [(doc_id, copy.deepcopy(data)) for doc_id, data in results]
+
+    def count(self, collection, filters=()):
+        with self._lock:
+            return len(run_query(self._docs[collection].items(), filters))
+
+    def get_update_time(self, collection, doc_id):
+        with self._lock:
+            return self._update_times.get((collection, doc_id))
+
+    def _touch(self, collection, doc_id):
+        self._last_update_time = next_update_time(self._last_update_time)
+        self._update_times[(collection, doc_id)] = self._last_update_time
+
+    # --- Local writes ---
+
+    def apply_writes(self, writes, preconditions=None):
+        """Applies a list of (op, collection, doc_id, data, merge) writes atomically to the mirror
+        and records them in the outbox for the sync thread. op is 'set', 'create', 'update' or 'delete'.
+        preconditions ({(collection, doc_id): last_update_time}) are checked against the local copies;
+        remote edits not pulled yet are caught by the conflict check when the outbox is pushed."""
+        now = datetime.now(timezone.utc).isoformat()
+        with self._lock:
+            check_preconditions(self._update_times, preconditions)
+            # Validate the whole batch first so a failing write leaves nothing applied, like a Firestore batch.
+            staged = {}
+            for op, collection, doc_id, data, merge in writes:
+                key = (collection, doc_id)
+                current = staged[key] if key in staged else self._docs[collection].get(doc_id)
+                if op == "update" and current is None:
+                    raise NotFound(f"No document to update: {collection}/{doc_id}")
+                if op == "create" and current is not None:
+                    raise ValueError(f"Document already exists: {collection}/{doc_id}")
+                if op == "delete":
+                    staged[key] = None
+                elif op == "update" or merge:
+                    staged[key] = _apply_field_writes(current, data, self._server_time(collection))
+                else:
+                    staged[key] = _apply_field_writes({}, data, self._server_time(collection))
+
+            try:
+                for op, collection, doc_id, data, merge in writes:
+                    # Remember which version the write was based on, for conflict detection at push time
+                    current = self._docs[collection].get(doc_id)
+                    base = {"exists": current is not None,
+                            "last_updated_timestamp": current.get("last_updated_timestamp") if current else None}
+                    self._conn.execute(
+                        "INSERT INTO outbox (collection, doc_id, op, payload, merge, base, created_at) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (collection, doc_id, op, json.dumps(_encode(data)) if data is not None else None,
+                         1 if merge else 0, json.dumps(_encode(base)), now))
+                for (collection, doc_id), new_data in staged.items():
+                    self._store(collection, doc_id, new_data)
+                self._conn.commit()
+            except Exception:
+                self._conn.rollback()
+                self._load()
+                raise
+        self._wake_event.set()
+
+    def _store(self, collection, doc_id, data):
+        """Writes a document (or deletes it when data is None) to memory and SQLite. Caller holds the lock."""
+        if data is None:
+            self._docs[collection].pop(doc_id, None)
+            self._update_times.pop((collection, doc_id), None)
+            self._conn.execute("DELETE FROM documents WHERE collection = ? AND doc_id = ?", (collection, doc_id))
+        else:
+            self._docs[collection][doc_id] = data
+            self._touch(collection, doc_id)
+            self._conn.execute("INSERT OR REPLACE INTO documents (collection, doc_id, data) VALUES (?, ?, ?)",
+                               (collection, doc_id, json.dumps(_encode(data))))
+
+    # --- Outbox inspection ---
+
+    def pending_count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM outbox WHERE status = 'pending'").fetchone()[0]
+
+    def conflicts(self):
+        """Returns outbox entries that were not pushed because the remote document changed first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT seq, collection, doc_id, op, payload, created_at, last_error FROM outbox "
+                "WHERE status = 'conflict' ORDER BY seq").fetchall()
+        return [{"seq": seq, "collection": collection, "doc_id": doc_id, "op": op,
+                 "payload": _decode(json.loads(payload)) if payload else None,
+                 "created_at": created_at, "reason": reason}
+                for seq, collection, doc_id, op, payload, created_at, reason in rows]
+
+    def discard_conflict(self, seq):
+        with self._lock:
+            self._conn.execute("DELETE FROM outbox WHERE seq = ? AND status = 'conflict'", (seq,))
+            self._conn.commit()
+
+    # --- Background sync ---
+
+    def start(self):
+        """Starts the background sync thread."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="LocalMirrorSync", daemon=True)
+        self._thread.start()
+        logging.info("LocalMirror sync thread started.")
+
+    def stop(self, timeout=5):
+        """Stops the sync thread after a final push attempt."""
+        self._stop_event.set()
+        self._wake_event.set()
+        if self._thread:
+            self._thread.join(timeout)
+        logging.info("LocalMirror sync thread stopped.")
+
+    def sync_now(self):
+        """Wakes the sync thread so it runs a push/pull cycle immediately."""
+        self._wake_event.set()
+
+    def _run(self):
+        while True:
+            self.sync_once()
+            if self._stop_event.is_set():
+                break
+            self._wake_event.wait(self.sync_interval)
+            self._wake_event.clear()
+
+    def sync_once(self):
+        """Runs one push/pull cycle. Network errors are logged and retried on the next cycle."""
+        try:
+            with track_action("mirror_sync"):
+                self._push_outbox()
+                for name in self.collections:
+                    self._pull_collection(name)
+            self.last_sync_error = None
+        except Exception as e:
+            self.last_sync_error = str(e)
+            logging.warning(f"LocalMirror sync cycle failed, will retry: {e}")
+
+    def _push_outbox(self):
+        """Pushes pending outbox entries to Firestore in order, skipping ones that conflict."""
+        with self._lock:
+            entries = self._conn.execute(
+                "SELECT seq, collection, doc_id, op, payload, merge, base FROM outbox "
+                "WHERE status = 'pending' ORDER BY seq").fetchall()
+        if not entries:
+            return
+        logging.info(f"Pushing {len(entries)} outbox entries to Firestore.")
+
+        rebased = {}  # seq -> base moved onto a write pushed earlier in this cycle (see _rebase_next_entry)
+        for seq, collection, doc_id, op, payload, merge, base in entries:
+            data = _decode(json.loads(payload)) if payload else None
+            base = rebased.pop(seq, None) or _decode(json.loads(base))
+            doc_ref = self.remote_db.collection(collection).document(doc_id)
+            try:
+                conflict_reason, option = self._detect_conflict(doc_ref, op, data, merge, base)
+                if conflict_reason:
+                    self._mark_conflict(seq, collection, doc_id, conflict_reason, doc_ref)
+                    continue
+                if op == "delete":
+                    result = doc_ref.delete(option=option) if option is not None else doc_ref.delete()
+                elif op == "update":
+                    result = doc_ref.update(data, option=option) if option is not None else doc_ref.update(data)
+                elif op == "create" or (op == "set" and not merge and not base["exists"]):
+                    result = doc_ref.create(data)  # Fails if someone created it since the check
+                else:
+                    result = doc_ref.set(data, merge=bool(merge))
+            except NotFound as e:
+                self._mark_conflict(seq, collection, doc_id, f"Remote document missing: {e}", doc_ref)
+                continue
+            except FailedPrecondition as e:
+                self._mark_conflict(seq, collection, doc_id, f"Remote document changed while pushing: {e}", doc_ref)
+                continue
+            except AlreadyExists:
+                self._mark_conflict(seq, collection, doc_id, "Document was created remotely with the same ID.", doc_ref)
+                continue
+            except Exception as e:
+                with self._lock:
+                    self._conn.execute("UPDATE outbox SET attempts = attempts + 1, last_error = ? WHERE seq = ?", (str(e), seq))
+                    self._conn.commit()
+                raise  # Keep ordering: stop this cycle and retry from this entry next time.
+            with self._lock:
+                self._conn.execute("DELETE FROM outbox WHERE seq = ?", (seq,))
+                if data is not None and data.get("last_updated_timestamp") is transforms.SERVER_TIMESTAMP:
+                    rebased.update(self._rebase_next_entry(seq, collection, doc_id, getattr(result, "update_time", None)))
+                self._conn.commit()
+
+    def _detect_conflict(self, doc_ref, op, data, merge, base):
+        """Conflict detection based on last_updated_timestamp: a user edit conflicts if the remote
+        document was updated after the version the local edit was based on. Creating a document
+        that did not exist locally conflicts if someone else created it remotely in the meantime
+        (the push uses create(), which fails in that case).
+
+        Returns (conflict reason or None, write option). The option makes an update or delete conditional on
+        the remote version checked here, so an edit landing between the check and the push fails the push
+        with FailedPrecondition instead of being overwritten."""
+        is_user_edit = op == "delete" or (data is not None and "last_updated_timestamp" in data and
+                                          not set(data) <= _STATUS_CHANGE_FIELDS)
+        if not is_user_edit:
+            return None, None  # New documents, status flips and counter increments need no read.
+        remote_snapshot = doc_ref.get()
+        if not remote_snapshot.exists:
+            return None, None
+        remote_timestamp = _normalize((remote_snapshot.to_dict() or {}).get("last_updated_timestamp"))
+        base_timestamp = base["last_updated_timestamp"]
+        if remote_timestamp is not None and base_timestamp is not None and \
+                _compare_values(remote_timestamp, base_timestamp) > 0:
+            return f"Remote document updated at {remote_timestamp} after local base {base_timestamp}.", None
+        return None, self.remote_db.write_option(last_update_time=remote_snapshot.update_time)
+
+    def _rebase_next_entry(self, seq, collection, doc_id, update_time):
+        """After pushing entry seq, whose last_updated_timestamp Firestore set to the commit time (update_time),
+        makes the next pending edit of the same document, which was based on that write, use it as its base.
+        Without it our own pushed write would look like a newer remote edit. Returns {seq: new base} for the
+        entry rebased, if any. Caller holds the lock."""
+        if update_time is None:
+            return {}
+        row = self._conn.execute(
+            "SELECT seq, base FROM outbox WHERE collection = ? AND doc_id = ? AND status = 'pending' AND seq > ? "
+            "ORDER BY seq LIMIT 1", (collection, doc_id, seq)).fetchone()
+        if row is None:
+            return {}
+        base = _decode(json.loads(row[1]))
+        base["last_updated_timestamp"] = _normalize(update_time)
+        self._conn.execute("UPDATE outbox SET base = ? WHERE seq = ?", (json.dumps(_encode(base)), row[0]))
+        return {row[0]: base}
+
+    def _mark_conflict(self, seq, collection, doc_id, reason, doc_ref):
+        """Flags an outbox entry as conflicting and takes the remote version of the document (remote wins)."""
+        logging.warning(f"Sync conflict on {collection}/{doc_id}: {reason}")
+        remote_snapshot = doc_ref.get()
+        with self._lock:
+            self._conn.execute("UPDATE outbox SET status = 'conflict', last_error = ? WHERE seq = ?", (reason, seq))
+            if not self._has_pending(collection, doc_id):
+                self._store(collection, doc_id, _normalize(remote_snapshot.to_dict()) if remote_snapshot.exists else None)
+            self._conn.commit()
+
+    def _written_after(self, collection, doc_id, deleted_at):
+        """True if the local copy was written (e.g. re-created) after a tombstone's deletion time, so the
+        tombstone, pulled late, must not remove it. Caller holds the lock."""
+        changed_at = self._docs[collection][doc_id].get(DELTA_SYNC_FIELDS.get(collection, ""))
+        return isinstance(changed_at, datetime) and isinstance(deleted_at, datetime) and changed_at > deleted_at
+
+    def _has_pending(self, collection, doc_id):
+        return self._conn.execute(
+            "SELECT 1 FROM outbox WHERE collection = ? AND doc_id = ? AND status = 'pending' LIMIT 1",
+            (collection, doc_id)).fetchone() is not None
+
+    def _server_time(self, name):
+        """Local stand-in for SERVER_TIMESTAMP in a delta-synced collection: the newest server timestamp pulled so
+        far, never this machine's clock, so a local write can't move a delta sync mark past remote changes still
+        to be pulled. The pushed write is stamped by Firestore and pulled back with its real timestamp."""
+        return self._high_water_mark(name) if name in DELTA_SYNC_FIELDS else None
+
+    def _high_water_mark(self, name):
+        row = self._conn.execute("SELECT high_water_mark FROM sync_state WHERE collection = ?", (name,)).fetchone()
+        return _decode(json.loads(row[0])) if row and row[0] else None
+
+    def _pull_collection(self, name):
+        """Refreshes a mirrored collection from Firestore, keeping documents with unpushed local writes.
+        Collections listed in DELTA_SYNC_FIELDS are pulled incrementally once they have been fully pulled."""
+        delta_field = DELTA_SYNC_FIELDS.get(name)
+        with self._lock:
+            high_water_mark = self._high_water_mark(name) if delta_field else None
+
+        remote_query = self.remote_db.collection(name)
+        if high_water_mark is not None:
+            remote_query = remote_query.where(delta_field, ">", high_water_mark)
+        remote_docs = {doc.id: _normalize(doc.to_dict()) for doc in remote_query.stream()}
+
+        with self._lock:
+            pending_ids = {row[0] for row in self._conn.execute(
+                "SELECT DISTINCT doc_id FROM outbox WHERE collection = ? AND status = 'pending'", (name,))}
+            if high_water_mark is None:
+                for doc_id in list(self._docs[name]):
+                    if doc_id not in remote_docs and doc_id not in pending_ids:
+                        self._store(name, doc_id, None)
+            for doc_id, data in remote_docs.items():
+                if doc_id not in pending_ids and self._docs[name].get(doc_id) != data:
+                    self._store(name, doc_id, data)
+            if name == TOMBSTONES_COLLECTION:
+                for data in remote_docs.values():
+                    deleted_collection, deleted_id = data.get("collection"), data.get("doc_id")
+                    if deleted_collection in self._docs and deleted_id in self._docs[deleted_collection] and \
+                            not self._has_pending(deleted_collection, deleted_id) and \
+                            not self._written_after(deleted_collection, deleted_id, data.get("deleted_timestamp")):
+                        self._store(deleted_collection, deleted_id, None)
+
+            if delta_field:
+                for data in remote_docs.values():
+                    value = data.get(delta_field)
+                    if isinstance(value, datetime) and (high_water_mark is None or value > high_water_mark):
+                        high_water_mark = value
+            self._conn.execute("INSERT OR REPLACE INTO sync_state (collection, last_pull_at, high_water_mark) VALUES (?, ?, ?)",
+                               (name, datetime.now(timezone.utc).isoformat(),
+                                json.dumps(_encode(high_water_mark)) if high_water_mark is not None else None))
+            self._conn.commit()
+        logging.debug(f"Pulled {len(remote_docs)} {'changed ' if delta_field else ''}documents for mirrored collection '{name}'.")
+
+
+# --- Firestore-compatible facade over the mirror ---
+
+def _project(data, field_paths):
+    """Keeps only field_paths (dotted paths allowed) of a document, like a Firestore select() projection."""
+    projected = {}
+    for field_path in field_paths:
+        found, value = _get_field(data, field_path)
+        if not found:
+            continue
+        parts = field_path.split(".")
+        target = projected
+        for part in parts[:-1]:
+            target = target.setdefault(part, {})
+        target[parts[-1]] = value
+    return projected
+
+
+class MirrorSnapshot:
+    """Mimics a Firestore DocumentSnapshot for a mirrored document."""
+
+    def __init__(self, reference, data, update_time=None):
+        self.reference = reference
+        self.id = reference.id
+        self.update_time = update_time
+        self._data = data
+
+    @property
+    def exists(self):
+        return self._data is not None
+
+    def to_dict(self):
+        return copy.deepcopy(self._data) if self._data is not None else None
+
+    def get(self, field_path):
+        return _get_field(self._data or {}, field_path)[1]
+
+
+class MirrorDocumentReference:
+    """Mimics a Firestore DocumentReference; writes go to the mirror and its outbox."""
+
+    def __init__(self, mirror, collection, doc_id):
+        self._mirror = mirror
+        self.collection_name = collection
+        self.id = doc_id
+
+    @property
+    def path(self):
+        return f"{self.collection_name}/{self.id}"
+
+    def get(self, field_paths=None, transaction=None):
+        update_time = self._mirror.get_update_time(self.collection_name, self.id)
+        if transaction is not None:
+            transaction.record_read(self, update_time)
+        return MirrorSnapshot(self, self._mirror.get_document(self.collection_name, self.id), update_time)
+
+    def set(self, document_data, merge=False):
+        return WriteResult(self._mirror.apply_writes([("set", self.collection_name, self.id, document_data, merge)]))
+
+    def create(self, document_data):
+        return WriteResult(self._mirror.apply_writes([("create", self.collection_name, self.id, document_data, False)]))
+
+    def update(self, field_updates, option=None):
+        return WriteResult(self._mirror.apply_writes([("update", self.collection_name, self.id, field_updates, False)],
+                                                     preconditions=_preconditions(self, option)))
+
+    def delete(self, option=None):
+        return self._mirror.apply_writes([("delete", self.collection_name, self.id, None, False)],
+                                         preconditions=_preconditions(self, option))
+
+
+class MirrorQuery:
+    """Mimics the subset of the Firestore Query API used by the logic modules."""
+
+    def __init__(self, mirror, collection, filters=(), orders=(), start_after_cursor=None, offset_count=0, limit_count=None,
+                 projection=None):
+        self._mirror = mirror
+        self._collection = collection
+        self._filters = tuple(filters)
+        self._orders = tuple(orders)
+        self._start_after = start_after_cursor
+        self._offset = offset_count
+        self._limit = limit_count
+        self._projection = projection
+
+    def _copy(self, **changes):
+        params = dict(filters=self._filters, orders=self._orders, start_after_cursor=self._start_after,
+                      offset_count=self._offset, limit_count=self._limit, projection=self._projection)
+        params.update(changes)
+        return MirrorQuery(self._mirror, self._collection, **params)
+
+    def where(self, field_path=None, op_string=None, value=None, filter=None):
+        if filter is not None:
+            field_path, op_string, value = filter.field_path, filter.op_string, filter.value
+        return self._copy(filters=self._filters + ((field_path, op_string, value),))
+
+    def order_by(self, field_path, direction="ASCENDING"):
+        return self._copy(orders=self._orders + ((field_path, direction),))
+
+    def limit(self, count):
+        return self._copy(limit_count=count)
+
+    def offset(self, num_to_skip):
+        return self._copy(offset_count=num_to_skip)
+
+    def start_after(self, document_fields_or_snapshot):
+        return self._copy(start_after_cursor=document_fields_or_snapshot)
+
+    def select(self, field_paths):
+        return self._copy(projection=tuple(field_paths))
+
+    def stream(self, transaction=None):
+        for doc_id, data in self._mirror.query(self._collection, self._filters, self._orders,
+                                               self._start_after, self._offset, self._limit):
+            if self._projection is not None:
+                data = _project(data, self._projection)
+            yield MirrorSnapshot(MirrorDocumentReference(self._mirror, self._collection, doc_id), data,
+                                 self._mirror.get_update_time(self._collection, doc_id))
+
+    def get(self, transaction=None):
+        return list(self.stream())
+
+    def count(self, alias="count"):
+        return MirrorAggregationQuery(self, alias)
+
+
+class MirrorCollectionReference(MirrorQuery):
+    """Mimics a Firestore CollectionReference for a mirrored collection."""
+
+    def __init__(self, mirror, collection):
+        super().__init__(mirror, collection)
+        self.id = collection
+
+    def document(self, document_id=None):
+        if document_id is None:
+            document_id = "".join(secrets.choice(_AUTO_ID_CHARS) for _ in range(20))
+        return MirrorDocumentReference(self._mirror, self._collection, document_id)
+
+    def add(self, document_data, document_id=None):
+        doc_ref = self.document(document_id)
+        doc_ref.create(document_data)
+        return datetime.now(timezone.utc), doc_ref
+
+
+class MirrorAggregationQuery:
+    """Mimics query.count(); the result shape matches Firestore's AggregationQuery.get()."""
+
+    def __init__(self, query, alias):
+        self._query = query
+        self._alias = alias
+
+    def get(self, transaction=None):
+        total = len(self._query.get())
+        return [[AggregationResult(alias=self._alias, value=total, read_time=datetime.now(timezone.utc))]]
+
+    def stream(self, transaction=None):
+        yield from self.get()
+
+
+class MirrorWriteBatch:
+    """Mimics a Firestore WriteBatch. Mirrored writes are applied locally and queued in the outbox;
+    writes to non-mirrored collections are forwarded to a remote batch."""
+
+    def __init__(self, mirror):
+        self._mirror = mirror
+        self._writes = []
+        self._preconditions = {}
+        self._remote_batch = None
+
+    def _remote(self):
+        if self._remote_batch is None:
+            self._remote_batch = self._mirror.remote_db.batch()
+        return self._remote_batch
+
+    def set(self, reference, document_data, merge=False):
+        if isinstance(reference, MirrorDocumentReference):
+            self._writes.append(("set", reference.collection_name, reference.id, document_data, merge))
+        else:
+            self._remote().set(reference, document_data, merge=merge)
+
+    def create(self, reference, document_data):
+        if isinstance(reference, MirrorDocumentReference):
+            self._writes.append(("create", reference.collection_name, reference.id, document_data, False))
+        else:
+            self._remote().create(reference, document_data)
+
+    def update(self, reference, field_updates, option=None):
+        if isinstance(reference, MirrorDocumentReference):
+            self._writes.append(("update", reference.collection_name, reference.id, field_updates, False))
+            self._preconditions.update(_preconditions(reference, option))
+        elif option is not None:
+            self._remote().update(reference, field_updates, option=option)
+        else:
+            self._remote().update(reference, field_updates)
+
+    def delete(self, reference):
+        if isinstance(reference, MirrorDocumentReference):
+            self._writes.append(("delete", reference.collection_name, reference.id, None, False))
+        else:
+            self._remote().delete(reference)
+
+    def commit(self):
+        if self._writes:
+            self._mirror.apply_writes(self._writes, preconditions=self._preconditions)
+        if self._remote_batch is not None:
+            self._remote_batch.commit()
+        committed = len(self._writes)
+        self._writes = []
+        self._preconditions = {}
+        self._remote_batch = None
+        return committed
+
+
+class MirrorTransaction(MirrorWriteBatch):
+    """Mimics a single-attempt Firestore transaction with optimistic concurrency: every document read through
+    it is a precondition of the commit, so the commit aborts (ABORTED, like a contended Firestore transaction)
+    if one of them was written in between. Query and count reads are not versioned."""
+
+    def __init__(self, mirror):
+        super().__init__(mirror)
+        self._read_versions = {}
+
+    def record_read(self, reference, update_time):
+        self._read_versions.setdefault((reference.collection_name, reference.id), update_time)
+
+    def run_attempt(self, fn):
+        """Runs fn(self) and commits its writes if nothing it read has changed since."""
+        self._writes, self._preconditions, self._read_versions = [], {}, {}
+        result = fn(self)
+        if self._writes:
+            self._preconditions.update(self._read_versions)
+            try:
+                self.commit()
+            except FailedPrecondition as e:
+                raise Aborted(f"Transaction contended: {e}") from e
+        return result
+
+
+class MirrorClient:
+    """Drop-in replacement for the Firestore client that serves mirrored collections from the LocalMirror.
+    Anything not mirrored (other collections, collection group queries, etc.) is passed through to Firestore."""
+
+    def __init__(self, mirror):
+        self.mirror = mirror
+
+    def collection(self, collection_path):
+        if collection_path in self.mirror.collections:
+            return MirrorCollectionReference(self.mirror, collection_path)
+        return self.mirror.remote_db.collection(collection_path)
+
+    def batch(self):
+        return MirrorWriteBatch(self.mirror)
+
+    def transaction(self, **kwargs):
+        return MirrorTransaction(self.mirror)
+
+    def write_option(self, last_update_time=None):
+        return WriteOption(last_update_time)
+
+    def get_all(self, references, field_paths=None, transaction=None):
+        """Reads mirrored documents from the mirror and passes the others to Firestore in one get_all."""
+        remote_references = []
+        for reference in references:
+            if isinstance(reference, MirrorDocumentReference):
+                yield reference.get(field_paths, transaction=transaction)
+            else:
+                remote_references.append(reference)
+        if remote_references:
+            yield from self.mirror.remote_db.get_all(remote_references, field_paths=field_paths, transaction=transaction)
+
+    def __getattr__(self, name):
+        return getattr(self.mirror.remote_db, name)
@@ -1,75 +1,145 @@
-# main_app.py
-import tkinter as tk
-from tkinter import ttk, messagebox
-
-# Import modules
-from firebase_setup import db
-from auth_manager import AuthManager
-from user_logic import UserLogic
-from admin_logic import AdminLogic
-from tester_logic import TesterLogic
-from constants import MIN_PASSWORD_LENGTH  # Just for style mapping, not direct use in logic here
-
-
-class ShelfLifeApp:
-    def __init__(self, root):
-        self.root = root
-        self.root.title("Shelf-life Study Management System")
-        self.root.geometry("800x600")
-
-        self.data = None  # This will hold the DataFrame, managed by UserLogic
-        self.file_path = ""  # Managed by UserLogic
-
-        self.current_user = None  # Stores authenticated user's data
-
-        # Initialize the logic modules, passing self (the main app instance) for callbacks
-        self.auth_manager = AuthManager(self.root, self)
-        self.user_logic = UserLogic(self.root, self)
-        self.admin_logic = AdminLogic(self.root, self)
-        self.tester_logic = TesterLogic(self.root, self)
-
-        self.login_screen()
-
-    def clear_root(self):
-        """Clears all widgets from the main window."""
-        for widget in self.root.winfo_children():
-            widget.destroy()
-
-    def login_screen(self):
-        """Displays the login screen by delegating to AuthManager."""
-        self.auth_manager.login_screen()
-
-    def admin_dashboard(self):
-        """Displays the admin dashboard by delegating to AdminLogic."""
-        self.admin_logic.admin_dashboard()
-
-    def user_dashboard(self):
-        """Displays the user dashboard by delegating to UserLogic."""
-        self.user_logic.user_dashboard()
-
-    def test_dashboard(self):
-        self.tester_logic.tester_dashboard()
-
-    def logout(self):
-        """Logs out the current user and returns to the login screen."""
-        confirm = messagebox.askyesno("Logout", "Are you sure you want to logout?")
-        if confirm:
-            self.current_user = None
-            self.login_screen()
-
-
-if __name__ == "__main__":
-    root = tk.Tk()
-
-    # Apply a modern theme
-    style = ttk.Style(root)
-    style.theme_use('clam')  # 'clam', 'alt', 'default', 'classic'
-    # Define an accent button style
-    style.configure('Accent.TButton', background='#4CAF50', foreground='white', font=('Helvetica', 10, 'bold'))
-    style.map('Accent.TButton',
-              background=[('active', '#45a049'), ('pressed', '#367c39')],
-              foreground=[('active', 'white'), ('pressed', 'white')])
-
-    app = ShelfLifeApp(root)
-    root.mainloop()
+# main_app.py
+import tkinter as tk
+from tkinter import ttk, messagebox
+
+# Import modules
+from firebase_setup import db, mirror, remote_db
+from auth_manager import AuthManager
+from user_logic import UserLogic
+from admin_logic import AdminLogic
+from tester_logic import TesterLogic
+from delta_sync import DeltaSync
+from due_soon import DueSoonView
+from sharded_counter import CounterFolder
+from event_bus import EventBus, SAMPLE_CHANGED, SAMPLE_DELETED
+from metrics_panel import MetricsPanel
+from constants import MIN_PASSWORD_LENGTH  # Just for style mapping, not direct use in logic here
+
+
+class ShelfLifeApp:
+    def __init__(self, root):
+        self.root = root
+        self.root.title("Shelf-life Study Management System")
+        self.root.geometry("800x600")
+
+        self.data = None  # This will hold the DataFrame, managed by UserLogic
+        self.file_path = ""  # Managed by UserLogic
+
+        self.current_user = None  # Stores authenticated user's data
+        self.mirror = mirror  # LocalMirror when offline-first mode is enabled, otherwise None
+        self.delta_sync = DeltaSync(db)  # High-water marks for incremental refreshes of loaded views
+        self.events = EventBus()  # Committed changes, delivered to the views on screen so they patch rows in place
+        # Tester's due-soon view document; sample writes made here refresh it shortly after they commit
+        self.due_soon = DueSoonView(db)
+        self.events.subscribe(SAMPLE_CHANGED, self.root, lambda **payload: self.due_soon.refresh_soon())
+        self.events.subscribe(SAMPLE_DELETED, self.root, lambda **payload: self.due_soon.refresh_soon())
+        # Folds quiet sample counter shards into their batches while an admin is logged in (directly on Firestore,
+        # so each fold is one real transaction even in offline-first mode)
+        self.counter_folder = CounterFolder(remote_db)
+        self.screens = {}  # Cached dashboard frames by name (see show_screen)
+
+        # Initialize the logic modules, passing self (the main app instance) for callbacks
+        self.auth_manager = AuthManager(self.root, self)
+        self.user_logic = UserLogic(self.root, self)
+        self.admin_logic = AdminLogic(self.root, self)
+        self.tester_logic = TesterLogic(self.root, self)
+
+        # Firestore usage per UI action; also reachable with Ctrl+Shift+D from any screen
+        self.metrics_panel = MetricsPanel(self.root)
+        self.root.bind_all("<Control-Shift-D>", lambda event: self.show_metrics_panel())
+
+        self.login_screen()
+
+    def clear_root(self):
+        """Clears all widgets from the main window, including the cached dashboard screens."""
+        for widget in self.root.winfo_children():
+            widget.destroy()
+        self.screens.clear()
+
+    def show_screen(self, name, build):
+        """Shows the dashboard screen name, calling build(frame) to create its widgets only if it isn't cached.
+        Other cached screens are hidden with their widgets and loaded data intact; anything else in the window
+        (login forms, the menu bar) is destroyed. Returns True if the screen was built."""
+        screen = self.screens.get(name)
+        cached_screens = list(self.screens.values())
+        for widget in self.root.winfo_children():
+            if widget in cached_screens:
+                if widget is not screen:
+                    widget.pack_forget()
+            else:
+                widget.destroy()
+        self.root.config(menu="")
+
+        built = screen is None
+        if built:
+            screen = ttk.Frame(self.root)
+            self.screens[name] = screen
+            build(screen)
+        screen.pack(expand=True, fill="both")
+        return built
+
+    def invalidate_screens(self, name=None):
+        """Destroys one cached screen (or all of them), so it is rebuilt and reloaded the next time it is shown."""
+        for screen_name in ([name] if name else list(self.screens)):
+            screen = self.screens.pop(screen_name, None)
+            if screen is not None:
+                screen.destroy()
+
+    def login_screen(self):
+        """Displays the login screen by delegating to AuthManager."""
+        self.auth_manager.login_screen()
+
+    def admin_dashboard(self):
+        """Displays the admin dashboard by delegating to AdminLogic."""
+        self.admin_logic.admin_dashboard()
+
+    def user_dashboard(self):
+        """Displays the user dashboard by delegating to UserLogic."""
+        self.user_logic.user_dashboard()
+
+    def test_dashboard(self):
+        self.tester_logic.tester_dashboard()
+
+    def show_metrics_panel(self):
+        """Opens the Firestore usage debug panel."""
+        self.metrics_panel.show()
+
+    def logout(self):
+        """Logs out the current user and returns to the login screen."""
+        confirm = messagebox.askyesno("Logout", "Are you sure you want to logout?")
+        if confirm:
+            self.current_user = None
+            self.delta_sync.forget()
+            self.due_soon.stop()
+            self.counter_folder.stop()
+            self.login_screen()
+
+    def on_close(self):
+        """Stops the background sync (flushing what it can) and closes the application."""
+        if self.mirror:
+            pending = self.mirror.pending_count()
+            if pending and not messagebox.askyesno(
+                    "Unsynced Changes",
+                    f"{pending} change(s) have not been synced to the database yet. They will be kept locally "
+                    "and synced next time. Exit anyway?"):
+                return
+            self.mirror.stop()
+        self.root.destroy()
+
+
+if __name__ == "__main__":
+    root = tk.Tk()
+
+    # Apply a modern theme
+    style = ttk.Style(root)
+    style.theme_use('clam')  # 'clam', 'alt', 'default', 'classic'
+    # Define an accent button style
+    style.configure('Accent.TButton', background='#4CAF50', foreground='white', font=('Helvetica', 10, 'bold'))
+    style.map('Accent.TButton',
+              background=[('active', '#45a049'), ('pressed', '#367c39')],
+              foreground=[('active', 'white'), ('pressed', 'white')])
+
+    app = ShelfLifeApp(root)
+    root.protocol("WM_DELETE_WINDOW", app.on_close)
+    root.mainloop()
     
\ No newline at end of file
@@ -0,0 +1,126 @@
+# metrics_panel.py
+import tkinter as tk
+from tkinter import filedialog, messagebox, ttk
+
+from firestore_metrics import metrics
+
+# --- Logging Setup ---
+import logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+# --- End Logging Setup ---
+
+
+class MetricsPanel:
+    """Debug window listing Firestore reads, writes, deletes, bytes and latency per UI action."""
+
+    COLUMNS = ("Action", "Calls", "Reads", "Writes", "Deletes", "KB Read", "KB Written", "p50 ms", "p95 ms", "Firestore ms")
+
+    def __init__(self, root):
+        self.root = root
+        self.window = None
+        self.tree = None
+        self.details_text = None
+        self.totals_label = None
+        self._actions = {}
+
+    def show(self):
+        """Opens the panel, or raises it if it is already open."""
+        if self.window is not None and self.window.winfo_exists():
+            self.window.lift()
+            self.refresh()
+            return
+
+        self.window = tk.Toplevel(self.root)
+        self.window.title("Firestore Usage by UI Action")
+        self.window.geometry("1100x550")
+
+        toolbar = ttk.Frame(self.window, padding=5)
+        toolbar.pack(fill="x")
+        ttk.Button(toolbar, text="Refresh", command=self.refresh).pack(side=tk.LEFT, padx=5)
+        ttk.Button(toolbar, text="Export JSON", command=self.export_json).pack(side=tk.LEFT, padx=5)
+        ttk.Button(toolbar, text="Reset", command=self.reset).pack(side=tk.LEFT, padx=5)
+        self.totals_label = ttk.Label(toolbar, text="")
+        self.totals_label.pack(side=tk.RIGHT, padx=5)
+
+        tree_frame = ttk.Frame(self.window)
+        tree_frame.pack(expand=True, fill=tk.BOTH, padx=5, pady=5)
+        self.tree = ttk.Treeview(tree_frame, columns=self.COLUMNS, show="headings", height=12)
+        for col in self.COLUMNS:
+            self.tree.heading(col, text=col)
+            self.tree.column(col, width=260 if col == "Action" else 80, anchor="w" if col == "Action" else "e")
+        scrollbar = ttk.Scrollbar(tree_frame, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.pack(expand=True, fill=tk.BOTH)
+        self.tree.bind("<<TreeviewSelect>>", self._show_details)
+
+        self.details_text = tk.Text(self.window, height=10, wrap="none", font=("Courier", 9))
+        self.details_text.pack(fill="x", padx=5, pady=(0, 5))
+
+        self.refresh()
+
+    def refresh(self):
+        """Reloads the table from the current metrics."""
+        snapshot = metrics.snapshot()
+        self._actions = {a["action"]: a for a in snapshot["actions"]}
+        self.tree.delete(*self.tree.get_children())
+        for action in snapshot["actions"]:
+            self.tree.insert("", tk.END, iid=action["action"], values=(
+                action["action"],
+                action["calls"],
+                action["reads"],
+                action["writes"],
+                action["deletes"],
+                f"{action['bytes_read'] / 1024:.1f}",
+                f"{action['bytes_written'] / 1024:.1f}",
+                action["action_latency"]["p50_ms"],
+                action["action_latency"]["p95_ms"],
+                action["firestore_latency"]["total_ms"],
+            ))
+        totals = snapshot["totals"]
+        self.totals_label.config(text=f"Since {snapshot['started_at'][:19]}: {totals['reads']} reads, "
+                                      f"{totals['writes']} writes, {totals['deletes']} deletes, {totals['retries']} retries, "
+                                      f"{totals['saved_calls']} saved calls")
+        self.details_text.delete("1.0", tk.END)
+
+    def _show_details(self, event=None):
+        selected = self.tree.selection()
+        if not selected or selected[0] not in self._actions:
+            return
+        action = self._actions[selected[0]]
+        lines = [f"{action['action']}", "", "Operations:"]
+        lines += [f"  {op:<40} {count}" for op, count in action["operations"].items()]
+        if action["transactions"]:
+            lines += ["", f"Transactions: {action['transactions']} ({action['transaction_attempts']} attempts, "
+                          f"{action['transaction_conflicts']} contended, {action['transactions_failed']} failed; "
+                          f"contention rate {action['contention_rate']:.1%})"]
+        if action["saved_calls"]:
+            lines += ["", f"Saved calls (shared an identical read in flight): {action['saved_calls']}"]
+        if action["retries"] or action["retries_exhausted"] or action["throttled_ms"]:
+            lines += ["", f"Retried calls ({action['retries_exhausted']} gave up, "
+                          f"{action['throttled_ms']:.0f} ms throttled):"]
+            lines += [f"  {kind:<40} {count}" for kind, count in action["retries"].items()]
+        for title, key in (("Action latency", "action_latency"), ("Firestore call latency", "firestore_latency")):
+            histogram = action[key]
+            lines += ["", f"{title} (p50 {histogram['p50_ms']} ms, p95 {histogram['p95_ms']} ms, p99 {histogram['p99_ms']} ms):"]
+            lines += [f"  {bucket:>10} {'#' * min(count, 60)} {count}" for bucket, count in histogram["buckets"].items() if count]
+        self.details_text.delete("1.0", tk.END)
+        self.details_text.insert(tk.END, "\n".join(lines))
+
+    def export_json(self):
+        file_path = filedialog.asksaveasfilename(parent=self.window, defaultextension=".json",
+                                                 filetypes=[("JSON files", "*.json")],
+                                                 initialfile="firestore_metrics.json")
+        if not file_path:
+            return
+        try:
+            metrics.export_json(file_path)
+            messagebox.showinfo("Export Complete", f"Firestore metrics exported to:\n{file_path}", parent=self.window)
+        except Exception as e:
+            logging.error(f"Failed to export Firestore metrics: {e}", exc_info=True)
+            messagebox.showerror("Export Error", f"Failed to export metrics: {e}", parent=self.window)
+
+    def reset(self):
+        if messagebox.askyesno("Reset Metrics", "Clear all recorded Firestore metrics?", parent=self.window):
+            metrics.reset()
+            self.refresh()
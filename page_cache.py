@@ -0,0 +1,90 @@
+# page_cache.py
+import threading
+from collections import OrderedDict
+
+from constants import PAGE_CACHE_PAGES_PER_VIEW, PAGE_CACHE_VIEWS, PREFETCH_WAIT_SECONDS
+
+# --- Logging Setup ---
+import logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+# --- End Logging Setup ---
+
+
+class PageCache:
+    """LRU cache of query result pages keyed by view and page index, with background prefetching.
+
+    Each view (e.g. all samples, one batch's samples) keeps its last pages_per_view pages, and the
+    views_limit most recently used views are kept. Pages stay until evicted or invalidated, which the
+    caller does after local writes and refreshes that found changes, so paging back and forth costs no
+    reads. prefetch() fetches a page on a background thread; get() waits briefly for it if it is in flight."""
+
+    def __init__(self, pages_per_view=PAGE_CACHE_PAGES_PER_VIEW, views_limit=PAGE_CACHE_VIEWS):
+        self.pages_per_view = pages_per_view
+        self.views_limit = views_limit
+        self.hits = 0
+        self.misses = 0
+        self._views = OrderedDict()  # view_key -> OrderedDict(page_index -> page)
+        self._pending = {}  # (view_key, page_index) -> threading.Event of a prefetch in flight
+        self._generation = 0  # Bumped on invalidate so prefetches started before it are dropped
+        self._lock = threading.Lock()
+
+    def get(self, view_key, page_index, wait=PREFETCH_WAIT_SECONDS):
+        """Returns the cached page or None, waiting up to wait seconds for a prefetch of it to finish."""
+        with self._lock:
+            pending = self._pending.get((view_key, page_index))
+        if pending is not None:
+            pending.wait(wait)
+        with self._lock:
+            pages = self._views.get(view_key)
+            if pages is None or page_index not in pages:
+                self.misses += 1
+                return None
+            self._views.move_to_end(view_key)
+            pages.move_to_end(page_index)
+            self.hits += 1
+            return pages[page_index]
+
+    def put(self, view_key, page_index, page, generation=None):
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            pages = self._views.setdefault(view_key, OrderedDict())
+            self._views.move_to_end(view_key)
+            pages[page_index] = page
+            pages.move_to_end(page_index)
+            while len(pages) > self.pages_per_view:
+                pages.popitem(last=False)
+            while len(self._views) > self.views_limit:
+                self._views.popitem(last=False)
+
+    def prefetch(self, view_key, page_index, fetch):
+        """Calls fetch() on a background thread and caches its result, unless the page is cached or in flight."""
+        key = (view_key, page_index)
+        with self._lock:
+            if key in self._pending or page_index in self._views.get(view_key, {}):
+                return
+            pending = threading.Event()
+            self._pending[key] = pending
+            generation = self._generation
+
+        def run():
+            try:
+                self.put(view_key, page_index, fetch(), generation)
+                logging.debug(f"Prefetched page {page_index + 1} of {view_key}.")
+            except Exception as e:
+                logging.warning(f"Prefetching page {page_index + 1} of {view_key} failed: {e}")
+            finally:
+                with self._lock:
+                    self._pending.pop(key, None)
+                pending.set()
+
+        threading.Thread(target=run, name=f"prefetch-page-{page_index + 1}", daemon=True).start()
+
+    def invalidate(self, view_key=None):
+        """Drops the cached pages of one view, or of all views."""
+        with self._lock:
+            self._generation += 1
+            if view_key is None:
+                self._views.clear()
+            else:
+                self._views.pop(view_key, None)
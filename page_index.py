@@ -0,0 +1,113 @@
+# page_index.py
+import threading
+
+from constants import PAGE_INDEX_POLL_MS
+from delta_sync import as_naive
+from firestore_metrics import track_action
+
+# --- Logging Setup ---
+import logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+# --- End Logging Setup ---
+
+
+class PageBoundaryIndex:
+    """Start cursors for every page of a query ordered by creation_date (then document ID).
+
+    build() streams the query projected to the order field only, keeping the last document of every
+    page, so any page can then be loaded with a single start_after query instead of walking the pages
+    before it. The scan reads each document once but transfers only its key; build_async() runs it on a
+    background thread. When documents are added or deleted, drop_from() keeps the boundaries before the
+    earliest of them and the next build scans on from the last one kept."""
+
+    def __init__(self, query, page_size, order_field="creation_date"):
+        self.query = query
+        self.page_size = page_size
+        self.order_field = order_field
+        self.boundaries = []  # boundaries[i] is the last document of page i + 1, a start_after cursor
+        self.total_count = 0
+        self.ready = False
+        self.building = False
+        self.error = None
+        self._generation = 0  # Bumped by drop_from(), so a scan that started before it is not kept
+        self._lock = threading.Lock()
+
+    @property
+    def page_count(self):
+        return max(1, (self.total_count + self.page_size - 1) // self.page_size)
+
+    def build(self):
+        """Scans the keys after the last known boundary (all of them the first time) and completes the index."""
+        with self._lock:
+            generation = self._generation
+            boundaries = list(self.boundaries)
+        query = self.query.order_by(self.order_field).order_by("__name__").select([self.order_field])
+        if boundaries:
+            query = query.start_after(boundaries[-1])
+        count = len(boundaries) * self.page_size
+        for count, doc in enumerate(query.stream(), start=count + 1):
+            if count % self.page_size == 0:
+                boundaries.append(doc)
+        with self._lock:
+            if generation != self._generation:
+                logging.info("Page index changed while it was being built; it will be scanned on again.")
+                return
+            self.boundaries = boundaries
+            self.total_count = count
+            self.ready = True
+        logging.info(f"Built page index: {count} documents, {self.page_count} pages.")
+
+    def drop_from(self, key=None):
+        """Drops the boundaries at or after key (an order field value, e.g. the creation_date of a sample added or
+        deleted); the pages before it are unchanged. key=None drops them all. The index then needs building again,
+        which only scans the documents after the last boundary kept."""
+        key = as_naive(key)
+        with self._lock:
+            self._generation += 1
+            if key is None:
+                self.boundaries = []
+            else:
+                self.boundaries = [doc for doc in self.boundaries
+                                   if as_naive((doc.to_dict() or {}).get(self.order_field)) < key]
+            self.ready = False
+
+    def build_async(self, action="build_page_index"):
+        """Builds the index on a background thread, once."""
+        with self._lock:
+            if self.ready or self.building:
+                return
+            self.building = True
+            self.error = None
+
+        def run():
+            try:
+                with track_action(action):
+                    self.build()
+            except Exception as e:
+                logging.error(f"Building page index failed: {e}", exc_info=True)
+                self.error = e
+            finally:
+                self.building = False
+
+        threading.Thread(target=run, name="page-index", daemon=True).start()
+
+    def cursor_for_page(self, page_index):
+        """Returns the start_after cursor for a 0-based page index (None for the first page)."""
+        if page_index <= 0:
+            return None
+        return self.boundaries[page_index - 1]
+
+
+def when_index_ready(root, index, callback, on_error=None, poll_ms=PAGE_INDEX_POLL_MS):
+    """Calls callback() on the Tk thread once index is built, or on_error(error) if building failed.
+    An index that is neither built nor building (new, or partly dropped) is built first."""
+    if index.ready:
+        callback()
+    elif index.error is not None and not index.building:
+        if on_error is not None:
+            on_error(index.error)
+        else:
+            logging.error(f"Page index unavailable: {index.error}")
+    else:
+        index.build_async()
+        root.after(poll_ms, lambda: when_index_ready(root, index, callback, on_error, poll_ms))
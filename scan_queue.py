@@ -0,0 +1,93 @@
+# scan_queue.py
+import threading
+import time
+
+from constants import IN_QUERY_LIMIT, LIST_VIEW_FIELDS, SCAN_RETRY_MAX_SECONDS, SCAN_RETRY_SECONDS
+from firestore_metrics import track_action
+
+# --- Logging Setup ---
+import logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+# --- End Logging Setup ---
+
+
+class ScanQueue:
+    """Sample IDs scanned in the tester's scan mode, looked up in the background.
+
+    A scan only appends to the queue. resolve_async() looks up every ID not yet resolved, one "in" query per
+    IN_QUERY_LIMIT IDs, and keeps going while new scans arrive. Fast scanning therefore batches the lookups
+    instead of waiting on one round trip per scan. After a failed lookup, error holds the exception and no new
+    lookup starts for a while (SCAN_RETRY_SECONDS, doubling per failure in a row up to SCAN_RETRY_MAX_SECONDS)."""
+
+    def __init__(self, db):
+        self.db = db
+        self.sample_ids = []  # In scan order
+        self.found = {}  # sample_id -> (doc_id, data, update_time), or None if no sample has that ID
+        self.error = None  # Exception of the last lookup, if it failed
+        self.retry_at = 0  # time.monotonic() before which no lookup starts after a failure
+        self._retry_delay = SCAN_RETRY_SECONDS
+        self._resolving = False
+        self._lock = threading.Lock()
+
+    def add(self, sample_id):
+        """Queues a scanned ID; returns False if it was already scanned."""
+        with self._lock:
+            if sample_id in self.sample_ids:
+                return False
+            self.sample_ids.append(sample_id)
+            return True
+
+    def remove(self, sample_id):
+        with self._lock:
+            if sample_id in self.sample_ids:
+                self.sample_ids.remove(sample_id)
+            self.found.pop(sample_id, None)
+
+    def clear(self):
+        with self._lock:
+            self.sample_ids = []
+            self.found = {}
+
+    def pending(self):
+        with self._lock:
+            return [sample_id for sample_id in self.sample_ids if sample_id not in self.found]
+
+    def resolve_pending(self):
+        """Looks up the queued IDs that aren't resolved yet."""
+        pending = self.pending()
+        for start in range(0, len(pending), IN_QUERY_LIMIT):
+            chunk = pending[start:start + IN_QUERY_LIMIT]
+            found = dict.fromkeys(chunk)
+            query = self.db.collection("samples").where("sample_id", "in", chunk).select(LIST_VIEW_FIELDS["scan_lookup"])
+            for doc in query.stream():
+                data = doc.to_dict()
+                found[data.get("sample_id")] = (doc.id, data, doc.update_time)
+            with self._lock:
+                self.found.update(found)
+        return len(pending)
+
+    def resolve_async(self):
+        """Resolves the queue on a background thread, unless a lookup is already running (it picks up new scans)
+        or the last one failed less than the retry delay ago."""
+        with self._lock:
+            if self._resolving or time.monotonic() < self.retry_at:
+                return
+            self._resolving = True
+
+        def run():
+            try:
+                with track_action("resolve_scanned_samples"):
+                    while self.resolve_pending():
+                        pass
+                self.error = None
+                self._retry_delay = SCAN_RETRY_SECONDS
+            except Exception as e:
+                logging.error(f"Looking up scanned samples failed, retrying in {self._retry_delay}s: {e}", exc_info=True)
+                self.error = e
+                self.retry_at = time.monotonic() + self._retry_delay
+                self._retry_delay = min(self._retry_delay * 2, SCAN_RETRY_MAX_SECONDS)
+            finally:
+                with self._lock:
+                    self._resolving = False
+
+        threading.Thread(target=run, name="scan-lookup", daemon=True).start()
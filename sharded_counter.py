@@ -0,0 +1,165 @@
+# sharded_counter.py
+import random
+import threading
+from datetime import datetime, timedelta, timezone
+
+from firebase_admin import firestore
+
+from constants import (COUNTER_FOLD_INTERVAL_SECONDS, COUNTER_FOLD_QUIET_SECONDS, COUNTER_SHARDS,
+                       COUNTER_SHARDS_COLLECTION, IN_QUERY_LIMIT)
+from firestore_metrics import track_action
+from firestore_retry import run_transaction
+
+# --- Logging Setup ---
+import logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+# --- End Logging Setup ---
+
+
+class ShardedCounter:
+    """A counter on a parent document (e.g. a batch's number_of_samples) spread over num_shards shard documents.
+
+    Each increment goes to a randomly chosen shard, so concurrent writers rarely touch the same document and
+    the sustained write rate into one parent grows with the shard count. Shards live in COUNTER_SHARDS_COLLECTION
+    and are created on their first increment. The counter's value is the field on the parent document
+    (kept as the base, so existing counts stay valid) plus the sum of its shards. Shards that have gone quiet are
+    folded into the parent field and deleted (see fold_counter_shards), so only recently incremented parents
+    have shards to read."""
+
+    def __init__(self, db, parent_collection, parent_id, name, num_shards=COUNTER_SHARDS):
+        self.db = db
+        self.parent_collection = parent_collection
+        self.parent_id = parent_id
+        self.name = name
+        self.num_shards = num_shards
+
+    @property
+    def parent_path(self):
+        return f"{self.parent_collection}/{self.parent_id}"
+
+    def shard_ref(self, index):
+        return self.db.collection(COUNTER_SHARDS_COLLECTION).document(
+            f"{self.parent_collection}__{self.parent_id}__{self.name}__{index}")
+
+    def increment(self, batch_write, amount=1):
+        """Adds amount to a random shard as part of batch_write (a WriteBatch or Transaction)."""
+        batch_write.set(self.shard_ref(random.randrange(self.num_shards)), {
+            "parent": self.parent_path,
+            "counter": self.name,
+            "value": firestore.Increment(amount),
+            "updated_at": firestore.SERVER_TIMESTAMP,
+        }, merge=True)
+
+    def total(self, parent_data=None):
+        """Returns the counter's value; parent_data is the parent's document data if already fetched."""
+        if parent_data is None:
+            parent_data = self.db.collection(self.parent_collection).document(self.parent_id).get().to_dict() or {}
+        return counter_totals(self.db, self.parent_collection, {self.parent_id: parent_data}, self.name)[self.parent_id]
+
+
+def counter_totals(db, parent_collection, parents, name):
+    """Returns {parent_id: value} of counter name for parents ({parent_id: parent document data}).
+
+    Only parents incremented since the last fold have shards. The parents are looked up with one "in" query per
+    IN_QUERY_LIMIT of them, so the cost is one query per chunk plus one read per unfolded shard of these parents."""
+    totals = {parent_id: (data or {}).get(name, 0) or 0 for parent_id, data in parents.items()}
+    paths = {f"{parent_collection}/{parent_id}": parent_id for parent_id in totals}
+    parent_paths = list(paths)
+    for start in range(0, len(parent_paths), IN_QUERY_LIMIT):
+        chunk = parent_paths[start:start + IN_QUERY_LIMIT]
+        for shard in db.collection(COUNTER_SHARDS_COLLECTION).where("parent", "in", chunk).get():
+            data = shard.to_dict() or {}
+            if data.get("counter") == name and data.get("parent") in paths:
+                totals[paths[data["parent"]]] += data.get("value", 0) or 0
+    return totals
+
+
+def fold_counter_shards(db, quiet_seconds=COUNTER_FOLD_QUIET_SECONDS):
+    """Folds every counter shard not incremented for quiet_seconds into its parent document's field and deletes
+    it. Each parent counter is folded in a transaction that reads its shards, so an increment
+    landing meanwhile makes the fold retry instead of being lost. quiet_seconds=None folds every shard, including
+    ones written before shards had an updated_at. Returns the number of shards folded."""
+    shards = db.collection(COUNTER_SHARDS_COLLECTION)
+    if quiet_seconds is not None:
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=quiet_seconds)
+        shards = shards.where("updated_at", "<", cutoff)
+    groups = {}
+    for shard in shards.get():
+        data = shard.to_dict() or {}
+        if data.get("parent") and data.get("counter"):
+            groups.setdefault((data["parent"], data["counter"]), []).append(shard.reference)
+    folded = 0
+    for (parent_path, name), shard_refs in groups.items():
+        folded += run_transaction(db, lambda transaction: _fold(db, transaction, parent_path, name, shard_refs),
+                                  "fold_counter_shards")
+    if folded:
+        logging.info(f"Folded {folded} counter shards into {len(groups)} parent documents.")
+    return folded
+
+
+def _fold(db, transaction, parent_path, name, shard_refs):
+    parent_collection, parent_id = parent_path.split("/", 1)
+    parent_ref = db.collection(parent_collection).document(parent_id)
+    parent = parent_ref.get(transaction=transaction)
+    shards = [shard_ref.get(transaction=transaction) for shard_ref in shard_refs]
+    total = sum((shard.to_dict() or {}).get("value", 0) or 0 for shard in shards if shard.exists)
+    if parent.exists:
+        transaction.update(parent_ref, {name: ((parent.to_dict() or {}).get(name, 0) or 0) + total,
+                                        "updated_at": firestore.SERVER_TIMESTAMP})
+    folded = 0
+    for shard in shards:
+        if shard.exists:
+            transaction.delete(shard.reference)
+            folded += 1
+    return folded
+
+
+class CounterFolder:
+    """Runs fold_counter_shards on a schedule in a background thread."""
+
+    def __init__(self, db, interval=COUNTER_FOLD_INTERVAL_SECONDS):
+        self.db = db
+        self.interval = interval
+        self._thread = None
+        self._stop_event = threading.Event()
+
+    def start(self):
+        """Starts the scheduled fold thread (once; later calls do nothing while it runs)."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+
+        def run():
+            while not self._stop_event.wait(self.interval):
+                try:
+                    with track_action("fold_counter_shards"):
+                        fold_counter_shards(self.db)
+                except Exception as e:
+                    logging.warning(f"Folding counter shards failed, will retry on the next run: {e}")
+
+        self._thread = threading.Thread(target=run, name="CounterFold", daemon=True)
+        self._thread.start()
+        logging.info("Counter shard folding scheduled.")
+
+    def stop(self):
+        self._stop_event.set()
+
+
+def delete_counter_shards(db, batch_write, parent_collection, parent_id):
+    """Adds deletes for every counter shard of a parent document to batch_write; returns how many.
+    Shards get no tombstones: no view lists them, and the offline mirror pulls them in full."""
+    shards = db.collection(COUNTER_SHARDS_COLLECTION).where("parent", "==", f"{parent_collection}/{parent_id}").stream()
+    deleted = 0
+    for shard in shards:
+        batch_write.delete(shard.reference)
+        deleted += 1
+    return deleted
+
+
+if __name__ == "__main__":
+    import sys
+    from firebase_setup import remote_db
+    # python sharded_counter.py [--all]  folds quiet shards (or, with --all, every shard), e.g. from a scheduled task
+    with track_action("fold_counter_shards"):
+        count = fold_counter_shards(remote_db, quiet_seconds=None if "--all" in sys.argv[1:] else COUNTER_FOLD_QUIET_SECONDS)
+    print(f"Folded {count} counter shards.")
@@ -0,0 +1,77 @@
+# single_flight.py
+import threading
+import time
+
+from constants import SINGLE_FLIGHT_REUSE_SECONDS
+
+# --- Logging Setup ---
+import logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+# --- End Logging Setup ---
+
+
+class _Flight:
+    def __init__(self, generation):
+        self.generation = generation
+        self.done = threading.Event()
+        self.finished_at = None
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Coalesces identical Firestore reads from one client (see InstrumentedClient in firestore_metrics.py).
+
+    A read whose key (its normalized query shape) matches one already in flight waits for that call and shares
+    its result instead of sending its own. A result also answers identical reads for reuse_seconds after it
+    arrived, which covers repeated clicks on a Refresh button queued while the first load ran. Any write through
+    the client ends that reuse and keeps later reads from joining a call that started before the write, so a
+    view reloaded after its own edit never shows the data from before it."""
+
+    def __init__(self, reuse_seconds=SINGLE_FLIGHT_REUSE_SECONDS):
+        self.reuse_seconds = reuse_seconds
+        self._flights = {}  # key -> _Flight
+        self._generation = 0  # Bumped on every write
+        self._lock = threading.Lock()
+
+    def do(self, key, fn):
+        """Returns (fn() or the result of an identical call, True if this call was saved). A key of None
+        (a read that can't be keyed) is always sent."""
+        if key is None:
+            return fn(), False
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None and flight.generation == self._generation and (
+                    not flight.done.is_set() or time.monotonic() - flight.finished_at <= self.reuse_seconds):
+                leader = False
+            else:
+                now = time.monotonic()
+                self._flights = {k: f for k, f in self._flights.items()
+                                 if not f.done.is_set() or now - f.finished_at <= self.reuse_seconds}
+                flight = self._flights[key] = _Flight(self._generation)
+                leader = True
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result, True
+
+        try:
+            flight.result = fn()
+        except Exception as e:
+            flight.error = e
+            with self._lock:
+                if self._flights.get(key) is flight:
+                    del self._flights[key]  # A failed read is never reused
+            raise
+        finally:
+            flight.finished_at = time.monotonic()
+            flight.done.set()
+        return flight.result, False
+
+    def wrote(self):
+        """Called after every write: reads from here on are sent again."""
+        with self._lock:
+            self._generation += 1
+            self._flights = {key: flight for key, flight in self._flights.items() if not flight.done.is_set()}
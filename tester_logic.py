@@ -1,467 +1,747 @@
-import tkinter as tk
-from tkinter import messagebox, ttk
-from datetime import datetime
-
-from firebase_setup import db  # Assuming db is initialized from firebase_setup
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from tkcalendar import DateEntry
-from tkinter import simpledialog
-
-# --- Logging Setup ---
-import logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
-# --- End Logging Setup ---
-
-
-class TesterLogic:
-    def __init__(self, root, app_instance):
-        """
-        Initializes the TesterLogic class.
-
-        Args:
-            root: The main Tkinter root window.
-            app_instance: The main application instance (ShelfLifeApp) to access shared attributes.
-        """
-        self.root = root
-        self.app = app_instance
-        self.tester_tree = None # Initialize tester_tree attribute
-        self.tester_mat_date_start_entry = None # Initialize entry widgets
-        self.tester_mat_date_end_entry = None
-        logging.info("TesterLogic initialized.")
-
-
-    def tester_dashboard(self):
-        """Displays the Tester dashboard with features for date range filtering and email reminders."""
-        logging.info("Entering tester_dashboard method.")
-        self.app.clear_root()
-        self.root.geometry("1200x700")
-
-        # Top frame for Logout button and Welcome message
-        top_frame = ttk.Frame(self.root)
-        top_frame.pack(fill="x", padx=10, pady=10)
-
-        ttk.Button(top_frame, text="Logout", command=self.app.logout).pack(side="right")
-        ttk.Label(top_frame, text=f"Welcome, Tester {self.app.current_user.get('username')}!",
-                  font=("Helvetica", 16)).pack(side="left", expand=True)
-
-        # === Tester Features Section ===
-        tester_frame = ttk.LabelFrame(self.root, text="Tester Features")
-        tester_frame.pack(fill="x", padx=10, pady=10)
-
-        ttk.Label(tester_frame, text="Maturation Date Start (YYYY-MM-DD):").grid(row=0, column=0, sticky="e", padx=5,
-                                                                                  pady=2)
-        self.tester_mat_date_start_entry = DateEntry(tester_frame, width=12, background='darkblue',
-                                                     foreground='white', date_pattern='yyyy-mm-dd')
-        self.tester_mat_date_start_entry.grid(row=0, column=1, sticky="ew", padx=5, pady=2)
-
-        ttk.Label(tester_frame, text="Maturation Date End (YYYY-MM-DD):").grid(row=0, column=2, sticky="e", padx=5,
-                                                                                pady=2)
-        self.tester_mat_date_end_entry = DateEntry(tester_frame, width=12, background='darkblue',
-                                                     foreground='white', date_pattern='yyyy-mm-dd')
-        self.tester_mat_date_end_entry.grid(row=0, column=3, sticky="ew", padx=5, pady=2)
-
-        ttk.Button(tester_frame, text="Filter Samples", command=self.filter_samples_by_maturation_date).grid(row=0,
-                                                                                                                column=4,
-                                                                                                                padx=10,
-                                                                                                                pady=2)
-        ttk.Button(tester_frame, text="Send Reminder Email", command=self.send_reminder_email).grid(row=0, column=5,
-                                                                                                     padx=10, pady=2)
-
-        # === Treeview for Data Display ===
-        ttk.Label(self.root, text="Samples within Date Range", font=("Helvetica", 14, "bold")).pack(pady=(10, 5))
-        
-        # Frame to hold Treeview and Scrollbar
-        tree_frame = ttk.Frame(self.root)
-        tree_frame.pack(expand=True, fill="both", padx=10, pady=10)
-
-        self.tester_tree = ttk.Treeview(tree_frame, columns=(
-        "SampleID", "Owner", "MaturationDate", "Status", "BatchID", "ProductOwnerEmail", "TestTeamEmail"),
-                                         show='headings')
-        self.tester_tree.heading("SampleID", text="Sample ID")
-        self.tester_tree.heading("Owner", text="Sample Owner")
-        self.tester_tree.heading("MaturationDate", text="Maturation Date")
-        self.tester_tree.heading("Status", text="Status")
-        self.tester_tree.heading("BatchID", text="Batch ID")
-        self.tester_tree.heading("ProductOwnerEmail", text="Product Owner Email")  # New column for email
-        self.tester_tree.heading("TestTeamEmail", text="Test Team Email")  # New column for email
-
-        self.tester_tree.column("SampleID", width=100, anchor="center")
-        self.tester_tree.column("Owner", width=100, anchor="center")
-        self.tester_tree.column("MaturationDate", width=120, anchor="center")
-        self.tester_tree.column("Status", width=80, anchor="center")
-        self.tester_tree.column("BatchID", width=120, anchor="center")
-        self.tester_tree.column("ProductOwnerEmail", width=150, anchor="center")
-        self.tester_tree.column("TestTeamEmail", width=150, anchor="center")
-
-        # Add a scrollbar to the Treeview
-        tree_scrollbar = ttk.Scrollbar(tree_frame, orient="vertical", command=self.tester_tree.yview)
-        self.tester_tree.configure(yscrollcommand=tree_scrollbar.set)
-
-        self.tester_tree.pack(side="left", expand=True, fill="both")
-        tree_scrollbar.pack(side="right", fill="y")
-
-        # Initial load of all samples or based on default range if desired
-        self.filter_samples_by_maturation_date()  # Load samples on dashboard start
-        logging.info("Tester dashboard loaded.")
-
-    def filter_samples_by_maturation_date(self):
-        """Filters and displays samples based on the provided maturation date range."""
-        logging.info("Starting filter_samples_by_maturation_date.")
-        self.tester_tree.delete(*self.tester_tree.get_children())
-        self.tester_tree.tag_configure('urgent', background='khaki')
-        self.tester_tree.tag_configure('today', background='salmon')
-        start_date_str = self.tester_mat_date_start_entry.get().strip()
-        end_date_str = self.tester_mat_date_end_entry.get().strip()
-
-        start_date = None
-        end_date = None
-
-        if start_date_str:
-            try:
-                start_date = datetime.strptime(start_date_str, "%Y-%m-%d")
-                logging.info(f"Parsed start date: {start_date}")
-            except ValueError:
-                messagebox.showerror("Invalid Date", "Maturation Date Start: Use YYYY-MM-DD format.")
-                logging.error(f"Invalid start date format: {start_date_str}")
-                return
-
-        if end_date_str:
-            try:
-                end_date = datetime.strptime(end_date_str, "%Y-%m-%d")
-                end_date = end_date.replace(hour=23, minute=59, second=59)  # Include full end day
-                logging.info(f"Parsed end date: {end_date}")
-            except ValueError:
-                messagebox.showerror("Invalid Date", "Maturation Date End: Use YYYY-MM-DD format.")
-                logging.error(f"Invalid end date format: {end_date_str}")
-                return
-
-        samples_ref = db.collection("samples")
-        query = samples_ref
-
-        # Apply date filters
-        if start_date:
-            query = query.where("maturation_date", ">=", start_date)
-            logging.info(f"Applied Firestore filter: maturation_date >= {start_date}")
-        if end_date:
-            query = query.where("maturation_date", "<=", end_date)
-            logging.info(f"Applied Firestore filter: maturation_date <= {end_date}")
-
-        try:
-            # Pre-fetch all user emails to avoid N+1 queries
-            logging.info("Pre-fetching all user emails.")
-            users_docs = db.collection("users").stream()
-            user_emails_map = {}
-            test_team_emails = [] # This will still be populated for the Treeview display
-            for user_doc in users_docs:
-                user_data = user_doc.to_dict()
-                if user_data.get("employee_id"):
-                    user_emails_map[user_data["employee_id"]] = user_data.get("email", "N/A")
-                if user_data.get("role") == "tester" and user_data.get("email"):
-                    test_team_emails.append(user_data["email"])
-            test_team_email_str = ", ".join(test_team_emails) if test_team_emails else "N/A"
-            logging.info(f"Pre-fetched {len(user_emails_map)} user emails and {len(test_team_emails)} tester emails.")
-
-
-            samples = query.stream()
-            sample_count = 0
-            for sample in samples:
-                sample_count += 1
-                data = sample.to_dict()
-                maturation_date_str = data.get("maturation_date", "")
-                if isinstance(maturation_date_str, datetime):
-                    maturation_date_str = maturation_date_str.strftime("%Y-%m-%d")
-                else:
-                    maturation_date_str = str(maturation_date_str) if maturation_date_str is not None else ''
-
-                # Get product owner email from pre-fetched map
-                submitted_by_employee_id = data.get("submitted_by_employee_id")
-                product_owner_email = user_emails_map.get(submitted_by_employee_id, "N/A")
-                logging.debug(f"Resolved product owner email: {product_owner_email} for user {submitted_by_employee_id}")
-
-                days_left = -1
-                try:
-                    maturation_date = datetime.strptime(maturation_date_str, "%Y-%m-%d")
-                    days_left = (maturation_date.date() - datetime.today().date()).days
-                except ValueError as ve:
-                    logging.warning(f"Could not parse maturation date '{maturation_date_str}' for sample {data.get('sample_id', 'N/A')}: {ve}")
-                    pass # Continue processing even if date parsing fails for coloring
-
-                tags = ()
-                if days_left == 0:
-                    tags = ('today',)
-                    logging.debug(f"Sample {data.get('sample_id', '')} tagged as 'today'.")
-                elif 0 < days_left <= 3:
-                    tags = ('urgent',)
-                    logging.debug(f"Sample {data.get('sample_id', '')} tagged as 'urgent'.")
-
-                self.tester_tree.insert("", "end", iid=sample.id,
-                                         values=(data.get("sample_id", ""),
-                                                 data.get("owner", ""),
-                                                 maturation_date_str,
-                                                 data.get("status", "pending"),
-                                                 data.get("batch_id", ""),
-                                                 product_owner_email,
-                                                 test_team_email_str), tags=tags)
-            logging.info(f"Filtered {sample_count} samples and populated Treeview.")
-            messagebox.showinfo("Filter Complete", "Samples filtered successfully.")
-        except Exception as e:
-            logging.exception("Failed to filter samples.") # Use logging.exception for full traceback
-            messagebox.showerror("Error", f"Failed to filter samples: {e}")
-
-    def prompt_reminder_period(self):
-        """Show a pop-up window with radio buttons to choose reminder period."""
-        logging.info("Prompting for reminder period.")
-        reminder_window = tk.Toplevel(self.root)
-        reminder_window.title("Choose Reminder Period")
-        reminder_window.geometry("300x250")
-        reminder_window.grab_set()  # Make this pop-up modal
-
-        reminder_var = tk.StringVar(value="7d")  # default selection changed to 1 week (7 days)
-
-        options = [
-            ("Due Today", "0d"),
-            ("Within 3 Days", "3d"),
-            ("Within 1 Week", "7d"),    # Changed from '1w' to '7d' for consistency
-            ("Within 2 Weeks", "14d"),   # Changed from '2w' to '14d'
-            ("Within 30 Days", "30d"),   # Changed from '1m' to '30d' and label updated
-            ("Within 60 Days", "60d")    # Changed from '2m' to '60d' and label updated
-        ]
-
-        tk.Label(reminder_window, text="Select Reminder Period:", font=("Helvetica", 12)).pack(pady=10)
-
-        for label, value in options:
-            tk.Radiobutton(reminder_window, text=label, variable=reminder_var, value=value).pack(anchor="w", padx=20)
-
-        def submit_choice():
-            logging.info(f"Reminder period selected: {reminder_var.get()}")
-            period_code = reminder_var.get()
-            reminder_window.destroy()
-            self.prompt_test_team_selection(period_code) # Call new function to select test team
-
-        tk.Button(reminder_window, text="Next", command=submit_choice).pack(pady=15) # Changed button text
-        logging.info("Reminder period prompt displayed.")
-
-    def prompt_test_team_selection(self, period_code):
-        """
-        Opens a Toplevel window for the user to select specific test team members
-        to receive reminder emails.
-        """
-        logging.info(f"Prompting for test team selection for period code: {period_code}")
-        test_team_window = tk.Toplevel(self.root)
-        test_team_window.title("Select Test Team Members")
-        test_team_window.geometry("600x400")
-        test_team_window.grab_set()
-        test_team_window.transient(self.root)
-
-        frame = ttk.Frame(test_team_window, padding=10)
-        frame.pack(expand=True, fill="both")
-
-        ttk.Label(frame, text="Select Test Team Members:", font=("Helvetica", 12)).pack(pady=10)
-
-        # Container for checkboxes with a scrollbar
-        canvas = tk.Canvas(frame)
-        scrollbar = ttk.Scrollbar(frame, orient="vertical", command=canvas.yview)
-        scrollable_frame = ttk.Frame(canvas)
-
-        scrollable_frame.bind(
-            "<Configure>",
-            lambda e: canvas.configure(
-                scrollregion=canvas.bbox("all")
-            )
-        )
-
-        canvas.create_window((0, 0), window=scrollable_frame, anchor="nw")
-        canvas.configure(yscrollcommand=scrollbar.set)
-
-        canvas.pack(side="left", fill="both", expand=True)
-        scrollbar.pack(side="right", fill="y")
-
-        self.tester_vars = [] # To hold (BooleanVar, email) tuples
-        testers_fetched = []
-
-        try:
-            users_docs = db.collection("users").where("role", "==", "tester").stream()
-            for user_doc in users_docs:
-                user_data = user_doc.to_dict()
-                email = user_data.get("email")
-                username = user_data.get("username")
-                if email and email != "N/A":
-                    var = tk.BooleanVar(value=True) # Default to selected
-                    cb = ttk.Checkbutton(scrollable_frame, text=f"{username} ({email})", variable=var)
-                    cb.pack(anchor="w", padx=5, pady=2)
-                    self.tester_vars.append((var, email))
-                    testers_fetched.append(f"{username} ({email})")
-            logging.info(f"Fetched {len(testers_fetched)} tester users for selection: {', '.join(testers_fetched)}")
-
-        except Exception as e:
-            logging.error(f"Failed to load tester users for selection: {e}", exc_info=True)
-            messagebox.showerror("Error", f"Failed to load tester users: {e}")
-            test_team_window.destroy()
-            return
-
-        if not self.tester_vars:
-            messagebox.showinfo("No Testers", "No tester users found in the database.")
-            test_team_window.destroy()
-            return
-
-
-        def send_selected_reminders():
-            selected_emails = [email for var, email in self.tester_vars if var.get()]
-            logging.info(f"Selected test team emails: {selected_emails}")
-            if not selected_emails:
-                messagebox.showwarning("No Selection", "Please select at least one test team member.")
-                return
-
-            test_team_window.destroy()
-            self.process_reminder_email(period_code, selected_emails)
-
-        ttk.Button(frame, text="Send Reminders", command=send_selected_reminders).pack(pady=10)
-        ttk.Button(frame, text="Cancel", command=test_team_window.destroy).pack(pady=5)
-        logging.info("Test team selection window displayed.")
-
-
-    def send_reminder_email(self):
-        logging.info("Initiating send_reminder_email.")
-        self.prompt_reminder_period()
-        logging.info("send_reminder_email process initiated.")
-
-    def process_reminder_email(self, period_code, selected_test_team_emails):
-        """Processes and sends emails based on selected period and selected test team members."""
-        logging.info(f"Processing reminder email for period code: {period_code}")
-        logging.info(f"Selected test team emails for this reminder: {selected_test_team_emails}")
-
-        days_map = {"0d": 0, "3d": 3, "7d": 7, "14d": 14, "30d": 30, "60d": 60}
-        days_threshold = days_map.get(period_code, 7)
-        logging.info(f"Calculated days threshold: {days_threshold}")
-
-        samples_to_remind = []
-        recipients_map = {}
-
-        today = datetime.today()
-        logging.info(f"Current date for comparison: {today.date()}")
-
-        if not self.tester_tree.get_children():
-            messagebox.showinfo("No Reminders", f"No samples currently displayed to check for reminders.")
-            logging.info("No samples in Treeview to process for reminders.")
-            return
-        
-        # We no longer need to pre-fetch all tester emails here, as they are passed directly
-        # all_test_team_emails = selected_test_team_emails # This is now the actual list to use.
-
-
-        for item_id in self.tester_tree.get_children():
-            values = self.tester_tree.item(item_id, "values")
-            sample_id = values[0]
-            owner = values[1]
-            maturation_date_str = values[2]
-            status = values[3]
-            batch_id = values[4]
-            product_owner_email = values[5]
-
-            logging.debug(f"Processing sample: {sample_id}, Maturation Date: {maturation_date_str}, Status: {status}")
-
-            try:
-                maturation_date = datetime.strptime(maturation_date_str, "%Y-%m-%d")
-                days_until = (maturation_date.date() - today.date()).days
-                logging.debug(f"Days until maturation for {sample_id}: {days_until}")
-            except ValueError:
-                logging.warning(f"Could not parse maturation date '{maturation_date_str}' for sample {sample_id}. Skipping.")
-                continue
-
-            if (period_code == "0d" and days_until == 0) or \
-               (period_code == "3d" and 0 < days_until <= 3) or \
-               (period_code == "7d" and 0 < days_until <= 7) or \
-               (period_code == "14d" and 0 < days_until <= 14) or \
-               (period_code == "30d" and 0 < days_until <= 30) or \
-               (period_code == "60d" and 0 < days_until <= 60):
-                samples_to_remind.append({
-                    "sample_id": sample_id,
-                    "owner": owner,
-                    "maturation_date": maturation_date_str,
-                    "batch_id": batch_id,
-                    "product_owner_email": product_owner_email,
-                    "test_team_emails": selected_test_team_emails # Use the selected list
-                })
-                logging.info(f"Sample {sample_id} added to reminders list (within threshold).")
-            else:
-                logging.debug(f"Sample {sample_id} (status: {status}, days_until: {days_until}) does not meet reminder criteria for period '{period_code}'.")
-
-
-        if not samples_to_remind:
-            messagebox.showinfo("No Reminders", f"No samples found for the selected period.")
-            logging.info("No samples found meeting reminder criteria.")
-            return
-
-        # Map recipients
-        for sample in samples_to_remind:
-            po_email = sample["product_owner_email"]
-            tt_emails = sample["test_team_emails"]
-            if po_email and po_email != "N/A":
-                recipients_map.setdefault(po_email, []).append(sample)
-                logging.debug(f"Adding product owner {po_email} to recipients map.")
-            for email in tt_emails: # Iterate through the pre-fetched list
-                if email and email != "N/A":
-                    recipients_map.setdefault(email, []).append(sample)
-                    logging.debug(f"Adding test team member {email} to recipients map.")
-
-
-        if not recipients_map:
-            messagebox.showinfo("No Recipients", "No valid email recipients found.")
-            logging.warning("No valid email recipients found after mapping.")
-            return
-
-        # Email config
-        smtp_server = "smtp.gmail.com"
-        smtp_port = 587
-        sender_email = "test.dept7@gmail.com"
-        app_password = "gicklxfdonaszuzh" 
-
-        email_send_success = []
-        email_send_fail = []
-        logging.info(f"Attempting to send emails to {len(recipients_map)} unique recipients.")
-
-        for recipient_email, samples in recipients_map.items():
-            subject = f"Reminder: Samples maturing soon"
-            body = "Dear User,\n\nThese samples require your attention:\n\n"
-            for s in samples:
-                body += f"- Sample ID: {s['sample_id']}, Owner: {s['owner']}, Maturation: {s['maturation_date']}, Batch: {s['batch_id']}\n"
-            body += "\nPlease take necessary action.\n\nBest regards,\nSample Management System"
-            logging.debug(f"Preparing email for {recipient_email}. Subject: {subject}")
-
-            msg = MIMEMultipart()
-            msg["From"] = sender_email
-            msg["To"] = recipient_email
-            msg["Subject"] = subject
-            msg.attach(MIMEText(body, "plain"))
-
-            try:
-                with smtplib.SMTP(smtp_server, smtp_port) as server:
-                    server.starttls()
-                    server.login(sender_email, app_password)
-                    server.send_message(msg)
-                    email_send_success.append(recipient_email)
-                    logging.info(f"Successfully sent email to: {recipient_email}")
-            except Exception as e:
-                email_send_fail.append(f"{recipient_email} ({e})")
-                logging.error(f"Failed to send email to {recipient_email}: {e}", exc_info=True)
-
-        if email_send_success:
-            messagebox.showinfo("Reminder Sent", f"Emails sent to: {', '.join(email_send_success)}")
-            logging.info(f"Emails successfully sent to: {', '.join(email_send_success)}")
-        if email_send_fail:
-            messagebox.showwarning("Some Failed", f"Some emails failed:\n{chr(10).join(email_send_fail)}")
-            logging.warning(f"Emails failed for: {', '.join(email_send_fail)}")
-
-        messagebox.showinfo("Done", "Reminder email process completed.")
-        logging.info("Reminder email process completed.")
-
-    def toggle_batch_fields(self, parent_frame, is_existing_batch_selected):
-        """Toggles the visibility/state of new/existing batch fields. (Placeholder for other modules)"""
-        pass  # This method is not directly used in TesterLogic, but kept as a stub if called
-
-
-    def load_existing_batches_into_combobox(self):
-        """Loads batch IDs from Firestore into the combobox. (Placeholder for other modules)"""
-        pass  # This method is not directly used in TesterLogic, but kept as a stub if called
+import tkinter as tk
+from tkinter import messagebox, ttk
+from datetime import datetime
+import time
+from firebase_admin import firestore
+
+from firebase_setup import db  # Assuming db is initialized from firebase_setup
+from firestore_query import matches_all
+from firestore_metrics import ui_action
+from constants import DUE_SOON_URGENT_DAYS, LIST_VIEW_FIELDS, SCAN_POLL_MS
+from event_bus import SAMPLE_CHANGED, SAMPLE_DELETED
+from bulk_ops import start_bulk_operation, show_bulk_summary
+from scan_queue import ScanQueue
+import smtplib
+from email.mime.text import MIMEText
+from email.mime.multipart import MIMEMultipart
+from tkcalendar import DateEntry
+from tkinter import simpledialog
+
+# --- Logging Setup ---
+import logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+# --- End Logging Setup ---
+
+# tester_tree row tags per due-soon urgency class (see due_soon.py)
+URGENCY_TAGS = {"today": ("today",), "urgent": ("urgent",), "this_week": ()}
+
+
+class TesterLogic:
+    def __init__(self, root, app_instance):
+        """
+        Initializes the TesterLogic class.
+
+        Args:
+            root: The main Tkinter root window.
+            app_instance: The main application instance (ShelfLifeApp) to access shared attributes.
+        """
+        self.root = root
+        self.app = app_instance
+        self.tester_tree = None # Initialize tester_tree attribute
+        self.tester_mat_date_start_entry = None # Initialize entry widgets
+        self.tester_mat_date_end_entry = None
+        # Delta sync state for the maturation date view currently shown in tester_tree
+        self.tester_view_key = None
+        self.tester_user_emails_map = {}
+        self.tester_test_team_email_str = "N/A"
+        logging.info("TesterLogic initialized.")
+
+
+    def tester_dashboard(self):
+        """Displays the Tester dashboard with features for date range filtering and email reminders.
+        The dashboard is built and loaded once per login; showing it again keeps the filtered samples."""
+        logging.info("Entering tester_dashboard method.")
+        if not self.app.show_screen("tester", self._build_tester_dashboard):
+            logging.info("Showing cached tester dashboard.")
+        self.root.geometry("1200x700")
+
+    def _build_tester_dashboard(self, screen):
+        """Creates the tester dashboard widgets in screen and loads the samples."""
+        self.tester_view_key = None  # tester_tree is recreated below
+
+        # Top frame for Logout button and Welcome message
+        top_frame = ttk.Frame(screen)
+        top_frame.pack(fill="x", padx=10, pady=10)
+
+        ttk.Button(top_frame, text="Logout", command=self.app.logout).pack(side="right")
+        ttk.Label(top_frame, text=f"Welcome, Tester {self.app.current_user.get('username')}!",
+                  font=("Helvetica", 16)).pack(side="left", expand=True)
+
+        # === Tester Features Section ===
+        tester_frame = ttk.LabelFrame(screen, text="Tester Features")
+        tester_frame.pack(fill="x", padx=10, pady=10)
+
+        ttk.Label(tester_frame, text="Maturation Date Start (YYYY-MM-DD):").grid(row=0, column=0, sticky="e", padx=5,
+                                                                                  pady=2)
+        self.tester_mat_date_start_entry = DateEntry(tester_frame, width=12, background='darkblue',
+                                                     foreground='white', date_pattern='yyyy-mm-dd')
+        self.tester_mat_date_start_entry.grid(row=0, column=1, sticky="ew", padx=5, pady=2)
+
+        ttk.Label(tester_frame, text="Maturation Date End (YYYY-MM-DD):").grid(row=0, column=2, sticky="e", padx=5,
+                                                                                pady=2)
+        self.tester_mat_date_end_entry = DateEntry(tester_frame, width=12, background='darkblue',
+                                                     foreground='white', date_pattern='yyyy-mm-dd')
+        self.tester_mat_date_end_entry.grid(row=0, column=3, sticky="ew", padx=5, pady=2)
+
+        ttk.Button(tester_frame, text="Filter Samples", command=self.filter_samples_by_maturation_date).grid(row=0,
+                                                                                                                column=4,
+                                                                                                                padx=10,
+                                                                                                                pady=2)
+        ttk.Button(tester_frame, text="Send Reminder Email", command=self.send_reminder_email).grid(row=0, column=5,
+                                                                                                     padx=10, pady=2)
+        ttk.Button(tester_frame, text="Scan Tested Samples", command=self.open_scan_mode).grid(row=0, column=6,
+                                                                                               padx=10, pady=2)
+        ttk.Button(tester_frame, text="Due This Week", command=self.show_due_soon).grid(row=0, column=7,
+                                                                                        padx=10, pady=2)
+
+        # === Treeview for Data Display ===
+        self.tester_list_label = ttk.Label(screen, text="Samples within Date Range", font=("Helvetica", 14, "bold"))
+        self.tester_list_label.pack(pady=(10, 5))
+        
+        # Frame to hold Treeview and Scrollbar
+        tree_frame = ttk.Frame(screen)
+        tree_frame.pack(expand=True, fill="both", padx=10, pady=10)
+
+        self.tester_tree = ttk.Treeview(tree_frame, columns=(
+        "SampleID", "Owner", "MaturationDate", "Status", "BatchID", "ProductOwnerEmail", "TestTeamEmail"),
+                                         show='headings')
+        self.tester_tree.heading("SampleID", text="Sample ID")
+        self.tester_tree.heading("Owner", text="Sample Owner")
+        self.tester_tree.heading("MaturationDate", text="Maturation Date")
+        self.tester_tree.heading("Status", text="Status")
+        self.tester_tree.heading("BatchID", text="Batch ID")
+        self.tester_tree.heading("ProductOwnerEmail", text="Product Owner Email")  # New column for email
+        self.tester_tree.heading("TestTeamEmail", text="Test Team Email")  # New column for email
+
+        self.tester_tree.column("SampleID", width=100, anchor="center")
+        self.tester_tree.column("Owner", width=100, anchor="center")
+        self.tester_tree.column("MaturationDate", width=120, anchor="center")
+        self.tester_tree.column("Status", width=80, anchor="center")
+        self.tester_tree.column("BatchID", width=120, anchor="center")
+        self.tester_tree.column("ProductOwnerEmail", width=150, anchor="center")
+        self.tester_tree.column("TestTeamEmail", width=150, anchor="center")
+
+        # Add a scrollbar to the Treeview
+        tree_scrollbar = ttk.Scrollbar(tree_frame, orient="vertical", command=self.tester_tree.yview)
+        self.tester_tree.configure(yscrollcommand=tree_scrollbar.set)
+
+        self.tester_tree.pack(side="left", expand=True, fill="both")
+        self.tester_tree.tag_configure('urgent', background='khaki')
+        self.tester_tree.tag_configure('today', background='salmon')
+        # Samples edited or deleted elsewhere in the app are patched in place
+        self.app.events.subscribe(SAMPLE_CHANGED, self.tester_tree, self._on_sample_changed)
+        self.app.events.subscribe(SAMPLE_DELETED, self.tester_tree,
+                                  lambda doc_id: self.tester_tree.exists(doc_id) and self.tester_tree.delete(doc_id))
+        tree_scrollbar.pack(side="right", fill="y")
+
+        # Open on this week's workload from the due-soon view, kept up to date in the background
+        self.show_due_soon()
+        self.app.due_soon.start()
+        logging.info("Tester dashboard loaded.")
+
+    @ui_action()
+    def show_due_soon(self):
+        """Shows the samples maturing today and in the next days from the due-soon view (one batched read)."""
+        try:
+            view = self.app.due_soon.load()
+        except Exception as e:
+            logging.exception("Failed to load the due-soon view.")
+            messagebox.showerror("Error", f"Failed to load this week's samples: {e}")
+            return
+        self.tester_user_emails_map = view.get("user_emails") or {}
+        self.tester_test_team_email_str = view.get("test_team_emails", "N/A")
+        self.tester_view_key = None  # The next Filter Samples loads its range in full
+        self.tester_tree.delete(*self.tester_tree.get_children())
+        counts = {urgency: 0 for urgency in URGENCY_TAGS}
+        for _, bucket in sorted((view.get("buckets") or {}).items()):
+            counts[bucket["urgency"]] += len(bucket["samples"])
+            for doc_id, entry in sorted(bucket["samples"].items(), key=lambda item: str(item[1].get("sample_id"))):
+                values, _ = self._tester_row(entry)
+                self.tester_tree.insert("", "end", iid=doc_id, values=values, tags=URGENCY_TAGS[bucket["urgency"]])
+        self.tester_list_label.config(text=f"Due This Week: {counts['today']} today, {counts['urgent']} within "
+                                           f"{DUE_SOON_URGENT_DAYS} days, {counts['this_week']} later this week")
+        logging.info(f"Showing {sum(counts.values())} due-soon samples.")
+
+    @ui_action()
+    def filter_samples_by_maturation_date(self):
+        """Filters and displays samples based on the provided maturation date range."""
+        logging.info("Starting filter_samples_by_maturation_date.")
+        self.tester_list_label.config(text="Samples within Date Range")
+        start_date_str = self.tester_mat_date_start_entry.get().strip()
+        end_date_str = self.tester_mat_date_end_entry.get().strip()
+
+        start_date = None
+        end_date = None
+
+        if start_date_str:
+            try:
+                start_date = datetime.strptime(start_date_str, "%Y-%m-%d")
+                logging.info(f"Parsed start date: {start_date}")
+            except ValueError:
+                messagebox.showerror("Invalid Date", "Maturation Date Start: Use YYYY-MM-DD format.")
+                logging.error(f"Invalid start date format: {start_date_str}")
+                return
+
+        if end_date_str:
+            try:
+                end_date = datetime.strptime(end_date_str, "%Y-%m-%d")
+                end_date = end_date.replace(hour=23, minute=59, second=59)  # Include full end day
+                logging.info(f"Parsed end date: {end_date}")
+            except ValueError:
+                messagebox.showerror("Invalid Date", "Maturation Date End: Use YYYY-MM-DD format.")
+                logging.error(f"Invalid end date format: {end_date_str}")
+                return
+
+        # Today's date is part of the key so the 'today'/'urgent' tags are recomputed once the day changes.
+        view_key = ("samples", "tester_maturation", start_date, end_date, datetime.today().date())
+        if view_key == self.tester_view_key and self.app.delta_sync.has_mark(view_key):
+            try:
+                self._merge_tester_changes(view_key, start_date, end_date)
+                messagebox.showinfo("Filter Complete", "Samples filtered successfully.")
+                return
+            except Exception as e:
+                logging.warning(f"Delta refresh of tester view failed, reloading the full range: {e}")
+
+        self.tester_tree.delete(*self.tester_tree.get_children())
+        samples_ref = db.collection("samples")
+        query = samples_ref
+
+        # Apply date filters
+        if start_date:
+            query = query.where("maturation_date", ">=", start_date)
+            logging.info(f"Applied Firestore filter: maturation_date >= {start_date}")
+        if end_date:
+            query = query.where("maturation_date", "<=", end_date)
+            logging.info(f"Applied Firestore filter: maturation_date <= {end_date}")
+
+        try:
+            marks = self.app.delta_sync.server_marks("samples")
+            # Pre-fetch all user emails to avoid N+1 queries
+            logging.info("Pre-fetching all user emails.")
+            users_docs = db.collection("users").select(LIST_VIEW_FIELDS["user_emails"]).get()
+            user_emails_map = {}
+            test_team_emails = [] # This will still be populated for the Treeview display
+            for user_doc in users_docs:
+                user_data = user_doc.to_dict()
+                if user_data.get("employee_id"):
+                    user_emails_map[user_data["employee_id"]] = user_data.get("email", "N/A")
+                if user_data.get("role") == "tester" and user_data.get("email"):
+                    test_team_emails.append(user_data["email"])
+            self.tester_user_emails_map = user_emails_map
+            self.tester_test_team_email_str = ", ".join(test_team_emails) if test_team_emails else "N/A"
+            logging.info(f"Pre-fetched {len(user_emails_map)} user emails and {len(test_team_emails)} tester emails.")
+
+
+            samples = query.select(LIST_VIEW_FIELDS["tester_sample_rows"]).get()
+            sample_count = 0
+            for sample in samples:
+                sample_count += 1
+                values, tags = self._tester_row(sample.to_dict())
+                self.tester_tree.insert("", "end", iid=sample.id, values=values, tags=tags)
+            self.tester_view_key = view_key
+            self.app.delta_sync.prime(view_key, marks)
+            logging.info(f"Filtered {sample_count} samples and populated Treeview.")
+            messagebox.showinfo("Filter Complete", "Samples filtered successfully.")
+        except Exception as e:
+            logging.exception("Failed to filter samples.") # Use logging.exception for full traceback
+            messagebox.showerror("Error", f"Failed to filter samples: {e}")
+
+    def _tester_row(self, data):
+        """Builds the tester_tree values and urgency tags for a sample document."""
+        maturation_date_str = data.get("maturation_date", "")
+        if isinstance(maturation_date_str, datetime):
+            maturation_date_str = maturation_date_str.strftime("%Y-%m-%d")
+        else:
+            maturation_date_str = str(maturation_date_str) if maturation_date_str is not None else ''
+
+        # Get product owner email from pre-fetched map
+        submitted_by_employee_id = data.get("submitted_by_employee_id")
+        product_owner_email = self.tester_user_emails_map.get(submitted_by_employee_id, "N/A")
+        logging.debug(f"Resolved product owner email: {product_owner_email} for user {submitted_by_employee_id}")
+
+        days_left = -1
+        try:
+            maturation_date = datetime.strptime(maturation_date_str, "%Y-%m-%d")
+            days_left = (maturation_date.date() - datetime.today().date()).days
+        except ValueError as ve:
+            logging.warning(f"Could not parse maturation date '{maturation_date_str}' for sample {data.get('sample_id', 'N/A')}: {ve}")
+            pass # Continue processing even if date parsing fails for coloring
+
+        tags = ()
+        if days_left == 0:
+            tags = ('today',)
+            logging.debug(f"Sample {data.get('sample_id', '')} tagged as 'today'.")
+        elif 0 < days_left <= 3:
+            tags = ('urgent',)
+            logging.debug(f"Sample {data.get('sample_id', '')} tagged as 'urgent'.")
+
+        values = (data.get("sample_id", ""),
+                  data.get("owner", ""),
+                  maturation_date_str,
+                  data.get("status", "pending"),
+                  data.get("batch_id", ""),
+                  product_owner_email,
+                  self.tester_test_team_email_str)
+        return values, tags
+
+    def _on_sample_changed(self, doc_id, changes):
+        """Patches a sample row (and its urgency tags) after a change committed elsewhere in the app."""
+        if not self.tester_tree.exists(doc_id):
+            return
+        values = self.tester_tree.item(doc_id, 'values')
+        data = {"sample_id": values[0], "owner": values[1], "maturation_date": values[2], "status": values[3],
+                "batch_id": values[4]}
+        data.update({field: value for field, value in changes.items() if field in data})
+        new_values, tags = self._tester_row(data)
+        # Keep the emails already resolved for the row
+        self.tester_tree.item(doc_id, values=new_values[:5] + tuple(values[5:]), tags=tags)
+
+    def _merge_tester_changes(self, view_key, start_date, end_date):
+        """Applies samples changed or deleted since the last filter to tester_tree instead of re-reading the range."""
+        changed, deleted_ids = self.app.delta_sync.fetch_changes(view_key, "samples",
+                                                                 field_paths=LIST_VIEW_FIELDS["tester_sample_rows"])
+        range_filters = []
+        if start_date:
+            range_filters.append(("maturation_date", ">=", start_date))
+        if end_date:
+            range_filters.append(("maturation_date", "<=", end_date))
+
+        for doc_id in deleted_ids:
+            if self.tester_tree.exists(doc_id):
+                self.tester_tree.delete(doc_id)
+        for sample in changed:
+            data = sample.to_dict()
+            if matches_all(data, range_filters):
+                values, tags = self._tester_row(data)
+                if self.tester_tree.exists(sample.id):
+                    self.tester_tree.item(sample.id, values=values, tags=tags)
+                else:
+                    self.tester_tree.insert("", "end", iid=sample.id, values=values, tags=tags)
+            elif self.tester_tree.exists(sample.id):
+                self.tester_tree.delete(sample.id)  # Maturation date moved out of the range
+        logging.info(f"Merged {len(changed)} changed and {len(deleted_ids)} deleted samples into the tester view.")
+
+    @ui_action()
+    def open_scan_mode(self):
+        """Opens the scan window. Scanned sample IDs are queued and looked up in the background with batched
+        queries; Mark Tested then moves every 'pending test' sample in the queue to 'tested' in batched writes."""
+        logging.info("Opening scan mode.")
+        scan_queue = ScanQueue(db)
+        scan_window = tk.Toplevel(self.root)
+        scan_window.title("Scan Tested Samples")
+        scan_window.geometry("600x500")
+
+        ttk.Label(scan_window, text="Scan a sample barcode (or type its Sample ID and press Enter):").pack(pady=(10, 5))
+        scan_entry = ttk.Entry(scan_window, width=40)
+        scan_entry.pack(pady=5)
+        scan_entry.focus_set()
+
+        tree_frame = ttk.Frame(scan_window)
+        tree_frame.pack(expand=True, fill="both", padx=10, pady=5)
+        scan_tree = ttk.Treeview(tree_frame, columns=("SampleID", "Status", "Result"), show="headings")
+        scan_tree.heading("SampleID", text="Sample ID")
+        scan_tree.heading("Status", text="Status")
+        scan_tree.heading("Result", text="Result")
+        scan_tree.column("SampleID", width=150, anchor="center")
+        scan_tree.column("Status", width=120, anchor="center")
+        scan_tree.column("Result", width=250, anchor="center")
+        scan_scrollbar = ttk.Scrollbar(tree_frame, orient="vertical", command=scan_tree.yview)
+        scan_tree.configure(yscrollcommand=scan_scrollbar.set)
+        scan_tree.pack(side="left", expand=True, fill="both")
+        scan_scrollbar.pack(side="right", fill="y")
+
+        scan_count_label = ttk.Label(scan_window, text="0 scanned")
+        scan_count_label.pack(pady=5)
+
+        def on_scan(event=None):
+            sample_id = scan_entry.get().strip()
+            scan_entry.delete(0, tk.END)
+            if not sample_id:
+                return
+            if scan_queue.add(sample_id):
+                scan_tree.insert("", 0, iid=sample_id, values=(sample_id, "", "Looking up..."))
+                scan_queue.resolve_async()
+            else:
+                scan_tree.selection_set(sample_id)  # Scanned twice: point at the queued row
+                scan_tree.see(sample_id)
+
+        def show_lookups():
+            if not scan_window.winfo_exists():
+                return
+            for sample_id, found in list(scan_queue.found.items()):
+                if scan_tree.exists(sample_id) and scan_tree.set(sample_id, "Result") in ("Looking up...", "Lookup failed"):
+                    scan_tree.item(sample_id, values=self._scan_row(sample_id, found))
+            pending = scan_queue.pending()
+            if pending:
+                scan_queue.resolve_async()  # Scans that arrived as the last lookup finished (or a retry)
+            count_text = f"{len(scan_queue.sample_ids)} scanned, {len(self._scanned_pending_test(scan_queue)[0])} pending test"
+            if scan_queue.error is not None and pending:
+                for sample_id in pending:
+                    if scan_tree.exists(sample_id):
+                        scan_tree.set(sample_id, "Result", "Lookup failed")
+                retry_in = max(0, round(scan_queue.retry_at - time.monotonic()))
+                count_text += f"\nLookup failed ({scan_queue.error}); retrying in {retry_in}s"
+            scan_count_label.config(text=count_text)
+            self.root.after(SCAN_POLL_MS, show_lookups)
+
+        def remove_selected():
+            for sample_id in scan_tree.selection():
+                scan_queue.remove(sample_id)
+                scan_tree.delete(sample_id)
+            scan_entry.focus_set()
+
+        def clear_scans():
+            scan_queue.clear()
+            scan_tree.delete(*scan_tree.get_children())
+            scan_entry.focus_set()
+
+        scan_entry.bind("<Return>", on_scan)
+
+        btn_frame = ttk.Frame(scan_window)
+        btn_frame.pack(pady=10)
+        ttk.Button(btn_frame, text="Remove Selected", command=remove_selected).pack(side="left", padx=5)
+        ttk.Button(btn_frame, text="Clear", command=clear_scans).pack(side="left", padx=5)
+        ttk.Button(btn_frame, text="Mark Tested",
+                   command=lambda: self.mark_scanned_samples_tested(scan_queue, scan_tree)).pack(side="left", padx=5)
+        show_lookups()
+
+    def _scan_row(self, sample_id, found):
+        if found is None:
+            return sample_id, "", "Not found"
+        status = found[1].get("status", "")
+        return sample_id, status, "Ready" if status == "pending test" else "Not pending test"
+
+    def _scanned_pending_test(self, scan_queue):
+        """Splits the resolved scans into samples to mark tested and (sample, reason) pairs to skip."""
+        samples, skipped = [], []
+        for sample_id in scan_queue.sample_ids:
+            if sample_id not in scan_queue.found:
+                continue  # Still being looked up
+            found = scan_queue.found[sample_id]
+            sample = {"id": found[0] if found else sample_id, "label": sample_id,
+                      "update_time": found[2] if found else None}
+            if found is None:
+                skipped.append((sample, "no sample with this ID"))
+            elif found[1].get("status") != "pending test":
+                skipped.append((sample, f"status is '{found[1].get('status')}'"))
+            else:
+                samples.append(sample)
+        return samples, skipped
+
+    @ui_action()
+    def mark_scanned_samples_tested(self, scan_queue, scan_tree):
+        """Moves the scanned 'pending test' samples to 'tested' with today's TestDate in batched writes."""
+        try:
+            scan_queue.resolve_pending()  # Usually nothing left: lookups run while scanning
+        except Exception as e:
+            logging.error(f"Looking up scanned samples failed: {e}", exc_info=True)
+            messagebox.showerror("Error", f"Failed to look up the scanned samples:\n{e}")
+            return
+        samples, skipped = self._scanned_pending_test(scan_queue)
+        if not samples:
+            messagebox.showinfo("Info", "No scanned samples are pending test.")
+            return
+        if not messagebox.askyesno("Confirm Tested", f"Mark {len(samples)} scanned sample(s) as tested?"):
+            logging.info("Marking scanned samples tested cancelled.")
+            return
+
+        changes = {"status": "tested", "test_date": datetime.now(),
+                   "last_updated_by_user_id": self.app.current_user.get('employee_id'),
+                   "last_updated_timestamp": firestore.SERVER_TIMESTAMP}
+
+        def add_writes(batch_write, sample):
+            # Only if the sample is unchanged since the scan looked it up (e.g. not marked tested elsewhere meanwhile)
+            batch_write.update(db.collection("samples").document(sample["id"]), changes,
+                               option=db.write_option(last_update_time=sample["update_time"]))
+
+        def find_changed(chunk):
+            snapshots = {snapshot.id: snapshot for snapshot in db.get_all(
+                [db.collection("samples").document(sample["id"]) for sample in chunk], field_paths=["status"])}
+            changed = []
+            for sample in chunk:
+                snapshot = snapshots.get(sample["id"])
+                if snapshot is None or not snapshot.exists:
+                    changed.append((sample, "deleted since it was scanned"))
+                elif snapshot.update_time != sample["update_time"]:
+                    changed.append((sample, f"changed since it was scanned (status is now '{(snapshot.to_dict() or {}).get('status')}')"))
+            return changed
+
+        def on_done(progress):
+            for sample in progress.succeeded:
+                self.app.events.publish(SAMPLE_CHANGED, doc_id=sample["id"], changes=changes)
+                if scan_tree.winfo_exists() and scan_tree.exists(sample["label"]):
+                    scan_tree.item(sample["label"], values=(sample["label"], "tested", "Marked tested"))
+                    scan_queue.found[sample["label"]] = (sample["id"], {"status": "tested"}, None)
+            for sample, reason in progress.failed:
+                if scan_tree.winfo_exists() and scan_tree.exists(sample["label"]):
+                    scan_tree.set(sample["label"], "Result", f"Failed: {reason}")
+            changed = [sample for sample, _ in progress.skipped if sample in samples]
+            if changed and scan_tree.winfo_exists():
+                # Changed since the scan: look them up again so their rows show the current status
+                for sample in changed:
+                    scan_queue.found.pop(sample["label"], None)
+                    if scan_tree.exists(sample["label"]):
+                        scan_tree.item(sample["label"], values=(sample["label"], "", "Looking up..."))
+                scan_queue.resolve_async()
+            show_bulk_summary(self.root, "Mark Tested", progress, "Marked tested")
+
+        start_bulk_operation(self.root, db, "Mark Tested", samples, add_writes, on_done, skipped=skipped,
+                             action="bulk_mark_tested", find_changed=find_changed)
+
+    def prompt_reminder_period(self):
+        """Show a pop-up window with radio buttons to choose reminder period."""
+        logging.info("Prompting for reminder period.")
+        reminder_window = tk.Toplevel(self.root)
+        reminder_window.title("Choose Reminder Period")
+        reminder_window.geometry("300x250")
+        reminder_window.grab_set()  # Make this pop-up modal
+
+        reminder_var = tk.StringVar(value="7d")  # default selection changed to 1 week (7 days)
+
+        options = [
+            ("Due Today", "0d"),
+            ("Within 3 Days", "3d"),
+            ("Within 1 Week", "7d"),    # Changed from '1w' to '7d' for consistency
+            ("Within 2 Weeks", "14d"),   # Changed from '2w' to '14d'
+            ("Within 30 Days", "30d"),   # Changed from '1m' to '30d' and label updated
+            ("Within 60 Days", "60d")    # Changed from '2m' to '60d' and label updated
+        ]
+
+        tk.Label(reminder_window, text="Select Reminder Period:", font=("Helvetica", 12)).pack(pady=10)
+
+        for label, value in options:
+            tk.Radiobutton(reminder_window, text=label, variable=reminder_var, value=value).pack(anchor="w", padx=20)
+
+        def submit_choice():
+            logging.info(f"Reminder period selected: {reminder_var.get()}")
+            period_code = reminder_var.get()
+            reminder_window.destroy()
+            self.prompt_test_team_selection(period_code) # Call new function to select test team
+
+        tk.Button(reminder_window, text="Next", command=submit_choice).pack(pady=15) # Changed button text
+        logging.info("Reminder period prompt displayed.")
+
+    @ui_action()
+    def prompt_test_team_selection(self, period_code):
+        """
+        Opens a Toplevel window for the user to select specific test team members
+        to receive reminder emails.
+        """
+        logging.info(f"Prompting for test team selection for period code: {period_code}")
+        test_team_window = tk.Toplevel(self.root)
+        test_team_window.title("Select Test Team Members")
+        test_team_window.geometry("600x400")
+        test_team_window.grab_set()
+        test_team_window.transient(self.root)
+
+        frame = ttk.Frame(test_team_window, padding=10)
+        frame.pack(expand=True, fill="both")
+
+        ttk.Label(frame, text="Select Test Team Members:", font=("Helvetica", 12)).pack(pady=10)
+
+        # Container for checkboxes with a scrollbar
+        canvas = tk.Canvas(frame)
+        scrollbar = ttk.Scrollbar(frame, orient="vertical", command=canvas.yview)
+        scrollable_frame = ttk.Frame(canvas)
+
+        scrollable_frame.bind(
+            "<Configure>",
+            lambda e: canvas.configure(
+                scrollregion=canvas.bbox("all")
+            )
+        )
+
+        canvas.create_window((0, 0), window=scrollable_frame, anchor="nw")
+        canvas.configure(yscrollcommand=scrollbar.set)
+
+        canvas.pack(side="left", fill="both", expand=True)
+        scrollbar.pack(side="right", fill="y")
+
+        self.tester_vars = [] # To hold (BooleanVar, email) tuples
+        testers_fetched = []
+
+        try:
+            users_docs = db.collection("users").where("role", "==", "tester").stream()
+            for user_doc in users_docs:
+                user_data = user_doc.to_dict()
+                email = user_data.get("email")
+                username = user_data.get("username")
+                if email and email != "N/A":
+                    var = tk.BooleanVar(value=True) # Default to selected
+                    cb = ttk.Checkbutton(scrollable_frame, text=f"{username} ({email})", variable=var)
+                    cb.pack(anchor="w", padx=5, pady=2)
+                    self.tester_vars.append((var, email))
+                    testers_fetched.append(f"{username} ({email})")
+            logging.info(f"Fetched {len(testers_fetched)} tester users for selection: {', '.join(testers_fetched)}")
+
+        except Exception as e:
+            logging.error(f"Failed to load tester users for selection: {e}", exc_info=True)
+            messagebox.showerror("Error", f"Failed to load tester users: {e}")
+            test_team_window.destroy()
+            return
+
+        if not self.tester_vars:
+            messagebox.showinfo("No Testers", "No tester users found in the database.")
+            test_team_window.destroy()
+            return
+
+
+        def send_selected_reminders():
+            selected_emails = [email for var, email in self.tester_vars if var.get()]
+            logging.info(f"Selected test team emails: {selected_emails}")
+            if not selected_emails:
+                messagebox.showwarning("No Selection", "Please select at least one test team member.")
+                return
+
+            test_team_window.destroy()
+            self.process_reminder_email(period_code, selected_emails)
+
+        ttk.Button(frame, text="Send Reminders", command=send_selected_reminders).pack(pady=10)
+        ttk.Button(frame, text="Cancel", command=test_team_window.destroy).pack(pady=5)
+        logging.info("Test team selection window displayed.")
+
+
+    def send_reminder_email(self):
+        logging.info("Initiating send_reminder_email.")
+        self.prompt_reminder_period()
+        logging.info("send_reminder_email process initiated.")
+
+    @ui_action("process_reminder_email({period_code})")
+    def process_reminder_email(self, period_code, selected_test_team_emails):
+        """Processes and sends emails based on selected period and selected test team members."""
+        logging.info(f"Processing reminder email for period code: {period_code}")
+        logging.info(f"Selected test team emails for this reminder: {selected_test_team_emails}")
+
+        days_map = {"0d": 0, "3d": 3, "7d": 7, "14d": 14, "30d": 30, "60d": 60}
+        days_threshold = days_map.get(period_code, 7)
+        logging.info(f"Calculated days threshold: {days_threshold}")
+
+        samples_to_remind = []
+        recipients_map = {}
+
+        today = datetime.today()
+        logging.info(f"Current date for comparison: {today.date()}")
+
+        if not self.tester_tree.get_children():
+            messagebox.showinfo("No Reminders", f"No samples currently displayed to check for reminders.")
+            logging.info("No samples in Treeview to process for reminders.")
+            return
+        
+        # We no longer need to pre-fetch all tester emails here, as they are passed directly
+        # all_test_team_emails = selected_test_team_emails # This is now the actual list to use.
+
+
+        for item_id in self.tester_tree.get_children():
+            values = self.tester_tree.item(item_id, "values")
+            sample_id = values[0]
+            owner = values[1]
+            maturation_date_str = values[2]
+            status = values[3]
+            batch_id = values[4]
+            product_owner_email = values[5]
+
+            logging.debug(f"Processing sample: {sample_id}, Maturation Date: {maturation_date_str}, Status: {status}")
+
+            try:
+                maturation_date = datetime.strptime(maturation_date_str, "%Y-%m-%d")
+                days_until = (maturation_date.date() - today.date()).days
+                logging.debug(f"Days until maturation for {sample_id}: {days_until}")
+            except ValueError:
+                logging.warning(f"Could not parse maturation date '{maturation_date_str}' for sample {sample_id}. Skipping.")
+                continue
+
+            if (period_code == "0d" and days_until == 0) or \
+               (period_code == "3d" and 0 < days_until <= 3) or \
+               (period_code == "7d" and 0 < days_until <= 7) or \
+               (period_code == "14d" and 0 < days_until <= 14) or \
+               (period_code == "30d" and 0 < days_until <= 30) or \
+               (period_code == "60d" and 0 < days_until <= 60):
+                samples_to_remind.append({
+                    "sample_id": sample_id,
+                    "owner": owner,
+                    "maturation_date": maturation_date_str,
+                    "batch_id": batch_id,
+                    "product_owner_email": product_owner_email,
+                    "test_team_emails": selected_test_team_emails # Use the selected list
+                })
+                logging.info(f"Sample {sample_id} added to reminders list (within threshold).")
+            else:
+                logging.debug(f"Sample {sample_id} (status: {status}, days_until: {days_until}) does not meet reminder criteria for period '{period_code}'.")
+
+
+        if not samples_to_remind:
+            messagebox.showinfo("No Reminders", f"No samples found for the selected period.")
+            logging.info("No samples found meeting reminder criteria.")
+            return
+
+        # Map recipients
+        for sample in samples_to_remind:
+            po_email = sample["product_owner_email"]
+            tt_emails = sample["test_team_emails"]
+            if po_email and po_email != "N/A":
+                recipients_map.setdefault(po_email, []).append(sample)
+                logging.debug(f"Adding product owner {po_email} to recipients map.")
+            for email in tt_emails: # Iterate through the pre-fetched list
+                if email and email != "N/A":
+                    recipients_map.setdefault(email, []).append(sample)
+                    logging.debug(f"Adding test team member {email} to recipients map.")
+
+
+        if not recipients_map:
+            messagebox.showinfo("No Recipients", "No valid email recipients found.")
+            logging.warning("No valid email recipients found after mapping.")
+            return
+
+        # Email config
+        smtp_server = "smtp.gmail.com"
+        smtp_port = 587
+        sender_email = "test.dept7@gmail.com"
+        app_password = "gicklxfdonaszuzh" 
+
+        email_send_success = []
+        email_send_fail = []
+        logging.info(f"Attempting to send emails to {len(recipients_map)} unique recipients.")
+
+        for recipient_email, samples in recipients_map.items():
+            subject = f"Reminder: Samples maturing soon"
+            body = "Dear User,\n\nThese samples require your attention:\n\n"
+            for s in samples:
+                body += f"- Sample ID: {s['sample_id']}, Owner: {s['owner']}, Maturation: {s['maturation_date']}, Batch: {s['batch_id']}\n"
+            body += "\nPlease take necessary action.\n\nBest regards,\nSample Management System"
+            logging.debug(f"Preparing email for {recipient_email}. Subject: {subject}")
+
+            msg = MIMEMultipart()
+            msg["From"] = sender_email
+            msg["To"] = recipient_email
+            msg["Subject"] = subject
+            msg.attach(MIMEText(body, "plain"))
+
+            try:
+                with smtplib.SMTP(smtp_server, smtp_port) as server:
+                    server.starttls()
+                    server.login(sender_email, app_password)
+                    server.send_message(msg)
+                    email_send_success.append(recipient_email)
+                    logging.info(f"Successfully sent email to: {recipient_email}")
+            except Exception as e:
+                email_send_fail.append(f"{recipient_email} ({e})")
+                logging.error(f"Failed to send email to {recipient_email}: {e}", exc_info=True)
+
+        if email_send_success:
+            messagebox.showinfo("Reminder Sent", f"Emails sent to: {', '.join(email_send_success)}")
+            logging.info(f"Emails successfully sent to: {', '.join(email_send_success)}")
+        if email_send_fail:
+            messagebox.showwarning("Some Failed", f"Some emails failed:\n{chr(10).join(email_send_fail)}")
+            logging.warning(f"Emails failed for: {', '.join(email_send_fail)}")
+
+        messagebox.showinfo("Done", "Reminder email process completed.")
+        logging.info("Reminder email process completed.")
+
+    def toggle_batch_fields(self, parent_frame, is_existing_batch_selected):
+        """Toggles the visibility/state of new/existing batch fields. (Placeholder for other modules)"""
+        pass  # This method is not directly used in TesterLogic, but kept as a stub if called
+
+
+    def load_existing_batches_into_combobox(self):
+        """Loads batch IDs from Firestore into the combobox. (Placeholder for other modules)"""
+        pass  # This method is not directly used in TesterLogic, but kept as a stub if called
@@ -0,0 +1,15 @@
+# conftest.py
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from firestore_fake import FakeFirestoreClient  # noqa: E402
+
+
+@pytest.fixture
+def db():
+    """A Firestore client backed by a fresh in-memory store (see firestore_fake.py)."""
+    return FakeFirestoreClient()
@@ -0,0 +1,79 @@
+# test_bulk_ops.py
+import pytest
+from google.api_core.exceptions import InvalidArgument
+
+from bulk_ops import BulkProgress, run_bulk_writes
+from constants import MAX_WRITES_PER_BATCH
+from delta_sync import add_tombstone
+
+
+def _items(count):
+    return [{"id": f"s{i:04d}", "label": f"S{i:04d}"} for i in range(count)]
+
+
+def test_fake_rejects_commits_over_the_write_limit(db):
+    batch_write = db.batch()
+    for item in _items(MAX_WRITES_PER_BATCH + 1):
+        batch_write.set(db.collection("samples").document(item["id"]), {"n": 1})
+    with pytest.raises(InvalidArgument):
+        batch_write.commit()
+
+
+def test_writes_are_chunked_under_the_write_limit(db):
+    items = _items(1200)
+    for item in items:
+        db.collection("samples").document(item["id"]).set({"status": "pending"})
+    commits = []
+
+    def add_writes(batch_write, item):
+        batch_write.delete(db.collection("samples").document(item["id"]))
+        add_tombstone(db, batch_write, "samples", item["id"])
+
+    def before_commit(batch_write, chunk):
+        commits.append(len(chunk))
+        batch_write.set(db.collection("batches").document("b1"), {"seen": len(chunk)}, merge=True)
+
+    progress = BulkProgress(len(items))
+    run_bulk_writes(db, items, add_writes, progress, writes_per_item=3, before_commit=before_commit)
+
+    assert progress.finished and not progress.failed
+    assert len(progress.succeeded) == len(items)
+    assert all(2 * size + 1 <= MAX_WRITES_PER_BATCH for size in commits)
+    assert sum(commits) == len(items)
+    assert list(db.collection("samples").stream()) == []
+
+
+def test_failed_commit_marks_only_its_items_failed(db):
+    items = _items(10)
+
+    def add_writes(batch_write, item):
+        if item["id"] == "s0003":
+            raise RuntimeError("bad item")
+        batch_write.set(db.collection("samples").document(item["id"]), {"ok": True})
+
+    progress = BulkProgress(len(items))
+    run_bulk_writes(db, items, add_writes, progress, writes_per_item=MAX_WRITES_PER_BATCH // 4)
+
+    assert [item["id"] for item, _ in progress.failed] == ["s0000", "s0001", "s0002", "s0003"]
+    assert len(progress.succeeded) == 6
+
+
+def test_items_changed_since_read_are_skipped(db):
+    items = _items(5)
+    for item in items:
+        item["update_time"] = db.collection("samples").document(item["id"]).set({"status": "pending test"}).update_time
+    db.collection("samples").document("s0002").update({"status": "tested"})
+
+    def add_writes(batch_write, item):
+        batch_write.update(db.collection("samples").document(item["id"]), {"status": "tested"},
+                           option=db.write_option(last_update_time=item["update_time"]))
+
+    def find_changed(chunk):
+        return [(item, "changed") for item in chunk
+                if db.collection("samples").document(item["id"]).get().update_time != item["update_time"]]
+
+    progress = BulkProgress(len(items))
+    run_bulk_writes(db, items, add_writes, progress, find_changed=find_changed)
+
+    assert [item["id"] for item, _ in progress.skipped] == ["s0002"]
+    assert len(progress.succeeded) == 4 and not progress.failed
@@ -0,0 +1,82 @@
+# test_concurrent_edits.py
+import pytest
+
+import concurrent_edits
+from concurrent_edits import EditBase, save_edit
+
+
+@pytest.fixture
+def prompts(monkeypatch):
+    """Answers to the merge prompt, in order; the questions asked are recorded in .asked."""
+    class Prompts(list):
+        asked = []
+
+    answers = Prompts()
+
+    def askyesnocancel(title, message, parent=None):
+        answers.asked.append(message)
+        return answers.pop(0)
+
+    monkeypatch.setattr(concurrent_edits.messagebox, "askyesnocancel", askyesnocancel)
+    return answers
+
+
+def _open_form(db, data):
+    ref = db.collection("batches").document("b1")
+    ref.set(data)
+    snapshot = ref.get()
+    return ref, EditBase(snapshot.to_dict(), snapshot.update_time)
+
+
+def test_uncontended_save_writes_the_changes(db, prompts):
+    ref, base = _open_form(db, {"product_name": "A", "description": "d"})
+
+    saved = save_edit(db, ref, base, {"product_name": "B"}, "Batch")
+
+    assert saved["product_name"] == "B" and ref.get().to_dict()["product_name"] == "B"
+    assert prompts.asked == []
+
+
+def test_other_fields_changed_meanwhile_are_kept_without_a_prompt(db, prompts):
+    ref, base = _open_form(db, {"product_name": "A", "description": "d"})
+    ref.update({"description": "theirs"})
+
+    save_edit(db, ref, base, {"product_name": "B"}, "Batch")
+
+    assert ref.get().to_dict() == {"product_name": "B", "description": "theirs"}
+    assert prompts.asked == []
+
+
+@pytest.mark.parametrize("keep_mine, expected", [(True, "mine"), (False, "theirs")])
+def test_same_field_conflict_asks_whose_value_wins(db, prompts, keep_mine, expected):
+    ref, base = _open_form(db, {"product_name": "A", "description": "d"})
+    ref.update({"product_name": "theirs"})
+    prompts.append(keep_mine)
+
+    save_edit(db, ref, base, {"product_name": "mine", "description": "new"}, "Batch")
+
+    assert ref.get().to_dict() == {"product_name": expected, "description": "new"}
+    assert len(prompts.asked) == 1
+
+
+def test_back_to_form_rebases_on_the_version_read(db, prompts):
+    ref, base = _open_form(db, {"product_name": "A"})
+    ref.update({"product_name": "theirs"})
+    prompts.append(None)
+
+    assert save_edit(db, ref, base, {"product_name": "mine"}, "Batch") is None
+    assert ref.get().to_dict()["product_name"] == "theirs"
+    assert base.data["product_name"] == "theirs"
+
+    # Saving again from the same form only conflicts with changes made after that
+    save_edit(db, ref, base, {"product_name": "mine"}, "Batch")
+    assert ref.get().to_dict()["product_name"] == "mine"
+    assert len(prompts.asked) == 1
+
+
+def test_deleted_document_raises(db, prompts):
+    ref, base = _open_form(db, {"product_name": "A"})
+    ref.delete()
+
+    with pytest.raises(ValueError, match="deleted"):
+        save_edit(db, ref, base, {"product_name": "B"}, "Batch")
@@ -0,0 +1,79 @@
+# test_due_soon.py
+from datetime import datetime, timedelta
+
+from firebase_admin import firestore
+
+from constants import DUE_SOON_COLLECTION
+from delta_sync import add_tombstone
+import due_soon
+from due_soon import DueSoonView, day_key
+
+
+def _sample(db, doc_id, maturation_date, status="pending test"):
+    db.collection("samples").document(doc_id).set({
+        "sample_id": doc_id.upper(), "owner": "lab", "status": status, "batch_id": "B1",
+        "maturation_date": maturation_date, "submitted_by_employee_id": "E1",
+        "last_updated_timestamp": firestore.SERVER_TIMESTAMP,
+    })
+
+
+def _bucket_update_time(db, day):
+    return db.store.get_update_time(DUE_SOON_COLLECTION, f"{due_soon.DUE_SOON_DOCUMENT}_{day_key(day)}")
+
+
+def test_refresh_applies_changes_and_deletes(db):
+    today = due_soon._today()
+    db.collection("users").document("E1").set({"employee_id": "E1", "email": "e1@lab", "role": "user"})
+    _sample(db, "s1", today + timedelta(hours=9))
+    _sample(db, "s2", today + timedelta(days=1))
+    _sample(db, "s3", today + timedelta(days=2))
+    _sample(db, "later", today + timedelta(days=30))
+    view = DueSoonView(db)
+
+    loaded = view.load()
+    assert set(DueSoonView.entries(loaded)) == {"s1", "s2", "s3"}
+    assert loaded["buckets"][day_key(today)]["urgency"] == "today"
+    untouched_day = _bucket_update_time(db, today + timedelta(days=5))
+
+    # s1 is tested, s2 moves out of the window, s3 is deleted and "later" moves in
+    db.collection("samples").document("s1").update({"status": "tested",
+                                                    "last_updated_timestamp": firestore.SERVER_TIMESTAMP})
+    db.collection("samples").document("s2").update({"maturation_date": today + timedelta(days=40),
+                                                    "last_updated_timestamp": firestore.SERVER_TIMESTAMP})
+    batch_write = db.batch()
+    batch_write.delete(db.collection("samples").document("s3"))
+    add_tombstone(db, batch_write, "samples", "s3")
+    batch_write.commit()
+    db.collection("samples").document("later").update({"maturation_date": today + timedelta(days=3),
+                                                       "last_updated_timestamp": firestore.SERVER_TIMESTAMP})
+
+    refreshed = view.refresh()
+    entries = DueSoonView.entries(refreshed)
+    assert set(entries) == {"s1", "later"}
+    assert entries["s1"]["status"] == "tested"
+    assert set(DueSoonView.entries(view.load())) == {"s1", "later"}
+    # Only the days that changed are rewritten
+    assert _bucket_update_time(db, today + timedelta(days=5)) == untouched_day
+
+
+def test_refresh_without_changes_writes_nothing(db):
+    today = due_soon._today()
+    _sample(db, "s1", today)
+    view = DueSoonView(db)
+    view.load()
+    meta_update_time = db.store.get_update_time(DUE_SOON_COLLECTION, due_soon.DUE_SOON_DOCUMENT)
+
+    assert set(DueSoonView.entries(view.refresh())) == {"s1"}
+    assert db.store.get_update_time(DUE_SOON_COLLECTION, due_soon.DUE_SOON_DOCUMENT) == meta_update_time
+
+
+def test_marks_are_server_times(db):
+    today = due_soon._today()
+    _sample(db, "s1", today)
+    DueSoonView(db).load()
+    meta = db.collection(DUE_SOON_COLLECTION).document(due_soon.DUE_SOON_DOCUMENT).get().to_dict()
+    stamped = db.collection("samples").document("s1").get().to_dict()["last_updated_timestamp"]
+
+    assert "buckets" not in meta
+    assert isinstance(meta["built_at"], datetime) and isinstance(meta["refreshed_at"], datetime)
+    assert due_soon.as_naive(meta["synced_changes"]) == due_soon.as_naive(stamped)
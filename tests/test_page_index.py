@@ -0,0 +1,55 @@
+# test_page_index.py
+from datetime import datetime, timedelta
+
+from page_index import PageBoundaryIndex
+
+START = datetime(2025, 1, 1)
+
+
+def _add_samples(db, first, count):
+    for i in range(first, first + count):
+        db.collection("samples").document(f"s{i:04d}").set({"creation_date": START + timedelta(minutes=i)})
+
+
+def _boundary_ids(index):
+    return [doc.id for doc in index.boundaries]
+
+
+def test_build_keeps_the_last_document_of_every_page(db):
+    _add_samples(db, 0, 230)
+    index = PageBoundaryIndex(db.collection("samples"), 50)
+    index.build()
+
+    assert index.ready and index.total_count == 230 and index.page_count == 5
+    assert _boundary_ids(index) == ["s0049", "s0099", "s0149", "s0199"]
+    assert index.cursor_for_page(0) is None and index.cursor_for_page(2).id == "s0099"
+
+
+def test_drop_from_then_rebuild_matches_a_full_build(db):
+    _add_samples(db, 0, 230)
+    index = PageBoundaryIndex(db.collection("samples"), 50)
+    index.build()
+
+    # A sample deleted on page 3 and one added at the end
+    deleted_at = db.collection("samples").document("s0120").get().to_dict()["creation_date"]
+    db.collection("samples").document("s0120").delete()
+    _add_samples(db, 230, 1)
+    index.drop_from(deleted_at)
+    assert not index.ready and _boundary_ids(index) == ["s0049", "s0099"]
+
+    index.build()
+    fresh = PageBoundaryIndex(db.collection("samples"), 50)
+    fresh.build()
+    assert index.ready and index.total_count == fresh.total_count == 230
+    assert _boundary_ids(index) == _boundary_ids(fresh)
+
+
+def test_drop_from_none_drops_every_boundary(db):
+    _add_samples(db, 0, 120)
+    index = PageBoundaryIndex(db.collection("samples"), 50)
+    index.build()
+    index.drop_from()
+
+    assert index.boundaries == [] and not index.ready
+    index.build()
+    assert _boundary_ids(index) == ["s0049", "s0099"]
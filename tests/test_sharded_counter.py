@@ -0,0 +1,56 @@
+# test_sharded_counter.py
+from constants import COUNTER_SHARDS_COLLECTION, IN_QUERY_LIMIT
+from sharded_counter import ShardedCounter, counter_totals, delete_counter_shards, fold_counter_shards
+
+
+def _increment(db, parent_id, amount, times):
+    for _ in range(times):
+        batch_write = db.batch()
+        ShardedCounter(db, "batches", parent_id, "number_of_samples").increment(batch_write, amount)
+        batch_write.commit()
+
+
+def test_total_adds_the_shards_to_the_parent_field(db):
+    db.collection("batches").document("b1").set({"number_of_samples": 5})
+    _increment(db, "b1", 3, 20)
+    _increment(db, "b1", -1, 4)
+
+    assert ShardedCounter(db, "batches", "b1", "number_of_samples").total() == 5 + 60 - 4
+
+
+def test_fold_keeps_totals_and_deletes_the_shards(db):
+    parents = {}
+    for i in range(IN_QUERY_LIMIT * 2 + 5):  # More parents than one "in" query takes
+        parent_id = f"b{i}"
+        db.collection("batches").document(parent_id).set({"number_of_samples": i})
+        _increment(db, parent_id, 2, 3)
+        parents[parent_id] = db.collection("batches").document(parent_id).get().to_dict()
+    before = counter_totals(db, "batches", parents, "number_of_samples")
+    assert before == {f"b{i}": i + 6 for i in range(len(parents))}
+
+    assert fold_counter_shards(db, quiet_seconds=None) > 0
+
+    assert list(db.collection(COUNTER_SHARDS_COLLECTION).stream()) == []
+    assert list(db.collection("tombstones").stream()) == []
+    parents = {parent_id: db.collection("batches").document(parent_id).get().to_dict() for parent_id in parents}
+    assert counter_totals(db, "batches", parents, "number_of_samples") == before
+
+
+def test_fold_skips_recent_shards(db):
+    db.collection("batches").document("b1").set({"number_of_samples": 1})
+    _increment(db, "b1", 1, 5)
+
+    assert fold_counter_shards(db, quiet_seconds=3600) == 0
+    assert ShardedCounter(db, "batches", "b1", "number_of_samples").total() == 6
+
+
+def test_delete_counter_shards(db):
+    _increment(db, "b1", 1, 10)
+    _increment(db, "b2", 1, 2)
+    batch_write = db.batch()
+    deleted = delete_counter_shards(db, batch_write, "batches", "b1")
+    batch_write.commit()
+
+    assert deleted > 0
+    remaining = [shard.to_dict()["parent"] for shard in db.collection(COUNTER_SHARDS_COLLECTION).stream()]
+    assert remaining and set(remaining) == {"batches/b2"}
@@ -1,2561 +1,3065 @@
-import tkinter as tk
-from tkinter import filedialog, messagebox, ttk
-from datetime import datetime, timedelta
-import pandas as pd
-import barcode
-from barcode.writer import ImageWriter
-import os
-from firebase_setup import db
-from constants import NOTIFICATION_DAYS_BEFORE, COLUMNS, SAMPLE_STATUS_OPTIONS
-from tkcalendar import DateEntry
-import firebase_admin
-
-# --- Logging Setup ---
-import logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
-# --- End Logging Setup ---
-
-class UserLogic:
-    def __init__(self, root, app_instance):
-        self.root = root
-        self.app = app_instance
-        self.tree = None
-        self.status_label = None
-        self.excel_imported = False
-        self.current_selected_batch_id = None
-
-        # Initialize ttk Style
-        self.style = ttk.Style()
-        # Set a modern theme, e.g., 'clam', 'alt', 'vista', 'xpnative'
-        self.style.theme_use('clam') 
-
-        # Configure general styles
-        self.style.configure('TFrame', background='#f0f0f0')
-        self.style.configure('TLabel', font=('Helvetica', 10), background='#f0f0f0', foreground='#333333')
-        
-        # Configure different button styles
-        # Primary button (e.g., for major actions like Select Batch, Add Sample)
-        self.style.configure('Primary.TButton', font=('Helvetica', 10, 'bold'), padding=8, background='#007bff', foreground='white', relief='raised')
-        self.style.map('Primary.TButton', background=[('active', '#0056b3')]) # Darken on hover
-
-        self.style.configure('add.TButton', font=('Helvetica', 10, 'bold'), padding=8, background="#94e119", foreground='white', relief='raised')
-        self.style.map('add.TButton', background=[('active', "#0ee969")])
-
-        # Secondary button (e.g., for less critical actions like Refresh, Check Notifications)
-        self.style.configure('Secondary.TButton', font=('Helvetica', 10, 'bold'), padding=8, background='#6c757d', foreground='white', relief='raised')
-        self.style.map('Secondary.TButton', background=[('active', '#545b62')])
-
-        # Success button (e.g., for actions that add or confirm)
-        self.style.configure('Success.TButton', font=('Helvetica', 10, 'bold'), padding=8, background='#28a745', foreground='white', relief='raised')
-        self.style.map('Success.TButton', background=[('active', '#218838')])
-
-        # Warning/Info button (e.g., for filters, generate barcode)
-        self.style.configure('Info.TButton', font=('Helvetica', 10, 'bold'), padding=8, background='#17a2b8', foreground='white', relief='raised')
-        self.style.map('Info.TButton', background=[('active', '#138496')])
-
-        # Danger button (e.g., for delete actions)
-        self.style.configure('Danger.TButton', font=('Helvetica', 10, 'bold'), padding=8, background='#dc3545', foreground='white', relief='raised')
-        self.style.map('Danger.TButton', background=[('active', '#c82333')])
-
-        # Configure Entry and Combobox styles
-        self.style.configure('TEntry', padding=5)
-        self.style.configure('TCombobox', padding=5)
-        self.style.configure('TCheckbutton', background='#f0f0f0')
-        self.style.configure('TRadiobutton', background='#f0f0f0')
-
-        # Configure Treeview style
-        self.style.configure('Treeview',
-            font=('Helvetica', 9),
-            rowheight=25,
-            fieldbackground='#ffffff',
-            background='#ffffff',
-            foreground='#000000',
-            bordercolor='#cccccc',
-            lightcolor='#eeeeee',
-            darkcolor='#bbbbbb'
-        )
-        self.style.map('Treeview', background=[('selected', '#347083')]) # Blue selection
-        self.style.configure('Treeview.Heading', font=('Helvetica', 10, 'bold'), background='#e0e0e0', foreground='#333333')
-        self.style.map('Treeview.Heading', background=[('active', '#d0d0d0')])
-
-
-        # Elements for forms (will be created dynamically)
-        self.existing_batch_combobox = None
-        self.new_batch_product_name = None
-        self.new_batch_description = None
-        self.entry_sample_display_id = None
-        self.entry_owner_combobox = None
-        self.entry_maturation_date_entry = None
-        self.status_combobox = None
-
-        # Filter form elements
-        self.filter_maturation_date_var = tk.BooleanVar(value=False)
-        self.filter_creation_date_var = tk.BooleanVar(value=False)
-
-        self.filter_start_date_entry = None
-        self.filter_end_date_entry = None
-        self.filter_creation_start_date_entry = None
-        self.filter_creation_end_date_entry = None
-        self.filter_sample_id_entry = None
-        self.filter_batch_id_entry = None
-        self.filter_product_name_entry = None
-        self.filter_status_combobox = None
-
-        self.filter_mode = tk.StringVar(value="samples")
-        self.find_batch_id_entry = None
-        self.find_sample_id_entry = None # New: Entry for finding sample details
-        self.sample_filters_frame = None
-        self.batch_search_frame = None
-        self.sample_search_frame = None # New: Frame for sample search
-
-        self.maturation_date_filter_frame = None
-        self.creation_date_filter_frame = None
-
-        # Pagination variables
-        self.current_page_index = 0
-        self.samples_per_page = 100
-        self.all_samples_page_cursors = []
-        self.my_samples_page_cursors = []
-        self.batch_samples_page_cursors = []
-        self.last_loaded_query_type = None
-
-        # Pagination UI elements
-        self.page_info_label = None
-        self.prev_sample_page_btn = None
-        self.next_sample_page_btn = None
-
-        # Buttons that need their state controlled based on view type
-        self.edit_sample_button = None
-        self.delete_sample_button = None
-
-        logging.info("UserLogic initialized.")
-
-
-    def user_dashboard(self):
-        """Displays the user dashboard with sample management features."""
-        logging.info("Entering user_dashboard method.")
-        self.app.clear_root()
-        # Set root background color
-        self.root.config(bg='#f0f0f0') 
-        self.root.geometry("1300x600")
-        self.excel_imported = False
-        self.current_selected_batch_id = None
-        
-        # Reset pagination state for all views
-        self.current_page_index = 0
-        self.all_samples_page_cursors = []
-        self.my_samples_page_cursors = []
-        self.batch_samples_page_cursors = []
-        self.last_loaded_query_type = None
-
-        # === Menu Bar ===
-        menubar = tk.Menu(self.root)
-        
-        filemenu = tk.Menu(menubar, tearoff=0)
-        filemenu.add_command(label="Import Excel (Local/DB)", command=self.open_excel_import_options_form)
-        filemenu.add_command(label="Export Excel (Local)", command=self.export_excel)
-        menubar.add_cascade(label="File", menu=filemenu)
-
-        loadmenu = tk.Menu(menubar, tearoff=0)
-        loadmenu.add_command(label="Load All Samples", command=lambda: self.load_samples_paginated('all_samples', reset=True))
-        loadmenu.add_command(label="Load My Samples", command=lambda: self.load_samples_paginated('my_samples', reset=True))
-        loadmenu.add_separator()
-        loadmenu.add_command(label="Load All Batches", command=self.load_all_batches_to_tree)
-        loadmenu.add_command(label="Load My Batches", command=self.load_my_batches_to_tree)
-        menubar.add_cascade(label="Load", menu=loadmenu)
-        
-        self.root.config(menu=menubar)
-
-        # === Top Toolbar Frame for Buttons ===
-        # Using 'Toolbar.TFrame' style for consistency
-        toolbar_top = ttk.Frame(self.root, padding=(10, 10), style='TFrame')
-        toolbar_top.pack(fill="x", padx=10, pady=(10, 0)) # Add some top padding
-
-        # Use different button styles
-        ttk.Button(toolbar_top, text="Logout", command=self.app.logout, style='Secondary.TButton').pack(side=tk.RIGHT, padx=5)
-        ttk.Button(toolbar_top, text="Refresh", command=self.refresh_tree, style='Secondary.TButton').pack(side=tk.RIGHT, padx=5)
-        ttk.Button(toolbar_top, text="Load Today's Batches", command=self.load_todays_batches_to_tree, style='Secondary.TButton').pack(side=tk.LEFT, padx=5)
-        ttk.Button(toolbar_top, text="Check Notifications", command=self.check_notifications, style='Info.TButton').pack(side=tk.LEFT, padx=5)
-        self.add_sample_main_button = ttk.Button(toolbar_top, text="Select Batch", command=self.open_batch_selection_screen, style='Primary.TButton')
-        self.add_sample_main_button.pack(side=tk.LEFT, padx=5)
-        self.add_single_sample_button = ttk.Button(toolbar_top, text="Add Sample to Current Batch", command=self.open_single_sample_form, state=tk.DISABLED, style='add.TButton')
-        self.add_single_sample_button.pack(side=tk.LEFT, padx=5)
-        
-        self.edit_sample_button = ttk.Button(toolbar_top, text="Edit Sample", command=self.edit_sample, style='Info.TButton')
-        self.edit_sample_button.pack(side=tk.LEFT, padx=5)
-        self.delete_sample_button = ttk.Button(toolbar_top, text="Delete Sample", command=self.delete_sample, style='Danger.TButton')
-        self.delete_sample_button.pack(side=tk.LEFT, padx=5)
-
-
-        # === Treeview Frame for Data Display with Scrollbar ===
-        tree_frame = ttk.Frame(self.root, style='TFrame', relief='sunken', borderwidth=1) # Added relief and border
-        tree_frame.pack(expand=True, fill=tk.BOTH, padx=10, pady=10)
-
-        # Treeview configured with style 'Treeview'
-        self.tree = ttk.Treeview(tree_frame, columns=["DocID", "DisplaySampleID", "Owner", "MaturationDate", "Status", "BatchID", "CreationDate", "ProductName", "Description", "SubmissionDate", "NumberOfSamples"], show='headings', style='Treeview')
-
-        tree_scrollbar = ttk.Scrollbar(tree_frame, orient="vertical", command=self.tree.yview)
-        self.tree.configure(yscrollcommand=tree_scrollbar.set)
-
-        self.tree.pack(side=tk.LEFT, expand=True, fill=tk.BOTH)
-        tree_scrollbar.pack(side=tk.RIGHT, fill='y')
-
-        self.tree.heading("DocID", text="Doc ID")
-        self.tree.column("DocID", width=0, stretch=tk.NO)
-
-        self.tree.heading("DisplaySampleID", text="Sample ID")
-        self.tree.column("DisplaySampleID", width=100, anchor="center")
-
-        self.tree.heading("Owner", text="Sample Owner")
-        self.tree.column("Owner", width=100, anchor="center")
-
-        self.tree.heading("MaturationDate", text="Maturation Date")
-        self.tree.column("MaturationDate", width=120, anchor="center")
-
-        self.tree.heading("Status", text="Status")
-        self.tree.column("Status", width=80, anchor="center")
-
-        self.tree.heading("BatchID", text="Batch ID")
-        self.tree.column("BatchID", width=120, anchor="center")
-
-        self.tree.heading("CreationDate", text="Creation Date")
-        self.tree.column("CreationDate", width=120, anchor="center")
-
-        self.tree.heading("ProductName", text="Product Name")
-        self.tree.column("ProductName", width=0, stretch=tk.NO)
-
-        self.tree.heading("Description", text="Description")
-        self.tree.column("Description", width=0, stretch=tk.NO)
-
-        self.tree.heading("SubmissionDate", text="Submission Date")
-        self.tree.column("SubmissionDate", width=0, stretch=tk.NO)
-
-        self.tree.heading("NumberOfSamples", text="Num Samples")
-        self.tree.column("NumberOfSamples", width=0, stretch=tk.NO)
-
-        self.tree.bind("<Double-1>", self._on_tree_double_click)
-
-        # === Status Bar ===
-        self.status_label = ttk.Label(self.root, text="Load samples from DB or import Excel.", anchor='w', 
-                                     font=('Helvetica', 9), background='#e0e0e0', foreground='#333333', relief=tk.SUNKEN, borderwidth=1)
-        self.status_label.pack(fill=tk.X, padx=10, pady=(5, 10)) # Add some bottom padding
-
-        # === Bottom Toolbar Frame for Generate Barcode, Pagination, and Filter Button ===
-        bottom_toolbar = ttk.Frame(self.root, padding=(10, 5), style='TFrame')
-        bottom_toolbar.pack(fill="x", padx=10, pady=(0, 10), side=tk.BOTTOM)
-        
-        ttk.Button(bottom_toolbar, text="Generate Barcode", command=self.generate_barcode, style='Info.TButton').pack(side=tk.LEFT, padx=5)
-
-        pagination_frame = ttk.Frame(bottom_toolbar, style='TFrame')
-        pagination_frame.pack(side=tk.LEFT, expand=True)
-
-        self.prev_sample_page_btn = ttk.Button(pagination_frame, text="Previous", command=lambda: self.navigate_samples_page('prev'), state=tk.DISABLED, style='Secondary.TButton')
-        self.prev_sample_page_btn.pack(side=tk.LEFT, padx=2)
-
-        self.page_info_label = ttk.Label(pagination_frame, text="Page 1 of 1", style='TLabel')
-        self.page_info_label.pack(side=tk.LEFT, padx=5)
-
-        self.next_sample_page_btn = ttk.Button(pagination_frame, text="Next", command=lambda: self.navigate_samples_page('next'), state=tk.DISABLED, style='Secondary.TButton')
-        self.next_sample_page_btn.pack(side=tk.LEFT, padx=2)
-        
-        ttk.Button(bottom_toolbar, text="Filter Samples/Find Batch", command=self.open_filter_form, style='Info.TButton').pack(side=tk.RIGHT, padx=5)
-
-        self.load_samples_paginated(query_type='all_samples', reset=True)
-        logging.info("User dashboard loaded.")
-
-    def _on_tree_double_click(self, event):
-        """Handles double-click events on the Treeview to load batch samples."""
-        logging.info("Treeview double-click event detected.")
-        item_id = self.tree.identify_row(event.y)
-        if not item_id:
-            return
-
-        item_values = self.tree.item(item_id, 'values')
-        
-        if self.last_loaded_query_type in ['batches', 'my_batches', 'todays_batches']:
-            # Check if BatchID is present in Treeview values (index 5) and is valid
-            if len(item_values) > 1 and item_values[5] and item_values[5] != 'N/A':
-                batch_id_from_tree = item_values[5]
-                logging.info(f"Double-clicked on batch with ID: {batch_id_from_tree}")
-                self.current_selected_batch_id = batch_id_from_tree
-                self.load_samples_for_current_batch(reset=True)
-            else:
-                logging.warning("Double-clicked item is not recognized as a valid batch.")
-                messagebox.showwarning("Invalid Item", "Please double-click on a valid batch row.")
-        else:
-            logging.info("Double-click ignored as current view is not batches or is a local/filtered sample view.")
-
-
-    def load_samples_to_treeview(self, samples_list, is_pagination_load=False, current_page=1, total_pages=1):
-        """Populates the Treeview widget with the given list of samples.
-        Adjusts column visibility based on context (samples vs batches)."""
-        logging.info(f"Populating samples treeview. Pagination Load: {is_pagination_load}, Current Page: {current_page}, Total Pages: {total_pages}")
-        # Clear existing items for a fresh load
-        self.tree.delete(*self.tree.get_children())
-        # Reset DataFrame for new data
-        self.app.data = pd.DataFrame(columns=COLUMNS + ["DocID"])
-
-        # Define columns for samples and batches for visibility control
-        sample_cols = ["DisplaySampleID", "Owner", "MaturationDate", "Status", "BatchID", "CreationDate"]
-        batch_cols = ["ProductName", "Description", "SubmissionDate", "NumberOfSamples"]
-
-        # Set sample-specific columns visible
-        for col in sample_cols:
-            self.tree.column(col, width=100 if col != "MaturationDate" else 120, stretch=tk.YES)
-        # Hide batch-specific columns
-        for col in batch_cols:
-            self.tree.column(col, width=0, stretch=tk.NO)
-
-        if samples_list:
-            df = pd.DataFrame(samples_list)
-            # Rename columns for consistent display in Treeview
-            df.rename(columns={
-                "firestore_doc_id": "DocID",
-                "sample_id": "DisplaySampleID",
-                "owner": "Owner",
-                "maturation_date": "MaturationDate",
-                "status": "Status",
-                "batch_id": "BatchID",
-                "creation_date": "CreationDate"
-            }, inplace=True)
-
-            # Add missing expected columns with None to ensure DataFrame structure
-            for col in ["DocID", "DisplaySampleID", "Owner", "MaturationDate", "Status", "BatchID", "CreationDate"]:
-                if col not in df.columns:
-                    df[col] = None
-            
-            self.app.data = df
-            # Insert data into the Treeview
-            for index, row in df.iterrows():
-                mat_date_str = "N/A"
-                creation_date_str = "N/A"
-
-                mat_date = row.get('MaturationDate')
-                # Robustly convert maturation date to string format
-                if mat_date is not None:
-                    if hasattr(mat_date, 'to_datetime'):
-                        mat_date_dt = mat_date.to_datetime()
-                    elif isinstance(mat_date, datetime):
-                        mat_date_dt = mat_date
-                    else:
-                        try:
-                            mat_date_dt = datetime.strptime(str(mat_date).split(' ')[0], "%Y-%m-%d")
-                        except ValueError:
-                            mat_date_dt = None
-                    if mat_date_dt:
-                        mat_date_str = mat_date_dt.strftime("%Y-%m-%d")
-
-                creation_date = row.get('CreationDate')
-                # Robustly convert creation date to string format
-                if creation_date is not None:
-                    if hasattr(creation_date, 'to_datetime'):
-                        creation_date_dt = creation_date.to_datetime()
-                    elif isinstance(creation_date, datetime):
-                        creation_date_dt = creation_date
-                    else:
-                        try:
-                            creation_date_dt = datetime.strptime(str(creation_date).split(' ')[0], "%Y-%m-%d")
-                        except ValueError:
-                            creation_date_dt = None
-                    if creation_date_dt:
-                        creation_date_str = creation_date_dt.strftime("%Y-%m-%d")
-
-                self.tree.insert("", tk.END,
-                                 values=(row.get('DocID', ''),
-                                         row.get('DisplaySampleID', ''),
-                                         row.get('Owner', ''),
-                                         mat_date_str,
-                                         row.get('Status', ''),
-                                         row.get('BatchID', 'N/A'),
-                                         creation_date_str,
-                                         '', '', '', '')) # Empty values for hidden batch columns
-            
-            self.status_label.config(text=f"Loaded {len(self.app.data)} samples. Page {current_page} of {total_pages}.")
-            self.page_info_label.config(text=f"Page {current_page} of {total_pages}")
-        else:
-            self.status_label.config(text="No samples found.")
-            self.page_info_label.config(text="Page 0 of 0")
-            logging.info("No samples to display.")
-
-        # Update pagination button states based on current page and total pages
-        self.prev_sample_page_btn.config(state=tk.NORMAL if current_page > 1 else tk.DISABLED)
-        self.next_sample_page_btn.config(state=tk.NORMAL if current_page < total_pages else tk.DISABLED)
-        
-        # Enable Edit and Delete Sample buttons when samples are displayed
-        if self.edit_sample_button:
-            self.edit_sample_button.config(state=tk.NORMAL)
-        if self.delete_sample_button:
-            self.delete_sample_button.config(state=tk.NORMAL)
-
-        logging.info("Samples treeview populated and pagination buttons updated.")
-
-    def load_batches_to_treeview(self, batches_list):
-        """Populates the Treeview widget with the given list of batches.
-        Adjusts column visibility for batch display."""
-        logging.info(f"Populating batches treeview with {len(batches_list)} batches.")
-        self.tree.delete(*self.tree.get_children())
-        self.app.data = pd.DataFrame()
-
-        # Define columns for samples and batches for visibility control
-        sample_cols = ["DisplaySampleID", "Owner", "MaturationDate", "Status", "CreationDate"]
-        batch_cols = ["BatchID", "ProductName", "Description", "SubmissionDate", "NumberOfSamples"]
-
-        # Hide sample-specific columns
-        for col in sample_cols:
-            self.tree.column(col, width=0, stretch=tk.NO)
-        # Set batch-specific columns visible and configure widths
-        for col in batch_cols:
-            self.tree.column(col, width=100, stretch=tk.YES)
-        self.tree.column("BatchID", width=150, stretch=tk.YES)
-        self.tree.column("ProductName", width=120, stretch=tk.YES)
-        self.tree.column("Description", width=200, stretch=tk.YES)
-        self.tree.column("SubmissionDate", width=120, anchor="center", stretch=tk.YES)
-        self.tree.column("NumberOfSamples", width=100, anchor="center", stretch=tk.YES)
-
-
-        if batches_list:
-            df = pd.DataFrame(batches_list)
-            df.rename(columns={
-                "firestore_doc_id": "DocID",
-                "batch_id": "BatchID",
-                "product_name": "ProductName",
-                "description": "Description",
-                "submission_date": "SubmissionDate",
-                "number_of_samples": "NumberOfSamples"
-            }, inplace=True)
-
-            self.app.data = df
-
-            for index, row in self.app.data.iterrows():
-                submission_date_str = "N/A"
-                sub_date = row.get('SubmissionDate')
-                # Robustly convert submission date to string format
-                if sub_date is not None:
-                    if hasattr(sub_date, 'to_datetime'):
-                        sub_date_dt = sub_date.to_datetime()
-                    elif isinstance(sub_date, datetime):
-                        sub_date_dt = sub_date
-                    else:
-                        try:
-                            sub_date_dt = datetime.strptime(str(sub_date).split(' ')[0], "%Y-%m-%d")
-                        except ValueError:
-                            sub_date_dt = None
-                    if sub_date_dt:
-                        submission_date_str = sub_date_dt.strftime("%Y-%m-%d")
-
-                self.tree.insert("", tk.END,
-                                 values=(row.get('DocID', ''),
-                                         '', '', '', '', # Empty values for hidden sample columns
-                                         row.get('BatchID', 'N/A'),
-                                         '', # Empty for sample CreationDate
-                                         row.get('ProductName', 'N/A'),
-                                         row.get('Description', 'N/A'),
-                                         submission_date_str,
-                                         row.get('NumberOfSamples', 0)))
-            self.status_label.config(text=f"Loaded {len(self.app.data)} batches.")
-        else:
-            self.status_label.config(text="No batches found.")
-
-        # Disable sample-specific buttons and pagination controls when showing batches
-        self.add_single_sample_button.config(state=tk.DISABLED)
-        self.prev_sample_page_btn.config(state=tk.DISABLED)
-        self.next_sample_page_btn.config(state=tk.DISABLED)
-        self.page_info_label.config(text="Page 0 of 0")
-
-        # Disable Edit and Delete Sample buttons when batches are displayed
-        if self.edit_sample_button:
-            self.edit_sample_button.config(state=tk.DISABLED)
-        if self.delete_sample_button:
-            self.delete_sample_button.config(state=tk.DISABLED)
-
-        logging.info("Batches treeview populated.")
-
-    def navigate_samples_page(self, direction):
-        """Navigates to the previous or next page of samples based on the current query type."""
-        logging.info(f"Navigating samples page: {direction}, current_page_index: {self.current_page_index}")
-        if self.last_loaded_query_type == 'all_samples':
-            if direction == 'next':
-                self.current_page_index += 1
-            elif direction == 'prev':
-                self.current_page_index -= 1
-            self.load_samples_paginated('all_samples', reset=False)
-        elif self.last_loaded_query_type == 'my_samples':
-            if direction == 'next':
-                self.current_page_index += 1
-            elif direction == 'prev':
-                self.current_page_index -= 1
-            self.load_samples_paginated('my_samples', reset=False)
-        elif self.last_loaded_query_type == 'current_batch_samples':
-            if direction == 'next':
-                self.current_page_index += 1
-            elif direction == 'prev':
-                self.current_page_index -= 1
-            self.load_samples_for_current_batch(reset=False)
-        else:
-            messagebox.showwarning("Navigation Error", "Cannot navigate pages for the current view type. Please load all samples or my samples first.")
-            logging.warning("Attempted page navigation on unsupported view type.")
-
-
-    def load_samples_paginated(self, query_type, reset=True):
-        """
-        Loads samples from Firestore with cursor-based pagination.
-        query_type: 'all_samples' or 'my_samples'
-        reset: If True, resets to the first page. If False, loads next/previous.
-        """
-        logging.info(f"Loading samples paginated. Query Type: {query_type}, Reset: {reset}")
-        try:
-            samples_ref = db.collection("samples")
-            query = None
-            
-            # If resetting, clear all relevant pagination states
-            if reset:
-                self.current_page_index = 0
-                self.all_samples_page_cursors = []
-                self.my_samples_page_cursors = []
-                self.batch_samples_page_cursors = []
-
-            if query_type == 'all_samples':
-                self.last_loaded_query_type = 'all_samples'
-                
-                query = samples_ref.order_by("creation_date").limit(self.samples_per_page)
-                # Apply cursor for pagination if not on the first page
-                if self.current_page_index > 0 and len(self.all_samples_page_cursors) > self.current_page_index - 1:
-                    start_after_doc = self.all_samples_page_cursors[self.current_page_index - 1]
-                    query = query.start_after(start_after_doc)
-                logging.info(f"Building query for all samples. Current page index: {self.current_page_index}, Cursor count: {len(self.all_samples_page_cursors)}")
-
-            elif query_type == 'my_samples':
-                # Check if user is logged in
-                if not self.app.current_user or not self.app.current_user.get('employee_id'):
-                    messagebox.showwarning("Warning", "User not logged in or employee ID not found.")
-                    self.status_label.config(text="Cannot load my samples: User not identified.")
-                    logging.warning("Attempted to load 'my_samples' without a logged-in user or employee ID.")
-                    # Disable pagination buttons on error
-                    self.prev_sample_page_btn.config(state=tk.DISABLED)
-                    self.next_sample_page_btn.config(state=tk.DISABLED)
-                    self.page_info_label.config(text="Page 0 of 0")
-                    return
-                
-                self.last_loaded_query_type = 'my_samples'
-
-                # Query samples submitted by the current user, ordered by creation date
-                query = samples_ref.where("submitted_by_employee_id", "==", self.app.current_user['employee_id']).order_by("creation_date").limit(self.samples_per_page)
-                # Apply cursor for pagination if not on the first page
-                if self.current_page_index > 0 and len(self.my_samples_page_cursors) > self.current_page_index - 1:
-                    start_after_doc = self.my_samples_page_cursors[self.current_page_index - 1]
-                    query = query.start_after(start_after_doc)
-                logging.info(f"Building query for my samples (user: {self.app.current_user['employee_id']}). Current page index: {self.current_page_index}, Cursor count: {len(self.my_samples_page_cursors)}")
-            else:
-                logging.error(f"Invalid query_type passed to load_samples_paginated: {query_type}")
-                # Disable pagination buttons on invalid query type
-                self.prev_sample_page_btn.config(state=tk.DISABLED)
-                self.next_sample_page_btn.config(state=tk.DISABLED)
-                self.page_info_label.config(text="Page 0 of 0")
-                return
-
-            docs = list(query.stream())
-            logging.info(f"Fetched {len(docs)} documents for page {self.current_page_index + 1}.")
-            samples_list = []
-            for doc in docs:
-                data = doc.to_dict()
-                data['firestore_doc_id'] = doc.id
-                # Convert Firestore Timestamp objects to datetime objects
-                if data.get('maturation_date') and hasattr(data['maturation_date'], 'to_datetime'):
-                    data['maturation_date'] = data['maturation_date'].to_datetime()
-                if data.get('creation_date') and hasattr(data['creation_date'], 'to_datetime'):
-                    data['creation_date'] = data['creation_date'].to_datetime()
-                samples_list.append(data)
-            
-            # Determine total count for page info
-            total_count = 0
-            aggregate_query = db.collection("samples").count()
-            aggregate_query_snapshot = aggregate_query.get()
-            
-            if aggregate_query_snapshot:
-                try:
-                    potential_result_object = aggregate_query_snapshot[0]
-                    if isinstance(potential_result_object, list) and len(potential_result_object) > 0:
-                        potential_result_object = potential_result_object[0]
-                    if hasattr(potential_result_object, 'value'):
-                        total_count = potential_result_object.value
-                    elif isinstance(potential_result_object, dict) and 'count' in potential_result_object:
-                        total_count = potential_result_object.get('count', 0)
-                    else:
-                        logging.error(f"Unexpected structure for aggregate result object (all_samples): {type(potential_result_object)}")
-                        total_count = 0
-                except IndexError:
-                    logging.warning("AggregateQuerySnapshot was empty or index 0 out of bounds (all_samples).")
-                    total_count = 0
-                except Exception as unexpected_e:
-                    logging.error(f"Unexpected error when getting total count for all samples: {unexpected_e}", exc_info=True)
-                    total_count = 0
-            else:
-                total_count = 0
-            logging.info(f"Total count for all samples: {total_count}")
-            
-            # Store cursor for the next page if a full page was fetched
-            if docs and len(docs) == self.samples_per_page:
-                if len(self.all_samples_page_cursors) == self.current_page_index:
-                    self.all_samples_page_cursors.append(docs[-1])
-                else: 
-                    self.all_samples_page_cursors[self.current_page_index] = docs[-1]
-            elif not docs and self.current_page_index > 0:
-                logging.info("Reached end of 'all_samples' data during pagination.")
-
-            elif query_type == 'my_samples':
-                aggregate_query = db.collection("samples").where("submitted_by_employee_id", "==", self.app.current_user['employee_id']).count()
-                aggregate_query_snapshot = aggregate_query.get()
-                
-                if aggregate_query_snapshot:
-                    try:
-                        potential_result_object = aggregate_query_snapshot[0]
-                        if isinstance(potential_result_object, list) and len(potential_result_object) > 0:
-                            potential_result_object = potential_result_object[0]
-                        if hasattr(potential_result_object, 'value'):
-                            total_count = potential_result_object.value
-                        elif isinstance(potential_result_object, dict) and 'count' in potential_result_object:
-                            total_count = potential_result_object.get('count', 0)
-                        else:
-                            logging.error(f"Unexpected structure for aggregate result object (my_samples): {type(potential_result_object)}")
-                            total_count = 0
-                    except IndexError:
-                        logging.warning("AggregateQuerySnapshot was empty or index 0 out of bounds (my_samples).")
-                        total_count = 0
-                    except Exception as unexpected_e:
-                        logging.error(f"Unexpected error when getting total count for my samples: {unexpected_e}", exc_info=True)
-                        total_count = 0
-                else:
-                    total_count = 0
-                logging.info(f"Total count for my samples: {total_count}")
-                
-                # Store cursor for the next page if a full page was fetched
-                if docs and len(docs) == self.samples_per_page:
-                    if len(self.my_samples_page_cursors) == self.current_page_index:
-                        self.my_samples_page_cursors.append(docs[-1])
-                    else:
-                        self.my_samples_page_cursors[self.current_page_index] = docs[-1]
-                elif not docs and self.current_page_index > 0:
-                    logging.info("Reached end of 'my_samples' data during pagination.")
-
-            # Calculate total pages based on fetched total count
-            total_pages = (total_count + self.samples_per_page - 1) // self.samples_per_page if total_count > 0 else 1
-            logging.info(f"Calculated total pages: {total_pages}")
-            
-            self.load_samples_to_treeview(samples_list, is_pagination_load=True, current_page=self.current_page_index + 1, total_pages=total_pages)
-
-        except Exception as e:
-            logging.error(f"Failed to load samples paginated: {e}", exc_info=True)
-            messagebox.showerror("Error", f"Failed to load samples: {e}")
-            self.status_label.config(text="Failed to load samples.")
-            # Ensure buttons are disabled on error
-            self.prev_sample_page_btn.config(state=tk.DISABLED)
-            self.next_sample_page_btn.config(state=tk.DISABLED)
-            self.page_info_label.config(text="Page 0 of 0")
-
-
-    def load_all_batches_to_tree(self):
-        """Loads all batches from Firestore and displays them in the Treeview."""
-        logging.info("Loading all batches to tree.")
-        # Reset sample pagination states when loading batches
-        self.current_page_index = 0
-        self.all_samples_page_cursors = []
-        self.my_samples_page_cursors = []
-        self.batch_samples_page_cursors = []
-
-        self.last_loaded_query_type = 'batches'
-
-        try:
-            batches_ref = db.collection("batches")
-            batches_list = []
-            for batch_doc in batches_ref.stream():
-                data = batch_doc.to_dict()
-                data['firestore_doc_id'] = batch_doc.id
-                # Convert Firestore Timestamp to datetime object
-                if data.get('submission_date') and hasattr(data['submission_date'], 'to_datetime'):
-                    data['submission_date'] = data['submission_date'].to_datetime()
-                batches_list.append(data)
-            self.load_batches_to_treeview(batches_list)
-            logging.info(f"Successfully loaded {len(batches_list)} all batches.")
-        except Exception as e:
-            logging.error(f"Failed to load all batches: {e}", exc_info=True)
-            messagebox.showerror("Error", f"Failed to load all batches: {e}")
-            self.status_label.config(text="Failed to load all batches.")
-
-    def load_my_batches_to_tree(self):
-        """Loads batches created by the current user from Firestore."""
-        logging.info("Loading my batches to tree.")
-        # Reset sample pagination states when loading batches
-        self.current_page_index = 0
-        self.all_samples_page_cursors = []
-        self.my_samples_page_cursors = []
-        self.batch_samples_page_cursors = []
-
-        self.last_loaded_query_type = 'my_batches'
-
-        try:
-            # Check for current user and employee ID before proceeding with the query
-            if not self.app.current_user or not self.app.current_user.get('employee_id'):
-                messagebox.showwarning("Warning", "User not logged in or employee ID not found. Cannot load my batches.")
-                self.status_label.config(text="Cannot load my batches: User not identified.")
-                logging.warning("Attempted to load 'my_batches' without a logged-in user or employee ID.")
-                self.load_batches_to_treeview([])
-                return
-
-            batches_ref = db.collection("batches")
-            batches_list = []
-            # Query batches by the current user's employee ID
-            for batch_doc in batches_ref.where("user_employee_id", "==", self.app.current_user['employee_id']).stream():
-                data = batch_doc.to_dict()
-                data['firestore_doc_id'] = batch_doc.id
-                # Convert Firestore Timestamp to datetime object
-                if data.get('submission_date') and hasattr(data['submission_date'], 'to_datetime'):
-                    data['submission_date'] = data['submission_date'].to_datetime()
-                batches_list.append(data)
-            self.load_batches_to_treeview(batches_list)
-            logging.info(f"Successfully loaded {len(batches_list)} my batches for user {self.app.current_user['employee_id']}.")
-        except Exception as e:
-            logging.error(f"Failed to load my batches: {e}", exc_info=True)
-            messagebox.showerror("Error", f"Failed to load my batches: {e}")
-            self.status_label.config(text="Failed to load my batches.")
-
-    def load_todays_batches_to_tree(self):
-        """Loads batches submitted today from Firestore."""
-        logging.info("Loading today's batches to tree.")
-        # Reset sample pagination states when loading batches
-        self.current_page_index = 0
-        self.all_samples_page_cursors = []
-        self.my_samples_page_cursors = []
-        self.batch_samples_page_cursors = []
-
-        self.last_loaded_query_type = 'todays_batches'
-
-        try:
-            # Define today's start and end timestamps
-            today_start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-            today_end = datetime.now().replace(hour=23, minute=59, second=59, microsecond=999999)
-            logging.info(f"Fetching batches from {today_start} to {today_end}")
-
-            batches_ref = db.collection("batches")
-            batches_list = []
-            # Query batches submitted within today's date range
-            query = batches_ref.where("submission_date", ">=", today_start).where("submission_date", "<=", today_end)
-
-            for batch_doc in query.stream():
-                data = batch_doc.to_dict()
-                data['firestore_doc_id'] = batch_doc.id
-                # Convert Firestore Timestamp to datetime object
-                if data.get('submission_date') and hasattr(data['submission_date'], 'to_datetime'):
-                    data['submission_date'] = data['submission_date'].to_datetime()
-                batches_list.append(data)
-            self.load_batches_to_treeview(batches_list)
-            logging.info(f"Successfully loaded {len(batches_list)} today's batches.")
-        except Exception as e:
-            logging.error(f"Failed to load today's batches: {e}", exc_info=True)
-            messagebox.showerror("Error", f"Failed to load today's batches: {e}")
-            self.status_label.config(text="Failed to load today's batches.")
-
-
-    def open_excel_import_options_form(self):
-        """Opens a Toplevel window to choose how to import Excel data (local, new batch, existing batch)."""
-        logging.info("Opening Excel import options form.")
-        import_options_form = tk.Toplevel(self.root)
-        import_options_form.title("Excel Import Options")
-        import_options_form.geometry("480x400")
-        import_options_form.grab_set()
-        import_options_form.transient(self.root)
-        import_options_form.config(bg='#f0f0f0') # Set background
-
-        frame = ttk.Frame(import_options_form, padding=15, style='TFrame')
-        frame.pack(expand=True, fill="both")
-
-        self.excel_import_choice = tk.StringVar(value="local") # Default to local import
-        
-        # Radio buttons for import choices
-        ttk.Radiobutton(frame, text="Import to Local Table (temporary)",
-                        variable=self.excel_import_choice, value="local", style='TRadiobutton',
-                        command=self._toggle_excel_import_fields).grid(row=0, column=0, columnspan=2, sticky="w", pady=5)
-        
-        ttk.Radiobutton(frame, text="Add to New Batch in Database",
-                        variable=self.excel_import_choice, value="new_batch", style='TRadiobutton',
-                        command=self._toggle_excel_import_fields).grid(row=1, column=0, columnspan=2, sticky="w", pady=5)
-        
-        ttk.Label(frame, text="  New Product Name:", style='TLabel').grid(row=2, column=0, sticky="e", pady=2, padx=5)
-        self.excel_new_batch_product_name_entry = ttk.Entry(frame, width=35, state="disabled", style='TEntry')
-        self.excel_new_batch_product_name_entry.grid(row=2, column=1, sticky="ew", pady=2, padx=5)
-
-        ttk.Label(frame, text="  New Description:", style='TLabel').grid(row=3, column=0, sticky="e", pady=2, padx=5)
-        self.excel_new_batch_description_entry = ttk.Entry(frame, width=35, state="disabled", style='TEntry')
-        self.excel_new_batch_description_entry.grid(row=3, column=1, sticky="ew", pady=2, padx=5)
-
-        ttk.Radiobutton(frame, text="Add to Existing Batch in Database",
-                        variable=self.excel_import_choice, value="existing_batch", style='TRadiobutton',
-                        command=self._toggle_excel_import_fields).grid(row=4, column=0, columnspan=2, sticky="w", pady=5)
-        
-        ttk.Label(frame, text="  Existing Batch ID:", style='TLabel').grid(row=5, column=0, sticky="e", pady=2, padx=5)
-        self.excel_existing_batch_combobox = ttk.Combobox(frame, state="disabled", width=32, style='TCombobox')
-        self.excel_existing_batch_combobox.grid(row=5, column=1, sticky="ew", pady=2, padx=5)
-        self._load_existing_batches_into_combobox_for_excel_import(self.excel_existing_batch_combobox)
-
-
-        ttk.Button(frame, text="Select Excel File and Proceed", 
-                   command=lambda: self._handle_excel_import_choice(import_options_form), style='Primary.TButton').grid(row=6, column=0, columnspan=2, pady=20)
-        
-        self._toggle_excel_import_fields() # Set initial state of fields based on default radio button
-
-        import_options_form.protocol("WM_DELETE_WINDOW", import_options_form.destroy)
-        logging.info("Excel import options form opened.")
-
-    def _toggle_excel_import_fields(self):
-        """Toggles the state of Excel import fields based on selected radio button."""
-        choice = self.excel_import_choice.get()
-        logging.debug(f"Toggling Excel import fields. Current choice: {choice}")
-
-        # Reset and disable all fields first
-        self.excel_new_batch_product_name_entry.config(state="disabled")
-        self.excel_new_batch_product_name_entry.delete(0, tk.END)
-        self.excel_new_batch_description_entry.config(state="disabled")
-        self.excel_new_batch_description_entry.delete(0, tk.END)
-        self.excel_existing_batch_combobox.config(state="disabled")
-        self.excel_existing_batch_combobox.set('')
-        self.excel_existing_batch_combobox['values'] = [] # Clear values when disabling
-
-        # Enable fields based on selected choice
-        if choice == "new_batch":
-            self.excel_new_batch_product_name_entry.config(state="normal")
-            self.excel_new_batch_description_entry.config(state="normal")
-        elif choice == "existing_batch":
-            self.excel_existing_batch_combobox.config(state="readonly")
-            self._load_existing_batches_into_combobox_for_excel_import(self.excel_existing_batch_combobox) # Reload values for existing batches
-        logging.debug("Excel import fields toggled.")
-
-    def _load_existing_batches_into_combobox_for_excel_import(self, target_combobox):
-        """Loads batch IDs created by the current user from Firestore into a specific combobox for Excel import."""
-        logging.info("Loading existing batches into combobox for Excel import.")
-        # Ensure user is logged in before querying for user-specific batches
-        if not self.app.current_user or not self.app.current_user.get('employee_id'):
-            logging.warning("Cannot load existing batches: User not logged in or employee ID not found.")
-            target_combobox['values'] = []
-            return
-
-        batches_ref = db.collection("batches")
-        try:
-            batches = batches_ref.where("user_employee_id", "==", self.app.current_user['employee_id']).stream()
-            batch_ids = [batch.id for batch in batches]
-            target_combobox['values'] = batch_ids
-            logging.info(f"Loaded {len(batch_ids)} existing batches for Excel import combobox.")
-        except Exception as e:
-            logging.error(f"Failed to load existing batches for Excel import combobox: {e}", exc_info=True)
-            messagebox.showerror("Error", f"Failed to load existing batches for Excel import: {e}")
-            target_combobox['values'] = []
-
-    def _handle_excel_import_choice(self, form_window):
-        """Handles the user's choice for Excel import, reads the file, and proceeds based on selected option."""
-        logging.info("Handling Excel import choice.")
-        filetypes = (("Excel files", "*.xlsx *.xls"), ("All files", "*.*"))
-        filename = filedialog.askopenfilename(title="Open Excel file", filetypes=filetypes)
-        
-        if not filename:
-            logging.info("Excel file selection cancelled.")
-            return
-
-        df = None
-        try:
-            df = pd.read_excel(filename)
-            logging.info(f"Successfully read Excel file: {filename}")
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to read Excel file:\n{e}")
-            logging.error(f"Failed to read Excel file {filename}: {e}", exc_info=True)
-            return
-
-        # Sanitize column names for robust matching
-        df.columns = df.columns.str.strip().str.lower()
-
-        # Map potential variations of column names to standardized ones
-        column_name_mapping = {
-            'sampleid': 'sample_id',
-            'owner': 'owner',
-            'maturationdate': 'maturation_date',
-            'status': 'status',
-            'batchid': 'batch_id',
-            'creationdate': 'creation_date',
-            'submitted_by_employee_id': 'submitted_by_employee_id',
-            'ubmitted_by_employee_ic': 'submitted_by_employee_id',
-            'd_by_emp': 'submitted_by_employee_id',
-            'batch id': 'batch_id',
-            'sample id': 'sample_id',
-            'maturation date': 'maturation_date',
-            'creation date': 'creation_date',
-            'submitted by emp id': 'submitted_by_employee_id',
-        }
-        df.rename(columns=column_name_mapping, inplace=True)
-
-        # Ensure essential columns are present, adding defaults if missing
-        if 'sample_id' not in df.columns:
-            messagebox.showwarning("Missing Column", "Excel file must contain a 'SampleID' column (or 'sample_id').")
-            logging.warning("Excel file missing 'sample_id' column.")
-            return
-        if 'owner' not in df.columns:
-            messagebox.showwarning("Missing Column", "Excel file should ideally contain an 'Owner' column. Defaulting to current user.")
-            df['owner'] = self.app.current_user.get('username', 'N/A')
-        if 'maturation_date' not in df.columns:
-            messagebox.showwarning("Missing Column", "Excel file should ideally contain a 'MaturationDate' column. Defaulting to None.")
-            df['maturation_date'] = None
-        if 'status' not in df.columns:
-            df['status'] = SAMPLE_STATUS_OPTIONS[0]
-            logging.warning("Excel file missing 'status' column. Defaulting to first status option.")
-        if 'creation_date' not in df.columns:
-             df['creation_date'] = datetime.now()
-        if 'submitted_by_employee_id' not in df.columns:
-             df['submitted_by_employee_id'] = self.app.current_user.get('employee_id')
-        
-        # Convert date columns to datetime objects, coercing errors
-        for col in ['maturation_date', 'creation_date']:
-            if col in df.columns:
-                df[col] = pd.to_datetime(df[col], errors='coerce')
-                df[col] = df[col].apply(lambda x: x.to_pydatetime() if pd.notna(x) else None)
-        
-        choice = self.excel_import_choice.get()
-        if choice == "local":
-            self._import_excel_locally(df, filename, form_window)
-        elif choice == "new_batch":
-            product_name = self.excel_new_batch_product_name_entry.get().strip()
-            description = self.excel_new_batch_description_entry.get().strip()
-            self._add_excel_to_new_batch_db(df, product_name, description, form_window)
-        elif choice == "existing_batch":
-            batch_id = self.excel_existing_batch_combobox.get().strip()
-            self._add_excel_to_existing_batch_db(df, batch_id, form_window)
-        
-    def _import_excel_locally(self, df, filename, form_window):
-        """Imports data from a DataFrame into the application's local DataFrame and displays it."""
-        logging.info("Importing Excel data locally.")
-        self.app.data = df
-        self.app.file_path = filename
-        self.load_samples_to_treeview(self.app.data.to_dict('records'), is_pagination_load=True)
-        self.status_label.config(text=f"Loaded data from {os.path.basename(filename)} (Local)")
-        self.excel_imported = True
-        self.current_selected_batch_id = None
-        self.add_single_sample_button.config(state=tk.DISABLED)
-        # Disable pagination buttons for local import as it's not paginated from DB
-        self.prev_sample_page_btn.config(state=tk.DISABLED)
-        self.next_sample_page_btn.config(state=tk.DISABLED)
-        self.page_info_label.config(text="Page 0 of 0")
-        messagebox.showinfo("Success", f"Excel data loaded locally from {os.path.basename(filename)}.")
-        form_window.destroy()
-        logging.info("Excel data imported locally.")
-
-    def _add_excel_to_new_batch_db(self, df, product_name, description, form_window):
-        """Adds Excel data to a new batch in Firestore."""
-        logging.info("Adding Excel data to a new batch in DB.")
-        if not product_name:
-            messagebox.showerror("Error", "Product Name is required for a new batch.")
-            logging.warning("Product Name missing for new batch from Excel.")
-            return
-
-        # Generate a unique batch ID
-        new_batch_id = f"batch_{self.app.current_user['employee_id']}_{datetime.now().strftime('%Y%m%d%H%M%S')}"
-        if db.collection("batches").document(new_batch_id).get().exists:
-            messagebox.showerror("Error", "Generated Batch ID already exists. Please try again.")
-            logging.error("Generated batch ID already exists.")
-            return
-
-        new_batch_data = {
-            "batch_id": new_batch_id,
-            "product_name": product_name,
-            "description": description,
-            "submission_date": datetime.now(),
-            "user_employee_id": self.app.current_user['employee_id'],
-            "user_username": self.app.current_user['username'],
-            "user_email": self.app.current_user['email'],
-            "status": "pending approval",
-            "number_of_samples": 0
-        }
-
-        try:
-            batch_write = db.batch()
-            batch_doc_ref = db.collection("batches").document(new_batch_id)
-            batch_write.set(batch_doc_ref, new_batch_data)
-
-            samples_added_count = 0
-            for index, row in df.iterrows():
-                # Check for duplicate sample_id for each row before adding
-                sample_id = row['sample_id']
-                existing_samples_with_display_id = db.collection("samples").where("sample_id", "==", sample_id).limit(1).get()
-                if list(existing_samples_with_display_id):
-                    logging.warning(f"Skipping duplicate sample ID '{sample_id}' from Excel import.")
-                    continue
-
-                sample_data = {
-                    "sample_id": row['sample_id'],
-                    "owner": row['owner'],
-                    "maturation_date": row['maturation_date'],
-                    "status": row['status'],
-                    "batch_id": new_batch_id,
-                    "creation_date": row['creation_date'],
-                    "submitted_by_employee_id": row['submitted_by_employee_id'],
-                    "last_updated_by_user_id": self.app.current_user.get('employee_id'), # New field
-                    "last_updated_timestamp": datetime.now() # New field
-                }
-                sample_doc_ref = db.collection("samples").document()
-                batch_write.set(sample_doc_ref, sample_data)
-                samples_added_count += 1
-            
-            # Increment the number of samples in the batch document
-            batch_write.update(batch_doc_ref, {"number_of_samples": firebase_admin.firestore.Increment(samples_added_count)})
-
-            batch_write.commit()
-            messagebox.showinfo("Success", f"Excel data successfully added to new batch '{new_batch_id}' with {samples_added_count} samples.")
-            logging.info(f"Excel data added to new batch '{new_batch_id}' with {samples_added_count} samples.")
-
-            self.current_selected_batch_id = new_batch_id
-            self.load_samples_for_current_batch(reset=True)
-            if hasattr(self.app, 'admin_logic'):
-                self.app.admin_logic.load_batches()
-            form_window.destroy()
-
-        except Exception as e:
-            logging.error(f"Failed to add Excel data to new batch: {e}", exc_info=True)
-            messagebox.showerror("Error", f"Failed to add Excel data to new batch:\n{e}")
-
-    def _add_excel_to_existing_batch_db(self, df, batch_id, form_window):
-        """Adds Excel data to an existing batch in Firestore."""
-        logging.info(f"Adding Excel data to existing batch '{batch_id}' in DB.")
-        if not batch_id:
-            messagebox.showerror("Error", "Please select an existing Batch ID.")
-            logging.warning("No batch ID selected for existing batch import.")
-            return
-
-        batch_doc_ref = db.collection("batches").document(batch_id)
-        existing_batch_doc = batch_doc_ref.get()
-
-        if not existing_batch_doc.exists:
-            messagebox.showerror("Error", f"Batch ID '{batch_id}' does not exist.")
-            logging.error(f"Selected existing batch ID '{batch_id}' not found.")
-            return
-
-        try:
-            batch_write = db.batch()
-            samples_added_count = 0
-            for index, row in df.iterrows():
-                # Check for duplicate sample_id before adding to existing batch
-                sample_id = row['sample_id']
-                existing_samples_with_display_id = db.collection("samples").where("sample_id", "==", sample_id).limit(1).get()
-                if list(existing_samples_with_display_id):
-                    logging.warning(f"Skipping duplicate sample ID '{sample_id}' from Excel import.")
-                    continue
-
-                sample_data = {
-                    "sample_id": row['sample_id'],
-                    "owner": row['owner'],
-                    "maturation_date": row['maturation_date'],
-                    "status": row['status'],
-                    "batch_id": batch_id,
-                    "creation_date": row['creation_date'],
-                    "submitted_by_employee_id": row['submitted_by_employee_id'],
-                    "last_updated_by_user_id": self.app.current_user.get('employee_id'), # New field
-                    "last_updated_timestamp": datetime.now() # New field
-                }
-                sample_doc_ref = db.collection("samples").document()
-                batch_write.set(sample_doc_ref, sample_data)
-                samples_added_count += 1
-
-            # Increment the number of samples in the batch document
-            batch_write.update(batch_doc_ref, {"number_of_samples": firebase_admin.firestore.Increment(samples_added_count)})
-
-            batch_write.commit()
-            messagebox.showinfo("Success", f"Excel data successfully added to existing batch '{batch_id}' with {samples_added_count} new samples.")
-            logging.info(f"Excel data added to existing batch '{batch_id}' with {samples_added_count} new samples.")
-
-            self.current_selected_batch_id = batch_id
-            self.load_samples_for_current_batch(reset=True)
-            if hasattr(self.app, 'admin_logic'):
-                self.app.admin_logic.load_batches()
-            form_window.destroy()
-
-        except Exception as e:
-            logging.error(f"Failed to add Excel data to existing batch: {e}", exc_info=True)
-            messagebox.showerror("Error", f"Failed to add Excel data to existing batch:\n{e}")
-
-    def export_excel(self):
-        """Exports current data in the local DataFrame to an Excel file."""
-        logging.info("Attempting to export Excel file.")
-        if self.app.data.empty:
-            messagebox.showwarning("Warning", "No data to export.")
-            logging.warning("No data found to export to Excel.")
-            return
-        
-        filetypes = (("Excel files", "*.xlsx"),)
-        filename = filedialog.asksaveasfilename(defaultextension=".xlsx", filetypes=filetypes)
-        
-        if filename:
-            try:
-                df_to_prepare = self.app.data.copy()
-
-                # Define the desired standardized Excel output header names
-                expected_import_headers = {
-                    'batch_id',
-                    'submitted_by_employee_id',
-                    'status',
-                    'sample_id',
-                    'owner',
-                    'maturation_date',
-                    'creation_date',
-                    'last_updated_by_user_id', # Include new field for export if desired
-                    'last_updated_timestamp' # Include new field for export if desired
-                }
-
-                column_rename_map = {}
-                for col in df_to_prepare.columns:
-                    # Skip 'DocID' column from export
-                    if 'docid' in col.lower():
-                        continue
-
-                    # Explicitly map Treeview/internal names to desired export format
-                    if col == 'BatchID':
-                        column_rename_map[col] = 'batch_id'
-                    elif col == 'DisplaySampleID':
-                        column_rename_map[col] = 'sample_id'
-                    elif col == 'Owner':
-                        column_rename_map[col] = 'owner'
-                    elif col == 'MaturationDate':
-                        column_rename_map[col] = 'maturation_date'
-                    elif col == 'Status':
-                        column_rename_map[col] = 'status'
-                    elif col == 'CreationDate':
-                        column_rename_map[col] = 'creation_date'
-                    elif col == 'submitted_by_employee_id':
-                        column_rename_map[col] = 'submitted_by_employee_id'
-                    elif col == 'd_by_emp': # Handle typo from import side
-                         column_rename_map[col] = 'submitted_by_employee_id'
-                    elif col == 'last_updated_by_user_id': # Map the new internal field
-                        column_rename_map[col] = 'last_updated_by_user_id'
-                    elif col == 'last_updated_timestamp': # Map the new internal field
-                        column_rename_map[col] = 'last_updated_timestamp'
-                    elif col.lower().replace(' ', '_') in expected_import_headers:
-                         column_rename_map[col] = col.lower().replace(' ', '_')
-                    else:
-                        logging.warning(f"Column '{col}' not explicitly mapped for export. Defaulting to lowercase_with_underscores.")
-                        column_rename_map[col] = col.lower().replace(' ', '_')
-
-                df_to_prepare.rename(columns=column_rename_map, inplace=True, errors='ignore')
-
-                # Define the final desired order of columns in the Excel file
-                final_excel_output_order = [
-                    'batch_id',
-                    'submitted_by_employee_id',
-                    'status',
-                    'sample_id',
-                    'owner',
-                    'maturation_date',
-                    'creation_date',
-                    'last_updated_by_user_id', # Add to final output order
-                    'last_updated_timestamp' # Add to final output order
-                ]
-                
-                # Reindex the DataFrame to select only the desired columns and put them in the correct order.
-                df_for_export_final = df_to_prepare.reindex(columns=final_excel_output_order)
-
-                # Ensure datetime objects are timezone-naive before export
-                for col in df_for_export_final.columns:
-                    if pd.api.types.is_datetime64_any_dtype(df_for_export_final[col]):
-                        if df_for_export_final[col].dt.tz is not None:
-                            df_for_export_final[col] = df_for_export_final[col].dt.tz_localize(None)
-
-                df_for_export_final.to_excel(filename, index=False)
-                self.status_label.config(text=f"Data exported to {os.path.basename(filename)}")
-                messagebox.showinfo("Export Successful", f"Data successfully exported to {os.path.basename(filename)}.") # Success message
-                logging.info(f"Successfully exported data to {filename}.")
-            except Exception as e:
-                logging.error(f"Failed to export Excel file: {e}", exc_info=True)
-                messagebox.showerror("Error", f"Failed to export Excel file:\n{e}")
-
-    def refresh_tree(self):
-        """Refreshes the Treeview widget with the current DataFrame data or reloads from DB based on last query."""
-        logging.info(f"Refreshing tree. Last loaded query type: {self.last_loaded_query_type}")
-        if self.last_loaded_query_type in ['all_samples', 'my_samples']:
-            self.load_samples_paginated(self.last_loaded_query_type, reset=False)
-        elif self.last_loaded_query_type == 'current_batch_samples' and self.current_selected_batch_id:
-            self.load_samples_for_current_batch(reset=False)
-        elif self.last_loaded_query_type in ['filtered_samples', 'excel_import']:
-            # For filtered or excel_import, reload locally as they are not paginated from DB directly
-            self.load_samples_to_treeview(self.app.data.to_dict('records'))
-        elif self.last_loaded_query_type in ['batches', 'my_batches', 'todays_batches']:
-            # For batches, reload from DB
-            if self.last_loaded_query_type == 'batches':
-                self.load_all_batches_to_tree()
-            elif self.last_loaded_query_type == 'my_batches':
-                self.load_my_batches_to_tree()
-            elif self.last_loaded_query_type == 'todays_batches':
-                self.load_todays_batches_to_tree()
-        else:
-            # Fallback to loading all samples if no specific type is known
-            self.load_samples_paginated(query_type='all_samples', reset=True)
-        self.status_label.config(text=f"Treeview refreshed. Displaying {len(self.app.data)} items.")
-        logging.info(f"Tree refreshed. Displaying {len(self.app.data)} items.")
-
-
-    def generate_barcode(self):
-        """Generates a barcode for the selected sample ID (user-facing ID)."""
-        logging.info("Attempting to generate barcode.")
-        selected = self.tree.selection()
-        if not selected:
-            messagebox.showinfo("Info", "Please select a sample from the list.")
-            logging.warning("No sample selected for barcode generation.")
-            return
-
-        item = self.tree.item(selected[0])
-        # Ensure the selected item is a sample, not a batch
-        if self.last_loaded_query_type in ['batches', 'my_batches', 'todays_batches']:
-            messagebox.showwarning("Warning", "Please select a sample to generate a barcode (currently displaying batches).")
-            logging.warning("Selected item is a batch, not a sample. Barcode generation aborted.")
-            return
-
-        sample_id_for_barcode = str(item['values'][1]) if len(item['values']) > 1 else ""
-
-        if not sample_id_for_barcode:
-            messagebox.showerror("Error", "Selected sample has no valid Sample ID for barcode generation.")
-            logging.error("Selected sample has no valid Sample ID for barcode generation.")
-            return
-
-        try:
-            # Get Code128 barcode class and generate barcode
-            EAN = barcode.get_barcode_class('code128')
-            ean = EAN(sample_id_for_barcode, writer=ImageWriter())
-            # Prompt user for save location
-            save_path = filedialog.asksaveasfilename(defaultextension=".png",
-                                                     filetypes=[("PNG files", "*.png")],
-                                                     initialfile=f"{sample_id_for_barcode}_barcode.png")
-            if save_path:
-                ean.save(save_path)
-                messagebox.showinfo("Success", f"Barcode saved at {save_path}")
-                logging.info(f"Barcode saved at {save_path} for sample ID: {sample_id_for_barcode}")
-        except Exception as e:
-            logging.error(f"Barcode generation failed for {sample_id_for_barcode}: {e}", exc_info=True)
-            messagebox.showerror("Error", f"Barcode generation failed:\n{e}")
-
-    def check_notifications(self):
-        """Checks for samples maturing within the defined notification period."""
-        logging.info("Checking for notifications.")
-        if self.app.data.empty:
-            messagebox.showwarning("Warning", "No data loaded.")
-            logging.warning("No data loaded for notification check.")
-            return
-
-        # Ensure we are checking samples, not batches
-        if self.last_loaded_query_type in ['batches', 'my_batches', 'todays_batches']:
-             messagebox.showwarning("Warning", "Notifications are for samples only. Please load samples first.")
-             logging.warning("Notification check attempted when batches are displayed.")
-             return
-        
-        # Additional check if 'MaturationDate' column exists
-        if 'MaturationDate' not in self.app.data.columns:
-            messagebox.showwarning("Warning", "Maturation date information is not available in the current data set for notifications.")
-            logging.warning("Notification check attempted but 'MaturationDate' column is missing.")
-            return
-
-        # Make 'today' timezone-naive for consistent comparison
-        today = datetime.now().replace(tzinfo=None) 
-
-        notifications = []
-
-        for _, row in self.app.data.iterrows():
-            mat_date = row.get('MaturationDate')
-            if pd.isna(mat_date) or mat_date is None:
-                continue
-
-            mat_date_dt = None
-            if isinstance(mat_date, pd.Timestamp):
-                mat_date_dt = mat_date.to_pydatetime()
-            elif isinstance(mat_date, datetime):
-                mat_date_dt = mat_date
-            else:
-                try:
-                    # Attempt to convert Firestore Timestamp or string to datetime
-                    if hasattr(mat_date, 'to_datetime'):
-                        mat_date_dt = mat_date.to_datetime()
-                    else:
-                        mat_date_dt = datetime.strptime(str(mat_date).split(' ')[0], "%Y-%m-%d")
-                except (ValueError, TypeError):
-                    logging.warning(f"Could not parse maturation date for sample: {row.get('DisplaySampleID', 'N/A')}. Value: {mat_date}")
-                    continue
-
-            # Ensure mat_date_dt is also timezone-naive before comparison
-            if mat_date_dt and mat_date_dt.tzinfo is not None:
-                mat_date_dt = mat_date_dt.replace(tzinfo=None)
-
-            if mat_date_dt:
-                delta = mat_date_dt - today
-                if 0 <= delta.days <= NOTIFICATION_DAYS_BEFORE:
-                    notifications.append(f"Sample {row.get('DisplaySampleID', 'N/A')} owned by {row.get('Owner', 'N/A')} matures on {mat_date_dt.strftime('%Y-%m-%d')}.")
-
-        if notifications:
-            messagebox.showinfo("Notifications", "\n".join(notifications))
-            logging.info(f"Found {len(notifications)} notifications.")
-        else:
-            messagebox.showinfo("Notifications", f"No samples maturing within {NOTIFICATION_DAYS_BEFORE} days.")
-            logging.info(f"No samples maturing within {NOTIFICATION_DAYS_BEFORE} days.")
-
-
-    def open_batch_selection_screen(self):
-        """Opens a Toplevel window for selecting an existing batch or creating a new one."""
-        logging.info("Opening batch selection screen.")
-        batch_selection_form = tk.Toplevel(self.root)
-        batch_selection_form.title("Select or Create Batch")
-        batch_selection_form.geometry("450x320")
-        batch_selection_form.grab_set()
-        batch_selection_form.transient(self.root)
-        batch_selection_form.config(bg='#f0f0f0') # Set background
-
-        frame = ttk.Frame(batch_selection_form, padding=10, style='TFrame')
-        frame.pack(expand=True, fill="both")
-
-        self.batch_choice = tk.StringVar(value="existing")
-        radio_existing = ttk.Radiobutton(frame, text="Select Existing Batch", variable=self.batch_choice, value="existing", style='TRadiobutton')
-        radio_new = ttk.Radiobutton(frame, text="Create New Batch", variable=self.batch_choice, value="new", style='TRadiobutton')
-
-        radio_existing.grid(row=0, column=0, columnspan=2, sticky="w", pady=5)
-        radio_new.grid(row=1, column=0, columnspan=2, sticky="w", pady=5)
-
-        ttk.Label(frame, text="Existing Batch ID:", style='TLabel').grid(row=2, column=0, sticky="e", pady=5, padx=5)
-        self.existing_batch_combobox = ttk.Combobox(frame, state="readonly", width=30, style='TCombobox')
-        self.existing_batch_combobox.grid(row=2, column=1, sticky="ew", pady=5, padx=5)
-        self._load_existing_batches_into_combobox()
-
-        ttk.Label(frame, text="New Product Name:", style='TLabel').grid(row=3, column=0, sticky="e", pady=5, padx=5)
-        self.new_batch_product_name = ttk.Entry(frame, width=30, state="disabled", style='TEntry')
-        self.new_batch_product_name.grid(row=3, column=1, sticky="ew", pady=5, padx=5)
-
-        ttk.Label(frame, text="New Description:", style='TLabel').grid(row=4, column=0, sticky="e", pady=5, padx=5)
-        self.new_batch_description = ttk.Entry(frame, width=30, state="disabled", style='TEntry')
-        self.new_batch_description.grid(row=4, column=1, sticky="ew", pady=5, padx=5)
-
-        # Configure commands for radio buttons to toggle fields
-        radio_existing.config(command=lambda: self._toggle_batch_fields_on_selection(True))
-        radio_new.config(command=lambda: self._toggle_batch_fields_on_selection(False))
-
-        # Set initial state of fields based on default radio button
-        self._toggle_batch_fields_on_selection(True)
-
-        ttk.Button(frame, text="Confirm Batch Selection", command=lambda: self._handle_batch_selection_confirmation(batch_selection_form), style='Primary.TButton').grid(row=5, column=0, columnspan=2, pady=20)
-        batch_selection_form.protocol("WM_DELETE_WINDOW", batch_selection_form.destroy)
-        logging.info("Batch selection screen opened.")
-
-    def _toggle_batch_fields_on_selection(self, is_existing_batch_selected):
-        """Internal helper to toggle the visibility/state of new/existing batch fields."""
-        logging.debug(f"Toggling batch fields. Is existing batch selected: {is_existing_batch_selected}")
-        try:
-            if self.existing_batch_combobox:
-                self.existing_batch_combobox.config(state="readonly" if is_existing_batch_selected else "disabled")
-                if not is_existing_batch_selected:
-                    self.existing_batch_combobox.set('') # Clear selection when disabled
-        except Exception as e:
-            logging.warning(f"Error configuring existing_batch_combobox: {e}")
-
-        try:
-            if self.new_batch_product_name:
-                self.new_batch_product_name.config(state="normal" if not is_existing_batch_selected else "disabled")
-                if is_existing_batch_selected:
-                    self.new_batch_product_name.delete(0, tk.END)
-        except Exception as e:
-            logging.warning(f"Error configuring new_batch_product_name: {e}")
-
-        try:
-            if self.new_batch_description:
-                self.new_batch_description.config(state="normal" if not is_existing_batch_selected else "disabled")
-                if is_existing_batch_selected:
-                    self.new_batch_description.delete(0, tk.END)
-        except Exception as e:
-            logging.warning(f"Error configuring new_batch_description: {e}")
-        logging.debug("Batch fields toggled.")
-
-
-    def _load_existing_batches_into_combobox(self):
-        """Loads batch IDs created by the current user from Firestore into the combobox."""
-        logging.info("Loading existing batches into combobox.")
-        # Ensure user is logged in before querying for user-specific batches
-        if not self.app.current_user or not self.app.current_user.get('employee_id'):
-            logging.warning("Cannot load existing batches: User not logged in or employee ID not found.")
-            self.existing_batch_combobox['values'] = []
-            return
-
-        batches_ref = db.collection("batches")
-        try:
-            batches = batches_ref.where("user_employee_id", "==", self.app.current_user['employee_id']).stream()
-            batch_ids = [batch.id for batch in batches]
-            self.existing_batch_combobox['values'] = batch_ids
-            logging.info(f"Loaded {len(batch_ids)} existing batches for combobox.")
-        except Exception as e:
-            logging.error(f"Failed to load existing batches into combobox: {e}", exc_info=True)
-            messagebox.showerror("Error", f"Failed to load existing batches: {e}")
-            self.existing_batch_combobox['values'] = []
-
-    def _handle_batch_selection_confirmation(self, form_window):
-        """Handles the confirmation of batch selection or creation."""
-        logging.info("Handling batch selection confirmation.")
-        selected_batch_id = None
-
-        if self.batch_choice.get() == "new":
-            product_name = self.new_batch_product_name.get().strip()
-            description = self.new_batch_description.get().strip()
-            creation_date_dt = datetime.now()
-
-            if not product_name:
-                messagebox.showerror("Error", "New Batch Product Name is required.")
-                logging.warning("New batch product name is missing.")
-                return
-
-            # Generate a unique batch ID
-            selected_batch_id = f"batch_{self.app.current_user['employee_id']}_{datetime.now().strftime('%Y%m%d%H%M%S')}"
-            
-            # Check if generated ID already exists (collision is unlikely with timestamp but good practice)
-            if db.collection("batches").document(selected_batch_id).get().exists:
-                messagebox.showerror("Error", "Generated Batch ID already exists. Please try again.")
-                logging.error(f"Generated batch ID '{selected_batch_id}' already exists. Retrying generation might be needed.")
-                return
-
-            new_batch_data = {
-                "batch_id": selected_batch_id,
-                "product_name": product_name,
-                "description": description,
-                "submission_date": creation_date_dt,
-                "user_employee_id": self.app.current_user['employee_id'],
-                "user_username": self.app.current_user['username'],
-                "user_email": self.app.current_user['email'],
-                "status": "pending approval",
-                "number_of_samples": 0
-            }
-            try:
-                # Set the new batch document in Firestore
-                db.collection("batches").document(selected_batch_id).set(new_batch_data)
-                messagebox.showinfo("Success", f"New batch '{selected_batch_id}' created successfully.")
-                self.current_selected_batch_id = selected_batch_id
-                # Load samples for the new batch
-                self.load_samples_for_current_batch(reset=True)
-                # If admin_logic is available, update its batches
-                if hasattr(self.app, 'admin_logic'):
-                    self.app.admin_logic.load_batches()
-                form_window.destroy()
-                logging.info(f"New batch '{selected_batch_id}' created and samples loaded.")
-            except Exception as e:
-                logging.error(f"Failed to create new batch: {e}", exc_info=True)
-                messagebox.showerror("Error", f"Failed to create new batch: {e}")
-                return
-
-        else: # Existing batch selected
-            selected_batch_id = self.existing_batch_combobox.get().strip()
-            if not selected_batch_id:
-                messagebox.showerror("Error", "Please select an existing batch.")
-                logging.warning("No existing batch selected.")
-                return
-
-            try:
-                existing_batch_doc = db.collection("batches").document(selected_batch_id).get()
-                if not existing_batch_doc.exists:
-                    messagebox.showerror("Error", "Selected batch does not exist in the database.")
-                    logging.error(f"Selected batch ID '{selected_batch_id}' not found in database.")
-                    # Refresh current view if sample not found
-                    if self.last_loaded_query_type in ['all_samples', 'my_samples']:
-                        self.load_samples_paginated(self.last_loaded_query_type, reset=False)
-                    elif self.last_loaded_query_type == 'current_batch_samples' and self.current_selected_batch_id:
-                        self.load_samples_for_current_batch(reset=False)
-                    else:
-                        self.load_samples_paginated(query_type='all_samples', reset=True)
-                    return # Exit the function here as the batch was not found.
-
-                self.current_selected_batch_id = selected_batch_id
-                # Load samples for the existing batch
-                self.load_samples_for_current_batch(reset=True)
-                messagebox.showinfo("Batch Selected", f"Samples for batch '{selected_batch_id}' are now displayed.")
-                form_window.destroy()
-                logging.info(f"Existing batch '{selected_batch_id}' selected and samples loaded.")
-            except Exception as e:
-                logging.error(f"Failed to handle existing batch selection: {e}", exc_info=True)
-                messagebox.showerror("Error", f"Failed to retrieve batch details: {e}")
-
-    def load_samples_for_current_batch(self, reset=True):
-        """
-        Loads samples for the currently selected batch ID with pagination and updates the Treeview.
-        reset: If True, resets to the first page. If False, loads next/previous page.
-        """
-        logging.info(f"Loading samples for current batch: {self.current_selected_batch_id}, Reset: {reset}")
-        if not self.current_selected_batch_id:
-            self.status_label.config(text="No batch selected to display samples.")
-            logging.warning("load_samples_for_current_batch called with no current_selected_batch_id.")
-            # Disable pagination buttons as there's no batch data to paginate
-            self.prev_sample_page_btn.config(state=tk.DISABLED)
-            self.next_sample_page_btn.config(state=tk.DISABLED)
-            self.page_info_label.config(text="Page 0 of 0")
-            return
-
-        # Reset sample pagination state for this specific view if reset is True
-        if reset:
-            self.current_page_index = 0
-            self.all_samples_page_cursors = []
-            self.my_samples_page_cursors = []
-            self.batch_samples_page_cursors = []
-        
-        self.last_loaded_query_type = 'current_batch_samples'
-
-        self.tree.delete(*self.tree.get_children())
-        samples_list = []
-        try:
-            samples_ref = db.collection("samples")
-            # Build query for the specific batch, ordered by creation_date
-            query = samples_ref.where("batch_id", "==", self.current_selected_batch_id).order_by("creation_date").limit(self.samples_per_page)
-
-            # Apply cursor for pagination if not on the first page
-            if self.current_page_index > 0 and len(self.batch_samples_page_cursors) > self.current_page_index - 1:
-                start_after_doc = self.batch_samples_page_cursors[self.current_page_index - 1]
-                query = query.start_after(start_after_doc)
-            logging.info(f"Building query for batch samples ({self.current_selected_batch_id}). Current page index: {self.current_page_index}, Cursor count: {len(self.batch_samples_page_cursors)}")
-
-            docs = list(query.stream())
-            logging.info(f"Fetched {len(docs)} documents for page {self.current_page_index + 1} of batch {self.current_selected_batch_id}.")
-
-            for sample in docs:
-                data = sample.to_dict()
-                data['firestore_doc_id'] = sample.id
-                # Convert Firestore Timestamp to datetime objects
-                if data.get('maturation_date') and hasattr(data['maturation_date'], 'to_datetime'):
-                    data['maturation_date'] = data['maturation_date'].to_datetime()
-                if data.get('creation_date') and hasattr(data['creation_date'], 'to_datetime'):
-                    data['creation_date'] = data['creation_date'].to_datetime()
-                samples_list.append(data)
-
-            # Determine total count for page info for this specific batch
-            total_count = 0
-            aggregate_query = db.collection("samples").where("batch_id", "==", self.current_selected_batch_id).count()
-            aggregate_query_snapshot = aggregate_query.get()
-            
-            if aggregate_query_snapshot:
-                try:
-                    potential_result_object = aggregate_query_snapshot[0]
-                    if isinstance(potential_result_object, list) and len(potential_result_object) > 0:
-                        potential_result_object = potential_result_object[0]
-                    if hasattr(potential_result_object, 'value'):
-                        total_count = potential_result_object.value
-                    elif isinstance(potential_result_object, dict) and 'count' in potential_result_object:
-                        total_count = potential_result_object.get('count', 0)
-                    else:
-                        logging.error(f"Unexpected structure for aggregate result object (batch samples): {type(potential_result_object)}")
-                        total_count = 0
-                except IndexError:
-                    logging.warning("AggregateQuerySnapshot was empty or index 0 out of bounds (batch samples).")
-                    total_count = 0
-                except Exception as unexpected_e:
-                    logging.error(f"Unexpected error when getting total count for batch samples: {unexpected_e}", exc_info=True)
-                    total_count = 0
-            else:
-                total_count = 0
-            logging.info(f"Total count for batch {self.current_selected_batch_id}: {total_count}")
-            
-            # Store cursor for the next page if a full page was fetched
-            if docs and len(docs) == self.samples_per_page:
-                if len(self.batch_samples_page_cursors) == self.current_page_index:
-                    self.batch_samples_page_cursors.append(docs[-1])
-                else: 
-                    self.batch_samples_page_cursors[self.current_page_index] = docs[-1]
-            elif not docs and self.current_page_index > 0:
-                logging.info("Reached end of data for current batch during pagination.")
-
-            # Calculate total pages for the batch
-            total_pages = (total_count + self.samples_per_page - 1) // self.samples_per_page if total_count > 0 else 1
-            logging.info(f"Calculated total pages for batch {self.current_selected_batch_id}: {total_pages}")
-
-            self.load_samples_to_treeview(samples_list, is_pagination_load=True, current_page=self.current_page_index + 1, total_pages=total_pages)
-
-            if samples_list:
-                self.status_label.config(text=f"Loaded {len(self.app.data)} samples for Batch: {self.current_selected_batch_id}. Page {self.current_page_index + 1} of {total_pages}.")
-                logging.info(f"Loaded {len(samples_list)} samples for batch {self.current_selected_batch_id}.")
-            else:
-                self.status_label.config(text=f"No samples found for Batch: {self.current_selected_batch_id}")
-                logging.info(f"No samples found for batch {self.current_selected_batch_id}.")
-
-            self.add_single_sample_button.config(state=tk.NORMAL)
-            # Enable/disable pagination controls based on the current page for the batch
-            self.prev_sample_page_btn.config(state=tk.NORMAL if self.current_page_index > 0 else tk.DISABLED)
-            self.next_sample_page_btn.config(state=tk.NORMAL if self.current_page_index < total_pages -1 else tk.DISABLED)
-            self.page_info_label.config(text=f"Page {self.current_page_index + 1} of {total_pages}")
-
-
-        except Exception as e:
-            logging.error(f"Failed to load samples for batch {self.current_selected_batch_id} (paginated): {e}", exc_info=True)
-            messagebox.showerror("Error", f"Failed to load samples for batch: {e}")
-            self.status_label.config(text="Failed to load samples for batch.")
-            # Ensure pagination buttons are disabled on error
-            self.prev_sample_page_btn.config(state=tk.DISABLED)
-            self.next_sample_page_btn.config(state=tk.DISABLED)
-            self.page_info_label.config(text="Page 0 of 0")
-
-    def open_single_sample_form(self):
-        """Opens a form to add a single new sample to the currently selected batch."""
-        logging.info(f"Opening single sample form for batch: {self.current_selected_batch_id}")
-        if not self.current_selected_batch_id:
-            messagebox.showwarning("Warning", "Please select or create a batch first using 'Add Sample to Batch' button.")
-            logging.warning("open_single_sample_form called with no current_selected_batch_id.")
-            return
-
-        form = tk.Toplevel(self.root)
-        form.title(f"Add Sample to Batch: {self.current_selected_batch_id}")
-        form.geometry("500x350")
-        form.grab_set()
-        form.transient(self.root)
-        form.config(bg='#f0f0f0') # Set background
-
-        frame = ttk.Frame(form, padding=10, style='TFrame')
-        frame.pack(expand=True, fill="both")
-
-        current_row = 0
-
-        ttk.Label(frame, text="Batch ID:", style='TLabel').grid(row=current_row, column=0, sticky="e", pady=5, padx=5)
-        ttk.Label(frame, text=self.current_selected_batch_id, font=('Helvetica', 10, 'bold'), background='#f0f0f0', foreground='#333333').grid(row=current_row, column=1, sticky="w", pady=5, padx=5)
-        current_row += 1
-
-        ttk.Label(frame, text="Sample ID (e.g., SMPL-001):", style='TLabel').grid(row=current_row, column=0, sticky="e", pady=5, padx=5)
-        self.entry_sample_display_id = ttk.Entry(frame, width=30, style='TEntry')
-        self.entry_sample_display_id.grid(row=current_row, column=1, sticky="ew", pady=5, padx=5)
-        current_row += 1
-
-        ttk.Label(frame, text="Sample Owner:", style='TLabel').grid(row=current_row, column=0, sticky="e", pady=5, padx=5)
-        self.entry_owner_combobox = ttk.Combobox(frame, state="readonly", width=27, style='TCombobox')
-        self.entry_owner_combobox.grid(row=current_row, column=1, sticky="ew", pady=5, padx=5)
-        self._load_users_into_owner_combobox(self.entry_owner_combobox)
-        # Set default owner to current user if available
-        if self.app.current_user and self.app.current_user.get('username'):
-            self.entry_owner_combobox.set(self.app.current_user['username'])
-        current_row += 1
-
-        ttk.Label(frame, text="Maturation Date (YYYY-MM-DD):", style='TLabel').grid(row=current_row, column=0, sticky="e", pady=5, padx=5)
-        self.entry_maturation_date_entry = DateEntry(frame, width=28, background='darkblue', foreground='white', borderwidth=2,
-                                                     date_pattern='yyyy-mm-dd') # TkCalendar styling
-        self.entry_maturation_date_entry.grid(row=current_row, column=1, sticky="ew", pady=5, padx=5)
-        self.entry_maturation_date_entry.set_date(datetime.now().date()) # Default to today
-        current_row += 1
-
-        ttk.Label(frame, text="Status:", style='TLabel').grid(row=current_row, column=0, padx=5, pady=5, sticky="e")
-        self.status_combobox = ttk.Combobox(frame, values=SAMPLE_STATUS_OPTIONS, state="readonly", width=27, style='TCombobox')
-        self.status_combobox.grid(row=current_row, column=1, sticky="ew", pady=5, padx=5)
-        self.status_combobox.set(SAMPLE_STATUS_OPTIONS[0]) # Default to "pending approval"
-        current_row += 1
-
-        ttk.Button(frame, text="Add Sample to Batch", command=lambda: self._submit_single_sample(form), style='Success.TButton').grid(row=current_row, column=0, columnspan=2, pady=15)
-        form.protocol("WM_DELETE_WINDOW", form.destroy)
-        logging.info("Single sample form opened.")
-
-    def _load_users_into_owner_combobox(self, target_combobox):
-        """Loads usernames from Firestore into the sample owner combobox."""
-        logging.info("Loading users into owner combobox.")
-        users_ref = db.collection("users")
-        try:
-            users = users_ref.stream()
-            usernames = [user.to_dict().get("username", "") for user in users if user.to_dict().get("username")]
-            target_combobox['values'] = usernames
-            logging.info(f"Loaded {len(usernames)} users for owner combobox.")
-        except Exception as e:
-            logging.error(f"Failed to load users for owner selection: {e}", exc_info=True)
-            messagebox.showerror("Error", f"Failed to load users for owner selection: {e}")
-            target_combobox['values'] = []
-
-
-    def _submit_single_sample(self, form_window):
-        """Handles submission of a single new sample to the current batch."""
-        logging.info("Submitting single sample.")
-        sample_display_id = self.entry_sample_display_id.get().strip()
-        owner = self.entry_owner_combobox.get().strip()
-        sample_status = self.status_combobox.get().strip()
-
-        # Validate Maturation Date
-        mat_date_from_entry = self.entry_maturation_date_entry.get_date()
-        if not mat_date_from_entry or mat_date_from_entry == datetime(1,1,1).date():
-            messagebox.showerror("Error", "Maturation Date is required.")
-            logging.warning("Maturation Date is missing for single sample submission.")
-            return
-        
-        mat_date_dt = datetime(mat_date_from_entry.year, mat_date_from_entry.month, mat_date_from_entry.day)
-
-        # Maturation date validation: Must not be in the past
-        today_date = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-        if mat_date_dt < today_date:
-            messagebox.showerror("Validation Error", "Maturation Date cannot be in the past.")
-            logging.warning(f"Maturation Date {mat_date_dt.strftime('%Y-%m-%d')} is in the past. Submission prevented.")
-            return
-
-
-        sample_created_date_dt = datetime.now()
-
-        # Validate Sample ID and Owner
-        if not sample_display_id or not owner:
-            messagebox.showerror("Error", "Sample ID and Owner are required.")
-            logging.warning("Sample ID or Owner missing for single sample submission.")
-            return
-
-        try:
-            # Check for duplicate sample_id across the entire 'samples' collection
-            existing_samples_with_display_id = db.collection("samples").where("sample_id", "==", sample_display_id).limit(1).get()
-            if list(existing_samples_with_display_id):
-                messagebox.showerror("Error", "Sample ID already exists in the database. Please use a unique ID.")
-                logging.error(f"Duplicate sample ID '{sample_display_id}' detected.")
-                return
-        except Exception as e:
-            logging.error(f"Failed to check existing sample ID: {e}", exc_info=True)
-            messagebox.showerror("Database Error", f"Failed to check existing sample ID: {e}")
-            return
-
-        sample_data = {
-            "sample_id": sample_display_id,
-            "owner": owner,
-            "creation_date": sample_created_date_dt,
-            "status": sample_status,
-            "batch_id": self.current_selected_batch_id,
-            "submitted_by_employee_id": self.app.current_user.get('employee_id'),
-            "maturation_date": mat_date_dt,
-            "last_updated_by_user_id": self.app.current_user.get('employee_id'), # Store user ID of creator
-            "last_updated_timestamp": datetime.now() # Store timestamp of creation
-        }
-        logging.debug(f"Sample data prepared: {sample_data}")
-
-        try:
-            batch_write = db.batch()
-
-            # Let Firestore generate the document ID for the sample for true uniqueness
-            sample_doc_ref = db.collection("samples").document()
-            batch_write.set(sample_doc_ref, sample_data)
-            logging.info(f"Prepared to add sample with auto-generated doc ID: {sample_doc_ref.id}")
-
-            batch_doc_ref = db.collection("batches").document(self.current_selected_batch_id)
-            # Check if batch exists before attempting to update its sample count
-            if not batch_doc_ref.get().exists:
-                messagebox.showwarning("Warning", f"Batch '{self.current_selected_batch_id}' not found. Sample added, but batch count not updated.")
-                logging.warning(f"Batch '{self.current_selected_batch_id}' not found when adding sample. Batch count not updated.")
-            else:
-                batch_write.update(batch_doc_ref, {"number_of_samples": firebase_admin.firestore.Increment(1)})
-                logging.info(f"Prepared to increment sample count for batch: {self.current_selected_batch_id}")
-
-            batch_write.commit()
-            logging.info("Firestore batch committed successfully.")
-
-            messagebox.showinfo("Success", f"Sample '{sample_display_id}' added successfully to Batch '{self.current_selected_batch_id}'.")
-
-            # Reload samples for the current batch to refresh Treeview
-            self.load_samples_for_current_batch(reset=False)
-
-            # If admin_logic is available, update its batches
-            if hasattr(self.app, 'admin_logic'):
-                self.app.admin_logic.load_batches()
-
-            form_window.destroy()
-            logging.info("Single sample submission complete.")
-
-        except Exception as e:
-            logging.error(f"Failed to add sample: {e}", exc_info=True)
-            messagebox.showerror("Error", f"Failed to add sample: {e}")
-
-    def delete_sample(self):
-        """Deletes a selected sample from Firestore and decrements the batch's sample count."""
-        logging.info("Starting delete_sample process.")
-        selected = self.tree.selection()
-        if not selected:
-            messagebox.showinfo("Info", "Please select a sample to delete.")
-            logging.warning("Delete sample aborted: No sample selected.")
-            return
-
-        item = self.tree.item(selected[0])
-        logging.debug(f"Selected Treeview item raw values: {item['values']}")
-
-        firestore_doc_id = item['values'][0]
-        display_sample_id = item['values'][1]
-        batch_id = item['values'][5] if len(item['values']) > 5 else None
-
-        logging.info(f"Extracted values for deletion: DocID='{firestore_doc_id}', DisplaySampleID='{display_sample_id}', BatchID='{batch_id}'")
-
-        # Prevent deletion of locally imported samples that are not in DB
-        if not firestore_doc_id or firestore_doc_id == 'N/A (Local)':
-            messagebox.showerror("Error", "Cannot delete a locally imported sample directly from the database. Please export and re-import if needed.")
-            logging.error("Attempted to delete a local-only sample from the database.")
-            return
-
-        confirm = messagebox.askyesno("Confirm Delete", f"Are you sure you want to delete sample '{display_sample_id}' from Batch '{batch_id}'?")
-        if not confirm:
-            logging.info("Delete sample aborted: User cancelled.")
-            return
-
-        try:
-            logging.info("Attempting Firestore batch write operations for deletion...")
-            batch_write = db.batch()
-
-            # Delete the sample document
-            sample_doc_ref = db.collection("samples").document(firestore_doc_id)
-            logging.info(f"Prepared to delete sample document: {firestore_doc_id}")
-            batch_write.delete(sample_doc_ref)
-
-            # Decrement sample count in the associated batch
-            if batch_id and batch_id != 'N/A':
-                batch_doc_ref = db.collection("batches").document(batch_id)
-                logging.info(f"Checking existence of batch document: {batch_id}")
-                if batch_doc_ref.get().exists:
-                    logging.info(f"Batch document '{batch_id}' exists. Preparing to decrement sample count.")
-                    batch_write.update(batch_doc_ref, {"number_of_samples": firebase_admin.firestore.Increment(-1)})
-                else:
-                    logging.warning(f"Batch '{batch_id}' not found for sample '{display_sample_id}'. Cannot update sample count.")
-            else:
-                logging.warning(f"No valid Batch ID found for sample '{display_sample_id}'. Cannot update sample count.")
-
-            batch_write.commit()
-            logging.info("Firestore batch committed successfully.")
-
-            messagebox.showinfo("Success", f"Sample '{display_sample_id}' deleted successfully.")
-            logging.info("Success message displayed.")
-
-            # Refresh the Treeview based on the last loaded query type, maintaining current page
-            if self.last_loaded_query_type in ['all_samples', 'my_samples']:
-                self.load_samples_paginated(self.last_loaded_query_type, reset=False)
-            elif self.last_loaded_query_type == 'current_batch_samples' and self.current_selected_batch_id:
-                self.load_samples_for_current_batch(reset=False)
-            else: # Fallback to refresh all samples if context is unclear
-                self.load_samples_paginated(query_type='all_samples', reset=True)
-
-            logging.info("Sample data reloaded and tree refreshed.")
-
-            if hasattr(self.app, 'admin_logic'):
-                logging.info("Updating admin_logic batches...")
-                self.app.admin_logic.load_batches()
-                logging.info("Admin_logic batches updated.")
-
-            logging.info("Delete_sample process completed successfully.")
-
-        except Exception as e:
-            logging.error(f"Error during delete_sample: {e}", exc_info=True)
-            messagebox.showerror("Error", f"Failed to delete sample: {e}\nSample might have been deleted, but an issue occurred during UI update or batch count adjustment.")
-            logging.error("Delete_sample process completed with error.")
-
-
-    def edit_sample(self):
-        """Opens a form to edit details of a selected sample from Firestore."""
-        logging.info("Opening edit sample form.")
-        selected = self.tree.selection()
-        if not selected:
-            messagebox.showinfo("Info", "Please select a sample to edit.")
-            logging.warning("No sample selected for editing.")
-            return
-
-        item = self.tree.item(selected[0])
-        firestore_doc_id = item['values'][0]
-        display_sample_id = item['values'][1]
-
-        # Prevent editing of locally imported samples
-        if not firestore_doc_id or firestore_doc_id == 'N/A (Local)':
-            messagebox.showwarning("Warning", "Cannot edit locally imported samples directly. Please add them to a batch first.")
-            logging.warning("Attempted to edit a local-only sample.")
-            return
-
-        row = {}
-        try:
-            sample_doc = db.collection("samples").document(firestore_doc_id).get()
-            if not sample_doc.exists:
-                messagebox.showerror("Error", "Selected sample not found in database.")
-                logging.error(f"Sample with doc ID {firestore_doc_id} not found for editing.")
-                # Refresh current view if sample not found
-                if self.last_loaded_query_type in ['all_samples', 'my_samples']:
-                    self.load_samples_paginated(self.last_loaded_query_type, reset=False)
-                elif self.last_loaded_query_type == 'current_batch_samples' and self.current_selected_batch_id:
-                    self.load_samples_for_current_batch(reset=False)
-                else:
-                    self.load_samples_paginated(query_type='all_samples', reset=True)
-                return
-            row = sample_doc.to_dict()
-            logging.info(f"Fetched sample data for editing (DocID: {firestore_doc_id}).")
-        except Exception as e:
-            logging.error(f"Failed to retrieve sample data for editing: {e}", exc_info=True)
-            messagebox.showerror("Error", f"Failed to retrieve sample data: {e}")
-            return
-
-        form = tk.Toplevel(self.root)
-        form.title(f"Edit Sample {display_sample_id}")
-        form.geometry("450x250")
-        form.grab_set()
-        form.transient(self.root)
-        form.config(bg='#f0f0f0') # Set background
-
-        current_row = 0
-
-        ttk.Label(form, text="Sample ID:", style='TLabel').grid(row=current_row, column=0, sticky="e", pady=5, padx=5)
-        entry_sample_display_id = ttk.Entry(form, style='TEntry')
-        entry_sample_display_id.insert(0, row.get('sample_id', ''))
-        entry_sample_display_id.config(state='disabled') # Sample ID is usually not editable
-        entry_sample_display_id.grid(row=current_row, column=1, sticky="ew", pady=5, padx=5)
-        current_row += 1
-
-        ttk.Label(form, text="Sample Owner:", style='TLabel').grid(row=current_row, column=0, sticky="e", pady=5, padx=5)
-        edit_owner_combobox = ttk.Combobox(form, state="readonly", style='TCombobox')
-        self._load_users_into_owner_combobox(edit_owner_combobox)
-        edit_owner_combobox.set(row.get('owner', ''))
-        edit_owner_combobox.grid(row=current_row, column=1, sticky="ew", pady=5, padx=5)
-        current_row += 1
-
-        ttk.Label(form, text="Maturation Date (YYYY-MM-DD):", style='TLabel').grid(row=current_row, column=0, sticky="e", pady=5, padx=5)
-        self.edit_mat_date_entry = DateEntry(form, width=28, background='darkblue', foreground='white', borderwidth=2,
-                                         date_pattern='yyyy-mm-dd') # TkCalendar styling
-        self.edit_mat_date_entry.grid(row=current_row, column=1, sticky="ew", pady=5, padx=5)
-        
-        # Set the current maturation date or a default empty date
-        mat_date_for_entry = None
-        if isinstance(row.get('maturation_date'), datetime):
-            mat_date_for_entry = row['maturation_date']
-        elif row.get('maturation_date') and hasattr(row['maturation_date'], 'to_datetime'):
-            try:
-                mat_date_for_entry = row['maturation_date'].to_datetime()
-            except Exception:
-                pass
-        
-        if mat_date_for_entry:
-            self.edit_mat_date_entry.set_date(mat_date_for_entry)
-        else:
-            self.edit_mat_date_entry.set_date(datetime(1,1,1).date())
-        current_row += 1
-
-        ttk.Label(form, text="Status:", style='TLabel').grid(row=current_row, column=0, sticky="e", pady=5, padx=5)
-        status_combobox_edit = ttk.Combobox(form, values=SAMPLE_STATUS_OPTIONS, state="readonly", style='TCombobox')
-        status_combobox_edit.set(row.get('status', SAMPLE_STATUS_OPTIONS[0]))
-        status_combobox_edit.grid(row=current_row, column=1, sticky="ew", pady=5, padx=5)
-        current_row += 1
-
-        ttk.Button(form, text="Save Changes", command=lambda: self._submit_edit_sample(
-            form, firestore_doc_id, edit_owner_combobox.get(), self.edit_mat_date_entry.get_date(), status_combobox_edit.get()
-        ), style='Success.TButton').grid(row=current_row, column=0, columnspan=2, pady=15)
-        form.protocol("WM_DELETE_WINDOW", form.destroy)
-        logging.info("Edit sample form opened and populated.")
-
-    def _submit_edit_sample(self, form_window, firestore_doc_id, new_owner, new_mat_date_dt, new_status):
-        """Submits the edited sample data to Firestore."""
-        logging.info(f"Submitting edited sample (DocID: {firestore_doc_id}).")
-        if not new_owner or not new_status:
-            messagebox.showerror("Error", "Owner and Status fields are required.")
-            logging.warning("Owner or Status missing for sample edit.")
-            return
-
-        # Maturation date validation: Must not be in the past
-        today_date = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-        if new_mat_date_dt and new_mat_date_dt < today_date.date(): # Compare date objects directly
-            messagebox.showerror("Validation Error", "Maturation Date cannot be in the past.")
-            logging.warning(f"Maturation Date {new_mat_date_dt.strftime('%Y-%m-%d')} is in the past. Submission prevented.")
-            return
-        
-        # Convert new_mat_date_dt to datetime object for Firestore
-        mat_date_for_db = None
-        if new_mat_date_dt and new_mat_date_dt != datetime(1,1,1).date():
-            mat_date_for_db = datetime(new_mat_date_dt.year, new_mat_date_dt.month, new_mat_date_dt.day)
-        else:
-            messagebox.showerror("Error", "Maturation Date is required.")
-            logging.warning("Maturation Date is empty/default after edit, but is required.")
-            return
-
-
-        updated_data = {
-            "owner": new_owner,
-            "status": new_status,
-            "maturation_date": mat_date_for_db,
-            "last_updated_by_user_id": self.app.current_user.get('employee_id'), # New field: user ID who last updated
-            "last_updated_timestamp": datetime.now() # New field: timestamp of last update
-        }
-        
-        logging.debug(f"Updated data for sample {firestore_doc_id}: {updated_data}")
-        try:
-            db.collection("samples").document(firestore_doc_id).update(updated_data)
-            messagebox.showinfo("Success", "Sample updated successfully.")
-            logging.info(f"Sample {firestore_doc_id} updated successfully in Firestore.")
-
-            # Refresh the Treeview based on the last loaded query type, maintaining current page
-            if self.last_loaded_query_type in ['all_samples', 'my_samples']:
-                self.load_samples_paginated(self.last_loaded_query_type, reset=False)
-            elif self.last_loaded_query_type == 'current_batch_samples' and self.current_selected_batch_id:
-                self.load_samples_for_current_batch(reset=False)
-            else: # Fallback to refresh all samples if context is unclear
-                self.load_samples_paginated(query_type='all_samples', reset=True)
-
-            form_window.destroy()
-            logging.info("Sample edit complete.")
-        except Exception as e:
-            logging.error(f"Failed to update sample {firestore_doc_id}: {e}", exc_info=True)
-            messagebox.showerror("Error", f"Failed to update sample: {e}")
-
-    def open_filter_form(self):
-        """Opens a Toplevel window for users to input filtering criteria."""
-        logging.info("Opening filter form.")
-        filter_form = tk.Toplevel(self.root)
-        filter_form.title("Filter Options")
-        filter_form.geometry("450x500")
-        filter_form.grab_set()
-        filter_form.transient(self.root)
-        filter_form.config(bg='#f0f0f0') # Set background
-
-        # Radio buttons to choose filtering mode
-        radio_frame = ttk.Frame(filter_form, style='TFrame') 
-        radio_frame.pack(fill="x", padx=10, pady=10) 
-
-        ttk.Radiobutton(radio_frame, text="Filter Samples (by Sample/Batch/Product name)",
-                        variable=self.filter_mode, value="samples", style='TRadiobutton',
-                        command=self._toggle_filter_frames).pack(anchor="w", pady=5)
-        ttk.Radiobutton(radio_frame, text="Find Batch Details (by Batch ID)",
-                        variable=self.filter_mode, value="batch_search", style='TRadiobutton',
-                        command=self._toggle_filter_frames).pack(anchor="w", pady=5)
-        # New radio button for finding sample details
-        ttk.Radiobutton(radio_frame, text="Find Sample Details (by Sample ID)",
-                        variable=self.filter_mode, value="sample_search", style='TRadiobutton',
-                        command=self._toggle_filter_frames).pack(anchor="w", pady=5)
-
-
-        # Frames to hold specific filter options
-        self.sample_filters_frame = ttk.Frame(filter_form, style='TFrame')
-        self.batch_search_frame = ttk.Frame(filter_form, style='TFrame')
-        self.sample_search_frame = ttk.Frame(filter_form, style='TFrame') # New frame for sample search
-
-        # Maturation Date Filter widgets within its own frame
-        self.maturation_date_filter_frame = ttk.Frame(self.sample_filters_frame, style='TFrame')
-        ttk.Checkbutton(self.sample_filters_frame, text="Enable Maturation Date Filter",
-                        variable=self.filter_maturation_date_var, style='TCheckbutton',
-                        command=self._toggle_maturation_filter_state).grid(row=0, column=0, sticky="w", pady=5, padx=5, columnspan=2)
-
-        ttk.Label(self.maturation_date_filter_frame, text="From (YYYY-MM-DD):", style='TLabel').grid(row=0, column=0, sticky="e", pady=5, padx=5)
-        self.filter_start_date_entry = DateEntry(self.maturation_date_filter_frame, width=28, background='darkblue', foreground='white', borderwidth=2, date_pattern='yyyy-mm-dd')
-        self.filter_start_date_entry.grid(row=0, column=1, sticky="ew", pady=5, padx=5)
-        self.filter_start_date_entry.set_date(datetime.now().date())
-        # The below line was causing an issue with `DateEntry` if `DateEntry` was not yet initialized.
-        # It's been moved inside `_toggle_maturation_filter_state` which is called after `DateEntry` is initialized.
-
-        ttk.Label(self.maturation_date_filter_frame, text="To (YYYY-MM-DD):", style='TLabel').grid(row=1, column=0, sticky="e", pady=5, padx=5)
-        self.filter_end_date_entry = DateEntry(self.maturation_date_filter_frame, width=28, background='darkblue', foreground='white', borderwidth=2, date_pattern='yyyy-mm-dd')
-        self.filter_end_date_entry.grid(row=1, column=1, sticky="ew", pady=5, padx=5)
-        self.filter_end_date_entry.set_date(datetime.now().date())
-
-        # Creation Date Filter widgets within its own frame
-        self.creation_date_filter_frame = ttk.Frame(self.sample_filters_frame, style='TFrame')
-        ttk.Checkbutton(self.sample_filters_frame, text="Enable Creation Date Filter",
-                        variable=self.filter_creation_date_var, style='TCheckbutton',
-                        command=self._toggle_creation_filter_state).grid(row=2, column=0, sticky="w", pady=5, padx=5, columnspan=2)
-
-        ttk.Label(self.creation_date_filter_frame, text="From (YYYY-MM-DD):", style='TLabel').grid(row=0, column=0, sticky="e", pady=5, padx=5)
-        self.filter_creation_start_date_entry = DateEntry(self.creation_date_filter_frame, width=28, background='darkblue', foreground='white', borderwidth=2, date_pattern='yyyy-mm-dd')
-        self.filter_creation_start_date_entry.grid(row=0, column=1, sticky="ew", pady=5, padx=5)
-        self.filter_creation_start_date_entry.set_date(datetime.now().date())
-
-        ttk.Label(self.creation_date_filter_frame, text="To (YYYY-MM-DD):", style='TLabel').grid(row=1, column=0, sticky="e", pady=5, padx=5)
-        self.filter_creation_end_date_entry = DateEntry(self.creation_date_filter_frame, width=28, background='darkblue', foreground='white', borderwidth=2, date_pattern='yyyy-mm-dd')
-        self.filter_creation_end_date_entry.grid(row=1, column=1, sticky="ew", pady=5, padx=5)
-        self.filter_creation_end_date_entry.set_date(datetime.now().date())
-
-        # Initial state of date filter frames (hidden by default)
-        self._toggle_maturation_filter_state()
-        self._toggle_creation_filter_state()
-
-        # Other filters always visible, positioned after date filter frames
-        current_filter_row = 4
-
-        ttk.Label(self.sample_filters_frame, text="Sample ID (similar/contains):", style='TLabel').grid(row=current_filter_row, column=0, sticky="e", pady=5, padx=5)
-        self.filter_sample_id_entry = ttk.Entry(self.sample_filters_frame, width=30, style='TEntry')
-        self.filter_sample_id_entry.grid(row=current_filter_row, column=1, sticky="ew", pady=5, padx=5)
-        current_filter_row += 1
-
-        ttk.Label(self.sample_filters_frame, text="Batch ID (similar/contains):", style='TLabel').grid(row=current_filter_row, column=0, sticky="e", pady=5, padx=5)
-        self.filter_batch_id_entry = ttk.Entry(self.sample_filters_frame, width=30, style='TEntry')
-        self.filter_batch_id_entry.grid(row=current_filter_row, column=1, sticky="ew", pady=5, padx=5)
-        current_filter_row += 1
-
-        ttk.Label(self.sample_filters_frame, text="Product Name (similar/contains):", style='TLabel').grid(row=current_filter_row, column=0, sticky="e", pady=5, padx=5)
-        self.filter_product_name_entry = ttk.Entry(self.sample_filters_frame, width=30, style='TEntry')
-        self.filter_product_name_entry.grid(row=current_filter_row, column=1, sticky="ew", pady=5, padx=5)
-        current_filter_row += 1
-
-        ttk.Label(self.sample_filters_frame, text="Status:", style='TLabel').grid(row=current_filter_row, column=0, sticky="e", pady=5, padx=5)
-        self.filter_status_combobox = ttk.Combobox(self.sample_filters_frame, values=[""] + SAMPLE_STATUS_OPTIONS, state="readonly", width=27, style='TCombobox')
-        self.filter_status_combobox.set("") # Default to empty to show all statuses
-        self.filter_status_combobox.grid(row=current_filter_row, column=1, sticky="ew", pady=5, padx=5)
-        current_filter_row += 1
-
-        # Populate batch_search_frame
-        ttk.Label(self.batch_search_frame, text="Enter Batch ID:", style='TLabel').grid(row=0, column=0, sticky="e", pady=5, padx=5)
-        self.find_batch_id_entry = ttk.Entry(self.batch_search_frame, width=30, style='TEntry')
-        self.find_batch_id_entry.grid(row=0, column=1, sticky="ew", pady=5, padx=5)
-
-        # Populate sample_search_frame
-        ttk.Label(self.sample_search_frame, text="Enter Sample ID:", style='TLabel').grid(row=0, column=0, sticky="e", pady=5, padx=5)
-        self.find_sample_id_entry = ttk.Entry(self.sample_search_frame, width=30, style='TEntry')
-        self.find_sample_id_entry.grid(row=0, column=1, sticky="ew", pady=5, padx=5)
-
-
-        # Buttons common to both modes
-        button_frame = ttk.Frame(filter_form, style='TFrame')
-        button_frame.pack(fill="x", side="bottom", padx=10, pady=10)
-
-        ttk.Button(button_frame, text="Apply", command=lambda: self.apply_filters(filter_form), style='Success.TButton').pack(side=tk.LEFT, padx=5, pady=10)
-        ttk.Button(button_frame, text="Clear Filters", command=lambda: self.clear_filters(filter_form), style='Secondary.TButton').pack(side=tk.LEFT, padx=5, pady=10)
-
-        # Initial display of filter frames
-        self._toggle_filter_frames()
-
-        filter_form.protocol("WM_DELETE_WINDOW", filter_form.destroy)
-        logging.info("Filter form opened.")
-
-    def _toggle_maturation_filter_state(self):
-        """Toggles the visibility and state of maturation date filter entries."""
-        logging.debug(f"Toggling maturation filter state: {self.filter_maturation_date_var.get()}")
-        if self.filter_maturation_date_var.get():
-            self.maturation_date_filter_frame.grid(row=1, column=0, columnspan=2, sticky="ew")
-        else:
-            self.maturation_date_filter_frame.grid_forget()
-            # Reset dates when filter is disabled
-            if self.filter_start_date_entry:
-                self.filter_start_date_entry.set_date(datetime.now().date())
-            if self.filter_end_date_entry:
-                self.filter_end_date_entry.set_date(datetime.now().date())
-        logging.debug("Maturation filter state toggled.")
-
-    def _toggle_creation_filter_state(self):
-        """Toggles the visibility and state of creation date filter entries."""
-        logging.debug(f"Toggling creation filter state: {self.filter_creation_date_var.get()}")
-        if self.filter_creation_date_var.get():
-            self.creation_date_filter_frame.grid(row=3, column=0, columnspan=2, sticky="ew")
-        else:
-            self.creation_date_filter_frame.grid_forget()
-            # Reset dates when filter is disabled
-            if self.filter_creation_start_date_entry:
-                self.filter_creation_start_date_entry.set_date(datetime.now().date())
-            if self.filter_creation_end_date_entry:
-                self.filter_creation_end_date_entry.set_date(datetime.now().date())
-        logging.debug("Creation filter state toggled.")
-
-    def _toggle_filter_frames(self):
-        """Toggles visibility of filter frames based on radio button selection."""
-        logging.info(f"Toggling filter frames. Current mode: {self.filter_mode.get()}")
-        # Hide all frames first
-        self.sample_filters_frame.pack_forget()
-        self.batch_search_frame.pack_forget()
-        self.sample_search_frame.pack_forget() # Hide new sample search frame
-
-        # Ensure date filter frames are hidden and their variables are reset when switching modes
-        self.maturation_date_filter_frame.grid_forget()
-        self.creation_date_filter_frame.grid_forget()
-        self.filter_maturation_date_var.set(False)
-        self.filter_creation_date_var.set(False)
-
-        if self.filter_mode.get() == "samples":
-            self.sample_filters_frame.pack(fill="both", expand=True, padx=10, pady=10)
-            self._toggle_maturation_filter_state() # Re-apply state
-            self._toggle_creation_filter_state() # Re-apply state
-            logging.info("Switched to Sample Filter mode.")
-        elif self.filter_mode.get() == "batch_search":
-            self.batch_search_frame.pack(fill="both", expand=True, padx=10, pady=10)
-            logging.info("Switched to Batch Search mode.")
-        elif self.filter_mode.get() == "sample_search": # New: Handle sample search mode
-            self.sample_search_frame.pack(fill="both", expand=True, padx=10, pady=10)
-            logging.info("Switched to Sample Search mode.")
-
-
-    def apply_filters(self, form_window):
-        """Applies the filters based on the selected mode (sample filter, batch search, or sample search)."""
-        logging.info(f"Apply Filters called. Mode: {self.filter_mode.get()}")
-        if self.filter_mode.get() == "samples":
-            filters = {}
-            
-            # Process Maturation Date Filters
-            if self.filter_maturation_date_var.get():
-                start_date_obj = self.filter_start_date_entry.get_date()
-                end_date_obj = self.filter_end_date_entry.get_date()
-                if start_date_obj and start_date_obj != datetime(1,1,1).date():
-                    filters['start_date'] = datetime(start_date_obj.year, start_date_obj.month, start_date_obj.day)
-                if end_date_obj and end_date_obj != datetime(1,1,1).date():
-                    filters['end_date'] = datetime(end_date_obj.year, end_date_obj.month, end_date_obj.day, 23, 59, 59, 999999)
-                if filters.get('start_date') and filters.get('end_date') and filters['start_date'] > filters['end_date']:
-                    messagebox.showerror("Error", "'Maturation Date From' cannot be after 'Maturation Date To'.")
-                    logging.warning("Maturation date 'From' is after 'To' date.")
-                    return
-            
-            # Process Creation Date Filters
-            if self.filter_creation_date_var.get():
-                creation_start_date_obj = self.filter_creation_start_date_entry.get_date()
-                creation_end_date_obj = self.filter_creation_end_date_entry.get_date()
-                if creation_start_date_obj and creation_start_date_obj != datetime(1,1,1).date():
-                    filters['creation_start_date'] = datetime(creation_start_date_obj.year, creation_start_date_obj.month, creation_start_date_obj.day)
-                if creation_end_date_obj and creation_end_date_obj != datetime(1,1,1).date():
-                    filters['creation_end_date'] = datetime(creation_end_date_obj.year, creation_end_date_obj.month, creation_end_date_obj.day, 23, 59, 59, 999999)
-                if filters.get('creation_start_date') and filters.get('creation_end_date') and filters['creation_start_date'] > filters['creation_end_date']:
-                    messagebox.showerror("Error", "'Creation Date From' cannot be after 'Creation Date To'.")
-                    logging.warning("Creation date 'From' is after 'To' date.")
-                    return
-
-            logging.info(f"Maturation Date Filters processed: Start={filters.get('start_date')}, End={filters.get('end_date')}")
-            logging.info(f"Creation Date Filters processed: Start={filters.get('creation_start_date')}, End={filters.get('creation_end_date')}")
-
-            # Get text-based filter values
-            sample_id = self.filter_sample_id_entry.get().strip()
-            batch_id = self.filter_batch_id_entry.get().strip()
-            product_name = self.filter_product_name_entry.get().strip()
-            status = self.filter_status_combobox.get().strip()
-
-            if sample_id:
-                filters['sample_id'] = sample_id
-            if batch_id:
-                filters['batch_id'] = batch_id
-            if product_name:
-                filters['product_name'] = product_name
-            if status:
-                filters['status'] = status
-            
-            logging.info(f"Applying sample filters: {filters}")
-            self.load_all_user_samples_from_db_with_filters(filters)
-            form_window.destroy()
-
-        elif self.filter_mode.get() == "batch_search":
-            batch_id_to_find = self.find_batch_id_entry.get().strip()
-            logging.info(f"Searching for batch ID: {batch_id_to_find}")
-            if not batch_id_to_find:
-                messagebox.showerror("Error", "Please enter a Batch ID to search.")
-                logging.warning("No batch ID entered for batch search.")
-                return
-
-            try:
-                batch_doc = db.collection("batches").document(batch_id_to_find).get()
-                if batch_doc.exists:
-                    logging.info("Batch found. Displaying details.")
-                    self._display_batch_details_window(batch_doc.to_dict())
-                    form_window.destroy()
-                else:
-                    logging.info("Batch Not Found.")
-                    messagebox.showinfo("Batch Not Found", f"Batch with ID '{batch_id_to_find}' does not exist.")
-            except Exception as e:
-                logging.error(f"Error retrieving batch details for '{batch_id_to_find}': {e}", exc_info=True)
-                messagebox.showerror("Error", f"Failed to retrieve batch details: {e}")
-        
-        elif self.filter_mode.get() == "sample_search": # New: Handle sample search mode
-            sample_id_to_find = self.find_sample_id_entry.get().strip()
-            logging.info(f"Searching for sample ID: {sample_id_to_find}")
-            if not sample_id_to_find:
-                messagebox.showerror("Error", "Please enter a Sample ID to search.")
-                logging.warning("No sample ID entered for sample search.")
-                return
-
-            try:
-                # Find sample by sample_id (which is a field, not the Firestore document ID)
-                sample_docs = db.collection("samples").where("sample_id", "==", sample_id_to_find).limit(1).get()
-                sample_doc = None
-                for doc in sample_docs: # Iterate over the results (should be at most one due to limit(1))
-                    sample_doc = doc
-                    break
-                
-                if sample_doc and sample_doc.exists:
-                    logging.info("Sample found. Displaying details.")
-                    self._display_sample_details_window(sample_doc.to_dict())
-                    form_window.destroy()
-                else:
-                    logging.info("Sample Not Found.")
-                    messagebox.showinfo("Sample Not Found", f"Sample with ID '{sample_id_to_find}' does not exist.")
-            except Exception as e:
-                logging.error(f"Error retrieving sample details for '{sample_id_to_find}': {e}", exc_info=True)
-                messagebox.showerror("Error", f"Failed to retrieve sample details: {e}")
-
-    def load_all_user_samples_from_db_with_filters(self, filters=None):
-        """
-        Loads all sample data from Firestore and populates the local DataFrame and Treeview,
-        applying filters directly. This is a non-paginated search for filtered results.
-        """
-        logging.info(f"Loading all user samples from DB with filters: {filters}")
-        # Reset sample pagination state when loading filtered samples
-        self.current_page_index = 0
-        self.all_samples_page_cursors = []
-        self.my_samples_page_cursors = []
-        self.batch_samples_page_cursors = []
-        self.last_loaded_query_type = 'filtered_samples'
-
-        self.tree.delete(*self.tree.get_children())
-        samples_list = []
-        try:
-            samples_ref = db.collection("samples")
-            query = samples_ref
-
-            firestore_maturation_date_filter_applied = False
-            firestore_creation_date_filter_applied = False
-
-            if filters:
-                # Apply date range filters to Firestore query if present
-                if 'start_date' in filters and 'end_date' in filters:
-                    query = query.where("maturation_date", ">=", filters['start_date'])
-                    query = query.where("maturation_date", "<=", filters['end_date'])
-                    firestore_maturation_date_filter_applied = True
-                    logging.info("Applied Firestore maturation_date range filter.")
-                elif 'creation_start_date' in filters and 'creation_end_date' in filters:
-                    query = query.where("creation_date", ">=", filters['creation_start_date'])
-                    query = query.where("creation_date", "<=", filters['creation_end_date'])
-                    firestore_creation_date_filter_applied = True
-                    logging.info("Applied Firestore creation_date range filter.")
-                
-                # Apply direct equality filter for status if present
-                if filters.get('status'):
-                    query = query.where("status", "==", filters['status'])
-                
-            samples = query.stream()
-
-            for sample in samples:
-                data = sample.to_dict()
-                data['firestore_doc_id'] = sample.id
-                # Convert Firestore Timestamp to datetime objects
-                if data.get('maturation_date') and hasattr(data['maturation_date'], 'to_datetime'):
-                    data['maturation_date'] = data['maturation_date'].to_datetime()
-                if data.get('creation_date') and hasattr(data['creation_date'], 'to_datetime'):
-                    data['creation_date'] = data['creation_date'].to_datetime()
-                # Ensure last_updated_timestamp is converted for consistency, though not displayed
-                if data.get('last_updated_timestamp') and hasattr(data['last_updated_timestamp'], 'to_datetime'):
-                    data['last_updated_timestamp'] = data['last_updated_timestamp'].to_datetime()
-
-                samples_list.append(data)
-            logging.info(f"Initial fetch for filtered samples returned {len(samples_list)} results.")
-
-            df = pd.DataFrame(samples_list)
-
-            # Apply local filters for 'similar/contains' matching and secondary date filters
-            if filters:
-                # Filter by Sample ID (contains)
-                if filters.get('sample_id'):
-                    if 'sample_id' in df.columns:
-                         df = df[df['sample_id'].astype(str).str.contains(filters['sample_id'], case=False, na=False)]
-                    elif 'DisplaySampleID' in df.columns:
-                        df = df[df['DisplaySampleID'].astype(str).str.contains(filters['sample_id'], case=False, na=False)]
-                    logging.debug(f"Filtered by sample_id, {len(df)} remaining.")
-
-                # Filter by Batch ID (contains)
-                if filters.get('batch_id'):
-                    if 'batch_id' in df.columns:
-                        df = df[df['batch_id'].astype(str).str.contains(filters['batch_id'], case=False, na=False)]
-                    elif 'BatchID' in df.columns:
-                        df = df[df['BatchID'].astype(str).str.contains(filters['batch_id'], case=False, na=False)]
-                    logging.debug(f"Filtered by batch_id, {len(df)} remaining.")
-
-                # Filter by Product Name (contains) - requires fetching batch product names
-                if filters.get('product_name'):
-                    product_name_filter_val = filters['product_name'].lower()
-                    valid_batch_ids = df['batch_id'].dropna().unique() if 'batch_id' in df.columns else []
-                    batch_product_names = {}
-                    for b_id in valid_batch_ids:
-                        if b_id and b_id != 'N/A' and pd.notna(b_id):
-                            batch_doc = db.collection("batches").document(b_id).get()
-                            if batch_doc.exists:
-                                batch_product_names[b_id] = batch_doc.to_dict().get('product_name', '').lower()
-                    df = df[df['batch_id'].apply(lambda x: product_name_filter_val in batch_product_names.get(x, '') if pd.notna(x) else False)]
-                    logging.debug(f"Filtered by product_name, {len(df)} remaining.")
-
-                # Apply secondary date filters locally if not applied by Firestore
-                if 'start_date' in filters and 'end_date' in filters and not firestore_maturation_date_filter_applied:
-                    df = df[df['maturation_date'].apply(lambda x: x and filters['start_date'] <= x)]
-                    df = df[df['maturation_date'].apply(lambda x: x and x <= filters['end_date'])]
-                    logging.debug(f"Applied local maturation_date filter, {len(df)} remaining.")
-                
-                if 'creation_start_date' in filters and 'creation_end_date' in filters and not firestore_creation_date_filter_applied:
-                    df = df[df['creation_date'].apply(lambda x: x and filters['creation_start_date'] <= x)]
-                    df = df[df['creation_date'].apply(lambda x: x and x <= filters['creation_end_date'])]
-                    logging.debug(f"Applied local creation_date filter, {len(df)} remaining.")
-
-            self.load_samples_to_treeview(df.to_dict('records'))
-            
-            if not df.empty:
-                self.status_label.config(text=f"Loaded {len(self.app.data)} samples from database matching filters.")
-                logging.info(f"Finished loading filtered samples. Displaying {len(self.app.data)} samples.")
-            else:
-                self.status_label.config(text="No samples found in the database matching filters.")
-                logging.info("No samples found matching filters.")
-            
-            self.current_selected_batch_id = None
-            self.add_single_sample_button.config(state=tk.DISABLED)
-
-            # Disable pagination controls for filtered samples as it's a specific search result
-            self.prev_sample_page_btn.config(state=tk.DISABLED)
-            self.next_sample_page_btn.config(state=tk.DISABLED)
-            self.page_info_label.config(text="Page 0 of 0")
-
-
-        except Exception as e:
-            logging.error(f"Failed to load samples from database with filters: {e}", exc_info=True)
-            messagebox.showerror("Error", f"Failed to load samples from database: {e}")
-            self.status_label.config("Failed to load samples from database.")
-
-
-    def _display_batch_details_window(self, batch_data):
-        """Displays batch details in a new window with copyable text."""
-        logging.info(f"Displaying batch details for batch: {batch_data.get('batch_id', 'N/A')}")
-        details_window = tk.Toplevel(self.root)
-        details_window.title(f"Batch Details: {batch_data.get('batch_id', 'N/A')}")
-        details_window.geometry("500x300")
-        details_window.grab_set()
-        details_window.transient(self.root)
-        details_window.config(bg='#f0f0f0') # Set background
-
-        text_frame = ttk.Frame(details_window, padding=10, style='TFrame')
-        text_frame.pack(expand=True, fill="both")
-
-        text_widget = tk.Text(text_frame, wrap='word', font=('Consolas', 10),
-                              bg='#ffffff', bd=0, highlightthickness=0, foreground='#333333') # White background for text
-        text_widget.pack(side=tk.LEFT, expand=True, fill="both")
-
-        scrollbar = ttk.Scrollbar(text_frame, command=text_widget.yview)
-        scrollbar.pack(side=tk.RIGHT, fill='y')
-        text_widget.config(yscrollcommand=scrollbar.set)
-
-        details_str = f"Batch ID: {batch_data.get('batch_id', 'N/A')}\n"
-        details_str += f"Product Name: {batch_data.get('product_name', 'N/A')}\n"
-        details_str += f"Description: {batch_data.get('description', 'N/A')}\n"
-        
-        submission_date = batch_data.get('submission_date')
-        if submission_date is not None:
-            if hasattr(submission_date, 'to_datetime'):
-                submission_date_dt = submission_date.to_datetime()
-            elif isinstance(submission_date, datetime):
-                submission_date_dt = submission_date
-            else:
-                try:
-                    submission_date_dt = datetime.strptime(str(submission_date).split(' ')[0], "%Y-%m-%d")
-                except ValueError:
-                    submission_date_dt = None
-
-            if submission_date_dt:
-                details_str += f"Creation Date: {submission_date_dt.strftime('%Y-%m-%d %H:%M:%S')}\n"
-            else:
-                details_str += f"Creation Date: N/A\n"
-        else:
-            details_str += f"Creation Date: N/A\n"
-
-        details_str += f"Submitted By (Employee ID): {batch_data.get('user_employee_id', 'N/A')}\n"
-        details_str += f"Submitted By (Username): {batch_data.get('user_username', 'N/A')}\n"
-        details_str += f"Status: {batch_data.get('status', 'N/A')}\n"
-        details_str += f"Number of Samples: {batch_data.get('number_of_samples', 0)}\n"
-
-        text_widget.insert(tk.END, details_str)
-        text_widget.config(state='normal') # Allow selection and copying
-
-        ttk.Button(details_window, text="Close", command=details_window.destroy, style='Secondary.TButton').pack(pady=10)
-        details_window.protocol("WM_DELETE_WINDOW", details_window.destroy)
-        logging.info(f"Batch details window displayed for {batch_data.get('batch_id', 'N/A')}.")
-
-    def _display_sample_details_window(self, sample_data):
-        """Displays sample details in a new window with copyable text."""
-        logging.info(f"Displaying sample details for sample: {sample_data.get('sample_id', 'N/A')}")
-        details_window = tk.Toplevel(self.root)
-        details_window.title(f"Sample Details: {sample_data.get('sample_id', 'N/A')}")
-        details_window.geometry("500x350")
-        details_window.grab_set()
-        details_window.transient(self.root)
-        details_window.config(bg='#f0f0f0') # Set background
-
-        text_frame = ttk.Frame(details_window, padding=10, style='TFrame')
-        text_frame.pack(expand=True, fill="both")
-
-        text_widget = tk.Text(text_frame, wrap='word', font=('Consolas', 10),
-                              bg='#ffffff', bd=0, highlightthickness=0, foreground='#333333') # White background for text
-        text_widget.pack(side=tk.LEFT, expand=True, fill="both")
-
-        scrollbar = ttk.Scrollbar(text_frame, command=text_widget.yview)
-        scrollbar.pack(side=tk.RIGHT, fill='y')
-        text_widget.config(yscrollcommand=scrollbar.set)
-
-        details_str = f"Sample ID: {sample_data.get('sample_id', 'N/A')}\n"
-        details_str += f"Owner: {sample_data.get('owner', 'N/A')}\n"
-        details_str += f"Status: {sample_data.get('status', 'N/A')}\n"
-        details_str += f"Batch ID: {sample_data.get('batch_id', 'N/A')}\n"
-        details_str += f"Submitted By (Employee ID): {sample_data.get('submitted_by_employee_id', 'N/A')}\n"
-        
-        # Format Maturation Date
-        maturation_date = sample_data.get('maturation_date')
-        if maturation_date is not None:
-            if hasattr(maturation_date, 'to_datetime'):
-                maturation_date_dt = maturation_date.to_datetime()
-            elif isinstance(maturation_date, datetime):
-                maturation_date_dt = maturation_date
-            else:
-                try:
-                    maturation_date_dt = datetime.strptime(str(maturation_date).split(' ')[0], "%Y-%m-%d")
-                except ValueError:
-                    maturation_date_dt = None
-            if maturation_date_dt:
-                details_str += f"Maturation Date: {maturation_date_dt.strftime('%Y-%m-%d')}\n"
-            else:
-                details_str += f"Maturation Date: N/A\n"
-        else:
-            details_str += f"Maturation Date: N/A\n"
-
-        # Format Creation Date
-        creation_date = sample_data.get('creation_date')
-        if creation_date is not None:
-            if hasattr(creation_date, 'to_datetime'):
-                creation_date_dt = creation_date.to_datetime()
-            elif isinstance(creation_date, datetime):
-                creation_date_dt = creation_date
-            else:
-                try:
-                    creation_date_dt = datetime.strptime(str(creation_date).split(' ')[0], "%Y-%m-%d")
-                except ValueError:
-                    creation_date_dt = None
-            if creation_date_dt:
-                details_str += f"Creation Date: {creation_date_dt.strftime('%Y-%m-%d %H:%M:%S')}\n"
-            else:
-                details_str += f"Creation Date: N/A\n"
-        else:
-            details_str += f"Creation Date: N/A\n"
-
-        # Format Last Updated By and Timestamp
-        last_updated_by = sample_data.get('last_updated_by_user_id', 'N/A')
-        last_updated_timestamp = sample_data.get('last_updated_timestamp')
-        
-        details_str += f"Last Updated By: {last_updated_by}\n"
-        if last_updated_timestamp is not None:
-            if hasattr(last_updated_timestamp, 'to_datetime'):
-                last_updated_timestamp_dt = last_updated_timestamp.to_datetime()
-            elif isinstance(last_updated_timestamp, datetime):
-                last_updated_timestamp_dt = last_updated_timestamp
-            else:
-                try:
-                    last_updated_timestamp_dt = datetime.strptime(str(last_updated_timestamp).split(' ')[0], "%Y-%m-%d %H:%M:%S.%f")
-                except ValueError:
-                    last_updated_timestamp_dt = None
-            if last_updated_timestamp_dt:
-                details_str += f"Last Updated On: {last_updated_timestamp_dt.strftime('%Y-%m-%d %H:%M:%S')}\n"
-            else:
-                details_str += f"Last Updated On: N/A\n"
-        else:
-            details_str += f"Last Updated On: N/A\n"
-
-        text_widget.insert(tk.END, details_str)
-        text_widget.config(state='normal') # Allow selection and copying
-
-        ttk.Button(details_window, text="Close", command=details_window.destroy, style='Secondary.TButton').pack(pady=10)
-        details_window.protocol("WM_DELETE_WINDOW", details_window.destroy)
-        logging.info(f"Sample details window displayed for {sample_data.get('sample_id', 'N/A')}.")
-
-
-    def clear_filters(self, form_window):
-        """Clears all filter fields and reloads all samples."""
-        logging.info("Clear Filters called.")
-        if self.filter_mode.get() == "samples":
-            # Set checkbox variables to False, which will trigger the _toggle functions to hide/clear entries
-            self.filter_maturation_date_var.set(False)
-            self.filter_creation_date_var.set(False)
-            # Ensure entries are cleared immediately by calling toggle functions first
-            self._toggle_maturation_filter_state()
-            self._toggle_creation_filter_state()
-
-            # Clear the actual entry widgets if they exist
-            if self.filter_sample_id_entry:
-                self.filter_sample_id_entry.delete(0, tk.END)
-            if self.filter_batch_id_entry:
-                self.filter_batch_id_entry.delete(0, tk.END)
-            if self.filter_product_name_entry:
-                self.filter_product_name_entry.delete(0, tk.END)
-            if self.filter_status_combobox:
-                self.filter_status_combobox.set("")
-            logging.info("Sample filters cleared.")
-        elif self.filter_mode.get() == "batch_search" and self.find_batch_id_entry:
-            self.find_batch_id_entry.delete(0, tk.END)
-            logging.info("Batch search filter cleared.")
-        elif self.filter_mode.get() == "sample_search" and self.find_sample_id_entry: # Clear sample search field
-            self.find_sample_id_entry.delete(0, tk.END)
-            logging.info("Sample search filter cleared.")
-
-
-        # Always reload all samples (paginated) and reset all pagination states after clearing filters
-        self.load_samples_paginated(query_type='all_samples', reset=True)
-        form_window.destroy()
-        logging.info("Filters cleared and all samples reloaded.")
+import tkinter as tk
+from tkinter import filedialog, messagebox, ttk
+from datetime import datetime, timedelta
+import pandas as pd
+import barcode
+from barcode.writer import ImageWriter
+import os
+import itertools
+import threading
+from collections import Counter
+from firebase_admin import firestore
+from firebase_setup import db
+from constants import NOTIFICATION_DAYS_BEFORE, COLUMNS, SAMPLE_STATUS_OPTIONS, COUNT_POLL_MS, LIST_VIEW_FIELDS
+from delta_sync import add_tombstone, as_naive
+from event_bus import SAMPLE_CHANGED, SAMPLE_DELETED, BATCH_ADDED, BATCH_DELETED, BATCH_SAMPLE_COUNT_CHANGED
+from firestore_metrics import track_action, ui_action
+from id_generator import new_batch_id
+from page_cache import PageCache
+from count_cache import CountCache
+from page_index import PageBoundaryIndex, when_index_ready
+from sharded_counter import ShardedCounter, counter_totals
+from bulk_ops import start_bulk_operation, show_bulk_summary
+from concurrent_edits import EditBase, save_edit
+from import_pipeline import (ImportJobBusy, ImportProgress, ImportValidationError, SampleImporter, claim_import_job,
+                             create_import_job, estimate_total_rows, file_fingerprint, load_resumable_import_jobs,
+                             mark_import_job, normalize_import_chunk, read_import_chunks)
+from tkcalendar import DateEntry
+
+# --- Logging Setup ---
+import logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+# --- End Logging Setup ---
+
+# Firestore sample fields renamed to their Treeview/DataFrame column names
+SAMPLE_FIELD_COLUMNS = {
+    "firestore_doc_id": "DocID",
+    "sample_id": "DisplaySampleID",
+    "owner": "Owner",
+    "maturation_date": "MaturationDate",
+    "status": "Status",
+    "batch_id": "BatchID",
+    "creation_date": "CreationDate"
+}
+
+class UserLogic:
+    def __init__(self, root, app_instance):
+        self.root = root
+        self.app = app_instance
+        self.tree = None
+        self.status_label = None
+        self.excel_imported = False
+        self.current_selected_batch_id = None
+
+        # Initialize ttk Style
+        self.style = ttk.Style()
+        # Set a modern theme, e.g., 'clam', 'alt', 'vista', 'xpnative'
+        self.style.theme_use('clam') 
+
+        # Configure general styles
+        self.style.configure('TFrame', background='#f0f0f0')
+        self.style.configure('TLabel', font=('Helvetica', 10), background='#f0f0f0', foreground='#333333')
+        
+        # Configure different button styles
+        # Primary button (e.g., for major actions like Select Batch, Add Sample)
+        self.style.configure('Primary.TButton', font=('Helvetica', 10, 'bold'), padding=8, background='#007bff', foreground='white', relief='raised')
+        self.style.map('Primary.TButton', background=[('active', '#0056b3')]) # Darken on hover
+
+        self.style.configure('add.TButton', font=('Helvetica', 10, 'bold'), padding=8, background="#94e119", foreground='white', relief='raised')
+        self.style.map('add.TButton', background=[('active', "#0ee969")])
+
+        # Secondary button (e.g., for less critical actions like Refresh, Check Notifications)
+        self.style.configure('Secondary.TButton', font=('Helvetica', 10, 'bold'), padding=8, background='#6c757d', foreground='white', relief='raised')
+        self.style.map('Secondary.TButton', background=[('active', '#545b62')])
+
+        # Success button (e.g., for actions that add or confirm)
+        self.style.configure('Success.TButton', font=('Helvetica', 10, 'bold'), padding=8, background='#28a745', foreground='white', relief='raised')
+        self.style.map('Success.TButton', background=[('active', '#218838')])
+
+        # Warning/Info button (e.g., for filters, generate barcode)
+        self.style.configure('Info.TButton', font=('Helvetica', 10, 'bold'), padding=8, background='#17a2b8', foreground='white', relief='raised')
+        self.style.map('Info.TButton', background=[('active', '#138496')])
+
+        # Danger button (e.g., for delete actions)
+        self.style.configure('Danger.TButton', font=('Helvetica', 10, 'bold'), padding=8, background='#dc3545', foreground='white', relief='raised')
+        self.style.map('Danger.TButton', background=[('active', '#c82333')])
+
+        # Configure Entry and Combobox styles
+        self.style.configure('TEntry', padding=5)
+        self.style.configure('TCombobox', padding=5)
+        self.style.configure('TCheckbutton', background='#f0f0f0')
+        self.style.configure('TRadiobutton', background='#f0f0f0')
+
+        # Configure Treeview style
+        self.style.configure('Treeview',
+            font=('Helvetica', 9),
+            rowheight=25,
+            fieldbackground='#ffffff',
+            background='#ffffff',
+            foreground='#000000',
+            bordercolor='#cccccc',
+            lightcolor='#eeeeee',
+            darkcolor='#bbbbbb'
+        )
+        self.style.map('Treeview', background=[('selected', '#347083')]) # Blue selection
+        self.style.configure('Treeview.Heading', font=('Helvetica', 10, 'bold'), background='#e0e0e0', foreground='#333333')
+        self.style.map('Treeview.Heading', background=[('active', '#d0d0d0')])
+
+
+        # Elements for forms (will be created dynamically)
+        self.existing_batch_combobox = None
+        self.new_batch_product_name = None
+        self.new_batch_description = None
+        self.entry_sample_display_id = None
+        self.entry_owner_combobox = None
+        self.entry_maturation_date_entry = None
+        self.status_combobox = None
+
+        # Filter form elements
+        self.filter_maturation_date_var = tk.BooleanVar(value=False)
+        self.filter_creation_date_var = tk.BooleanVar(value=False)
+
+        self.filter_start_date_entry = None
+        self.filter_end_date_entry = None
+        self.filter_creation_start_date_entry = None
+        self.filter_creation_end_date_entry = None
+        self.filter_sample_id_entry = None
+        self.filter_batch_id_entry = None
+        self.filter_product_name_entry = None
+        self.filter_status_combobox = None
+
+        self.filter_mode = tk.StringVar(value="samples")
+        self.find_batch_id_entry = None
+        self.find_sample_id_entry = None # New: Entry for finding sample details
+        self.sample_filters_frame = None
+        self.batch_search_frame = None
+        self.sample_search_frame = None # New: Frame for sample search
+
+        self.maturation_date_filter_frame = None
+        self.creation_date_filter_frame = None
+
+        # Pagination variables
+        self.current_page_index = 0
+        self.samples_per_page = 100
+        self.all_samples_page_cursors = []
+        self.my_samples_page_cursors = []
+        self.batch_samples_page_cursors = []
+        self.last_loaded_query_type = None
+
+        # Recently viewed and prefetched sample pages (see _get_sample_page)
+        self.page_cache = PageCache()
+        # Pagination totals, counted in the background (see _poll_page_total)
+        self.count_cache = CountCache(db)
+        # Page boundary indexes of paginated views, built on the first page jump (see go_to_sample_page)
+        self.page_indexes = {}
+
+        # Delta sync state for the sample view currently on screen (see refresh_tree)
+        self.current_view_key = None
+        self.current_view_server_filters = []
+        self.current_view_page_bounds = None  # (first, last) creation_date of a paginated page, None if not paginated
+        self.last_sample_filters = None
+
+        # Database import running in the background (see _start_db_import)
+        self.import_progress = None
+
+        # Pagination UI elements
+        self.page_info_label = None
+        self.prev_sample_page_btn = None
+        self.next_sample_page_btn = None
+        self.goto_page_entry = None
+
+        # Buttons that need their state controlled based on view type
+        self.edit_sample_button = None
+        self.delete_sample_button = None
+
+        logging.info("UserLogic initialized.")
+
+
+    def user_dashboard(self):
+        """Displays the user dashboard with sample management features.
+        The dashboard is built and loaded once per login; showing it again keeps the view and its data."""
+        logging.info("Entering user_dashboard method.")
+        if not self.app.show_screen("user", self._build_user_dashboard):
+            logging.info("Showing cached user dashboard.")
+        # Set root background color
+        self.root.config(bg='#f0f0f0') 
+        self.root.geometry("1300x600")
+
+        # === Menu Bar ===
+        # The menu bar belongs to the window rather than the cached screen, so it is set on every show
+        menubar = tk.Menu(self.root)
+        
+        filemenu = tk.Menu(menubar, tearoff=0)
+        filemenu.add_command(label="Import Excel (Local/DB)", command=self.open_excel_import_options_form)
+        filemenu.add_command(label="Resume Interrupted Import...", command=self.open_resume_import_form)
+        filemenu.add_command(label="Export Excel (Local)", command=self.export_excel)
+        menubar.add_cascade(label="File", menu=filemenu)
+
+        loadmenu = tk.Menu(menubar, tearoff=0)
+        loadmenu.add_command(label="Load All Samples", command=lambda: self.load_samples_paginated('all_samples', reset=True))
+        loadmenu.add_command(label="Load My Samples", command=lambda: self.load_samples_paginated('my_samples', reset=True))
+        loadmenu.add_separator()
+        loadmenu.add_command(label="Load All Batches", command=self.load_all_batches_to_tree)
+        loadmenu.add_command(label="Load My Batches", command=self.load_my_batches_to_tree)
+        menubar.add_cascade(label="Load", menu=loadmenu)
+
+        debugmenu = tk.Menu(menubar, tearoff=0)
+        debugmenu.add_command(label="Firestore Usage...", command=self.app.show_metrics_panel)
+        menubar.add_cascade(label="Debug", menu=debugmenu)
+        
+        self.root.config(menu=menubar)
+
+    def _build_user_dashboard(self, screen):
+        """Creates the user dashboard widgets in screen and loads the first page of samples."""
+        self.current_view_key = None  # The Treeview is recreated below
+        self._invalidate_sample_caches()  # Samples may have changed (e.g. approvals) since the dashboard was last built
+        self.excel_imported = False
+        self.current_selected_batch_id = None
+        
+        # Reset pagination state for all views
+        self.current_page_index = 0
+        self.all_samples_page_cursors = []
+        self.my_samples_page_cursors = []
+        self.batch_samples_page_cursors = []
+        self.last_loaded_query_type = None
+
+
+        # === Top Toolbar Frame for Buttons ===
+        # Using 'Toolbar.TFrame' style for consistency
+        toolbar_top = ttk.Frame(screen, padding=(10, 10), style='TFrame')
+        toolbar_top.pack(fill="x", padx=10, pady=(10, 0)) # Add some top padding
+
+        # Use different button styles
+        ttk.Button(toolbar_top, text="Logout", command=self.app.logout, style='Secondary.TButton').pack(side=tk.RIGHT, padx=5)
+        ttk.Button(toolbar_top, text="Refresh", command=self.refresh_tree, style='Secondary.TButton').pack(side=tk.RIGHT, padx=5)
+        ttk.Button(toolbar_top, text="Load Today's Batches", command=self.load_todays_batches_to_tree, style='Secondary.TButton').pack(side=tk.LEFT, padx=5)
+        ttk.Button(toolbar_top, text="Check Notifications", command=self.check_notifications, style='Info.TButton').pack(side=tk.LEFT, padx=5)
+        self.add_sample_main_button = ttk.Button(toolbar_top, text="Select Batch", command=self.open_batch_selection_screen, style='Primary.TButton')
+        self.add_sample_main_button.pack(side=tk.LEFT, padx=5)
+        self.add_single_sample_button = ttk.Button(toolbar_top, text="Add Sample to Current Batch", command=self.open_single_sample_form, state=tk.DISABLED, style='add.TButton')
+        self.add_single_sample_button.pack(side=tk.LEFT, padx=5)
+        
+        self.edit_sample_button = ttk.Button(toolbar_top, text="Edit Sample", command=self.edit_sample, style='Info.TButton')
+        self.edit_sample_button.pack(side=tk.LEFT, padx=5)
+        self.delete_sample_button = ttk.Button(toolbar_top, text="Delete Sample", command=self.delete_sample, style='Danger.TButton')
+        self.delete_sample_button.pack(side=tk.LEFT, padx=5)
+
+
+        # === Treeview Frame for Data Display with Scrollbar ===
+        tree_frame = ttk.Frame(screen, style='TFrame', relief='sunken', borderwidth=1) # Added relief and border
+        tree_frame.pack(expand=True, fill=tk.BOTH, padx=10, pady=10)
+
+        # Treeview configured with style 'Treeview'
+        self.tree = ttk.Treeview(tree_frame, columns=["DocID", "DisplaySampleID", "Owner", "MaturationDate", "Status", "BatchID", "CreationDate", "ProductName", "Description", "SubmissionDate", "NumberOfSamples"], show='headings', style='Treeview', selectmode="extended")
+
+        tree_scrollbar = ttk.Scrollbar(tree_frame, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=tree_scrollbar.set)
+
+        self.tree.pack(side=tk.LEFT, expand=True, fill=tk.BOTH)
+        tree_scrollbar.pack(side=tk.RIGHT, fill='y')
+
+        self.tree.heading("DocID", text="Doc ID")
+        self.tree.column("DocID", width=0, stretch=tk.NO)
+
+        self.tree.heading("DisplaySampleID", text="Sample ID")
+        self.tree.column("DisplaySampleID", width=100, anchor="center")
+
+        self.tree.heading("Owner", text="Sample Owner")
+        self.tree.column("Owner", width=100, anchor="center")
+
+        self.tree.heading("MaturationDate", text="Maturation Date")
+        self.tree.column("MaturationDate", width=120, anchor="center")
+
+        self.tree.heading("Status", text="Status")
+        self.tree.column("Status", width=80, anchor="center")
+
+        self.tree.heading("BatchID", text="Batch ID")
+        self.tree.column("BatchID", width=120, anchor="center")
+
+        self.tree.heading("CreationDate", text="Creation Date")
+        self.tree.column("CreationDate", width=120, anchor="center")
+
+        self.tree.heading("ProductName", text="Product Name")
+        self.tree.column("ProductName", width=0, stretch=tk.NO)
+
+        self.tree.heading("Description", text="Description")
+        self.tree.column("Description", width=0, stretch=tk.NO)
+
+        self.tree.heading("SubmissionDate", text="Submission Date")
+        self.tree.column("SubmissionDate", width=0, stretch=tk.NO)
+
+        self.tree.heading("NumberOfSamples", text="Num Samples")
+        self.tree.column("NumberOfSamples", width=0, stretch=tk.NO)
+
+        self.tree.bind("<Double-1>", self._on_tree_double_click)
+        # Changes committed from other views (e.g. an admin approving a sample) patch the rows shown here
+        self.app.events.subscribe(SAMPLE_CHANGED, self.tree, self._on_sample_changed)
+        self.app.events.subscribe(SAMPLE_DELETED, self.tree, self._on_sample_deleted)
+        self.app.events.subscribe(BATCH_SAMPLE_COUNT_CHANGED, self.tree, self._on_batch_sample_count_changed)
+        self.app.events.subscribe(BATCH_DELETED, self.tree, self._on_batch_deleted)
+
+        # === Status Bar ===
+        self.status_label = ttk.Label(screen, text="Load samples from DB or import Excel.", anchor='w', 
+                                     font=('Helvetica', 9), background='#e0e0e0', foreground='#333333', relief=tk.SUNKEN, borderwidth=1)
+        self.status_label.pack(fill=tk.X, padx=10, pady=(5, 10)) # Add some bottom padding
+
+        # === Bottom Toolbar Frame for Generate Barcode, Pagination, and Filter Button ===
+        bottom_toolbar = ttk.Frame(screen, padding=(10, 5), style='TFrame')
+        bottom_toolbar.pack(fill="x", padx=10, pady=(0, 10), side=tk.BOTTOM)
+        
+        ttk.Button(bottom_toolbar, text="Generate Barcode", command=self.generate_barcode, style='Info.TButton').pack(side=tk.LEFT, padx=5)
+
+        pagination_frame = ttk.Frame(bottom_toolbar, style='TFrame')
+        pagination_frame.pack(side=tk.LEFT, expand=True)
+
+        self.prev_sample_page_btn = ttk.Button(pagination_frame, text="Previous", command=lambda: self.navigate_samples_page('prev'), state=tk.DISABLED, style='Secondary.TButton')
+        self.prev_sample_page_btn.pack(side=tk.LEFT, padx=2)
+
+        self.page_info_label = ttk.Label(pagination_frame, text="Page 1 of 1", style='TLabel')
+        self.page_info_label.pack(side=tk.LEFT, padx=5)
+
+        self.next_sample_page_btn = ttk.Button(pagination_frame, text="Next", command=lambda: self.navigate_samples_page('next'), state=tk.DISABLED, style='Secondary.TButton')
+        self.next_sample_page_btn.pack(side=tk.LEFT, padx=2)
+
+        self.goto_page_entry = ttk.Entry(pagination_frame, width=5)
+        self.goto_page_entry.pack(side=tk.LEFT, padx=(10, 2))
+        self.goto_page_entry.bind("<Return>", lambda event: self.go_to_sample_page())
+        ttk.Button(pagination_frame, text="Go to Page", command=self.go_to_sample_page, style='Secondary.TButton').pack(side=tk.LEFT, padx=2)
+        
+        ttk.Button(bottom_toolbar, text="Filter Samples/Find Batch", command=self.open_filter_form, style='Info.TButton').pack(side=tk.RIGHT, padx=5)
+
+        self.load_samples_paginated(query_type='all_samples', reset=True)
+        logging.info("User dashboard loaded.")
+
+    @ui_action("open_details")
+    def _on_tree_double_click(self, event):
+        """Handles double-click events on the Treeview to load batch samples."""
+        logging.info("Treeview double-click event detected.")
+        item_id = self.tree.identify_row(event.y)
+        if not item_id:
+            return
+
+        item_values = self.tree.item(item_id, 'values')
+        
+        if self.last_loaded_query_type in ['batches', 'my_batches', 'todays_batches']:
+            # Check if BatchID is present in Treeview values (index 5) and is valid
+            if len(item_values) > 1 and item_values[5] and item_values[5] != 'N/A':
+                batch_id_from_tree = item_values[5]
+                logging.info(f"Double-clicked on batch with ID: {batch_id_from_tree}")
+                self.current_selected_batch_id = batch_id_from_tree
+                self.load_samples_for_current_batch(reset=True)
+            else:
+                logging.warning("Double-clicked item is not recognized as a valid batch.")
+                messagebox.showwarning("Invalid Item", "Please double-click on a valid batch row.")
+        else:
+            logging.info("Double-click ignored as current view is not batches or is a local/filtered sample view.")
+
+
+    def load_samples_to_treeview(self, samples_list, is_pagination_load=False, current_page=1, total_pages=1):
+        """Populates the Treeview widget with the given list of samples.
+        Adjusts column visibility based on context (samples vs batches).
+        total_pages is None while the view's count is still being counted; Next then follows whether the page is full."""
+        logging.info(f"Populating samples treeview. Pagination Load: {is_pagination_load}, Current Page: {current_page}, Total Pages: {total_pages}")
+        # Clear existing items for a fresh load
+        self.tree.delete(*self.tree.get_children())
+        # Reset DataFrame for new data
+        self.app.data = pd.DataFrame(columns=COLUMNS + ["DocID"])
+        self.current_view_key = None  # Loaders that support delta refresh prime the view after this call
+
+        # Define columns for samples and batches for visibility control
+        sample_cols = ["DisplaySampleID", "Owner", "MaturationDate", "Status", "BatchID", "CreationDate"]
+        batch_cols = ["ProductName", "Description", "SubmissionDate", "NumberOfSamples"]
+
+        # Set sample-specific columns visible
+        for col in sample_cols:
+            self.tree.column(col, width=100 if col != "MaturationDate" else 120, stretch=tk.YES)
+        # Hide batch-specific columns
+        for col in batch_cols:
+            self.tree.column(col, width=0, stretch=tk.NO)
+
+        # "..." is shown until the background count arrives (see _poll_page_total)
+        pages_text = total_pages if total_pages is not None else "..."
+
+        if samples_list:
+            df = pd.DataFrame(samples_list)
+            # Rename columns for consistent display in Treeview
+            df.rename(columns=SAMPLE_FIELD_COLUMNS, inplace=True)
+
+            # Add missing expected columns with None to ensure DataFrame structure
+            for col in ["DocID", "DisplaySampleID", "Owner", "MaturationDate", "Status", "BatchID", "CreationDate"]:
+                if col not in df.columns:
+                    df[col] = None
+            
+            self.app.data = df
+            # Insert data into the Treeview, keyed by Firestore document ID so delta refreshes can update rows in place
+            for index, row in df.iterrows():
+                doc_id = row.get('DocID')
+                iid = doc_id if isinstance(doc_id, str) and doc_id and not self.tree.exists(doc_id) else None
+                self.tree.insert("", tk.END, iid=iid, values=self._sample_tree_values(row))
+            
+            self.status_label.config(text=f"Loaded {len(self.app.data)} samples. Page {current_page} of {pages_text}.")
+            self.page_info_label.config(text=f"Page {current_page} of {pages_text}")
+        else:
+            self.status_label.config(text="No samples found.")
+            self.page_info_label.config(text="Page 0 of 0")
+            logging.info("No samples to display.")
+
+        # Update pagination button states based on current page and total pages
+        if total_pages is None:
+            has_next_page = len(samples_list) == self.samples_per_page
+        else:
+            has_next_page = current_page < total_pages
+        self.prev_sample_page_btn.config(state=tk.NORMAL if current_page > 1 else tk.DISABLED)
+        self.next_sample_page_btn.config(state=tk.NORMAL if has_next_page else tk.DISABLED)
+        
+        # Enable Edit and Delete Sample buttons when samples are displayed
+        if self.edit_sample_button:
+            self.edit_sample_button.config(state=tk.NORMAL)
+        if self.delete_sample_button:
+            self.delete_sample_button.config(state=tk.NORMAL)
+
+        logging.info("Samples treeview populated and pagination buttons updated.")
+
+    def _sample_tree_values(self, row):
+        """Formats a sample row (DataFrame row or dict with Treeview column names) into Treeview values."""
+        mat_date_str = "N/A"
+        creation_date_str = "N/A"
+
+        mat_date = row.get('MaturationDate')
+        # Robustly convert maturation date to string format
+        if mat_date is not None:
+            if hasattr(mat_date, 'to_datetime'):
+                mat_date_dt = mat_date.to_datetime()
+            elif isinstance(mat_date, datetime):
+                mat_date_dt = mat_date
+            else:
+                try:
+                    mat_date_dt = datetime.strptime(str(mat_date).split(' ')[0], "%Y-%m-%d")
+                except ValueError:
+                    mat_date_dt = None
+            if mat_date_dt:
+                mat_date_str = mat_date_dt.strftime("%Y-%m-%d")
+
+        creation_date = row.get('CreationDate')
+        # Robustly convert creation date to string format
+        if creation_date is not None:
+            if hasattr(creation_date, 'to_datetime'):
+                creation_date_dt = creation_date.to_datetime()
+            elif isinstance(creation_date, datetime):
+                creation_date_dt = creation_date
+            else:
+                try:
+                    creation_date_dt = datetime.strptime(str(creation_date).split(' ')[0], "%Y-%m-%d")
+                except ValueError:
+                    creation_date_dt = None
+            if creation_date_dt:
+                creation_date_str = creation_date_dt.strftime("%Y-%m-%d")
+
+        return (row.get('DocID', ''),
+                row.get('DisplaySampleID', ''),
+                row.get('Owner', ''),
+                mat_date_str,
+                row.get('Status', ''),
+                row.get('BatchID', 'N/A'),
+                creation_date_str,
+                '', '', '', '') # Empty values for hidden batch columns
+
+    def load_batches_to_treeview(self, batches_list):
+        """Populates the Treeview widget with the given list of batches.
+        Adjusts column visibility for batch display."""
+        logging.info(f"Populating batches treeview with {len(batches_list)} batches.")
+        self.tree.delete(*self.tree.get_children())
+        self.app.data = pd.DataFrame()
+
+        # Define columns for samples and batches for visibility control
+        sample_cols = ["DisplaySampleID", "Owner", "MaturationDate", "Status", "CreationDate"]
+        batch_cols = ["BatchID", "ProductName", "Description", "SubmissionDate", "NumberOfSamples"]
+
+        # Hide sample-specific columns
+        for col in sample_cols:
+            self.tree.column(col, width=0, stretch=tk.NO)
+        # Set batch-specific columns visible and configure widths
+        for col in batch_cols:
+            self.tree.column(col, width=100, stretch=tk.YES)
+        self.tree.column("BatchID", width=150, stretch=tk.YES)
+        self.tree.column("ProductName", width=120, stretch=tk.YES)
+        self.tree.column("Description", width=200, stretch=tk.YES)
+        self.tree.column("SubmissionDate", width=120, anchor="center", stretch=tk.YES)
+        self.tree.column("NumberOfSamples", width=100, anchor="center", stretch=tk.YES)
+
+
+        if batches_list:
+            # number_of_samples is sharded; fold each batch's shards into the value shown
+            sample_counts = counter_totals(db, "batches", {b['firestore_doc_id']: b for b in batches_list}, "number_of_samples")
+            for batch in batches_list:
+                batch['number_of_samples'] = sample_counts[batch['firestore_doc_id']]
+            df = pd.DataFrame(batches_list)
+            df.rename(columns={
+                "firestore_doc_id": "DocID",
+                "batch_id": "BatchID",
+                "product_name": "ProductName",
+                "description": "Description",
+                "submission_date": "SubmissionDate",
+                "number_of_samples": "NumberOfSamples"
+            }, inplace=True)
+
+            self.app.data = df
+
+            for index, row in self.app.data.iterrows():
+                submission_date_str = "N/A"
+                sub_date = row.get('SubmissionDate')
+                # Robustly convert submission date to string format
+                if sub_date is not None:
+                    if hasattr(sub_date, 'to_datetime'):
+                        sub_date_dt = sub_date.to_datetime()
+                    elif isinstance(sub_date, datetime):
+                        sub_date_dt = sub_date
+                    else:
+                        try:
+                            sub_date_dt = datetime.strptime(str(sub_date).split(' ')[0], "%Y-%m-%d")
+                        except ValueError:
+                            sub_date_dt = None
+                    if sub_date_dt:
+                        submission_date_str = sub_date_dt.strftime("%Y-%m-%d")
+
+                self.tree.insert("", tk.END,
+                                 values=(row.get('DocID', ''),
+                                         '', '', '', '', # Empty values for hidden sample columns
+                                         row.get('BatchID', 'N/A'),
+                                         '', # Empty for sample CreationDate
+                                         row.get('ProductName', 'N/A'),
+                                         row.get('Description', 'N/A'),
+                                         submission_date_str,
+                                         row.get('NumberOfSamples', 0)))
+            self.status_label.config(text=f"Loaded {len(self.app.data)} batches.")
+        else:
+            self.status_label.config(text="No batches found.")
+
+        # Disable sample-specific buttons and pagination controls when showing batches
+        self.add_single_sample_button.config(state=tk.DISABLED)
+        self.prev_sample_page_btn.config(state=tk.DISABLED)
+        self.next_sample_page_btn.config(state=tk.DISABLED)
+        self.page_info_label.config(text="Page 0 of 0")
+
+        # Disable Edit and Delete Sample buttons when batches are displayed
+        if self.edit_sample_button:
+            self.edit_sample_button.config(state=tk.DISABLED)
+        if self.delete_sample_button:
+            self.delete_sample_button.config(state=tk.DISABLED)
+
+        logging.info("Batches treeview populated.")
+
+    @ui_action("navigate_samples_page({direction})")
+    def navigate_samples_page(self, direction):
+        """Navigates to the previous or next page of samples based on the current query type."""
+        logging.info(f"Navigating samples page: {direction}, current_page_index: {self.current_page_index}")
+        if self.last_loaded_query_type == 'all_samples':
+            if direction == 'next':
+                self.current_page_index += 1
+            elif direction == 'prev':
+                self.current_page_index -= 1
+            self.load_samples_paginated('all_samples', reset=False)
+        elif self.last_loaded_query_type == 'my_samples':
+            if direction == 'next':
+                self.current_page_index += 1
+            elif direction == 'prev':
+                self.current_page_index -= 1
+            self.load_samples_paginated('my_samples', reset=False)
+        elif self.last_loaded_query_type == 'current_batch_samples':
+            if direction == 'next':
+                self.current_page_index += 1
+            elif direction == 'prev':
+                self.current_page_index -= 1
+            self.load_samples_for_current_batch(reset=False)
+        else:
+            messagebox.showwarning("Navigation Error", "Cannot navigate pages for the current view type. Please load all samples or my samples first.")
+            logging.warning("Attempted page navigation on unsupported view type.")
+
+
+    def _page_cursors(self, query_type):
+        return {'all_samples': self.all_samples_page_cursors,
+                'my_samples': self.my_samples_page_cursors,
+                'current_batch_samples': self.batch_samples_page_cursors}[query_type]
+
+    def _show_sample_page(self, query_type, page_index):
+        self.current_page_index = page_index
+        if query_type == 'current_batch_samples':
+            self.load_samples_for_current_batch(reset=False)
+        else:
+            self.load_samples_paginated(query_type, reset=False)
+
+    @ui_action()
+    def go_to_sample_page(self):
+        """Jumps to the page number entered next to the pagination buttons.
+        Pages whose cursor is not known yet are reached through the view's page boundary index, built in the
+        background on the first jump, so any page loads with a single query."""
+        query_type = self.last_loaded_query_type
+        if query_type not in ('all_samples', 'my_samples', 'current_batch_samples') or not self.current_view_key:
+            messagebox.showwarning("Navigation Error", "Please load all samples, my samples or a batch's samples first.")
+            logging.warning("Attempted page jump on unsupported view type.")
+            return
+        try:
+            page_number = int(self.goto_page_entry.get().strip())
+        except ValueError:
+            messagebox.showerror("Error", "Please enter a page number.")
+            return
+        total_pages = self._total_sample_pages(self.count_cache.peek("samples", self.current_view_server_filters))
+        if page_number < 1 or (total_pages is not None and page_number > total_pages):
+            messagebox.showerror("Error", f"Please enter a page number between 1 and {total_pages or 1}.")
+            return
+
+        if page_number - 1 <= len(self._page_cursors(query_type)):
+            # The cursor for this page is already known from paging through the pages before it
+            self._show_sample_page(query_type, page_number - 1)
+            return
+
+        view_key = self.current_view_key
+        index = self.page_indexes.get(view_key)
+        if index is None:
+            query = db.collection("samples")
+            for field, op, value in self.current_view_server_filters:
+                query = query.where(field, op, value)
+            index = self.page_indexes[view_key] = PageBoundaryIndex(query, self.samples_per_page)
+            index.build_async("build_sample_page_index")
+        if not index.ready:
+            self.status_label.config(text=f"Indexing pages to jump to page {page_number}...")
+
+        def on_error(error):
+            self.page_indexes.pop(view_key, None)
+            messagebox.showerror("Error", f"Failed to index pages: {error}")
+        when_index_ready(self.root, index, lambda: self._jump_with_page_index(view_key, index, page_number), on_error)
+
+    def _jump_with_page_index(self, view_key, index, page_number):
+        if self.current_view_key != view_key:
+            return  # Another view was loaded while the index was being built
+        if page_number > index.page_count:
+            messagebox.showerror("Error", f"Please enter a page number between 1 and {index.page_count}.")
+            return
+        self._page_cursors(view_key[1])[:] = index.boundaries
+        logging.info(f"Jumping to page {page_number} of {view_key[1]} using the page index.")
+        self._show_sample_page(view_key[1], page_number - 1)
+
+    @ui_action("load_samples_paginated({query_type})")
+    def load_samples_paginated(self, query_type, reset=True):
+        """
+        Loads samples from Firestore with cursor-based pagination.
+        query_type: 'all_samples' or 'my_samples'
+        reset: If True, resets to the first page. If False, loads next/previous.
+        """
+        logging.info(f"Loading samples paginated. Query Type: {query_type}, Reset: {reset}")
+        try:
+            # If resetting, clear all relevant pagination states
+            if reset:
+                self.current_page_index = 0
+                self.all_samples_page_cursors = []
+                self.my_samples_page_cursors = []
+                self.batch_samples_page_cursors = []
+
+            if query_type == 'all_samples':
+                self.last_loaded_query_type = 'all_samples'
+                server_filters = []
+                cursors = self.all_samples_page_cursors
+
+            elif query_type == 'my_samples':
+                # Check if user is logged in
+                if not self.app.current_user or not self.app.current_user.get('employee_id'):
+                    messagebox.showwarning("Warning", "User not logged in or employee ID not found.")
+                    self.status_label.config(text="Cannot load my samples: User not identified.")
+                    logging.warning("Attempted to load 'my_samples' without a logged-in user or employee ID.")
+                    # Disable pagination buttons on error
+                    self.prev_sample_page_btn.config(state=tk.DISABLED)
+                    self.next_sample_page_btn.config(state=tk.DISABLED)
+                    self.page_info_label.config(text="Page 0 of 0")
+                    return
+                
+                self.last_loaded_query_type = 'my_samples'
+                # Samples submitted by the current user
+                server_filters = [("submitted_by_employee_id", "==", self.app.current_user['employee_id'])]
+                cursors = self.my_samples_page_cursors
+            else:
+                logging.error(f"Invalid query_type passed to load_samples_paginated: {query_type}")
+                # Disable pagination buttons on invalid query type
+                self.prev_sample_page_btn.config(state=tk.DISABLED)
+                self.next_sample_page_btn.config(state=tk.DISABLED)
+                self.page_info_label.config(text="Page 0 of 0")
+                return
+
+            view_key = ("samples", query_type, tuple(server_filters))
+            logging.info(f"Loading page {self.current_page_index + 1} of {query_type}. Cursor count: {len(cursors)}")
+            page = self._get_sample_page(view_key, server_filters, cursors, reset)
+            total_pages = self._total_sample_pages(self.count_cache.get("samples", server_filters))
+            logging.info(f"Total pages for {query_type}: {total_pages if total_pages is not None else 'counting'}")
+
+            self.load_samples_to_treeview(page['records'], is_pagination_load=True, current_page=self.current_page_index + 1, total_pages=total_pages)
+            self._prime_sample_view(view_key, server_filters, page['marks'], page['records'], paginated=True)
+            self._poll_page_total(view_key, server_filters, self.current_page_index)
+
+        except Exception as e:
+            logging.error(f"Failed to load samples paginated: {e}", exc_info=True)
+            messagebox.showerror("Error", f"Failed to load samples: {e}")
+            self.status_label.config(text="Failed to load samples.")
+            # Ensure buttons are disabled on error
+            self.prev_sample_page_btn.config(state=tk.DISABLED)
+            self.next_sample_page_btn.config(state=tk.DISABLED)
+            self.page_info_label.config(text="Page 0 of 0")
+
+    def _get_sample_page(self, view_key, server_filters, cursors, reset=False):
+        """Returns the current page of a paginated sample view as a dict with records, last_doc (the cursor for
+        the next page, None on the last page) and marks (delta sync marks taken before the page was read). Pages come from the page cache when
+        possible; the page after it is prefetched in the background. The view's total count is not read here
+        (see count_cache.py), so a page turn never waits for a count aggregation."""
+        if reset:
+            self.page_cache.invalidate(view_key)
+        page_index = self.current_page_index
+        page = self.page_cache.get(view_key, page_index)
+        if page is None:
+            # Apply cursor for pagination if not on the first page
+            cursor = cursors[page_index - 1] if 0 < page_index <= len(cursors) else None
+            page = self._fetch_sample_page(server_filters, cursor)
+            self.page_cache.put(view_key, page_index, page)
+            logging.info(f"Fetched {len(page['records'])} documents for page {page_index + 1}.")
+        else:
+            logging.info(f"Page {page_index + 1} served from the page cache ({len(page['records'])} samples).")
+
+        # Store cursor for the next page if a full page was fetched
+        if page['last_doc'] is not None:
+            if len(cursors) == page_index:
+                cursors.append(page['last_doc'])
+            elif len(cursors) > page_index:
+                cursors[page_index] = page['last_doc']
+        elif page_index > 0:
+            logging.info(f"Reached end of {view_key[1]} data during pagination.")
+
+        total_pages = self._total_sample_pages(self.count_cache.peek("samples", server_filters))
+        if page['last_doc'] is not None and (total_pages is None or page_index + 1 < total_pages):
+            def fetch_next_page(cursor=page['last_doc']):
+                with track_action("prefetch_sample_page"):
+                    return self._fetch_sample_page(server_filters, cursor)
+            self.page_cache.prefetch(view_key, page_index + 1, fetch_next_page)
+        return page
+
+    def _fetch_sample_page(self, server_filters, cursor=None):
+        """Queries one page of samples ordered by creation_date, then document ID (random auto-IDs, so samples
+        created in the same instant still have a stable order), after cursor. Safe to call off the Tk thread."""
+        marks = self.app.delta_sync.server_marks("samples")
+        query = db.collection("samples")
+        for field, op, value in server_filters:
+            query = query.where(field, op, value)
+        page_query = query.order_by("creation_date").order_by("__name__") \
+            .select(LIST_VIEW_FIELDS["sample_rows"]).limit(self.samples_per_page)
+        if cursor is not None:
+            page_query = page_query.start_after(cursor)
+        docs = page_query.get()
+        return {
+            "records": [self._sample_snapshot_to_record(doc) for doc in docs],
+            "last_doc": docs[-1] if len(docs) == self.samples_per_page else None,
+            "marks": marks,
+        }
+
+    def _total_sample_pages(self, total_count):
+        """Number of pages for total_count samples; None while the count is not known yet."""
+        if total_count is None:
+            return None
+        return (total_count + self.samples_per_page - 1) // self.samples_per_page if total_count > 0 else 1
+
+    def _poll_page_total(self, view_key, server_filters, page_index):
+        """Fills in the page total and Next button once the view's count has been (re)counted in the background."""
+        if self.current_view_key != view_key or self.current_page_index != page_index:
+            return  # Another view or page is on screen now
+        if self.count_cache.is_pending("samples", server_filters):
+            self.root.after(COUNT_POLL_MS, lambda: self._poll_page_total(view_key, server_filters, page_index))
+            return
+        total_pages = self._total_sample_pages(self.count_cache.peek("samples", server_filters))
+        if total_pages is None or not self.tree.get_children():
+            return
+        self.page_info_label.config(text=f"Page {page_index + 1} of {total_pages}")
+        self.next_sample_page_btn.config(state=tk.NORMAL if page_index + 1 < total_pages else tk.DISABLED)
+
+    def _invalidate_sample_caches(self, creation_dates=None):
+        """Drops cached sample pages and marks sample counts stale, e.g. after a write. creation_dates are those of
+        the samples added or deleted: page indexes keep their boundaries before the earliest one. Pass [] for edits,
+        which don't move samples between pages, and None when it isn't known, which drops every boundary."""
+        self.page_cache.invalidate()
+        self.count_cache.invalidate("samples")
+        if creation_dates is not None and not creation_dates:
+            return
+        earliest = min(as_naive(date) for date in creation_dates) if creation_dates else None
+        for index in self.page_indexes.values():
+            index.drop_from(earliest)
+
+    def _sample_creation_dates(self, doc_ids):
+        """Returns the creation dates of samples shown in the view, or None if any of them isn't loaded."""
+        data = self.app.data
+        if data is None or 'DocID' not in data.columns or 'CreationDate' not in data.columns:
+            return None
+        dates = dict(zip(data['DocID'], data['CreationDate']))
+        found = [dates.get(doc_id) for doc_id in doc_ids]
+        return None if any(pd.isna(date) or not isinstance(date, datetime) for date in found) else found
+
+    def _sample_snapshot_to_record(self, doc):
+        """Converts a sample DocumentSnapshot into the record dict used by the sample loaders."""
+        data = doc.to_dict()
+        data['firestore_doc_id'] = doc.id
+        # Convert Firestore Timestamp objects to datetime objects
+        for field in ('maturation_date', 'creation_date', 'last_updated_timestamp'):
+            if data.get(field) and hasattr(data[field], 'to_datetime'):
+                data[field] = data[field].to_datetime()
+        return data
+
+    def _prime_sample_view(self, view_key, server_filters, marks, samples_list, paginated):
+        """Remembers the sample view just loaded so refresh_tree can fetch only what changed since marks.
+        server_filters are the equality filters of the view on immutable fields (owner employee ID, batch ID)."""
+        self.current_view_key = view_key
+        self.current_view_server_filters = server_filters
+        if paginated:
+            # A page covers a creation_date range; the last page (not full) is open-ended.
+            first = samples_list[0].get('creation_date') if samples_list and self.current_page_index > 0 else None
+            last = samples_list[-1].get('creation_date') if len(samples_list) == self.samples_per_page else None
+            self.current_view_page_bounds = (as_naive(first), as_naive(last))
+        else:
+            self.current_view_page_bounds = None
+        self.app.delta_sync.prime(view_key, marks)
+
+    def _sample_ids_matching_current_view(self, records):
+        """Returns the doc IDs among changed sample records that belong in the view currently on screen."""
+        if not records:
+            return set()
+        if self.current_view_page_bounds is not None:
+            first, last = self.current_view_page_bounds
+            matching = set()
+            for record in records:
+                creation_date = as_naive(record.get('creation_date'))
+                if not isinstance(creation_date, datetime):
+                    continue
+                if (first is None or creation_date >= first) and (last is None or creation_date <= last):
+                    matching.add(record['firestore_doc_id'])
+            return matching
+        df = self._filter_samples_dataframe(pd.DataFrame(records), self.last_sample_filters or {})
+        return set(df['firestore_doc_id']) if not df.empty else set()
+
+    def _delta_refresh_sample_view(self):
+        """Merges samples changed or deleted since the view was loaded into the DataFrame and Treeview.
+        Returns False when the view has no delta sync mark or must be reloaded in full."""
+        view_key = self.current_view_key
+        if not view_key or not self.app.delta_sync.has_mark(view_key) or self.app.data is None:
+            return False
+        try:
+            changed, deleted_ids = self.app.delta_sync.fetch_changes(view_key, "samples", self.current_view_server_filters,
+                                                                     field_paths=LIST_VIEW_FIELDS["sample_rows"])
+        except Exception as e:
+            logging.warning(f"Delta refresh failed for {view_key}, falling back to a full reload: {e}")
+            return False
+
+        records = [self._sample_snapshot_to_record(doc) for doc in changed]
+        if records or deleted_ids:
+            # Cached pages may hold the changed samples. Samples not on screen may be new, which moves the page
+            # boundaries after them; edits of rows on screen don't
+            deleted_dates = self._sample_creation_dates(deleted_ids)
+            moved_dates = [record.get('creation_date') for record in records
+                           if not self.tree.exists(record['firestore_doc_id'])]
+            self._invalidate_sample_caches(None if deleted_dates is None or None in moved_dates
+                                           else deleted_dates + moved_dates)
+        matching_ids = self._sample_ids_matching_current_view(records)
+        for doc_id in deleted_ids:
+            self._remove_sample_row(doc_id)
+        for record in records:
+            doc_id = record['firestore_doc_id']
+            if doc_id in matching_ids:
+                if self.tree.exists(doc_id):
+                    self._update_sample_row(record)
+                elif self.current_view_page_bounds is not None:
+                    # A new sample falls inside this page and shifts its rows; reload the page instead.
+                    logging.info(f"Sample {doc_id} was added within the current page; reloading the page.")
+                    return False
+                else:
+                    self._insert_sample_row(record)
+            elif self.tree.exists(doc_id):
+                self._remove_sample_row(doc_id)  # No longer matches the view (e.g. status changed)
+        logging.info(f"Delta refresh merged {len(records)} changed and {len(deleted_ids)} deleted samples.")
+        return True
+
+    def _update_sample_row(self, record):
+        """Updates a sample already shown in the view with its latest field values."""
+        # SERVER_TIMESTAMP values are filled in by Firestore; the row keeps its old value until a refresh reads it
+        row = {SAMPLE_FIELD_COLUMNS.get(field, field): value for field, value in record.items()
+               if value is not firestore.SERVER_TIMESTAMP}
+        row_indexes = self.app.data.index[self.app.data['DocID'] == row['DocID']]
+        for column, value in row.items():
+            if column not in self.app.data.columns:
+                self.app.data[column] = None
+            column_tz = getattr(self.app.data[column].dtype, 'tz', None)
+            if column_tz is not None and isinstance(value, datetime) and value.tzinfo is None:
+                value = pd.Timestamp(value).tz_localize(column_tz)  # Firestore stores naive datetimes as UTC
+            for index in row_indexes:
+                self.app.data.at[index, column] = value
+        shown_row = self.app.data.loc[row_indexes[0]].to_dict() if len(row_indexes) else row
+        self.tree.item(row['DocID'], values=self._sample_tree_values(shown_row))
+
+    def _insert_sample_row(self, record):
+        """Appends a sample that newly matches the view to the DataFrame and Treeview."""
+        row = {SAMPLE_FIELD_COLUMNS.get(field, field): value for field, value in record.items()}
+        new_rows = pd.DataFrame([row])
+        self.app.data = new_rows if self.app.data.empty else pd.concat([self.app.data, new_rows], ignore_index=True)
+        self.tree.insert("", tk.END, iid=row['DocID'], values=self._sample_tree_values(row))
+
+    def _remove_sample_row(self, doc_id):
+        """Drops a deleted (or no longer matching) sample from the DataFrame and Treeview."""
+        if self.app.data is not None and 'DocID' in self.app.data.columns:
+            self.app.data = self.app.data[self.app.data['DocID'] != doc_id].reset_index(drop=True)
+        if self.tree.exists(doc_id):
+            self.tree.delete(doc_id)
+
+    def _patch_sample_row_optimistically(self, doc_id, changes):
+        """Applies changes ({field: value}) to a sample shown in the view before they are written.
+        Returns a function that puts the row back as it was, for when the write fails."""
+        if self.app.data is None or 'DocID' not in self.app.data.columns or not self.tree.exists(doc_id):
+            return lambda: None
+        previous_data = self.app.data.copy()
+        previous_values = self.tree.item(doc_id, 'values')
+        self._update_sample_row(dict(changes, firestore_doc_id=doc_id))
+
+        def rollback():
+            self.app.data = previous_data
+            if self.tree.exists(doc_id):
+                self.tree.item(doc_id, values=previous_values)
+        return rollback
+
+    def _remove_sample_row_optimistically(self, doc_id):
+        """Removes a sample from the view before its delete is written.
+        Returns a function that puts the row back in place, for when the write fails."""
+        previous_data = self.app.data
+        tree_index = self.tree.index(doc_id) if self.tree.exists(doc_id) else None
+        previous_values = self.tree.item(doc_id, 'values') if tree_index is not None else None
+        self._remove_sample_row(doc_id)
+
+        def rollback():
+            self.app.data = previous_data
+            if tree_index is not None and not self.tree.exists(doc_id):
+                self.tree.insert("", tree_index, iid=doc_id, values=previous_values)
+        return rollback
+
+    def _on_sample_changed(self, doc_id, changes):
+        if self.app.data is not None and 'DocID' in self.app.data.columns and self.tree.exists(doc_id):
+            self._update_sample_row(dict(changes, firestore_doc_id=doc_id))
+
+    def _on_sample_deleted(self, doc_id):
+        self._remove_sample_row(doc_id)
+
+    def _on_batch_deleted(self, batch_doc_id):
+        if self.last_loaded_query_type not in ['batches', 'my_batches', 'todays_batches']:
+            return
+        for item_id in self.tree.get_children():
+            if self.tree.set(item_id, "DocID") == batch_doc_id:
+                self.tree.delete(item_id)
+        self.app.data = self.app.data[self.app.data['DocID'] != batch_doc_id].reset_index(drop=True)
+
+    def _show_added_sample(self, record):
+        """Adds a sample just created here to the view on screen if it belongs there: a sample view whose server
+        filters it matches, on the page its creation_date falls in (new samples sort after the full pages)."""
+        if self.last_loaded_query_type not in ['all_samples', 'my_samples', 'current_batch_samples', 'filtered_samples'] \
+                or self.app.data is None or self.tree is None or not self.tree.winfo_exists():
+            return
+        if any(record.get(field) != value for field, _, value in self.current_view_server_filters or []):
+            return
+        if record['firestore_doc_id'] in self._sample_ids_matching_current_view([record]):
+            self._insert_sample_row(record)
+
+    def _on_batch_sample_count_changed(self, batch_doc_id, delta):
+        if self.last_loaded_query_type not in ['batches', 'my_batches', 'todays_batches']:
+            return
+        for item_id in self.tree.get_children():
+            if self.tree.set(item_id, "DocID") == batch_doc_id:
+                count = int(self.tree.set(item_id, "NumberOfSamples") or 0) + delta
+                self.tree.set(item_id, "NumberOfSamples", count)
+                self.app.data.loc[self.app.data['DocID'] == batch_doc_id, 'NumberOfSamples'] = count
+
+    @ui_action()
+    def load_all_batches_to_tree(self):
+        """Loads all batches from Firestore and displays them in the Treeview."""
+        logging.info("Loading all batches to tree.")
+        # Reset sample pagination states when loading batches
+        self.current_page_index = 0
+        self.all_samples_page_cursors = []
+        self.my_samples_page_cursors = []
+        self.batch_samples_page_cursors = []
+
+        self.last_loaded_query_type = 'batches'
+
+        try:
+            batches_ref = db.collection("batches")
+            batches_list = []
+            for batch_doc in batches_ref.select(LIST_VIEW_FIELDS["batch_rows"]).get():
+                data = batch_doc.to_dict()
+                data['firestore_doc_id'] = batch_doc.id
+                # Convert Firestore Timestamp to datetime object
+                if data.get('submission_date') and hasattr(data['submission_date'], 'to_datetime'):
+                    data['submission_date'] = data['submission_date'].to_datetime()
+                batches_list.append(data)
+            self.load_batches_to_treeview(batches_list)
+            logging.info(f"Successfully loaded {len(batches_list)} all batches.")
+        except Exception as e:
+            logging.error(f"Failed to load all batches: {e}", exc_info=True)
+            messagebox.showerror("Error", f"Failed to load all batches: {e}")
+            self.status_label.config(text="Failed to load all batches.")
+
+    @ui_action()
+    def load_my_batches_to_tree(self):
+        """Loads batches created by the current user from Firestore."""
+        logging.info("Loading my batches to tree.")
+        # Reset sample pagination states when loading batches
+        self.current_page_index = 0
+        self.all_samples_page_cursors = []
+        self.my_samples_page_cursors = []
+        self.batch_samples_page_cursors = []
+
+        self.last_loaded_query_type = 'my_batches'
+
+        try:
+            # Check for current user and employee ID before proceeding with the query
+            if not self.app.current_user or not self.app.current_user.get('employee_id'):
+                messagebox.showwarning("Warning", "User not logged in or employee ID not found. Cannot load my batches.")
+                self.status_label.config(text="Cannot load my batches: User not identified.")
+                logging.warning("Attempted to load 'my_batches' without a logged-in user or employee ID.")
+                self.load_batches_to_treeview([])
+                return
+
+            batches_ref = db.collection("batches")
+            batches_list = []
+            # Query batches by the current user's employee ID
+            my_batches = batches_ref.where("user_employee_id", "==", self.app.current_user['employee_id'])
+            for batch_doc in my_batches.select(LIST_VIEW_FIELDS["batch_rows"]).get():
+                data = batch_doc.to_dict()
+                data['firestore_doc_id'] = batch_doc.id
+                # Convert Firestore Timestamp to datetime object
+                if data.get('submission_date') and hasattr(data['submission_date'], 'to_datetime'):
+                    data['submission_date'] = data['submission_date'].to_datetime()
+                batches_list.append(data)
+            self.load_batches_to_treeview(batches_list)
+            logging.info(f"Successfully loaded {len(batches_list)} my batches for user {self.app.current_user['employee_id']}.")
+        except Exception as e:
+            logging.error(f"Failed to load my batches: {e}", exc_info=True)
+            messagebox.showerror("Error", f"Failed to load my batches: {e}")
+            self.status_label.config(text="Failed to load my batches.")
+
+    @ui_action()
+    def load_todays_batches_to_tree(self):
+        """Loads batches submitted today from Firestore."""
+        logging.info("Loading today's batches to tree.")
+        # Reset sample pagination states when loading batches
+        self.current_page_index = 0
+        self.all_samples_page_cursors = []
+        self.my_samples_page_cursors = []
+        self.batch_samples_page_cursors = []
+
+        self.last_loaded_query_type = 'todays_batches'
+
+        try:
+            # Define today's start and end timestamps
+            today_start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+            today_end = datetime.now().replace(hour=23, minute=59, second=59, microsecond=999999)
+            logging.info(f"Fetching batches from {today_start} to {today_end}")
+
+            batches_ref = db.collection("batches")
+            batches_list = []
+            # Query batches submitted within today's date range
+            query = batches_ref.where("submission_date", ">=", today_start).where("submission_date", "<=", today_end)
+
+            for batch_doc in query.select(LIST_VIEW_FIELDS["batch_rows"]).get():
+                data = batch_doc.to_dict()
+                data['firestore_doc_id'] = batch_doc.id
+                # Convert Firestore Timestamp to datetime object
+                if data.get('submission_date') and hasattr(data['submission_date'], 'to_datetime'):
+                    data['submission_date'] = data['submission_date'].to_datetime()
+                batches_list.append(data)
+            self.load_batches_to_treeview(batches_list)
+            logging.info(f"Successfully loaded {len(batches_list)} today's batches.")
+        except Exception as e:
+            logging.error(f"Failed to load today's batches: {e}", exc_info=True)
+            messagebox.showerror("Error", f"Failed to load today's batches: {e}")
+            self.status_label.config(text="Failed to load today's batches.")
+
+
+    @ui_action()
+    def open_excel_import_options_form(self):
+        """Opens a Toplevel window to choose how to import Excel data (local, new batch, existing batch)."""
+        logging.info("Opening Excel import options form.")
+        import_options_form = tk.Toplevel(self.root)
+        import_options_form.title("Excel Import Options")
+        import_options_form.geometry("480x400")
+        import_options_form.grab_set()
+        import_options_form.transient(self.root)
+        import_options_form.config(bg='#f0f0f0') # Set background
+
+        frame = ttk.Frame(import_options_form, padding=15, style='TFrame')
+        frame.pack(expand=True, fill="both")
+
+        self.excel_import_choice = tk.StringVar(value="local") # Default to local import
+        
+        # Radio buttons for import choices
+        ttk.Radiobutton(frame, text="Import to Local Table (temporary)",
+                        variable=self.excel_import_choice, value="local", style='TRadiobutton',
+                        command=self._toggle_excel_import_fields).grid(row=0, column=0, columnspan=2, sticky="w", pady=5)
+        
+        ttk.Radiobutton(frame, text="Add to New Batch in Database",
+                        variable=self.excel_import_choice, value="new_batch", style='TRadiobutton',
+                        command=self._toggle_excel_import_fields).grid(row=1, column=0, columnspan=2, sticky="w", pady=5)
+        
+        ttk.Label(frame, text="  New Product Name:", style='TLabel').grid(row=2, column=0, sticky="e", pady=2, padx=5)
+        self.excel_new_batch_product_name_entry = ttk.Entry(frame, width=35, state="disabled", style='TEntry')
+        self.excel_new_batch_product_name_entry.grid(row=2, column=1, sticky="ew", pady=2, padx=5)
+
+        ttk.Label(frame, text="  New Description:", style='TLabel').grid(row=3, column=0, sticky="e", pady=2, padx=5)
+        self.excel_new_batch_description_entry = ttk.Entry(frame, width=35, state="disabled", style='TEntry')
+        self.excel_new_batch_description_entry.grid(row=3, column=1, sticky="ew", pady=2, padx=5)
+
+        ttk.Radiobutton(frame, text="Add to Existing Batch in Database",
+                        variable=self.excel_import_choice, value="existing_batch", style='TRadiobutton',
+                        command=self._toggle_excel_import_fields).grid(row=4, column=0, columnspan=2, sticky="w", pady=5)
+        
+        ttk.Label(frame, text="  Existing Batch ID:", style='TLabel').grid(row=5, column=0, sticky="e", pady=2, padx=5)
+        self.excel_existing_batch_combobox = ttk.Combobox(frame, state="disabled", width=32, style='TCombobox')
+        self.excel_existing_batch_combobox.grid(row=5, column=1, sticky="ew", pady=2, padx=5)
+        self._load_existing_batches_into_combobox_for_excel_import(self.excel_existing_batch_combobox)
+
+
+        ttk.Button(frame, text="Select Excel/CSV File and Proceed", 
+                   command=lambda: self._handle_excel_import_choice(import_options_form), style='Primary.TButton').grid(row=6, column=0, columnspan=2, pady=20)
+        
+        self._toggle_excel_import_fields() # Set initial state of fields based on default radio button
+
+        import_options_form.protocol("WM_DELETE_WINDOW", import_options_form.destroy)
+        logging.info("Excel import options form opened.")
+
+    def _toggle_excel_import_fields(self):
+        """Toggles the state of Excel import fields based on selected radio button."""
+        choice = self.excel_import_choice.get()
+        logging.debug(f"Toggling Excel import fields. Current choice: {choice}")
+
+        # Reset and disable all fields first
+        self.excel_new_batch_product_name_entry.config(state="disabled")
+        self.excel_new_batch_product_name_entry.delete(0, tk.END)
+        self.excel_new_batch_description_entry.config(state="disabled")
+        self.excel_new_batch_description_entry.delete(0, tk.END)
+        self.excel_existing_batch_combobox.config(state="disabled")
+        self.excel_existing_batch_combobox.set('')
+        self.excel_existing_batch_combobox['values'] = [] # Clear values when disabling
+
+        # Enable fields based on selected choice
+        if choice == "new_batch":
+            self.excel_new_batch_product_name_entry.config(state="normal")
+            self.excel_new_batch_description_entry.config(state="normal")
+        elif choice == "existing_batch":
+            self.excel_existing_batch_combobox.config(state="readonly")
+            self._load_existing_batches_into_combobox_for_excel_import(self.excel_existing_batch_combobox) # Reload values for existing batches
+        logging.debug("Excel import fields toggled.")
+
+    def _load_existing_batches_into_combobox_for_excel_import(self, target_combobox):
+        """Loads batch IDs created by the current user from Firestore into a specific combobox for Excel import."""
+        logging.info("Loading existing batches into combobox for Excel import.")
+        # Ensure user is logged in before querying for user-specific batches
+        if not self.app.current_user or not self.app.current_user.get('employee_id'):
+            logging.warning("Cannot load existing batches: User not logged in or employee ID not found.")
+            target_combobox['values'] = []
+            return
+
+        batches_ref = db.collection("batches")
+        try:
+            batches = batches_ref.where("user_employee_id", "==", self.app.current_user['employee_id']) \
+                .select(LIST_VIEW_FIELDS["batch_ids"]).stream()
+            batch_ids = [batch.id for batch in batches]
+            target_combobox['values'] = batch_ids
+            logging.info(f"Loaded {len(batch_ids)} existing batches for Excel import combobox.")
+        except Exception as e:
+            logging.error(f"Failed to load existing batches for Excel import combobox: {e}", exc_info=True)
+            messagebox.showerror("Error", f"Failed to load existing batches for Excel import: {e}")
+            target_combobox['values'] = []
+
+    @ui_action("import_excel")
+    def _handle_excel_import_choice(self, form_window):
+        """Handles the user's choice for Excel import, reads the file in chunks, and proceeds based on selected option."""
+        logging.info("Handling Excel import choice.")
+        if self.import_progress is not None:
+            messagebox.showinfo("Import Running", "Please wait for the current import to finish.")
+            return
+
+        filetypes = (("Excel or CSV files", "*.xlsx *.xls *.csv"), ("All files", "*.*"))
+        filename = filedialog.askopenfilename(title="Open Excel or CSV file", filetypes=filetypes)
+        
+        if not filename:
+            logging.info("Excel file selection cancelled.")
+            return
+
+        default_owner = self.app.current_user.get('username', 'N/A')
+        default_employee_id = self.app.current_user.get('employee_id')
+        try:
+            raw_chunks = read_import_chunks(filename)
+            # The first chunk is checked here so missing columns are reported before anything is written
+            first_chunk, notes = normalize_import_chunk(next(raw_chunks), default_owner, default_employee_id)
+            logging.info(f"Successfully opened import file: {filename}")
+        except ImportValidationError as e:
+            messagebox.showwarning("Missing Column", str(e))
+            logging.warning(f"Import file {filename} rejected: {e}")
+            return
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to read Excel file:\n{e}")
+            logging.error(f"Failed to read Excel file {filename}: {e}", exc_info=True)
+            return
+
+        for note in notes:
+            messagebox.showwarning("Missing Column", note)
+            logging.warning(note)
+        # Remaining chunks are read, validated and converted lazily, one at a time
+        chunks = itertools.chain([first_chunk], (normalize_import_chunk(chunk, default_owner, default_employee_id)[0]
+                                                 for chunk in raw_chunks))
+
+        choice = self.excel_import_choice.get()
+        if choice == "local":
+            self._import_excel_locally(pd.concat(list(chunks), ignore_index=True), filename, form_window)
+        elif choice == "new_batch":
+            product_name = self.excel_new_batch_product_name_entry.get().strip()
+            description = self.excel_new_batch_description_entry.get().strip()
+            self._add_excel_to_new_batch_db(chunks, product_name, description, form_window, estimate_total_rows(filename),
+                                            source_path=filename)
+        elif choice == "existing_batch":
+            batch_id = self.excel_existing_batch_combobox.get().strip()
+            self._add_excel_to_existing_batch_db(chunks, batch_id, form_window, estimate_total_rows(filename),
+                                                 source_path=filename)
+        
+    def _import_excel_locally(self, df, filename, form_window):
+        """Imports data from a DataFrame into the application's local DataFrame and displays it."""
+        logging.info("Importing Excel data locally.")
+        self.app.data = df
+        self.app.file_path = filename
+        self.load_samples_to_treeview(self.app.data.to_dict('records'), is_pagination_load=True)
+        self.status_label.config(text=f"Loaded data from {os.path.basename(filename)} (Local)")
+        self.excel_imported = True
+        self.current_selected_batch_id = None
+        self.add_single_sample_button.config(state=tk.DISABLED)
+        # Disable pagination buttons for local import as it's not paginated from DB
+        self.prev_sample_page_btn.config(state=tk.DISABLED)
+        self.next_sample_page_btn.config(state=tk.DISABLED)
+        self.page_info_label.config(text="Page 0 of 0")
+        messagebox.showinfo("Success", f"Excel data loaded locally from {os.path.basename(filename)}.")
+        form_window.destroy()
+        logging.info("Excel data imported locally.")
+
+    def _add_excel_to_new_batch_db(self, chunks, product_name, description, form_window, total_rows=None, source_path=None):
+        """Adds imported chunks to a new batch in Firestore."""
+        logging.info("Adding Excel data to a new batch in DB.")
+        if not product_name:
+            messagebox.showerror("Error", "Product Name is required for a new batch.")
+            logging.warning("Product Name missing for new batch from Excel.")
+            return
+
+        # Time-ordered unique batch ID; the batch is created together with the import job
+        batch_id = new_batch_id(self.app.current_user['employee_id'])
+
+        new_batch_data = {
+            "batch_id": batch_id,
+            "product_name": product_name,
+            "description": description,
+            "submission_date": datetime.now(),
+            "user_employee_id": self.app.current_user['employee_id'],
+            "user_username": self.app.current_user['username'],
+            "user_email": self.app.current_user['email'],
+            "status": "pending approval",
+            "number_of_samples": 0,
+            "updated_at": firestore.SERVER_TIMESTAMP
+        }
+        self._start_db_import(chunks, batch_id, form_window, total_rows, new_batch_data=new_batch_data,
+                              source_path=source_path)
+
+    def _add_excel_to_existing_batch_db(self, chunks, batch_id, form_window, total_rows=None, source_path=None):
+        """Adds imported chunks to an existing batch in Firestore."""
+        logging.info(f"Adding Excel data to existing batch '{batch_id}' in DB.")
+        if not batch_id:
+            messagebox.showerror("Error", "Please select an existing Batch ID.")
+            logging.warning("No batch ID selected for existing batch import.")
+            return
+
+        batch_doc_ref = db.collection("batches").document(batch_id)
+        existing_batch_doc = batch_doc_ref.get()
+
+        if not existing_batch_doc.exists:
+            messagebox.showerror("Error", f"Batch ID '{batch_id}' does not exist.")
+            logging.error(f"Selected existing batch ID '{batch_id}' not found.")
+            return
+
+        self._start_db_import(chunks, batch_id, form_window, total_rows, source_path=source_path)
+
+    def _start_db_import(self, chunks, batch_id, form_window, total_rows=None, new_batch_data=None, source_path=None,
+                         job=None):
+        """Writes the chunks to Firestore on a background thread as a tracked import job, each range of rows
+        committed as soon as it is ready, while a progress window shows the live rows-per-second rate.
+        Pass the job of an interrupted import to resume it."""
+        employee_id = self.app.current_user.get('employee_id')
+        if job is None:
+            try:
+                job = create_import_job(db, batch_id, employee_id,
+                                        file_name=os.path.basename(source_path) if source_path else None,
+                                        fingerprint=file_fingerprint(source_path) if source_path else None,
+                                        total_rows=total_rows, new_batch_data=new_batch_data)
+            except Exception as e:
+                logging.error(f"Failed to start import job for batch '{batch_id}': {e}", exc_info=True)
+                messagebox.showerror("Error", f"Failed to start the import:\n{e}")
+                return
+            if new_batch_data is not None:
+                self.app.events.publish(BATCH_ADDED, batch_doc_id=batch_id, data=new_batch_data)
+        progress = ImportProgress(total_rows)
+        importer = SampleImporter(db, job, employee_id, progress)
+        self.import_progress = progress
+
+        def run_import():
+            with track_action("import_excel"):
+                try:
+                    importer.import_chunks(chunks)
+                    progress.finish()
+                except Exception as e:
+                    logging.error(f"Import job '{job['job_id']}' into batch '{batch_id}' failed: {e}", exc_info=True)
+                    mark_import_job(db, job['job_id'], "failed", e, lease_id=importer.lease_id)
+                    progress.finish(error=e)
+                finally:
+                    # Cleared here, not by the poll: navigating away destroys the progress window and ends the poll
+                    if self.import_progress is progress:
+                        self.import_progress = None
+
+        progress_window = tk.Toplevel(self.root)
+        progress_window.title("Importing Samples")
+        progress_window.geometry("460x140")
+        progress_window.transient(self.root)
+        progress_window.protocol("WM_DELETE_WINDOW", lambda: None)  # Stays open until the import ends
+        ttk.Label(progress_window, text=f"Importing into batch '{batch_id}'...", font=("Helvetica", 10, "bold")).pack(pady=(15, 5))
+        progress_bar = ttk.Progressbar(progress_window, length=400,
+                                       mode="determinate" if total_rows else "indeterminate",
+                                       maximum=total_rows or 100)
+        progress_bar.pack(pady=5)
+        if not total_rows:
+            progress_bar.start(15)
+        progress_label = ttk.Label(progress_window, text="Starting...")
+        progress_label.pack(pady=5)
+
+        threading.Thread(target=run_import, name=f"import-{batch_id}", daemon=True).start()
+        self._poll_import_progress(progress, batch_id, form_window, progress_window, progress_bar, progress_label,
+                                   is_new_batch=new_batch_data is not None)
+
+    def _poll_import_progress(self, progress, batch_id, form_window, progress_window, progress_bar, progress_label,
+                              is_new_batch):
+        """Refreshes the progress window until the background import ends, then reports the result. The window
+        may be gone by then (show_screen and logout destroy it); the import keeps running and is still reported."""
+        if not progress.finished:
+            if progress_window.winfo_exists():
+                if progress.total_rows:
+                    progress_bar["value"] = progress.rows_read
+                progress_label.config(text=progress.summary())
+            self.root.after(250, lambda: self._poll_import_progress(progress, batch_id, form_window, progress_window,
+                                                                    progress_bar, progress_label, is_new_batch))
+            return
+
+        self._invalidate_sample_caches()  # Samples were written, even if the import stopped part way
+        if progress_window.winfo_exists():
+            progress_window.destroy()
+        if progress.error is not None:
+            messagebox.showerror("Error", f"Import into batch '{batch_id}' stopped after {progress.rows_written} samples "
+                                          f"were saved:\n{progress.error}\n\nUse File > Resume Interrupted Import "
+                                          "to continue from the last checkpoint.")
+        else:
+            target = "new batch" if is_new_batch else "existing batch"
+            resumed = f", {progress.rows_resumed} imported before the interruption" if progress.rows_resumed else ""
+            messagebox.showinfo("Success", f"Excel data successfully added to {target} '{batch_id}' with "
+                                           f"{progress.rows_written} new samples ({progress.rows_skipped} skipped{resumed}).")
+            logging.info(f"Excel data added to {target} '{batch_id}': {progress.summary()}")
+            if form_window.winfo_exists():
+                form_window.destroy()
+
+        if progress.rows_written:
+            self.app.events.publish(BATCH_SAMPLE_COUNT_CHANGED, batch_doc_id=batch_id, delta=progress.rows_written)
+            self.app.due_soon.refresh_soon()  # New samples may be due this week
+        if self.tree is None or not self.tree.winfo_exists():
+            return  # The user dashboard was left (e.g. logged out) while the import ran
+        # Show the first page of the batch imported into (one page query)
+        self.current_selected_batch_id = batch_id
+        self.load_samples_for_current_batch(reset=True)
+
+    def open_resume_import_form(self):
+        """Lists the user's interrupted imports and resumes the selected one from its last checkpoint."""
+        logging.info("Opening resume import form.")
+        if self.import_progress is not None:
+            messagebox.showinfo("Import Running", "Please wait for the current import to finish.")
+            return
+        try:
+            jobs = load_resumable_import_jobs(db, self.app.current_user.get('employee_id'))
+        except Exception as e:
+            logging.error(f"Failed to load import jobs: {e}", exc_info=True)
+            messagebox.showerror("Error", f"Failed to load interrupted imports: {e}")
+            return
+        if not jobs:
+            messagebox.showinfo("Resume Import", "There are no interrupted imports to resume.")
+            return
+
+        resume_window = tk.Toplevel(self.root)
+        resume_window.title("Resume Interrupted Import")
+        resume_window.geometry("760x320")
+        resume_window.transient(self.root)
+        resume_window.grab_set()
+
+        columns = ("Batch", "File", "Saved", "Skipped", "Status", "Last Update")
+        jobs_tree = ttk.Treeview(resume_window, columns=columns, show="headings", height=8, selectmode="browse")
+        for col in columns:
+            jobs_tree.heading(col, text=col)
+            jobs_tree.column(col, width=200 if col in ("Batch", "File") else 80)
+        jobs_by_id = {}
+        for job in jobs:
+            jobs_by_id[job["job_id"]] = job
+            updated_at = as_naive(job.get("updated_at"))
+            jobs_tree.insert("", tk.END, iid=job["job_id"], values=(
+                job.get("batch_id"), job.get("file_name") or "", job.get("rows_written", 0), job.get("rows_skipped", 0),
+                job.get("status"), updated_at.strftime("%Y-%m-%d %H:%M") if isinstance(updated_at, datetime) else ""))
+        jobs_tree.pack(expand=True, fill="both", padx=10, pady=10)
+
+        def resume_selected():
+            selected = jobs_tree.selection()
+            if not selected:
+                messagebox.showinfo("Info", "Please select an import to resume.", parent=resume_window)
+                return
+            self._resume_import_job(jobs_by_id[selected[0]], resume_window)
+
+        ttk.Button(resume_window, text="Select File and Resume", command=resume_selected,
+                   style='Primary.TButton').pack(pady=(0, 10))
+
+    @ui_action("resume_import")
+    def _resume_import_job(self, job, resume_window):
+        """Re-reads the original file of an interrupted import and imports only the ranges not yet committed."""
+        filetypes = (("Excel or CSV files", "*.xlsx *.xls *.csv"), ("All files", "*.*"))
+        filename = filedialog.askopenfilename(title=f"Select {job.get('file_name') or 'the original file'}",
+                                              filetypes=filetypes, parent=resume_window)
+        if not filename:
+            return
+        if job.get("file_fingerprint") and file_fingerprint(filename) != job["file_fingerprint"]:
+            messagebox.showerror("Different File", "This is not the file the import was started with. "
+                                                   "Please select the original, unchanged file.", parent=resume_window)
+            return
+
+        try:
+            job = claim_import_job(db, job["job_id"])
+        except ImportJobBusy as e:
+            messagebox.showinfo("Import Running", str(e), parent=resume_window)
+            return
+        except Exception as e:
+            logging.error(f"Failed to resume import job '{job['job_id']}': {e}", exc_info=True)
+            messagebox.showerror("Error", f"Failed to resume the import:\n{e}", parent=resume_window)
+            return
+
+        default_owner = self.app.current_user.get('username', 'N/A')
+        default_employee_id = self.app.current_user.get('employee_id')
+        # Read errors surface in the background import and mark the job failed again, ready for another resume
+        chunks = (normalize_import_chunk(chunk, default_owner, default_employee_id)[0]
+                  for chunk in read_import_chunks(filename))
+        logging.info(f"Resuming import job '{job['job_id']}' ({len(job.get('committed_ranges') or [])} ranges already committed).")
+        self._start_db_import(chunks, job["batch_id"], resume_window, job.get("total_rows"), job=job)
+
+    @ui_action()
+    def export_excel(self):
+        """Exports current data in the local DataFrame to an Excel file."""
+        logging.info("Attempting to export Excel file.")
+        if self.app.data.empty:
+            messagebox.showwarning("Warning", "No data to export.")
+            logging.warning("No data found to export to Excel.")
+            return
+        
+        filetypes = (("Excel files", "*.xlsx"),)
+        filename = filedialog.asksaveasfilename(defaultextension=".xlsx", filetypes=filetypes)
+        
+        if filename:
+            try:
+                df_to_prepare = self.app.data.copy()
+                if self.last_loaded_query_type in ['all_samples', 'my_samples', 'current_batch_samples', 'filtered_samples'] \
+                        and 'DocID' in df_to_prepare.columns:
+                    # Sample lists hold only the fields they render; export the rest from the full documents
+                    df_to_prepare = self._with_full_sample_fields(df_to_prepare)
+
+                # Define the desired standardized Excel output header names
+                expected_import_headers = {
+                    'batch_id',
+                    'submitted_by_employee_id',
+                    'status',
+                    'sample_id',
+                    'owner',
+                    'maturation_date',
+                    'creation_date',
+                    'last_updated_by_user_id', # Include new field for export if desired
+                    'last_updated_timestamp' # Include new field for export if desired
+                }
+
+                column_rename_map = {}
+                for col in df_to_prepare.columns:
+                    # Skip 'DocID' column from export
+                    if 'docid' in col.lower():
+                        continue
+
+                    # Explicitly map Treeview/internal names to desired export format
+                    if col == 'BatchID':
+                        column_rename_map[col] = 'batch_id'
+                    elif col == 'DisplaySampleID':
+                        column_rename_map[col] = 'sample_id'
+                    elif col == 'Owner':
+                        column_rename_map[col] = 'owner'
+                    elif col == 'MaturationDate':
+                        column_rename_map[col] = 'maturation_date'
+                    elif col == 'Status':
+                        column_rename_map[col] = 'status'
+                    elif col == 'CreationDate':
+                        column_rename_map[col] = 'creation_date'
+                    elif col == 'submitted_by_employee_id':
+                        column_rename_map[col] = 'submitted_by_employee_id'
+                    elif col == 'd_by_emp': # Handle typo from import side
+                         column_rename_map[col] = 'submitted_by_employee_id'
+                    elif col == 'last_updated_by_user_id': # Map the new internal field
+                        column_rename_map[col] = 'last_updated_by_user_id'
+                    elif col == 'last_updated_timestamp': # Map the new internal field
+                        column_rename_map[col] = 'last_updated_timestamp'
+                    elif col.lower().replace(' ', '_') in expected_import_headers:
+                         column_rename_map[col] = col.lower().replace(' ', '_')
+                    else:
+                        logging.warning(f"Column '{col}' not explicitly mapped for export. Defaulting to lowercase_with_underscores.")
+                        column_rename_map[col] = col.lower().replace(' ', '_')
+
+                df_to_prepare.rename(columns=column_rename_map, inplace=True, errors='ignore')
+
+                # Define the final desired order of columns in the Excel file
+                final_excel_output_order = [
+                    'batch_id',
+                    'submitted_by_employee_id',
+                    'status',
+                    'sample_id',
+                    'owner',
+                    'maturation_date',
+                    'creation_date',
+                    'last_updated_by_user_id', # Add to final output order
+                    'last_updated_timestamp' # Add to final output order
+                ]
+                
+                # Reindex the DataFrame to select only the desired columns and put them in the correct order.
+                df_for_export_final = df_to_prepare.reindex(columns=final_excel_output_order)
+
+                # Ensure datetime objects are timezone-naive before export
+                for col in df_for_export_final.columns:
+                    if pd.api.types.is_datetime64_any_dtype(df_for_export_final[col]):
+                        if df_for_export_final[col].dt.tz is not None:
+                            df_for_export_final[col] = df_for_export_final[col].dt.tz_localize(None)
+
+                df_for_export_final.to_excel(filename, index=False)
+                self.status_label.config(text=f"Data exported to {os.path.basename(filename)}")
+                messagebox.showinfo("Export Successful", f"Data successfully exported to {os.path.basename(filename)}.") # Success message
+                logging.info(f"Successfully exported data to {filename}.")
+            except Exception as e:
+                logging.error(f"Failed to export Excel file: {e}", exc_info=True)
+                messagebox.showerror("Error", f"Failed to export Excel file:\n{e}")
+
+    def _with_full_sample_fields(self, df):
+        """Fills in the sample fields that list queries leave out (see LIST_VIEW_FIELDS) by reading the full
+        document of every sample row in df."""
+        full_records = {}
+        for doc_id in df['DocID'].dropna().unique():
+            sample_doc = db.collection("samples").document(str(doc_id)).get()
+            if sample_doc.exists:
+                full_records[doc_id] = self._sample_snapshot_to_record(sample_doc)
+        logging.info(f"Fetched {len(full_records)} full sample documents for export.")
+        for field in ('submitted_by_employee_id', 'last_updated_by_user_id', 'last_updated_timestamp'):
+            full_values = df['DocID'].map(lambda doc_id: full_records.get(doc_id, {}).get(field))
+            df[field] = df[field].where(df[field].notna(), full_values) if field in df.columns else full_values
+        return df
+
+    @ui_action()
+    def refresh_tree(self):
+        """Refreshes the Treeview widget with the current DataFrame data or reloads from DB based on last query."""
+        logging.info(f"Refreshing tree. Last loaded query type: {self.last_loaded_query_type}")
+        if self.last_loaded_query_type in ['all_samples', 'my_samples', 'current_batch_samples', 'filtered_samples'] \
+                and self._delta_refresh_sample_view():
+            pass  # Only samples changed or deleted since the last load were fetched and merged
+        elif self.last_loaded_query_type in ['all_samples', 'my_samples']:
+            self._invalidate_sample_caches()  # Re-read the page rather than serve it from the cache
+            self.load_samples_paginated(self.last_loaded_query_type, reset=False)
+        elif self.last_loaded_query_type == 'current_batch_samples' and self.current_selected_batch_id:
+            self._invalidate_sample_caches()
+            self.load_samples_for_current_batch(reset=False)
+        elif self.last_loaded_query_type in ['filtered_samples', 'excel_import']:
+            # For filtered or excel_import, reload locally as they are not paginated from DB directly
+            self.load_samples_to_treeview(self.app.data.to_dict('records'))
+        elif self.last_loaded_query_type in ['batches', 'my_batches', 'todays_batches']:
+            # For batches, reload from DB
+            if self.last_loaded_query_type == 'batches':
+                self.load_all_batches_to_tree()
+            elif self.last_loaded_query_type == 'my_batches':
+                self.load_my_batches_to_tree()
+            elif self.last_loaded_query_type == 'todays_batches':
+                self.load_todays_batches_to_tree()
+        else:
+            # Fallback to loading all samples if no specific type is known
+            self.load_samples_paginated(query_type='all_samples', reset=True)
+        self.status_label.config(text=f"Treeview refreshed. Displaying {len(self.app.data)} items.")
+        logging.info(f"Tree refreshed. Displaying {len(self.app.data)} items.")
+
+
+    def generate_barcode(self):
+        """Generates a barcode for the selected sample ID (user-facing ID)."""
+        logging.info("Attempting to generate barcode.")
+        selected = self.tree.selection()
+        if not selected:
+            messagebox.showinfo("Info", "Please select a sample from the list.")
+            logging.warning("No sample selected for barcode generation.")
+            return
+
+        item = self.tree.item(selected[0])
+        # Ensure the selected item is a sample, not a batch
+        if self.last_loaded_query_type in ['batches', 'my_batches', 'todays_batches']:
+            messagebox.showwarning("Warning", "Please select a sample to generate a barcode (currently displaying batches).")
+            logging.warning("Selected item is a batch, not a sample. Barcode generation aborted.")
+            return
+
+        sample_id_for_barcode = str(item['values'][1]) if len(item['values']) > 1 else ""
+
+        if not sample_id_for_barcode:
+            messagebox.showerror("Error", "Selected sample has no valid Sample ID for barcode generation.")
+            logging.error("Selected sample has no valid Sample ID for barcode generation.")
+            return
+
+        try:
+            # Get Code128 barcode class and generate barcode
+            EAN = barcode.get_barcode_class('code128')
+            ean = EAN(sample_id_for_barcode, writer=ImageWriter())
+            # Prompt user for save location
+            save_path = filedialog.asksaveasfilename(defaultextension=".png",
+                                                     filetypes=[("PNG files", "*.png")],
+                                                     initialfile=f"{sample_id_for_barcode}_barcode.png")
+            if save_path:
+                ean.save(save_path)
+                messagebox.showinfo("Success", f"Barcode saved at {save_path}")
+                logging.info(f"Barcode saved at {save_path} for sample ID: {sample_id_for_barcode}")
+        except Exception as e:
+            logging.error(f"Barcode generation failed for {sample_id_for_barcode}: {e}", exc_info=True)
+            messagebox.showerror("Error", f"Barcode generation failed:\n{e}")
+
+    @ui_action()
+    def check_notifications(self):
+        """Checks for samples maturing within the defined notification period."""
+        logging.info("Checking for notifications.")
+        if self.app.data.empty:
+            messagebox.showwarning("Warning", "No data loaded.")
+            logging.warning("No data loaded for notification check.")
+            return
+
+        # Ensure we are checking samples, not batches
+        if self.last_loaded_query_type in ['batches', 'my_batches', 'todays_batches']:
+             messagebox.showwarning("Warning", "Notifications are for samples only. Please load samples first.")
+             logging.warning("Notification check attempted when batches are displayed.")
+             return
+        
+        # Additional check if 'MaturationDate' column exists
+        if 'MaturationDate' not in self.app.data.columns:
+            messagebox.showwarning("Warning", "Maturation date information is not available in the current data set for notifications.")
+            logging.warning("Notification check attempted but 'MaturationDate' column is missing.")
+            return
+
+        # Make 'today' timezone-naive for consistent comparison
+        today = datetime.now().replace(tzinfo=None) 
+
+        notifications = []
+
+        for _, row in self.app.data.iterrows():
+            mat_date = row.get('MaturationDate')
+            if pd.isna(mat_date) or mat_date is None:
+                continue
+
+            mat_date_dt = None
+            if isinstance(mat_date, pd.Timestamp):
+                mat_date_dt = mat_date.to_pydatetime()
+            elif isinstance(mat_date, datetime):
+                mat_date_dt = mat_date
+            else:
+                try:
+                    # Attempt to convert Firestore Timestamp or string to datetime
+                    if hasattr(mat_date, 'to_datetime'):
+                        mat_date_dt = mat_date.to_datetime()
+                    else:
+                        mat_date_dt = datetime.strptime(str(mat_date).split(' ')[0], "%Y-%m-%d")
+                except (ValueError, TypeError):
+                    logging.warning(f"Could not parse maturation date for sample: {row.get('DisplaySampleID', 'N/A')}. Value: {mat_date}")
+                    continue
+
+            # Ensure mat_date_dt is also timezone-naive before comparison
+            if mat_date_dt and mat_date_dt.tzinfo is not None:
+                mat_date_dt = mat_date_dt.replace(tzinfo=None)
+
+            if mat_date_dt:
+                delta = mat_date_dt - today
+                if 0 <= delta.days <= NOTIFICATION_DAYS_BEFORE:
+                    notifications.append(f"Sample {row.get('DisplaySampleID', 'N/A')} owned by {row.get('Owner', 'N/A')} matures on {mat_date_dt.strftime('%Y-%m-%d')}.")
+
+        if notifications:
+            messagebox.showinfo("Notifications", "\n".join(notifications))
+            logging.info(f"Found {len(notifications)} notifications.")
+        else:
+            messagebox.showinfo("Notifications", f"No samples maturing within {NOTIFICATION_DAYS_BEFORE} days.")
+            logging.info(f"No samples maturing within {NOTIFICATION_DAYS_BEFORE} days.")
+
+
+    @ui_action()
+    def open_batch_selection_screen(self):
+        """Opens a Toplevel window for selecting an existing batch or creating a new one."""
+        logging.info("Opening batch selection screen.")
+        batch_selection_form = tk.Toplevel(self.root)
+        batch_selection_form.title("Select or Create Batch")
+        batch_selection_form.geometry("450x320")
+        batch_selection_form.grab_set()
+        batch_selection_form.transient(self.root)
+        batch_selection_form.config(bg='#f0f0f0') # Set background
+
+        frame = ttk.Frame(batch_selection_form, padding=10, style='TFrame')
+        frame.pack(expand=True, fill="both")
+
+        self.batch_choice = tk.StringVar(value="existing")
+        radio_existing = ttk.Radiobutton(frame, text="Select Existing Batch", variable=self.batch_choice, value="existing", style='TRadiobutton')
+        radio_new = ttk.Radiobutton(frame, text="Create New Batch", variable=self.batch_choice, value="new", style='TRadiobutton')
+
+        radio_existing.grid(row=0, column=0, columnspan=2, sticky="w", pady=5)
+        radio_new.grid(row=1, column=0, columnspan=2, sticky="w", pady=5)
+
+        ttk.Label(frame, text="Existing Batch ID:", style='TLabel').grid(row=2, column=0, sticky="e", pady=5, padx=5)
+        self.existing_batch_combobox = ttk.Combobox(frame, state="readonly", width=30, style='TCombobox')
+        self.existing_batch_combobox.grid(row=2, column=1, sticky="ew", pady=5, padx=5)
+        self._load_existing_batches_into_combobox()
+
+        ttk.Label(frame, text="New Product Name:", style='TLabel').grid(row=3, column=0, sticky="e", pady=5, padx=5)
+        self.new_batch_product_name = ttk.Entry(frame, width=30, state="disabled", style='TEntry')
+        self.new_batch_product_name.grid(row=3, column=1, sticky="ew", pady=5, padx=5)
+
+        ttk.Label(frame, text="New Description:", style='TLabel').grid(row=4, column=0, sticky="e", pady=5, padx=5)
+        self.new_batch_description = ttk.Entry(frame, width=30, state="disabled", style='TEntry')
+        self.new_batch_description.grid(row=4, column=1, sticky="ew", pady=5, padx=5)
+
+        # Configure commands for radio buttons to toggle fields
+        radio_existing.config(command=lambda: self._toggle_batch_fields_on_selection(True))
+        radio_new.config(command=lambda: self._toggle_batch_fields_on_selection(False))
+
+        # Set initial state of fields based on default radio button
+        self._toggle_batch_fields_on_selection(True)
+
+        ttk.Button(frame, text="Confirm Batch Selection", command=lambda: self._handle_batch_selection_confirmation(batch_selection_form), style='Primary.TButton').grid(row=5, column=0, columnspan=2, pady=20)
+        batch_selection_form.protocol("WM_DELETE_WINDOW", batch_selection_form.destroy)
+        logging.info("Batch selection screen opened.")
+
+    def _toggle_batch_fields_on_selection(self, is_existing_batch_selected):
+        """Internal helper to toggle the visibility/state of new/existing batch fields."""
+        logging.debug(f"Toggling batch fields. Is existing batch selected: {is_existing_batch_selected}")
+        try:
+            if self.existing_batch_combobox:
+                self.existing_batch_combobox.config(state="readonly" if is_existing_batch_selected else "disabled")
+                if not is_existing_batch_selected:
+                    self.existing_batch_combobox.set('') # Clear selection when disabled
+        except Exception as e:
+            logging.warning(f"Error configuring existing_batch_combobox: {e}")
+
+        try:
+            if self.new_batch_product_name:
+                self.new_batch_product_name.config(state="normal" if not is_existing_batch_selected else "disabled")
+                if is_existing_batch_selected:
+                    self.new_batch_product_name.delete(0, tk.END)
+        except Exception as e:
+            logging.warning(f"Error configuring new_batch_product_name: {e}")
+
+        try:
+            if self.new_batch_description:
+                self.new_batch_description.config(state="normal" if not is_existing_batch_selected else "disabled")
+                if is_existing_batch_selected:
+                    self.new_batch_description.delete(0, tk.END)
+        except Exception as e:
+            logging.warning(f"Error configuring new_batch_description: {e}")
+        logging.debug("Batch fields toggled.")
+
+
+    def _load_existing_batches_into_combobox(self):
+        """Loads batch IDs created by the current user from Firestore into the combobox."""
+        logging.info("Loading existing batches into combobox.")
+        # Ensure user is logged in before querying for user-specific batches
+        if not self.app.current_user or not self.app.current_user.get('employee_id'):
+            logging.warning("Cannot load existing batches: User not logged in or employee ID not found.")
+            self.existing_batch_combobox['values'] = []
+            return
+
+        batches_ref = db.collection("batches")
+        try:
+            batches = batches_ref.where("user_employee_id", "==", self.app.current_user['employee_id']) \
+                .select(LIST_VIEW_FIELDS["batch_ids"]).stream()
+            batch_ids = [batch.id for batch in batches]
+            self.existing_batch_combobox['values'] = batch_ids
+            logging.info(f"Loaded {len(batch_ids)} existing batches for combobox.")
+        except Exception as e:
+            logging.error(f"Failed to load existing batches into combobox: {e}", exc_info=True)
+            messagebox.showerror("Error", f"Failed to load existing batches: {e}")
+            self.existing_batch_combobox['values'] = []
+
+    @ui_action("confirm_batch_selection")
+    def _handle_batch_selection_confirmation(self, form_window):
+        """Handles the confirmation of batch selection or creation."""
+        logging.info("Handling batch selection confirmation.")
+        selected_batch_id = None
+
+        if self.batch_choice.get() == "new":
+            product_name = self.new_batch_product_name.get().strip()
+            description = self.new_batch_description.get().strip()
+            creation_date_dt = datetime.now()
+
+            if not product_name:
+                messagebox.showerror("Error", "New Batch Product Name is required.")
+                logging.warning("New batch product name is missing.")
+                return
+
+            # Time-ordered unique batch ID; no existence read needed since create() fails on a collision
+            selected_batch_id = new_batch_id(self.app.current_user['employee_id'])
+
+            new_batch_data = {
+                "batch_id": selected_batch_id,
+                "product_name": product_name,
+                "description": description,
+                "submission_date": creation_date_dt,
+                "user_employee_id": self.app.current_user['employee_id'],
+                "user_username": self.app.current_user['username'],
+                "user_email": self.app.current_user['email'],
+                "status": "pending approval",
+                "number_of_samples": 0,
+                "updated_at": firestore.SERVER_TIMESTAMP
+            }
+            try:
+                # Create the new batch document in Firestore (fails rather than overwrite an existing batch)
+                db.collection("batches").document(selected_batch_id).create(new_batch_data)
+                messagebox.showinfo("Success", f"New batch '{selected_batch_id}' created successfully.")
+                self.current_selected_batch_id = selected_batch_id
+                # Load samples for the new batch
+                self.load_samples_for_current_batch(reset=True)
+                self.app.events.publish(BATCH_ADDED, batch_doc_id=selected_batch_id, data=new_batch_data)
+                form_window.destroy()
+                logging.info(f"New batch '{selected_batch_id}' created and samples loaded.")
+            except Exception as e:
+                logging.error(f"Failed to create new batch: {e}", exc_info=True)
+                messagebox.showerror("Error", f"Failed to create new batch: {e}")
+                return
+
+        else: # Existing batch selected
+            selected_batch_id = self.existing_batch_combobox.get().strip()
+            if not selected_batch_id:
+                messagebox.showerror("Error", "Please select an existing batch.")
+                logging.warning("No existing batch selected.")
+                return
+
+            try:
+                existing_batch_doc = db.collection("batches").document(selected_batch_id).get()
+                if not existing_batch_doc.exists:
+                    messagebox.showerror("Error", "Selected batch does not exist in the database.")
+                    logging.error(f"Selected batch ID '{selected_batch_id}' not found in database.")
+                    # Refresh current view if sample not found
+                    if self.last_loaded_query_type in ['all_samples', 'my_samples']:
+                        self.load_samples_paginated(self.last_loaded_query_type, reset=False)
+                    elif self.last_loaded_query_type == 'current_batch_samples' and self.current_selected_batch_id:
+                        self.load_samples_for_current_batch(reset=False)
+                    else:
+                        self.load_samples_paginated(query_type='all_samples', reset=True)
+                    return # Exit the function here as the batch was not found.
+
+                self.current_selected_batch_id = selected_batch_id
+                # Load samples for the existing batch
+                self.load_samples_for_current_batch(reset=True)
+                messagebox.showinfo("Batch Selected", f"Samples for batch '{selected_batch_id}' are now displayed.")
+                form_window.destroy()
+                logging.info(f"Existing batch '{selected_batch_id}' selected and samples loaded.")
+            except Exception as e:
+                logging.error(f"Failed to handle existing batch selection: {e}", exc_info=True)
+                messagebox.showerror("Error", f"Failed to retrieve batch details: {e}")
+
+    @ui_action()
+    def load_samples_for_current_batch(self, reset=True):
+        """
+        Loads samples for the currently selected batch ID with pagination and updates the Treeview.
+        reset: If True, resets to the first page. If False, loads next/previous page.
+        """
+        logging.info(f"Loading samples for current batch: {self.current_selected_batch_id}, Reset: {reset}")
+        if not self.current_selected_batch_id:
+            self.status_label.config(text="No batch selected to display samples.")
+            logging.warning("load_samples_for_current_batch called with no current_selected_batch_id.")
+            # Disable pagination buttons as there's no batch data to paginate
+            self.prev_sample_page_btn.config(state=tk.DISABLED)
+            self.next_sample_page_btn.config(state=tk.DISABLED)
+            self.page_info_label.config(text="Page 0 of 0")
+            return
+
+        # Reset sample pagination state for this specific view if reset is True
+        if reset:
+            self.current_page_index = 0
+            self.all_samples_page_cursors = []
+            self.my_samples_page_cursors = []
+            self.batch_samples_page_cursors = []
+        
+        self.last_loaded_query_type = 'current_batch_samples'
+
+        self.tree.delete(*self.tree.get_children())
+        samples_list = []
+        try:
+            # Samples of the specific batch, ordered by creation_date
+            server_filters = [("batch_id", "==", self.current_selected_batch_id)]
+            view_key = ("samples", 'current_batch_samples', tuple(server_filters))
+            logging.info(f"Loading page {self.current_page_index + 1} of batch samples ({self.current_selected_batch_id}). Cursor count: {len(self.batch_samples_page_cursors)}")
+            page = self._get_sample_page(view_key, server_filters, self.batch_samples_page_cursors, reset)
+            samples_list = page['records']
+
+            # Total pages for the batch, from the count cache (None while it is being counted)
+            total_pages = self._total_sample_pages(self.count_cache.get("samples", server_filters))
+            logging.info(f"Total pages for batch {self.current_selected_batch_id}: {total_pages if total_pages is not None else 'counting'}")
+
+            # Also sets the page label and the Prev/Next buttons
+            self.load_samples_to_treeview(samples_list, is_pagination_load=True, current_page=self.current_page_index + 1, total_pages=total_pages)
+            self._prime_sample_view(view_key, server_filters, page['marks'], samples_list, paginated=True)
+            self._poll_page_total(view_key, server_filters, self.current_page_index)
+
+            if samples_list:
+                self.status_label.config(text=f"Loaded {len(self.app.data)} samples for Batch: {self.current_selected_batch_id}. Page {self.current_page_index + 1}.")
+                logging.info(f"Loaded {len(samples_list)} samples for batch {self.current_selected_batch_id}.")
+            else:
+                self.status_label.config(text=f"No samples found for Batch: {self.current_selected_batch_id}")
+                logging.info(f"No samples found for batch {self.current_selected_batch_id}.")
+
+            self.add_single_sample_button.config(state=tk.NORMAL)
+
+
+        except Exception as e:
+            logging.error(f"Failed to load samples for batch {self.current_selected_batch_id} (paginated): {e}", exc_info=True)
+            messagebox.showerror("Error", f"Failed to load samples for batch: {e}")
+            self.status_label.config(text="Failed to load samples for batch.")
+            # Ensure pagination buttons are disabled on error
+            self.prev_sample_page_btn.config(state=tk.DISABLED)
+            self.next_sample_page_btn.config(state=tk.DISABLED)
+            self.page_info_label.config(text="Page 0 of 0")
+
+    @ui_action()
+    def open_single_sample_form(self):
+        """Opens a form to add a single new sample to the currently selected batch."""
+        logging.info(f"Opening single sample form for batch: {self.current_selected_batch_id}")
+        if not self.current_selected_batch_id:
+            messagebox.showwarning("Warning", "Please select or create a batch first using 'Add Sample to Batch' button.")
+            logging.warning("open_single_sample_form called with no current_selected_batch_id.")
+            return
+
+        form = tk.Toplevel(self.root)
+        form.title(f"Add Sample to Batch: {self.current_selected_batch_id}")
+        form.geometry("500x350")
+        form.grab_set()
+        form.transient(self.root)
+        form.config(bg='#f0f0f0') # Set background
+
+        frame = ttk.Frame(form, padding=10, style='TFrame')
+        frame.pack(expand=True, fill="both")
+
+        current_row = 0
+
+        ttk.Label(frame, text="Batch ID:", style='TLabel').grid(row=current_row, column=0, sticky="e", pady=5, padx=5)
+        ttk.Label(frame, text=self.current_selected_batch_id, font=('Helvetica', 10, 'bold'), background='#f0f0f0', foreground='#333333').grid(row=current_row, column=1, sticky="w", pady=5, padx=5)
+        current_row += 1
+
+        ttk.Label(frame, text="Sample ID (e.g., SMPL-001):", style='TLabel').grid(row=current_row, column=0, sticky="e", pady=5, padx=5)
+        self.entry_sample_display_id = ttk.Entry(frame, width=30, style='TEntry')
+        self.entry_sample_display_id.grid(row=current_row, column=1, sticky="ew", pady=5, padx=5)
+        current_row += 1
+
+        ttk.Label(frame, text="Sample Owner:", style='TLabel').grid(row=current_row, column=0, sticky="e", pady=5, padx=5)
+        self.entry_owner_combobox = ttk.Combobox(frame, state="readonly", width=27, style='TCombobox')
+        self.entry_owner_combobox.grid(row=current_row, column=1, sticky="ew", pady=5, padx=5)
+        self._load_users_into_owner_combobox(self.entry_owner_combobox)
+        # Set default owner to current user if available
+        if self.app.current_user and self.app.current_user.get('username'):
+            self.entry_owner_combobox.set(self.app.current_user['username'])
+        current_row += 1
+
+        ttk.Label(frame, text="Maturation Date (YYYY-MM-DD):", style='TLabel').grid(row=current_row, column=0, sticky="e", pady=5, padx=5)
+        self.entry_maturation_date_entry = DateEntry(frame, width=28, background='darkblue', foreground='white', borderwidth=2,
+                                                     date_pattern='yyyy-mm-dd') # TkCalendar styling
+        self.entry_maturation_date_entry.grid(row=current_row, column=1, sticky="ew", pady=5, padx=5)
+        self.entry_maturation_date_entry.set_date(datetime.now().date()) # Default to today
+        current_row += 1
+
+        ttk.Label(frame, text="Status:", style='TLabel').grid(row=current_row, column=0, padx=5, pady=5, sticky="e")
+        self.status_combobox = ttk.Combobox(frame, values=SAMPLE_STATUS_OPTIONS, state="readonly", width=27, style='TCombobox')
+        self.status_combobox.grid(row=current_row, column=1, sticky="ew", pady=5, padx=5)
+        self.status_combobox.set(SAMPLE_STATUS_OPTIONS[0]) # Default to "pending approval"
+        current_row += 1
+
+        ttk.Button(frame, text="Add Sample to Batch", command=lambda: self._submit_single_sample(form), style='Success.TButton').grid(row=current_row, column=0, columnspan=2, pady=15)
+        form.protocol("WM_DELETE_WINDOW", form.destroy)
+        logging.info("Single sample form opened.")
+
+    def _load_users_into_owner_combobox(self, target_combobox):
+        """Loads usernames from Firestore into the sample owner combobox."""
+        logging.info("Loading users into owner combobox.")
+        users_ref = db.collection("users")
+        try:
+            users = users_ref.select(LIST_VIEW_FIELDS["usernames"]).stream()
+            usernames = [user.to_dict().get("username", "") for user in users if user.to_dict().get("username")]
+            target_combobox['values'] = usernames
+            logging.info(f"Loaded {len(usernames)} users for owner combobox.")
+        except Exception as e:
+            logging.error(f"Failed to load users for owner selection: {e}", exc_info=True)
+            messagebox.showerror("Error", f"Failed to load users for owner selection: {e}")
+            target_combobox['values'] = []
+
+
+    @ui_action("add_single_sample")
+    def _submit_single_sample(self, form_window):
+        """Handles submission of a single new sample to the current batch."""
+        logging.info("Submitting single sample.")
+        sample_display_id = self.entry_sample_display_id.get().strip()
+        owner = self.entry_owner_combobox.get().strip()
+        sample_status = self.status_combobox.get().strip()
+
+        # Validate Maturation Date
+        mat_date_from_entry = self.entry_maturation_date_entry.get_date()
+        if not mat_date_from_entry or mat_date_from_entry == datetime(1,1,1).date():
+            messagebox.showerror("Error", "Maturation Date is required.")
+            logging.warning("Maturation Date is missing for single sample submission.")
+            return
+        
+        mat_date_dt = datetime(mat_date_from_entry.year, mat_date_from_entry.month, mat_date_from_entry.day)
+
+        # Maturation date validation: Must not be in the past
+        today_date = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        if mat_date_dt < today_date:
+            messagebox.showerror("Validation Error", "Maturation Date cannot be in the past.")
+            logging.warning(f"Maturation Date {mat_date_dt.strftime('%Y-%m-%d')} is in the past. Submission prevented.")
+            return
+
+
+        sample_created_date_dt = datetime.now()
+
+        # Validate Sample ID and Owner
+        if not sample_display_id or not owner:
+            messagebox.showerror("Error", "Sample ID and Owner are required.")
+            logging.warning("Sample ID or Owner missing for single sample submission.")
+            return
+
+        try:
+            # Check for duplicate sample_id across the entire 'samples' collection
+            existing_samples_with_display_id = db.collection("samples").where("sample_id", "==", sample_display_id).limit(1).get()
+            if list(existing_samples_with_display_id):
+                messagebox.showerror("Error", "Sample ID already exists in the database. Please use a unique ID.")
+                logging.error(f"Duplicate sample ID '{sample_display_id}' detected.")
+                return
+        except Exception as e:
+            logging.error(f"Failed to check existing sample ID: {e}", exc_info=True)
+            messagebox.showerror("Database Error", f"Failed to check existing sample ID: {e}")
+            return
+
+        sample_data = {
+            "sample_id": sample_display_id,
+            "owner": owner,
+            "creation_date": sample_created_date_dt,
+            "status": sample_status,
+            "batch_id": self.current_selected_batch_id,
+            "submitted_by_employee_id": self.app.current_user.get('employee_id'),
+            "maturation_date": mat_date_dt,
+            "last_updated_by_user_id": self.app.current_user.get('employee_id'), # Store user ID of creator
+            "last_updated_timestamp": firestore.SERVER_TIMESTAMP # Set by Firestore, so delta syncs don't depend on this clock
+        }
+        logging.debug(f"Sample data prepared: {sample_data}")
+
+        try:
+            batch_write = db.batch()
+
+            # Random auto-ID: sequential IDs would send every new sample to the same key range (a write hotspot);
+            # pages are ordered by creation_date and then the ID instead
+            sample_doc_ref = db.collection("samples").document()
+            batch_write.create(sample_doc_ref, sample_data)
+            logging.info(f"Prepared to add sample with generated doc ID: {sample_doc_ref.id}")
+
+            # The batch was picked from the user's batch list; the shard write needs no read of it first
+            ShardedCounter(db, "batches", self.current_selected_batch_id, "number_of_samples").increment(batch_write, 1)
+            logging.info(f"Prepared to increment sample count for batch: {self.current_selected_batch_id}")
+
+            batch_write.commit()
+            self._invalidate_sample_caches([sample_created_date_dt])
+            logging.info("Firestore batch committed successfully.")
+
+            messagebox.showinfo("Success", f"Sample '{sample_display_id}' added successfully to Batch '{self.current_selected_batch_id}'.")
+
+            # The new row and the batch's count are patched into the views on screen; no list is reloaded
+            self._show_added_sample(dict({field: value for field, value in sample_data.items()
+                                          if value is not firestore.SERVER_TIMESTAMP},
+                                         firestore_doc_id=sample_doc_ref.id))
+            self.app.events.publish(BATCH_SAMPLE_COUNT_CHANGED, batch_doc_id=self.current_selected_batch_id, delta=1)
+            self.app.due_soon.refresh_soon()  # New samples may be due this week
+
+            form_window.destroy()
+            logging.info("Single sample submission complete.")
+
+        except Exception as e:
+            logging.error(f"Failed to add sample: {e}", exc_info=True)
+            messagebox.showerror("Error", f"Failed to add sample: {e}")
+
+    @ui_action()
+    def delete_sample(self):
+        """Deletes a selected sample from Firestore and decrements the batch's sample count."""
+        logging.info("Starting delete_sample process.")
+        selected = self.tree.selection()
+        if not selected:
+            messagebox.showinfo("Info", "Please select a sample to delete.")
+            logging.warning("Delete sample aborted: No sample selected.")
+            return
+        if len(selected) > 1:
+            self.delete_samples(selected)
+            return
+
+        item = self.tree.item(selected[0])
+        logging.debug(f"Selected Treeview item raw values: {item['values']}")
+
+        firestore_doc_id = item['values'][0]
+        display_sample_id = item['values'][1]
+        batch_id = item['values'][5] if len(item['values']) > 5 else None
+
+        logging.info(f"Extracted values for deletion: DocID='{firestore_doc_id}', DisplaySampleID='{display_sample_id}', BatchID='{batch_id}'")
+
+        # Prevent deletion of locally imported samples that are not in DB
+        if not firestore_doc_id or firestore_doc_id == 'N/A (Local)':
+            messagebox.showerror("Error", "Cannot delete a locally imported sample directly from the database. Please export and re-import if needed.")
+            logging.error("Attempted to delete a local-only sample from the database.")
+            return
+
+        confirm = messagebox.askyesno("Confirm Delete", f"Are you sure you want to delete sample '{display_sample_id}' from Batch '{batch_id}'?")
+        if not confirm:
+            logging.info("Delete sample aborted: User cancelled.")
+            return
+
+        creation_dates = self._sample_creation_dates([firestore_doc_id])
+        # The row goes at once and comes back if the delete fails; no view is reloaded either way.
+        rollback = self._remove_sample_row_optimistically(firestore_doc_id)
+        count_decremented = False
+        try:
+            logging.info("Attempting Firestore batch write operations for deletion...")
+            batch_write = db.batch()
+
+            # Delete the sample document
+            sample_doc_ref = db.collection("samples").document(firestore_doc_id)
+            logging.info(f"Prepared to delete sample document: {firestore_doc_id}")
+            batch_write.delete(sample_doc_ref)
+            add_tombstone(db, batch_write, "samples", firestore_doc_id, self.app.current_user.get('employee_id'))
+
+            # Decrement sample count in the associated batch. The count lives in counter shard documents, so the
+            # batch document itself isn't read first; shards of a deleted batch are removed with it.
+            if batch_id and batch_id != 'N/A':
+                ShardedCounter(db, "batches", batch_id, "number_of_samples").increment(batch_write, -1)
+                count_decremented = True
+            else:
+                logging.warning(f"No valid Batch ID found for sample '{display_sample_id}'. Cannot update sample count.")
+
+            batch_write.commit()
+            logging.info("Firestore batch committed successfully.")
+        except Exception as e:
+            rollback()
+            logging.error(f"Error during delete_sample: {e}", exc_info=True)
+            messagebox.showerror("Error", f"Failed to delete sample: {e}")
+            logging.error("Delete_sample process completed with error.")
+            return
+
+        self._invalidate_sample_caches(creation_dates)
+        self.app.events.publish(SAMPLE_DELETED, doc_id=firestore_doc_id)
+        if count_decremented:
+            self.app.events.publish(BATCH_SAMPLE_COUNT_CHANGED, batch_doc_id=batch_id, delta=-1)
+        self.status_label.config(text=f"Sample '{display_sample_id}' deleted.")
+        messagebox.showinfo("Success", f"Sample '{display_sample_id}' deleted successfully.")
+        logging.info("Delete_sample process completed successfully.")
+
+    def _selected_db_samples(self, selected):
+        """Returns the selected samples as dicts read from their rows (no document reads), labelled for the bulk
+        result summary. Locally imported samples, which aren't in the database, are returned as skipped."""
+        samples, skipped = [], []
+        for item_id in selected:
+            values = self.tree.item(item_id, 'values')
+            batch_id = values[5] if len(values) > 5 and values[5] != 'N/A' else None
+            sample = {"id": values[0], "label": values[1], "batch_id": batch_id}
+            if not values[0] or values[0] == 'N/A (Local)':
+                skipped.append((sample, "not saved in the database"))
+            else:
+                samples.append(sample)
+        return samples, skipped
+
+    def delete_samples(self, selected):
+        """Deletes several samples after one confirmation. Deletes are committed in batched writes with the
+        samples ordered by batch, and each commit adjusts a batch's sample count once for all of its samples."""
+        samples, skipped = self._selected_db_samples(selected)
+        if not samples:
+            messagebox.showinfo("Info", "None of the selected samples are saved in the database.")
+            return
+        batch_count = len({sample["batch_id"] for sample in samples if sample["batch_id"]})
+        if not messagebox.askyesno("Confirm Delete",
+                                   f"Are you sure you want to delete {len(samples)} selected samples from {batch_count} batch(es)?"):
+            logging.info("Bulk sample delete aborted: User cancelled.")
+            return
+        samples.sort(key=lambda sample: sample["batch_id"] or "")  # Keeps each batch's samples in as few commits as possible
+        employee_id = self.app.current_user.get('employee_id')
+        creation_dates = self._sample_creation_dates([sample["id"] for sample in samples])
+
+        def add_writes(batch_write, sample):
+            batch_write.delete(db.collection("samples").document(sample["id"]))
+            add_tombstone(db, batch_write, "samples", sample["id"], employee_id)
+
+        def adjust_sample_counts(batch_write, chunk):
+            for batch_id, count in Counter(sample["batch_id"] for sample in chunk if sample["batch_id"]).items():
+                ShardedCounter(db, "batches", batch_id, "number_of_samples").increment(batch_write, -count)
+
+        def on_done(progress):
+            if progress.succeeded:
+                self._invalidate_sample_caches(creation_dates)
+                for sample in progress.succeeded:
+                    self.app.events.publish(SAMPLE_DELETED, doc_id=sample["id"])
+                deleted_per_batch = Counter(sample["batch_id"] for sample in progress.succeeded if sample["batch_id"])
+                for batch_id, count in deleted_per_batch.items():
+                    self.app.events.publish(BATCH_SAMPLE_COUNT_CHANGED, batch_doc_id=batch_id, delta=-count)
+            self.status_label.config(text=f"{len(progress.succeeded)} samples deleted.")
+            show_bulk_summary(self.root, "Delete Samples", progress, "Deleted")
+
+        # Each sample is a delete and a tombstone, plus at most one counter shard write for its batch
+        start_bulk_operation(self.root, db, "Delete Samples", samples, add_writes, on_done, writes_per_item=3,
+                             skipped=skipped, action="bulk_delete_samples", before_commit=adjust_sample_counts)
+
+    @ui_action()
+    def edit_sample(self):
+        """Opens a form to edit details of a selected sample from Firestore."""
+        logging.info("Opening edit sample form.")
+        selected = self.tree.selection()
+        if not selected:
+            messagebox.showinfo("Info", "Please select a sample to edit.")
+            logging.warning("No sample selected for editing.")
+            return
+        if len(selected) > 1:
+            self.edit_samples(selected)
+            return
+
+        item = self.tree.item(selected[0])
+        firestore_doc_id = item['values'][0]
+        display_sample_id = item['values'][1]
+
+        # Prevent editing of locally imported samples
+        if not firestore_doc_id or firestore_doc_id == 'N/A (Local)':
+            messagebox.showwarning("Warning", "Cannot edit locally imported samples directly. Please add them to a batch first.")
+            logging.warning("Attempted to edit a local-only sample.")
+            return
+
+        row = {}
+        try:
+            # The snapshot's update_time makes the save fail if someone else saves the sample meanwhile
+            sample_doc = db.collection("samples").document(firestore_doc_id).get()
+            if not sample_doc.exists:
+                messagebox.showerror("Error", "Selected sample not found in database.")
+                logging.error(f"Sample with doc ID {firestore_doc_id} not found for editing.")
+                # Refresh current view if sample not found
+                if self.last_loaded_query_type in ['all_samples', 'my_samples']:
+                    self.load_samples_paginated(self.last_loaded_query_type, reset=False)
+                elif self.last_loaded_query_type == 'current_batch_samples' and self.current_selected_batch_id:
+                    self.load_samples_for_current_batch(reset=False)
+                else:
+                    self.load_samples_paginated(query_type='all_samples', reset=True)
+                return
+            row = sample_doc.to_dict()
+            logging.info(f"Fetched sample data for editing (DocID: {firestore_doc_id}).")
+        except Exception as e:
+            logging.error(f"Failed to retrieve sample data for editing: {e}", exc_info=True)
+            messagebox.showerror("Error", f"Failed to retrieve sample data: {e}")
+            return
+
+        form = tk.Toplevel(self.root)
+        form.title(f"Edit Sample {display_sample_id}")
+        form.geometry("450x250")
+        form.grab_set()
+        form.transient(self.root)
+        form.config(bg='#f0f0f0') # Set background
+
+        current_row = 0
+
+        ttk.Label(form, text="Sample ID:", style='TLabel').grid(row=current_row, column=0, sticky="e", pady=5, padx=5)
+        entry_sample_display_id = ttk.Entry(form, style='TEntry')
+        entry_sample_display_id.insert(0, row.get('sample_id', ''))
+        entry_sample_display_id.config(state='disabled') # Sample ID is usually not editable
+        entry_sample_display_id.grid(row=current_row, column=1, sticky="ew", pady=5, padx=5)
+        current_row += 1
+
+        ttk.Label(form, text="Sample Owner:", style='TLabel').grid(row=current_row, column=0, sticky="e", pady=5, padx=5)
+        edit_owner_combobox = ttk.Combobox(form, state="readonly", style='TCombobox')
+        self._load_users_into_owner_combobox(edit_owner_combobox)
+        edit_owner_combobox.set(row.get('owner', ''))
+        edit_owner_combobox.grid(row=current_row, column=1, sticky="ew", pady=5, padx=5)
+        current_row += 1
+
+        ttk.Label(form, text="Maturation Date (YYYY-MM-DD):", style='TLabel').grid(row=current_row, column=0, sticky="e", pady=5, padx=5)
+        self.edit_mat_date_entry = DateEntry(form, width=28, background='darkblue', foreground='white', borderwidth=2,
+                                         date_pattern='yyyy-mm-dd') # TkCalendar styling
+        self.edit_mat_date_entry.grid(row=current_row, column=1, sticky="ew", pady=5, padx=5)
+        
+        # Set the current maturation date or a default empty date
+        mat_date_for_entry = None
+        if isinstance(row.get('maturation_date'), datetime):
+            mat_date_for_entry = row['maturation_date']
+        elif row.get('maturation_date') and hasattr(row['maturation_date'], 'to_datetime'):
+            try:
+                mat_date_for_entry = row['maturation_date'].to_datetime()
+            except Exception:
+                pass
+        
+        if mat_date_for_entry:
+            self.edit_mat_date_entry.set_date(mat_date_for_entry)
+        else:
+            self.edit_mat_date_entry.set_date(datetime(1,1,1).date())
+        current_row += 1
+
+        ttk.Label(form, text="Status:", style='TLabel').grid(row=current_row, column=0, sticky="e", pady=5, padx=5)
+        status_combobox_edit = ttk.Combobox(form, values=SAMPLE_STATUS_OPTIONS, state="readonly", style='TCombobox')
+        status_combobox_edit.set(row.get('status', SAMPLE_STATUS_OPTIONS[0]))
+        status_combobox_edit.grid(row=current_row, column=1, sticky="ew", pady=5, padx=5)
+        current_row += 1
+
+        edit_base = EditBase(row, sample_doc.update_time)  # Moved to the latest version if a save conflicts
+        ttk.Button(form, text="Save Changes", command=lambda: self._submit_edit_sample(
+            form, firestore_doc_id, edit_owner_combobox.get(), self.edit_mat_date_entry.get_date(), status_combobox_edit.get(),
+            edit_base
+        ), style='Success.TButton').grid(row=current_row, column=0, columnspan=2, pady=15)
+        form.protocol("WM_DELETE_WINDOW", form.destroy)
+        logging.info("Edit sample form opened and populated.")
+
+    @ui_action("save_sample_edit")
+    def _submit_edit_sample(self, form_window, firestore_doc_id, new_owner, new_mat_date_dt, new_status, edit_base=None):
+        """Submits the edited sample data to Firestore. edit_base (an EditBase) is the sample as read when the form
+        opened; a conflicting save by someone else is merged (see concurrent_edits.py)."""
+        logging.info(f"Submitting edited sample (DocID: {firestore_doc_id}).")
+        if not new_owner or not new_status:
+            messagebox.showerror("Error", "Owner and Status fields are required.")
+            logging.warning("Owner or Status missing for sample edit.")
+            return
+
+        # Maturation date validation: Must not be in the past
+        today_date = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        if new_mat_date_dt and new_mat_date_dt < today_date.date(): # Compare date objects directly
+            messagebox.showerror("Validation Error", "Maturation Date cannot be in the past.")
+            logging.warning(f"Maturation Date {new_mat_date_dt.strftime('%Y-%m-%d')} is in the past. Submission prevented.")
+            return
+        
+        # Convert new_mat_date_dt to datetime object for Firestore
+        mat_date_for_db = None
+        if new_mat_date_dt and new_mat_date_dt != datetime(1,1,1).date():
+            mat_date_for_db = datetime(new_mat_date_dt.year, new_mat_date_dt.month, new_mat_date_dt.day)
+        else:
+            messagebox.showerror("Error", "Maturation Date is required.")
+            logging.warning("Maturation Date is empty/default after edit, but is required.")
+            return
+
+
+        updated_data = {
+            "owner": new_owner,
+            "status": new_status,
+            "maturation_date": mat_date_for_db,
+            "last_updated_by_user_id": self.app.current_user.get('employee_id'), # New field: user ID who last updated
+            "last_updated_timestamp": firestore.SERVER_TIMESTAMP # New field: timestamp of last update
+        }
+        
+        logging.debug(f"Updated data for sample {firestore_doc_id}: {updated_data}")
+        # The row shows the new values at once and reverts if the update fails; no view is reloaded either way.
+        rollback = self._patch_sample_row_optimistically(firestore_doc_id, updated_data)
+        edit_base = edit_base or EditBase({}, None)
+        try:
+            saved = save_edit(db, db.collection("samples").document(firestore_doc_id), edit_base, updated_data,
+                              f"Sample '{edit_base.data.get('sample_id', firestore_doc_id)}'", parent=form_window)
+        except Exception as e:
+            rollback()
+            logging.error(f"Failed to update sample {firestore_doc_id}: {e}", exc_info=True)
+            messagebox.showerror("Error", f"Failed to update sample: {e}")
+            return
+        if saved is None:
+            rollback()  # Back to the form to edit again
+            logging.info(f"Edit of sample {firestore_doc_id} returned to the form after a conflict.")
+            return
+        # After a merge the saved values may differ from the form's (e.g. the other person's kept)
+        updated_data = {field: saved[field] for field in updated_data if field in saved}
+
+        self._invalidate_sample_caches([])  # Edits keep creation_date, so page boundaries stay
+        self.app.events.publish(SAMPLE_CHANGED, doc_id=firestore_doc_id, changes=updated_data)
+        messagebox.showinfo("Success", "Sample updated successfully.")
+        logging.info(f"Sample {firestore_doc_id} updated successfully in Firestore.")
+        form_window.destroy()
+        logging.info("Sample edit complete.")
+
+    def edit_samples(self, selected):
+        """Opens a form that sets the owner, status and/or maturation date of several samples at once.
+        Fields left unchanged in the form keep each sample's own value."""
+        samples, skipped = self._selected_db_samples(selected)
+        if not samples:
+            messagebox.showwarning("Warning", "Cannot edit locally imported samples directly. Please add them to a batch first.")
+            return
+
+        form = tk.Toplevel(self.root)
+        form.title(f"Edit {len(samples)} Samples")
+        form.geometry("450x250")
+        form.grab_set()
+        form.transient(self.root)
+        form.config(bg='#f0f0f0')
+
+        ttk.Label(form, text="Leave a field blank to keep each sample's value.", style='TLabel').grid(
+            row=0, column=0, columnspan=2, pady=5, padx=5)
+
+        ttk.Label(form, text="Sample Owner:", style='TLabel').grid(row=1, column=0, sticky="e", pady=5, padx=5)
+        owner_combobox = ttk.Combobox(form, state="readonly", style='TCombobox')
+        self._load_users_into_owner_combobox(owner_combobox)
+        owner_combobox['values'] = [""] + list(owner_combobox['values'])
+        owner_combobox.grid(row=1, column=1, sticky="ew", pady=5, padx=5)
+
+        change_mat_date_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(form, text="Maturation Date:", variable=change_mat_date_var).grid(row=2, column=0, sticky="e", pady=5, padx=5)
+        mat_date_entry = DateEntry(form, width=28, background='darkblue', foreground='white', borderwidth=2,
+                                   date_pattern='yyyy-mm-dd')
+        mat_date_entry.grid(row=2, column=1, sticky="ew", pady=5, padx=5)
+
+        ttk.Label(form, text="Status:", style='TLabel').grid(row=3, column=0, sticky="e", pady=5, padx=5)
+        status_combobox = ttk.Combobox(form, values=[""] + SAMPLE_STATUS_OPTIONS, state="readonly", style='TCombobox')
+        status_combobox.grid(row=3, column=1, sticky="ew", pady=5, padx=5)
+
+        ttk.Button(form, text="Save Changes", command=lambda: self._submit_edit_samples(
+            form, samples, skipped, owner_combobox.get(),
+            mat_date_entry.get_date() if change_mat_date_var.get() else None, status_combobox.get()
+        ), style='Success.TButton').grid(row=4, column=0, columnspan=2, pady=15)
+        logging.info(f"Bulk edit form opened for {len(samples)} samples.")
+
+    def _submit_edit_samples(self, form_window, samples, skipped, new_owner, new_mat_date_dt, new_status):
+        """Writes the fields chosen in the bulk edit form to every sample in batched writes."""
+        updated_data = {}
+        if new_owner:
+            updated_data["owner"] = new_owner
+        if new_status:
+            updated_data["status"] = new_status
+        if new_mat_date_dt:
+            if new_mat_date_dt < datetime.now().date():
+                messagebox.showerror("Validation Error", "Maturation Date cannot be in the past.", parent=form_window)
+                return
+            updated_data["maturation_date"] = datetime(new_mat_date_dt.year, new_mat_date_dt.month, new_mat_date_dt.day)
+        if not updated_data:
+            messagebox.showerror("Error", "Choose at least one field to change.", parent=form_window)
+            return
+        updated_data["last_updated_by_user_id"] = self.app.current_user.get('employee_id')
+        updated_data["last_updated_timestamp"] = firestore.SERVER_TIMESTAMP
+        form_window.destroy()
+
+        def add_writes(batch_write, sample):
+            batch_write.update(db.collection("samples").document(sample["id"]), updated_data)
+
+        def on_done(progress):
+            if progress.succeeded:
+                self._invalidate_sample_caches([])  # Edits keep creation_date, so page boundaries stay
+                for sample in progress.succeeded:
+                    self.app.events.publish(SAMPLE_CHANGED, doc_id=sample["id"], changes=updated_data)
+            self.status_label.config(text=f"{len(progress.succeeded)} samples updated.")
+            show_bulk_summary(self.root, "Edit Samples", progress, "Updated")
+
+        start_bulk_operation(self.root, db, "Edit Samples", samples, add_writes, on_done, skipped=skipped,
+                             action="bulk_edit_samples")
+
+    def open_filter_form(self):
+        """Opens a Toplevel window for users to input filtering criteria."""
+        logging.info("Opening filter form.")
+        filter_form = tk.Toplevel(self.root)
+        filter_form.title("Filter Options")
+        filter_form.geometry("450x500")
+        filter_form.grab_set()
+        filter_form.transient(self.root)
+        filter_form.config(bg='#f0f0f0') # Set background
+
+        # Radio buttons to choose filtering mode
+        radio_frame = ttk.Frame(filter_form, style='TFrame') 
+        radio_frame.pack(fill="x", padx=10, pady=10) 
+
+        ttk.Radiobutton(radio_frame, text="Filter Samples (by Sample/Batch/Product name)",
+                        variable=self.filter_mode, value="samples", style='TRadiobutton',
+                        command=self._toggle_filter_frames).pack(anchor="w", pady=5)
+        ttk.Radiobutton(radio_frame, text="Find Batch Details (by Batch ID)",
+                        variable=self.filter_mode, value="batch_search", style='TRadiobutton',
+                        command=self._toggle_filter_frames).pack(anchor="w", pady=5)
+        # New radio button for finding sample details
+        ttk.Radiobutton(radio_frame, text="Find Sample Details (by Sample ID)",
+                        variable=self.filter_mode, value="sample_search", style='TRadiobutton',
+                        command=self._toggle_filter_frames).pack(anchor="w", pady=5)
+
+
+        # Frames to hold specific filter options
+        self.sample_filters_frame = ttk.Frame(filter_form, style='TFrame')
+        self.batch_search_frame = ttk.Frame(filter_form, style='TFrame')
+        self.sample_search_frame = ttk.Frame(filter_form, style='TFrame') # New frame for sample search
+
+        # Maturation Date Filter widgets within its own frame
+        self.maturation_date_filter_frame = ttk.Frame(self.sample_filters_frame, style='TFrame')
+        ttk.Checkbutton(self.sample_filters_frame, text="Enable Maturation Date Filter",
+                        variable=self.filter_maturation_date_var, style='TCheckbutton',
+                        command=self._toggle_maturation_filter_state).grid(row=0, column=0, sticky="w", pady=5, padx=5, columnspan=2)
+
+        ttk.Label(self.maturation_date_filter_frame, text="From (YYYY-MM-DD):", style='TLabel').grid(row=0, column=0, sticky="e", pady=5, padx=5)
+        self.filter_start_date_entry = DateEntry(self.maturation_date_filter_frame, width=28, background='darkblue', foreground='white', borderwidth=2, date_pattern='yyyy-mm-dd')
+        self.filter_start_date_entry.grid(row=0, column=1, sticky="ew", pady=5, padx=5)
+        self.filter_start_date_entry.set_date(datetime.now().date())
+        # The below line was causing an issue with `DateEntry` if `DateEntry` was not yet initialized.
+        # It's been moved inside `_toggle_maturation_filter_state` which is called after `DateEntry` is initialized.
+
+        ttk.Label(self.maturation_date_filter_frame, text="To (YYYY-MM-DD):", style='TLabel').grid(row=1, column=0, sticky="e", pady=5, padx=5)
+        self.filter_end_date_entry = DateEntry(self.maturation_date_filter_frame, width=28, background='darkblue', foreground='white', borderwidth=2, date_pattern='yyyy-mm-dd')
+        self.filter_end_date_entry.grid(row=1, column=1, sticky="ew", pady=5, padx=5)
+        self.filter_end_date_entry.set_date(datetime.now().date())
+
+        # Creation Date Filter widgets within its own frame
+        self.creation_date_filter_frame = ttk.Frame(self.sample_filters_frame, style='TFrame')
+        ttk.Checkbutton(self.sample_filters_frame, text="Enable Creation Date Filter",
+                        variable=self.filter_creation_date_var, style='TCheckbutton',
+                        command=self._toggle_creation_filter_state).grid(row=2, column=0, sticky="w", pady=5, padx=5, columnspan=2)
+
+        ttk.Label(self.creation_date_filter_frame, text="From (YYYY-MM-DD):", style='TLabel').grid(row=0, column=0, sticky="e", pady=5, padx=5)
+        self.filter_creation_start_date_entry = DateEntry(self.creation_date_filter_frame, width=28, background='darkblue', foreground='white', borderwidth=2, date_pattern='yyyy-mm-dd')
+        self.filter_creation_start_date_entry.grid(row=0, column=1, sticky="ew", pady=5, padx=5)
+        self.filter_creation_start_date_entry.set_date(datetime.now().date())
+
+        ttk.Label(self.creation_date_filter_frame, text="To (YYYY-MM-DD):", style='TLabel').grid(row=1, column=0, sticky="e", pady=5, padx=5)
+        self.filter_creation_end_date_entry = DateEntry(self.creation_date_filter_frame, width=28, background='darkblue', foreground='white', borderwidth=2, date_pattern='yyyy-mm-dd')
+        self.filter_creation_end_date_entry.grid(row=1, column=1, sticky="ew", pady=5, padx=5)
+        self.filter_creation_end_date_entry.set_date(datetime.now().date())
+
+        # Initial state of date filter frames (hidden by default)
+        self._toggle_maturation_filter_state()
+        self._toggle_creation_filter_state()
+
+        # Other filters always visible, positioned after date filter frames
+        current_filter_row = 4
+
+        ttk.Label(self.sample_filters_frame, text="Sample ID (similar/contains):", style='TLabel').grid(row=current_filter_row, column=0, sticky="e", pady=5, padx=5)
+        self.filter_sample_id_entry = ttk.Entry(self.sample_filters_frame, width=30, style='TEntry')
+        self.filter_sample_id_entry.grid(row=current_filter_row, column=1, sticky="ew", pady=5, padx=5)
+        current_filter_row += 1
+
+        ttk.Label(self.sample_filters_frame, text="Batch ID (similar/contains):", style='TLabel').grid(row=current_filter_row, column=0, sticky="e", pady=5, padx=5)
+        self.filter_batch_id_entry = ttk.Entry(self.sample_filters_frame, width=30, style='TEntry')
+        self.filter_batch_id_entry.grid(row=current_filter_row, column=1, sticky="ew", pady=5, padx=5)
+        current_filter_row += 1
+
+        ttk.Label(self.sample_filters_frame, text="Product Name (similar/contains):", style='TLabel').grid(row=current_filter_row, column=0, sticky="e", pady=5, padx=5)
+        self.filter_product_name_entry = ttk.Entry(self.sample_filters_frame, width=30, style='TEntry')
+        self.filter_product_name_entry.grid(row=current_filter_row, column=1, sticky="ew", pady=5, padx=5)
+        current_filter_row += 1
+
+        ttk.Label(self.sample_filters_frame, text="Status:", style='TLabel').grid(row=current_filter_row, column=0, sticky="e", pady=5, padx=5)
+        self.filter_status_combobox = ttk.Combobox(self.sample_filters_frame, values=[""] + SAMPLE_STATUS_OPTIONS, state="readonly", width=27, style='TCombobox')
+        self.filter_status_combobox.set("") # Default to empty to show all statuses
+        self.filter_status_combobox.grid(row=current_filter_row, column=1, sticky="ew", pady=5, padx=5)
+        current_filter_row += 1
+
+        # Populate batch_search_frame
+        ttk.Label(self.batch_search_frame, text="Enter Batch ID:", style='TLabel').grid(row=0, column=0, sticky="e", pady=5, padx=5)
+        self.find_batch_id_entry = ttk.Entry(self.batch_search_frame, width=30, style='TEntry')
+        self.find_batch_id_entry.grid(row=0, column=1, sticky="ew", pady=5, padx=5)
+
+        # Populate sample_search_frame
+        ttk.Label(self.sample_search_frame, text="Enter Sample ID:", style='TLabel').grid(row=0, column=0, sticky="e", pady=5, padx=5)
+        self.find_sample_id_entry = ttk.Entry(self.sample_search_frame, width=30, style='TEntry')
+        self.find_sample_id_entry.grid(row=0, column=1, sticky="ew", pady=5, padx=5)
+
+
+        # Buttons common to both modes
+        button_frame = ttk.Frame(filter_form, style='TFrame')
+        button_frame.pack(fill="x", side="bottom", padx=10, pady=10)
+
+        ttk.Button(button_frame, text="Apply", command=lambda: self.apply_filters(filter_form), style='Success.TButton').pack(side=tk.LEFT, padx=5, pady=10)
+        ttk.Button(button_frame, text="Clear Filters", command=lambda: self.clear_filters(filter_form), style='Secondary.TButton').pack(side=tk.LEFT, padx=5, pady=10)
+
+        # Initial display of filter frames
+        self._toggle_filter_frames()
+
+        filter_form.protocol("WM_DELETE_WINDOW", filter_form.destroy)
+        logging.info("Filter form opened.")
+
+    def _toggle_maturation_filter_state(self):
+        """Toggles the visibility and state of maturation date filter entries."""
+        logging.debug(f"Toggling maturation filter state: {self.filter_maturation_date_var.get()}")
+        if self.filter_maturation_date_var.get():
+            self.maturation_date_filter_frame.grid(row=1, column=0, columnspan=2, sticky="ew")
+        else:
+            self.maturation_date_filter_frame.grid_forget()
+            # Reset dates when filter is disabled
+            if self.filter_start_date_entry:
+                self.filter_start_date_entry.set_date(datetime.now().date())
+            if self.filter_end_date_entry:
+                self.filter_end_date_entry.set_date(datetime.now().date())
+        logging.debug("Maturation filter state toggled.")
+
+    def _toggle_creation_filter_state(self):
+        """Toggles the visibility and state of creation date filter entries."""
+        logging.debug(f"Toggling creation filter state: {self.filter_creation_date_var.get()}")
+        if self.filter_creation_date_var.get():
+            self.creation_date_filter_frame.grid(row=3, column=0, columnspan=2, sticky="ew")
+        else:
+            self.creation_date_filter_frame.grid_forget()
+            # Reset dates when filter is disabled
+            if self.filter_creation_start_date_entry:
+                self.filter_creation_start_date_entry.set_date(datetime.now().date())
+            if self.filter_creation_end_date_entry:
+                self.filter_creation_end_date_entry.set_date(datetime.now().date())
+        logging.debug("Creation filter state toggled.")
+
+    def _toggle_filter_frames(self):
+        """Toggles visibility of filter frames based on radio button selection."""
+        logging.info(f"Toggling filter frames. Current mode: {self.filter_mode.get()}")
+        # Hide all frames first
+        self.sample_filters_frame.pack_forget()
+        self.batch_search_frame.pack_forget()
+        self.sample_search_frame.pack_forget() # Hide new sample search frame
+
+        # Ensure date filter frames are hidden and their variables are reset when switching modes
+        self.maturation_date_filter_frame.grid_forget()
+        self.creation_date_filter_frame.grid_forget()
+        self.filter_maturation_date_var.set(False)
+        self.filter_creation_date_var.set(False)
+
+        if self.filter_mode.get() == "samples":
+            self.sample_filters_frame.pack(fill="both", expand=True, padx=10, pady=10)
+            self._toggle_maturation_filter_state() # Re-apply state
+            self._toggle_creation_filter_state() # Re-apply state
+            logging.info("Switched to Sample Filter mode.")
+        elif self.filter_mode.get() == "batch_search":
+            self.batch_search_frame.pack(fill="both", expand=True, padx=10, pady=10)
+            logging.info("Switched to Batch Search mode.")
+        elif self.filter_mode.get() == "sample_search": # New: Handle sample search mode
+            self.sample_search_frame.pack(fill="both", expand=True, padx=10, pady=10)
+            logging.info("Switched to Sample Search mode.")
+
+
+    @ui_action()
+    def apply_filters(self, form_window):
+        """Applies the filters based on the selected mode (sample filter, batch search, or sample search)."""
+        logging.info(f"Apply Filters called. Mode: {self.filter_mode.get()}")
+        if self.filter_mode.get() == "samples":
+            filters = {}
+            
+            # Process Maturation Date Filters
+            if self.filter_maturation_date_var.get():
+                start_date_obj = self.filter_start_date_entry.get_date()
+                end_date_obj = self.filter_end_date_entry.get_date()
+                if start_date_obj and start_date_obj != datetime(1,1,1).date():
+                    filters['start_date'] = datetime(start_date_obj.year, start_date_obj.month, start_date_obj.day)
+                if end_date_obj and end_date_obj != datetime(1,1,1).date():
+                    filters['end_date'] = datetime(end_date_obj.year, end_date_obj.month, end_date_obj.day, 23, 59, 59, 999999)
+                if filters.get('start_date') and filters.get('end_date') and filters['start_date'] > filters['end_date']:
+                    messagebox.showerror("Error", "'Maturation Date From' cannot be after 'Maturation Date To'.")
+                    logging.warning("Maturation date 'From' is after 'To' date.")
+                    return
+            
+            # Process Creation Date Filters
+            if self.filter_creation_date_var.get():
+                creation_start_date_obj = self.filter_creation_start_date_entry.get_date()
+                creation_end_date_obj = self.filter_creation_end_date_entry.get_date()
+                if creation_start_date_obj and creation_start_date_obj != datetime(1,1,1).date():
+                    filters['creation_start_date'] = datetime(creation_start_date_obj.year, creation_start_date_obj.month, creation_start_date_obj.day)
+                if creation_end_date_obj and creation_end_date_obj != datetime(1,1,1).date():
+                    filters['creation_end_date'] = datetime(creation_end_date_obj.year, creation_end_date_obj.month, creation_end_date_obj.day, 23, 59, 59, 999999)
+                if filters.get('creation_start_date') and filters.get('creation_end_date') and filters['creation_start_date'] > filters['creation_end_date']:
+                    messagebox.showerror("Error", "'Creation Date From' cannot be after 'Creation Date To'.")
+                    logging.warning("Creation date 'From' is after 'To' date.")
+                    return
+
+            logging.info(f"Maturation Date Filters processed: Start={filters.get('start_date')}, End={filters.get('end_date')}")
+            logging.info(f"Creation Date Filters processed: Start={filters.get('creation_start_date')}, End={filters.get('creation_end_date')}")
+
+            # Get text-based filter values
+            sample_id = self.filter_sample_id_entry.get().strip()
+            batch_id = self.filter_batch_id_entry.get().strip()
+            product_name = self.filter_product_name_entry.get().strip()
+            status = self.filter_status_combobox.get().strip()
+
+            if sample_id:
+                filters['sample_id'] = sample_id
+            if batch_id:
+                filters['batch_id'] = batch_id
+            if product_name:
+                filters['product_name'] = product_name
+            if status:
+                filters['status'] = status
+            
+            logging.info(f"Applying sample filters: {filters}")
+            self.load_all_user_samples_from_db_with_filters(filters)
+            form_window.destroy()
+
+        elif self.filter_mode.get() == "batch_search":
+            batch_id_to_find = self.find_batch_id_entry.get().strip()
+            logging.info(f"Searching for batch ID: {batch_id_to_find}")
+            if not batch_id_to_find:
+                messagebox.showerror("Error", "Please enter a Batch ID to search.")
+                logging.warning("No batch ID entered for batch search.")
+                return
+
+            try:
+                batch_doc = db.collection("batches").document(batch_id_to_find).get()
+                if batch_doc.exists:
+                    logging.info("Batch found. Displaying details.")
+                    batch_data = batch_doc.to_dict()
+                    batch_data['number_of_samples'] = ShardedCounter(db, "batches", batch_doc.id, "number_of_samples").total(batch_data)
+                    self._display_batch_details_window(batch_data)
+                    form_window.destroy()
+                else:
+                    logging.info("Batch Not Found.")
+                    messagebox.showinfo("Batch Not Found", f"Batch with ID '{batch_id_to_find}' does not exist.")
+            except Exception as e:
+                logging.error(f"Error retrieving batch details for '{batch_id_to_find}': {e}", exc_info=True)
+                messagebox.showerror("Error", f"Failed to retrieve batch details: {e}")
+        
+        elif self.filter_mode.get() == "sample_search": # New: Handle sample search mode
+            sample_id_to_find = self.find_sample_id_entry.get().strip()
+            logging.info(f"Searching for sample ID: {sample_id_to_find}")
+            if not sample_id_to_find:
+                messagebox.showerror("Error", "Please enter a Sample ID to search.")
+                logging.warning("No sample ID entered for sample search.")
+                return
+
+            try:
+                # Find sample by sample_id (which is a field, not the Firestore document ID)
+                sample_docs = db.collection("samples").where("sample_id", "==", sample_id_to_find).limit(1).get()
+                sample_doc = None
+                for doc in sample_docs: # Iterate over the results (should be at most one due to limit(1))
+                    sample_doc = doc
+                    break
+                
+                if sample_doc and sample_doc.exists:
+                    logging.info("Sample found. Displaying details.")
+                    self._display_sample_details_window(sample_doc.to_dict())
+                    form_window.destroy()
+                else:
+                    logging.info("Sample Not Found.")
+                    messagebox.showinfo("Sample Not Found", f"Sample with ID '{sample_id_to_find}' does not exist.")
+            except Exception as e:
+                logging.error(f"Error retrieving sample details for '{sample_id_to_find}': {e}", exc_info=True)
+                messagebox.showerror("Error", f"Failed to retrieve sample details: {e}")
+
+    def load_all_user_samples_from_db_with_filters(self, filters=None):
+        """
+        Loads all sample data from Firestore and populates the local DataFrame and Treeview,
+        applying filters directly. This is a non-paginated search for filtered results.
+        """
+        logging.info(f"Loading all user samples from DB with filters: {filters}")
+        view_key = ("samples", "filtered_samples", repr(sorted((filters or {}).items())))
+        if self.last_loaded_query_type == 'filtered_samples' and self.current_view_key == view_key \
+                and self._delta_refresh_sample_view():
+            # Same search as the one on screen: only samples changed since then were fetched
+            self.status_label.config(text=f"Loaded {len(self.app.data)} samples from database matching filters.")
+            return
+
+        # Reset sample pagination state when loading filtered samples
+        self.current_page_index = 0
+        self.all_samples_page_cursors = []
+        self.my_samples_page_cursors = []
+        self.batch_samples_page_cursors = []
+        self.last_loaded_query_type = 'filtered_samples'
+
+        self.tree.delete(*self.tree.get_children())
+        samples_list = []
+        try:
+            marks = self.app.delta_sync.server_marks("samples")
+            samples_ref = db.collection("samples")
+            query = samples_ref
+
+            firestore_maturation_date_filter_applied = False
+            firestore_creation_date_filter_applied = False
+
+            if filters:
+                # Apply date range filters to Firestore query if present
+                if 'start_date' in filters and 'end_date' in filters:
+                    query = query.where("maturation_date", ">=", filters['start_date'])
+                    query = query.where("maturation_date", "<=", filters['end_date'])
+                    firestore_maturation_date_filter_applied = True
+                    logging.info("Applied Firestore maturation_date range filter.")
+                elif 'creation_start_date' in filters and 'creation_end_date' in filters:
+                    query = query.where("creation_date", ">=", filters['creation_start_date'])
+                    query = query.where("creation_date", "<=", filters['creation_end_date'])
+                    firestore_creation_date_filter_applied = True
+                    logging.info("Applied Firestore creation_date range filter.")
+                
+                # Apply direct equality filter for status if present
+                if filters.get('status'):
+                    query = query.where("status", "==", filters['status'])
+                
+            samples = query.select(LIST_VIEW_FIELDS["sample_rows"]).get()
+
+            samples_list = [self._sample_snapshot_to_record(sample) for sample in samples]
+            logging.info(f"Initial fetch for filtered samples returned {len(samples_list)} results.")
+
+            df = pd.DataFrame(samples_list)
+            if filters:
+                df = self._filter_samples_dataframe(df, filters,
+                                                    maturation_applied_by_query=firestore_maturation_date_filter_applied,
+                                                    creation_applied_by_query=firestore_creation_date_filter_applied,
+                                                    status_applied_by_query=bool(filters.get('status')))
+
+            self.load_samples_to_treeview(df.to_dict('records'))
+            # Status is mutable, so delta refreshes re-check every filter locally instead of querying on it.
+            self.last_sample_filters = filters or {}
+            self._prime_sample_view(view_key, [], marks, samples_list, paginated=False)
+            
+            if not df.empty:
+                self.status_label.config(text=f"Loaded {len(self.app.data)} samples from database matching filters.")
+                logging.info(f"Finished loading filtered samples. Displaying {len(self.app.data)} samples.")
+            else:
+                self.status_label.config(text="No samples found in the database matching filters.")
+                logging.info("No samples found matching filters.")
+            
+            self.current_selected_batch_id = None
+            self.add_single_sample_button.config(state=tk.DISABLED)
+
+            # Disable pagination controls for filtered samples as it's a specific search result
+            self.prev_sample_page_btn.config(state=tk.DISABLED)
+            self.next_sample_page_btn.config(state=tk.DISABLED)
+            self.page_info_label.config(text="Page 0 of 0")
+
+
+        except Exception as e:
+            logging.error(f"Failed to load samples from database with filters: {e}", exc_info=True)
+            messagebox.showerror("Error", f"Failed to load samples from database: {e}")
+            self.status_label.config("Failed to load samples from database.")
+
+
+    def _filter_samples_dataframe(self, df, filters, maturation_applied_by_query=False, creation_applied_by_query=False,
+                                  status_applied_by_query=False):
+        """Applies the sample filters that Firestore could not apply to a DataFrame of sample records.
+        Also used by delta refreshes, where every filter is checked locally."""
+        if df.empty:
+            return df
+
+        # Apply local filters for 'similar/contains' matching and secondary date filters
+        # Filter by Sample ID (contains)
+        if filters.get('sample_id'):
+            if 'sample_id' in df.columns:
+                 df = df[df['sample_id'].astype(str).str.contains(filters['sample_id'], case=False, na=False)]
+            elif 'DisplaySampleID' in df.columns:
+                df = df[df['DisplaySampleID'].astype(str).str.contains(filters['sample_id'], case=False, na=False)]
+            logging.debug(f"Filtered by sample_id, {len(df)} remaining.")
+
+        # Filter by Batch ID (contains)
+        if filters.get('batch_id'):
+            if 'batch_id' in df.columns:
+                df = df[df['batch_id'].astype(str).str.contains(filters['batch_id'], case=False, na=False)]
+            elif 'BatchID' in df.columns:
+                df = df[df['BatchID'].astype(str).str.contains(filters['batch_id'], case=False, na=False)]
+            logging.debug(f"Filtered by batch_id, {len(df)} remaining.")
+
+        # Filter by Product Name (contains) - requires fetching batch product names
+        if filters.get('product_name'):
+            product_name_filter_val = filters['product_name'].lower()
+            valid_batch_ids = df['batch_id'].dropna().unique() if 'batch_id' in df.columns else []
+            batch_product_names = {}
+            for b_id in valid_batch_ids:
+                if b_id and b_id != 'N/A' and pd.notna(b_id):
+                    batch_doc = db.collection("batches").document(b_id).get()
+                    if batch_doc.exists:
+                        batch_product_names[b_id] = batch_doc.to_dict().get('product_name', '').lower()
+            df = df[df['batch_id'].apply(lambda x: product_name_filter_val in batch_product_names.get(x, '') if pd.notna(x) else False)]
+            logging.debug(f"Filtered by product_name, {len(df)} remaining.")
+
+        # Filter by Status (exact) if not applied by Firestore
+        if filters.get('status') and not status_applied_by_query:
+            df = df[df['status'] == filters['status']] if 'status' in df.columns else df.iloc[0:0]
+            logging.debug(f"Filtered by status, {len(df)} remaining.")
+
+        # Apply secondary date filters locally if not applied by Firestore
+        if 'start_date' in filters and 'end_date' in filters and not maturation_applied_by_query:
+            df = df[df['maturation_date'].apply(lambda x: bool(x) and filters['start_date'] <= as_naive(x))]
+            df = df[df['maturation_date'].apply(lambda x: bool(x) and as_naive(x) <= filters['end_date'])]
+            logging.debug(f"Applied local maturation_date filter, {len(df)} remaining.")
+
+        if 'creation_start_date' in filters and 'creation_end_date' in filters and not creation_applied_by_query:
+            df = df[df['creation_date'].apply(lambda x: bool(x) and filters['creation_start_date'] <= as_naive(x))]
+            df = df[df['creation_date'].apply(lambda x: bool(x) and as_naive(x) <= filters['creation_end_date'])]
+            logging.debug(f"Applied local creation_date filter, {len(df)} remaining.")
+        return df
+
+    def _display_batch_details_window(self, batch_data):
+        """Displays batch details in a new window with copyable text."""
+        logging.info(f"Displaying batch details for batch: {batch_data.get('batch_id', 'N/A')}")
+        details_window = tk.Toplevel(self.root)
+        details_window.title(f"Batch Details: {batch_data.get('batch_id', 'N/A')}")
+        details_window.geometry("500x300")
+        details_window.grab_set()
+        details_window.transient(self.root)
+        details_window.config(bg='#f0f0f0') # Set background
+
+        text_frame = ttk.Frame(details_window, padding=10, style='TFrame')
+        text_frame.pack(expand=True, fill="both")
+
+        text_widget = tk.Text(text_frame, wrap='word', font=('Consolas', 10),
+                              bg='#ffffff', bd=0, highlightthickness=0, foreground='#333333') # White background for text
+        text_widget.pack(side=tk.LEFT, expand=True, fill="both")
+
+        scrollbar = ttk.Scrollbar(text_frame, command=text_widget.yview)
+        scrollbar.pack(side=tk.RIGHT, fill='y')
+        text_widget.config(yscrollcommand=scrollbar.set)
+
+        details_str = f"Batch ID: {batch_data.get('batch_id', 'N/A')}\n"
+        details_str += f"Product Name: {batch_data.get('product_name', 'N/A')}\n"
+        details_str += f"Description: {batch_data.get('description', 'N/A')}\n"
+        
+        submission_date = batch_data.get('submission_date')
+        if submission_date is not None:
+            if hasattr(submission_date, 'to_datetime'):
+                submission_date_dt = submission_date.to_datetime()
+            elif isinstance(submission_date, datetime):
+                submission_date_dt = submission_date
+            else:
+                try:
+                    submission_date_dt = datetime.strptime(str(submission_date).split(' ')[0], "%Y-%m-%d")
+                except ValueError:
+                    submission_date_dt = None
+
+            if submission_date_dt:
+                details_str += f"Creation Date: {submission_date_dt.strftime('%Y-%m-%d %H:%M:%S')}\n"
+            else:
+                details_str += f"Creation Date: N/A\n"
+        else:
+            details_str += f"Creation Date: N/A\n"
+
+        details_str += f"Submitted By (Employee ID): {batch_data.get('user_employee_id', 'N/A')}\n"
+        details_str += f"Submitted By (Username): {batch_data.get('user_username', 'N/A')}\n"
+        details_str += f"Status: {batch_data.get('status', 'N/A')}\n"
+        details_str += f"Number of Samples: {batch_data.get('number_of_samples', 0)}\n"
+
+        text_widget.insert(tk.END, details_str)
+        text_widget.config(state='normal') # Allow selection and copying
+
+        ttk.Button(details_window, text="Close", command=details_window.destroy, style='Secondary.TButton').pack(pady=10)
+        details_window.protocol("WM_DELETE_WINDOW", details_window.destroy)
+        logging.info(f"Batch details window displayed for {batch_data.get('batch_id', 'N/A')}.")
+
+    def _display_sample_details_window(self, sample_data):
+        """Displays sample details in a new window with copyable text."""
+        logging.info(f"Displaying sample details for sample: {sample_data.get('sample_id', 'N/A')}")
+        details_window = tk.Toplevel(self.root)
+        details_window.title(f"Sample Details: {sample_data.get('sample_id', 'N/A')}")
+        details_window.geometry("500x350")
+        details_window.grab_set()
+        details_window.transient(self.root)
+        details_window.config(bg='#f0f0f0') # Set background
+
+        text_frame = ttk.Frame(details_window, padding=10, style='TFrame')
+        text_frame.pack(expand=True, fill="both")
+
+        text_widget = tk.Text(text_frame, wrap='word', font=('Consolas', 10),
+                              bg='#ffffff', bd=0, highlightthickness=0, foreground='#333333') # White background for text
+        text_widget.pack(side=tk.LEFT, expand=True, fill="both")
+
+        scrollbar = ttk.Scrollbar(text_frame, command=text_widget.yview)
+        scrollbar.pack(side=tk.RIGHT, fill='y')
+        text_widget.config(yscrollcommand=scrollbar.set)
+
+        details_str = f"Sample ID: {sample_data.get('sample_id', 'N/A')}\n"
+        details_str += f"Owner: {sample_data.get('owner', 'N/A')}\n"
+        details_str += f"Status: {sample_data.get('status', 'N/A')}\n"
+        details_str += f"Batch ID: {sample_data.get('batch_id', 'N/A')}\n"
+        details_str += f"Submitted By (Employee ID): {sample_data.get('submitted_by_employee_id', 'N/A')}\n"
+        
+        # Format Maturation Date
+        maturation_date = sample_data.get('maturation_date')
+        if maturation_date is not None:
+            if hasattr(maturation_date, 'to_datetime'):
+                maturation_date_dt = maturation_date.to_datetime()
+            elif isinstance(maturation_date, datetime):
+                maturation_date_dt = maturation_date
+            else:
+                try:
+                    maturation_date_dt = datetime.strptime(str(maturation_date).split(' ')[0], "%Y-%m-%d")
+                except ValueError:
+                    maturation_date_dt = None
+            if maturation_date_dt:
+                details_str += f"Maturation Date: {maturation_date_dt.strftime('%Y-%m-%d')}\n"
+            else:
+                details_str += f"Maturation Date: N/A\n"
+        else:
+            details_str += f"Maturation Date: N/A\n"
+
+        # Format Creation Date
+        creation_date = sample_data.get('creation_date')
+        if creation_date is not None:
+            if hasattr(creation_date, 'to_datetime'):
+                creation_date_dt = creation_date.to_datetime()
+            elif isinstance(creation_date, datetime):
+                creation_date_dt = creation_date
+            else:
+                try:
+                    creation_date_dt = datetime.strptime(str(creation_date).split(' ')[0], "%Y-%m-%d")
+                except ValueError:
+                    creation_date_dt = None
+            if creation_date_dt:
+                details_str += f"Creation Date: {creation_date_dt.strftime('%Y-%m-%d %H:%M:%S')}\n"
+            else:
+                details_str += f"Creation Date: N/A\n"
+        else:
+            details_str += f"Creation Date: N/A\n"
+
+        # Format Last Updated By and Timestamp
+        last_updated_by = sample_data.get('last_updated_by_user_id', 'N/A')
+        last_updated_timestamp = sample_data.get('last_updated_timestamp')
+        
+        details_str += f"Last Updated By: {last_updated_by}\n"
+        if last_updated_timestamp is not None:
+            if hasattr(last_updated_timestamp, 'to_datetime'):
+                last_updated_timestamp_dt = last_updated_timestamp.to_datetime()
+            elif isinstance(last_updated_timestamp, datetime):
+                last_updated_timestamp_dt = last_updated_timestamp
+            else:
+                try:
+                    last_updated_timestamp_dt = datetime.strptime(str(last_updated_timestamp).split(' ')[0], "%Y-%m-%d %H:%M:%S.%f")
+                except ValueError:
+                    last_updated_timestamp_dt = None
+            if last_updated_timestamp_dt:
+                details_str += f"Last Updated On: {last_updated_timestamp_dt.strftime('%Y-%m-%d %H:%M:%S')}\n"
+            else:
+                details_str += f"Last Updated On: N/A\n"
+        else:
+            details_str += f"Last Updated On: N/A\n"
+
+        text_widget.insert(tk.END, details_str)
+        text_widget.config(state='normal') # Allow selection and copying
+
+        ttk.Button(details_window, text="Close", command=details_window.destroy, style='Secondary.TButton').pack(pady=10)
+        details_window.protocol("WM_DELETE_WINDOW", details_window.destroy)
+        logging.info(f"Sample details window displayed for {sample_data.get('sample_id', 'N/A')}.")
+
+
+    def clear_filters(self, form_window):
+        """Clears all filter fields and reloads all samples."""
+        logging.info("Clear Filters called.")
+        if self.filter_mode.get() == "samples":
+            # Set checkbox variables to False, which will trigger the _toggle functions to hide/clear entries
+            self.filter_maturation_date_var.set(False)
+            self.filter_creation_date_var.set(False)
+            # Ensure entries are cleared immediately by calling toggle functions first
+            self._toggle_maturation_filter_state()
+            self._toggle_creation_filter_state()
+
+            # Clear the actual entry widgets if they exist
+            if self.filter_sample_id_entry:
+                self.filter_sample_id_entry.delete(0, tk.END)
+            if self.filter_batch_id_entry:
+                self.filter_batch_id_entry.delete(0, tk.END)
+            if self.filter_product_name_entry:
+                self.filter_product_name_entry.delete(0, tk.END)
+            if self.filter_status_combobox:
+                self.filter_status_combobox.set("")
+            logging.info("Sample filters cleared.")
+        elif self.filter_mode.get() == "batch_search" and self.find_batch_id_entry:
+            self.find_batch_id_entry.delete(0, tk.END)
+            logging.info("Batch search filter cleared.")
+        elif self.filter_mode.get() == "sample_search" and self.find_sample_id_entry: # Clear sample search field
+            self.find_sample_id_entry.delete(0, tk.END)
+            logging.info("Sample search filter cleared.")
+
+
+        # Always reload all samples (paginated) and reset all pagination states after clearing filters
+        self.load_samples_paginated(query_type='all_samples', reset=True)
+        form_window.destroy()
+        logging.info("Filters cleared and all samples reloaded.")